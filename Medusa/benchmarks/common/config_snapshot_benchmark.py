@@ -0,0 +1,104 @@
+"""
+Import time of the modules which read the config at import (TimeoutManager class attributes, client_config, step
+modules), with ConfigManager.get_config() returning a pickle deep copy per call, as it did before, against the shared
+frozen config. Each mode runs in a fresh interpreter, like a pytest collection run, and modules which cannot be
+imported in the current environment are skipped.
+
+Run from the Medusa folder:
+    python -m benchmarks.common.config_snapshot_benchmark --repeat 5
+"""
+
+import argparse
+import json
+import pickle
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_TIME_MODULES = [
+    "utils.timeout_manager",
+    "lib.platform.aws_boto3.client_config",
+    "lib.platform.aws_boto3.s3_bucket_usage",
+    "tests.steps.aws_protection.cloud_account_manager.kafka_steps",
+    "tests.steps.aws_protection.inventory_manager.kafka_steps",
+    "tests.steps.aws_protection.backup_steps",
+    "tests.steps.aws_protection.protection_job_steps",
+]
+
+
+def _child(mode, modules):
+    from lib.common.config.config_manager import ConfigManager
+
+    shared_get_config = ConfigManager.get_config.__func__
+    calls = 0
+    seconds = 0.0
+
+    def get_config(cls):
+        nonlocal calls, seconds
+        start = time.perf_counter()
+        config = shared_get_config(cls)
+        if mode == "copy":
+            config = pickle.loads(pickle.dumps(config))
+        calls += 1
+        seconds += time.perf_counter() - start
+        return config
+
+    ConfigManager.get_config = classmethod(get_config)
+    # Parse the INI files before the timing, both modes parse them once
+    ConfigManager.get_config()
+    calls, seconds = 0, 0.0
+
+    imported, skipped = [], []
+    start = time.perf_counter()
+    for module in modules:
+        try:
+            __import__(module)
+            imported.append(module)
+        except Exception as e:
+            skipped.append(f"{module} ({type(e).__name__}: {e})")
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {"import_s": elapsed, "calls": calls, "get_config_s": seconds, "imported": imported, "skipped": skipped}
+        )
+    )
+
+
+def _run(mode, modules):
+    output = subprocess.run(
+        [sys.executable, "-m", __spec__.name, "--child", mode, "--modules", *modules],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_config() deep copies against the shared frozen config")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per mode")
+    parser.add_argument("--modules", nargs="+", default=IMPORT_TIME_MODULES)
+    parser.add_argument("--child", choices=["copy", "shared"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.modules)
+        return
+
+    results = {mode: [_run(mode, args.modules) for _ in range(args.repeat)] for mode in ("copy", "shared")}
+    first = results["shared"][0]
+    print(f"Imported: {', '.join(first['imported'])}")
+    for skipped in first["skipped"]:
+        print(f"Skipped: {skipped}")
+    print(f"{'':<10}{'get_config calls':>18}{'in get_config (ms)':>20}{'import (ms)':>14}")
+    for mode, runs in results.items():
+        print(
+            f"{mode:<10}{runs[0]['calls']:>18}"
+            f"{statistics.median(run['get_config_s'] for run in runs) * 1000:>20.1f}"
+            f"{statistics.median(run['import_s'] for run in runs) * 1000:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
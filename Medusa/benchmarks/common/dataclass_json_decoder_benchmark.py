@@ -0,0 +1,170 @@
+"""
+from_json time of list responses, decoded by dataclasses_json (introspection of the model on every call) against the
+compiled decoders of lib.common.dataclass_json_decoder. The payloads are generated from the type hints of the models,
+with the camelCase keys of the API, every list field holding --nested entries, and --items entries in "items".
+Each payload is decoded both ways first and the results compared.
+
+--verify-all decodes a generated payload of every @dataclass_json model under lib both ways and compares them.
+
+Run from the Medusa folder:
+    python -m benchmarks.common.dataclass_json_decoder_benchmark --items 10 1000 --repeat 5
+"""
+
+import argparse
+import importlib
+import json
+import pkgutil
+import statistics
+import time
+import warnings
+from dataclasses import MISSING, fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Union, get_type_hints
+
+from dataclasses_json import core
+
+import lib
+from lib.common import dataclass_json_decoder
+
+SUITES = {
+    "tasks": ("lib.dscc.tasks.payload.task", "TaskList"),
+    "ec2 instances": (
+        "lib.dscc.backup_recovery.aws_protection.ec2.models.csp_machine_instance.csp_instance_v1beta1",
+        "CSPMachineInstanceList",
+    ),
+    "ebs volumes": ("lib.dscc.backup_recovery.aws_protection.ebs.models.csp_volume_v1beta1", "CSPVolumeList"),
+    "secrets": ("lib.dscc.secret_manager.models.secrets_v1", "SecretList"),
+}
+
+
+def sample_value(type_, nested, depth=0, name=""):
+    """JSON value of the type, as the API would send it"""
+    origin = getattr(type_, "__origin__", None)
+    args = getattr(type_, "__args__", ())
+    if is_dataclass(type_):
+        return sample_payload(type_, nested, depth + 1)
+    if origin is Union:
+        return sample_value(args[0], nested, depth, name)
+    if origin in (list, set, tuple):
+        return [sample_value(args[0] if args else str, nested, depth) for _ in range(nested)] if depth < 6 else []
+    if origin is dict:
+        return {"key": sample_value(args[1] if args else str, nested, depth)}
+    if isinstance(type_, type) and issubclass(type_, Enum):
+        return next(iter(type_)).value
+    if type_ in (bool, int, float):
+        return type_(1)
+    if type_ is datetime:
+        return 1700000000.5
+    if name.lower().endswith(("at", "time", "timestamp")):
+        return "2024-01-01T00:00:00Z"
+    return "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+def sample_payload(cls, nested=2, depth=0):
+    overrides = core._user_overrides_or_exts(cls)
+    types = get_type_hints(cls)
+    payload = {}
+    for field in fields(cls):
+        if not field.init or (depth > 6 and (field.default is not MISSING or field.default_factory is not MISSING)):
+            continue
+        letter_case = overrides[field.name].letter_case
+        key = letter_case(field.name) if letter_case else field.name
+        payload[key] = sample_value(types.get(field.name, Any), nested, depth, field.name)
+    return payload
+
+
+def _decode_both(cls, payload_json):
+    dataclass_json_decoder.uninstall()
+    try:
+        expected = cls.from_json(payload_json)
+    finally:
+        dataclass_json_decoder.install()
+    return expected, cls.from_json(payload_json)
+
+
+def _time(cls, payload_json, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cls.from_json(payload_json)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds) * 1000
+
+
+def verify_all():
+    """Compiled against dataclasses_json decoding of a payload of every model under lib"""
+    compared, failed = 0, []
+    for module_info in pkgutil.walk_packages(lib.__path__, "lib."):
+        try:
+            module = importlib.import_module(module_info.name)
+        except Exception:
+            continue
+        for cls in vars(module).values():
+            if not (isinstance(cls, type) and is_dataclass(cls) and hasattr(cls, "from_json")):
+                continue
+            if cls.__module__ != module.__name__:
+                continue
+            try:
+                payload_json = json.dumps(sample_payload(cls))
+                dataclass_json_decoder.uninstall()
+                try:
+                    expected = cls.from_json(payload_json)
+                finally:
+                    dataclass_json_decoder.install()
+            except Exception as e:
+                expected = e
+            try:
+                decoded = cls.from_json(payload_json)
+            except Exception as e:
+                decoded = e
+            compared += 1
+            if isinstance(expected, Exception) or isinstance(decoded, Exception):
+                same = type(expected) is type(decoded) and str(expected) == str(decoded)
+            else:
+                same = expected == decoded
+            if not same:
+                failed.append(f"{cls.__module__}.{cls.__name__}: {expected!r:.200} != {decoded!r:.200}")
+    print(f"{compared} models compared, {len(failed)} different")
+    for failure in failed:
+        print(failure)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dataclasses_json from_json against the compiled decoders")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--nested", type=int, default=2, help="entries of the list fields of each item")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--verify-all", action="store_true")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", RuntimeWarning)
+    if args.verify_all:
+        verify_all()
+        return
+
+    print(f"{'model':<16}{'items':>8}{'payload KB':>12}{'dataclasses_json':>18}{'compiled':>12}{'speedup':>9}   (ms)")
+    for suite, (module_name, class_name) in SUITES.items():
+        cls = getattr(importlib.import_module(module_name), class_name)
+        item_type = get_type_hints(cls)["items"].__args__[0]
+        for items in args.items:
+            payload = sample_payload(cls, args.nested)
+            payload["items"] = [sample_payload(item_type, args.nested) for _ in range(items)]
+            payload_json = json.dumps(payload)
+            expected, decoded = _decode_both(cls, payload_json)
+            assert expected == decoded, f"{class_name} decoded differently"
+
+            dataclass_json_decoder.uninstall()
+            try:
+                library_ms = _time(cls, payload_json, args.repeat)
+            finally:
+                dataclass_json_decoder.install()
+            compiled_ms = _time(cls, payload_json, args.repeat)
+            print(
+                f"{suite:<16}{items:>8}{len(payload_json) / 1024:>12.0f}{library_ms:>18.2f}{compiled_ms:>12.2f}"
+                f"{library_ms / compiled_ms:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
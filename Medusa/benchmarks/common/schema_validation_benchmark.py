@@ -0,0 +1,71 @@
+"""
+Per response validation time of assert_valid_schema as it was (schema file read and parsed, meta-schema checked and
+validator built on every call, by jsonschema.validate) against the schema registry, for the list schemas of schemas/
+with a response of --items entries made from the example of the schema. The registry is timed with every entry of
+"items" validated, with a sample of them, and with all of them in chunks on the process pool.
+
+Run from the Medusa folder:
+    python -m benchmarks.common.schema_validation_benchmark --items 10 1000 10000 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import jsonschema
+
+from utils import schema_validator
+from utils.schema_validator import SCHEMAS_DIR, ItemsMode, assert_valid_schema, schema_registry
+
+SCHEMA = "atlantia/inventory_manager/get_machine_instances.json"
+
+
+def _validate_uncached(data, schema_file):
+    with open(SCHEMAS_DIR / schema_file) as file:
+        schema = json.loads(file.read())
+    return jsonschema.validate(data, schema)
+
+
+def _response(schema_file, items):
+    with open(SCHEMAS_DIR / schema_file) as file:
+        example = json.load(file)["examples"][0]
+    return {**example, "items": example["items"][:1] * items, "total": items, "pageLimit": items}
+
+
+def _time(validate, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        validate()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="jsonschema.validate per response against the schema registry")
+    parser.add_argument("--schema", default=SCHEMA, help="list schema with an example, path under schemas/")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    schema_registry.validator(args.schema)
+    print(f"Registry load and first compile: {(time.perf_counter() - start) * 1000:.1f} ms")
+    # Start the process pool outside of the timings
+    assert_valid_schema(_response(args.schema, schema_validator.ITEMS_CHUNK_SIZE + 1), args.schema, ItemsMode.CHUNKS)
+
+    modes = {
+        "jsonschema.validate": lambda data: _validate_uncached(data, args.schema),
+        "registry full": lambda data: assert_valid_schema(data, args.schema),
+        "registry sample": lambda data: assert_valid_schema(data, args.schema, ItemsMode.SAMPLE),
+        "registry chunks": lambda data: assert_valid_schema(data, args.schema, ItemsMode.CHUNKS),
+    }
+    print(f"{'items':>8}" + "".join(f"{mode:>22}" for mode in modes) + "   (ms per response)")
+    for items in args.items:
+        data = _response(args.schema, items)
+        print(f"{items:>8}" + "".join(f"{_time(lambda: mode(data), args.repeat):>22.2f}" for mode in modes.values()))
+
+
+if __name__ == "__main__":
+    main()
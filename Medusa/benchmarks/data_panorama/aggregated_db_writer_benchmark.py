@@ -0,0 +1,124 @@
+"""
+Benchmarks the aggregated DB load: DataFrame.to_sql() against the chunked AggregatedDBWriter, and the latency of
+the volusage_all_collection / volperf_all_collection lookups the mock consumption APIs do, with and without the
+indexes the writer creates. Also checks that an incremental append run gives the same rows as a full rebuild.
+
+Run from the Medusa folder:
+    python -m benchmarks.data_panorama.aggregated_db_writer_benchmark --collections 24 --arrays 2 --volumes 2000
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import sqlalchemy
+
+from benchmarks.data_panorama.synthetic_collection import write_collections
+from lib.dscc.data_panorama.data_collector.db_writer.dataporter import (
+    StorageTables,
+    create_tables_from_collection,
+)
+from lib.dscc.data_panorama.data_collector.db_writer.sqlite_writer import AggregatedDBWriter
+
+ALL_COLLECTION_TABLES = {
+    "volusage_all_collection": "volusage_table",
+    "volperf_all_collection": "volume_performance_table",
+}
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _load_to_sql(tables, db_file):
+    engine = sqlalchemy.create_engine(f"sqlite:///{db_file}")
+    for db_table, dataframe in tables.items():
+        dataframe.to_sql(db_table, engine, if_exists="replace", index=False)
+    engine.dispose()
+
+
+def _load_writer(tables, db_file, chunk_size):
+    with AggregatedDBWriter(db_file, chunk_size=chunk_size) as writer:
+        for db_table, dataframe in tables.items():
+            writer.write_table(dataframe, db_table)
+
+
+def _query_latency(db_file, db_table, column, keys, repeat):
+    conn = sqlite3.connect(db_file)
+    query = f'SELECT * FROM {db_table} WHERE "{column}" = ?'
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for key in keys:
+            conn.execute(query, (key,)).fetchall()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed / (repeat * len(keys)) * 1000
+
+
+def _bench_load_and_queries(mock_dir, chunk_size, repeat):
+    table = StorageTables()
+    table.create_table_from_multiple_collection(mock_dir)
+    tables = {db_table: table.export_table(name) for db_table, name in ALL_COLLECTION_TABLES.items()}
+    rows = sum(len(dataframe) for dataframe in tables.values())
+
+    to_sql_db = os.path.join(mock_dir, "to_sql.sqlite")
+    writer_db = os.path.join(mock_dir, "writer.sqlite")
+    _, to_sql_time = _timed(_load_to_sql, tables, to_sql_db)
+    _, writer_time = _timed(_load_writer, tables, writer_db, chunk_size)
+    print(f"Load of {rows} rows: to_sql {to_sql_time:.2f} s, AggregatedDBWriter {writer_time:.2f} s")
+
+    print(f"{'table':<26}{'column':<14}{'to_sql (ms)':>12}{'writer (ms)':>13}")
+    for db_table, dataframe in tables.items():
+        for column in ("arrid", "id", "collectionId"):
+            if column not in dataframe:
+                continue
+            keys = dataframe[column].drop_duplicates().head(20).tolist()
+            baseline = _query_latency(to_sql_db, db_table, column, keys, repeat)
+            indexed = _query_latency(writer_db, db_table, column, keys, repeat)
+            print(f"{db_table:<26}{column:<14}{baseline:>12.3f}{indexed:>13.3f}")
+
+
+def _check_append(mock_dir, collection_dirs):
+    full_db = os.path.join(mock_dir, "full.sqlite")
+    append_db = os.path.join(mock_dir, "append.sqlite")
+    create_tables_from_collection(mock_dir, full_db)
+
+    # First build with all but the last collection, then append the last one
+    last_dir = collection_dirs[-1]
+    held_back = shutil.move(last_dir, tempfile.mkdtemp())
+    create_tables_from_collection(mock_dir, append_db)
+    shutil.move(held_back, last_dir)
+    _, append_time = _timed(create_tables_from_collection, mock_dir, append_db, 1, True)
+
+    full = sqlite3.connect(full_db)
+    appended = sqlite3.connect(append_db)
+    for db_table in ALL_COLLECTION_TABLES:
+        query = f"SELECT * FROM {db_table}"
+        assert sorted(map(repr, full.execute(query))) == sorted(map(repr, appended.execute(query))), db_table
+    print(f"Append of the last collection: {append_time:.2f} s, rows match the full rebuild")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="to_sql vs chunked AggregatedDBWriter")
+    parser.add_argument("--collections", type=int, default=24)
+    parser.add_argument("--arrays", type=int, default=2)
+    parser.add_argument("--volumes", type=int, default=2000, help="volumes per array")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as mock_dir:
+        files = write_collections(mock_dir, args.collections, args.arrays, args.volumes)
+        collection_dirs = sorted({os.path.dirname(file) for file in files})
+        print(f"Synthetic collections: {args.collections} x {args.arrays} arrays x {args.volumes} volumes")
+        _bench_load_and_queries(mock_dir, args.chunk_size, args.repeat)
+        _check_append(mock_dir, collection_dirs)
+
+
+if __name__ == "__main__":
+    main()
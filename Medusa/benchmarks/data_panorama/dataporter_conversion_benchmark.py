@@ -0,0 +1,128 @@
+"""
+Benchmarks the vectorized size/flag conversions of db_writer.column_conversion against the per element
+Series.apply() helpers StorageTables used before, over a synthetic multi-array collection, and checks that
+the exported values are identical.
+
+Run from the Medusa folder:
+    python -m benchmarks.data_panorama.dataporter_conversion_benchmark --arrays 4 --volumes 25000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.data_panorama.synthetic_collection import write_collections
+from lib.dscc.data_panorama.data_collector.db_writer import column_conversion
+from lib.dscc.data_panorama.data_collector.db_writer.dataporter import StorageTables
+
+
+# Reference copies of the per element helpers StorageTables used before column_conversion
+def _legacy_convert_to_bytes(size_mb):
+    size_bytes = size_mb * 1024**2
+    return np.format_float_positional(size_bytes, trim="-")
+
+
+def _legacy_convert_to_mb(size_bytes):
+    size_mb = round(int(size_bytes) / 1024**2)
+    return np.format_float_positional(size_mb, trim="-")
+
+
+def _legacy_get_provision_type(thin_provision):
+    return "thin" if thin_provision == True else "thick"  # noqa: E712
+
+
+def _legacy_get_snap_type(is_unmanaged):
+    return "periodic" if is_unmanaged else "adhoc"
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _raw_columns(dt1_file, dt2_file):
+    with open(dt1_file) as f:
+        dt1 = json.load(f)
+    with open(dt2_file) as f:
+        dt2 = json.load(f)
+    dt1_volumes = pd.json_normalize([v for vols in dt1["Volumes"].values() for v in vols], max_level=2)
+    dt2_volumes = pd.json_normalize([v for vols in dt2["Volumes"].values() for v in vols], max_level=2)
+    dt1_snaps = pd.json_normalize([s for snaps in dt1["Snapshots"].values() for s in snaps], max_level=2)
+    dt2_snaps = pd.json_normalize([s for snaps in dt2["Snapshots"].values() for s in snaps], max_level=2)
+    return {
+        "mib_to_bytes": [dt1_volumes["sizeMiB"], dt1_volumes["usedSizeMiB"], dt1_snaps["sizeMiB"]],
+        "bytes_to_mib": [dt2_volumes["size"], dt2_volumes["total_usage_bytes"], dt2_snaps["size"]],
+        "provision_type": [dt1_volumes["thinProvisioned"], dt2_volumes["thinly_provisioned"]],
+        "snap_type": [dt2_snaps["is_unmanaged"]],
+    }
+
+
+def _bench_conversions(columns):
+    legacy = {
+        "mib_to_bytes": _legacy_convert_to_bytes,
+        "bytes_to_mib": _legacy_convert_to_mb,
+        "provision_type": _legacy_get_provision_type,
+        "snap_type": _legacy_get_snap_type,
+    }
+    formatted = {"mib_to_bytes", "bytes_to_mib"}
+    print(f"{'conversion':<16}{'rows':>10}{'apply (s)':>12}{'vectorized (s)':>16}{'speedup':>10}  equal")
+    for name, series_list in columns.items():
+        converter = getattr(column_conversion, name)
+        for series in series_list:
+            expected, legacy_time = _timed(series.apply, legacy[name])
+            if name in formatted:
+                actual, new_time = _timed(lambda s: column_conversion.format_size_column(converter(s)), series)
+            else:
+                actual, new_time = _timed(converter, series)
+            equal = expected.tolist() == actual.tolist()
+            speedup = legacy_time / new_time
+            print(f"{name:<16}{len(series):>10}{legacy_time:>12.3f}{new_time:>16.3f}{speedup:>9.1f}x  {equal}")
+            assert equal, f"{name} output differs from the Series.apply() reference"
+
+
+def _bench_tables(dt1_file, dt2_file):
+    table = StorageTables()
+
+    def _build():
+        for mock_file in (dt1_file, dt2_file):
+            table.create_tables_from_latest_collection(mock_file)
+            table.create_volusage_perf_tables(mock_file)
+
+    _, elapsed = _timed(_build)
+    _, export_elapsed = _timed(lambda: [table.export_table(name) for name in vars(table) if name.endswith("_table")])
+    print(f"StorageTables build: {elapsed:.2f} s, export formatting: {export_elapsed:.2f} s")
+
+    # dt1 rows carry formatted bytes, dt2 rows keep their raw bytes
+    volume_table = table.export_table("volume_table")
+    dt1_rows = volume_table["devicetype"] == "deviceType1"
+    with open(dt1_file) as f:
+        dt1 = json.load(f)
+    dt1_sizes = [v["sizeMiB"] for vols in dt1["Volumes"].values() for v in vols]
+    assert volume_table.loc[dt1_rows, "volsize"].tolist() == [_legacy_convert_to_bytes(s) for s in dt1_sizes]
+    assert volume_table.loc[~dt1_rows, "volsize"].tolist() == table.volume_table.loc[~dt1_rows, "volsize"].tolist()
+    print("volume_table export matches the legacy formatting")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs Series.apply column conversions")
+    parser.add_argument("--arrays", type=int, default=4)
+    parser.add_argument("--volumes", type=int, default=25000, help="volumes per array")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as mock_dir:
+        dt1_file, dt2_file = write_collections(mock_dir, collections=1, arrays=args.arrays, volumes=args.volumes)
+        print(f"Synthetic collection: {args.arrays} arrays x {args.volumes} volumes per device type in {mock_dir}")
+        _bench_conversions(_raw_columns(dt1_file, dt2_file))
+        _bench_tables(dt1_file, dt2_file)
+        os.remove(dt1_file)
+        os.remove(dt2_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Synthetic data collector output (same layout as dt1_collector / dt2_collector write) for the data_panorama benchmarks.
+"""
+
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+BYTES_IN_MIB = 1024**2
+
+
+def _dt1_collection(rng: random.Random, collection_time: datetime, customer_id: str, arrays: int, volumes: int):
+    system_id = "4ENC4AB8OC"
+    all_volumes = {}
+    all_snapshots = {}
+    all_applicationsets = {}
+    all_volume_performance = []
+    for array_index in range(arrays):
+        array_id = f"{system_id}{array_index}"
+        volume_list = []
+        for volume_index in range(volumes):
+            volume_id = f"{array_id}-vol-{volume_index}"
+            size_mib = rng.randint(1024, 4 * 1024**2)
+            volume_list.append(
+                {
+                    "id": volume_id,
+                    "volumeId": volume_index,
+                    "name": f"pqa-dt1-vol-{volume_index}",
+                    "sizeMiB": size_mib,
+                    "usedSizeMiB": rng.randint(0, size_mib),
+                    "thinProvisioned": rng.random() < 0.8,
+                    "creationTime": {"ms": int(collection_time.timestamp() * 1000) - rng.randint(0, 10**10)},
+                    "policy": {"system": False},
+                }
+            )
+            all_snapshots[volume_id] = [
+                {
+                    "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+                    "name": f"pqa-dt1-vol-{volume_index}-snap-0",
+                    "sizeMiB": rng.randint(0, size_mib) + rng.choice([0, 0.5, 0.25]),
+                    "creationTime": {"Ms": int(collection_time.timestamp() * 1000) - rng.randint(0, 10**9)},
+                }
+            ]
+            all_volume_performance.append(
+                {"volumeId": volume_id, "iops": {"total": {"avgOf1day": rng.random() * 1000}}}
+            )
+        all_volumes[array_id] = volume_list
+        all_applicationsets[array_id] = [
+            {
+                "appSetName": f"appset-{app_index}",
+                "appSetType": "Oracle",
+                "appSetId": f"{array_id}-appset-{app_index}",
+                "members": [volume["id"] for volume in volume_list[app_index::10]],
+            }
+            for app_index in range(10)
+        ]
+
+    return {
+        "DeviceType": "deviceType1",
+        "Systems": [{"id": system_id, "name": f"system_{system_id}"}],
+        "SystemCapacity": [
+            {
+                "id": system_id,
+                "systemid": system_id,
+                "capacitySummary": {"allocated": {"total": rng.randint(10**6, 10**7)}, "total": 10**8},
+                "capacityByTier": {"usableCapacity": 10**8, "totalUsed": rng.randint(10**6, 10**7)},
+            }
+        ],
+        "Volumes": all_volumes,
+        "Snapshots": all_snapshots,
+        "VolumePerformance": all_volume_performance,
+        "Applicationsets": all_applicationsets,
+    }
+
+
+def _dt2_collection(rng: random.Random, collection_time: datetime, customer_id: str, arrays: int, volumes: int):
+    system_id = "093a28a53987d127d7000000000000000000000001"
+    all_volumes = {}
+    all_snapshots = {}
+    all_volume_performance = []
+    array_items = []
+    for array_index in range(arrays):
+        array_id = f"{system_id[:-2]}{array_index:02d}"
+        array_items.append(
+            {
+                "id": array_id,
+                "name": f"array-{array_index}",
+                "usage": rng.randint(10**12, 10**13),
+                "usable_capacity_bytes": 10**14,
+            }
+        )
+        volume_list = []
+        for volume_index in range(volumes):
+            volume_id = f"{array_id}-vol-{volume_index}"
+            is_clone = volume_index % 20 == 19
+            size = rng.randint(1, 4096) * BYTES_IN_MIB + rng.randint(0, BYTES_IN_MIB)
+            volume_list.append(
+                {
+                    "id": volume_id,
+                    "name": f"pqa-dt2-vol-{volume_index}",
+                    "clone": is_clone,
+                    "size": size,
+                    "total_usage_bytes": rng.randint(0, size),
+                    "vol_usage_compressed_bytes": rng.randint(0, size),
+                    "thinly_provisioned": rng.random() < 0.8,
+                    "dedupe_enabled": rng.random() < 0.5,
+                    "creation_time": int(collection_time.timestamp()) - rng.randint(0, 10**7),
+                    "num_snaps": 1,
+                    "parent_vol_name": f"pqa-dt2-vol-{volume_index - 1}" if is_clone else "",
+                    "parent_vol_id": f"{array_id}-vol-{volume_index - 1}" if is_clone else "",
+                    "base_snap_name": "",
+                    "base_snap_id": "",
+                    "perfpolicy_id": f"perfpolicy-{volume_index % 5}" if volume_index % 3 else "",
+                    "perfpolicy_name": f"Oracle-{volume_index % 5}" if volume_index % 3 else "",
+                }
+            )
+            all_snapshots[volume_id] = [
+                {
+                    "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+                    "name": f"pqa-dt2-vol-{volume_index}-snap-0",
+                    "size": rng.randint(0, size),
+                    "is_unmanaged": rng.random() < 0.5,
+                    "creation_time": int(collection_time.timestamp()) - rng.randint(0, 10**6),
+                    "expiry_time": int(collection_time.timestamp()) + rng.randint(0, 10**6),
+                }
+            ]
+            all_volume_performance.append({"volumeId": volume_id, "iops": {"total": {"avg_1day": rng.random() * 1000}}})
+        all_volumes[array_id] = volume_list
+
+    return {
+        "DeviceType": "deviceType2",
+        "Systems": [
+            {
+                "id": system_id,
+                "name": "group-pqa-dt2",
+                "dedupe_ratio": 1.5,
+                "usage": sum(item["usage"] for item in array_items),
+                "usable_capacity_bytes": sum(item["usable_capacity_bytes"] for item in array_items),
+                "arrays": {"items": array_items},
+            }
+        ],
+        "Volumes": all_volumes,
+        "Snapshots": all_snapshots,
+        "VolumePerformance": all_volume_performance,
+    }
+
+
+def generate_collection(device_type: str, collection_time: datetime, arrays: int, volumes: int, seed: int = 0) -> dict:
+    """Returns one synthetic collection of the given device type with arrays x volumes volumes"""
+    rng = random.Random(seed)
+    customer_id = "03bf4f5020022edecad3a7642bfb5391"
+    generator = _dt1_collection if device_type == "deviceType1" else _dt2_collection
+    collection = generator(rng, collection_time, customer_id, arrays, volumes)
+    collection.update(
+        {
+            "Version": "1.0",
+            "PlatformCustomerID": customer_id,
+            "CollectionID": uuid.UUID(int=rng.getrandbits(128)).hex,
+            "CollectionTrigger": "Planned",
+            "CollectionStartTime": collection_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "CollectionEndTime": (collection_time + timedelta(minutes=5)).strftime("%Y-%m-%d %H:%M:%S"),
+            "HaulerType": "Fleet",
+            "CollectionType": "Inventory",
+        }
+    )
+    return collection
+
+
+def write_collections(mock_dir: str, collections: int, arrays: int, volumes: int) -> list:
+    """Writes hourly dt1 and dt2 collections under mock_dir/<timestamp>/ and returns the written file paths"""
+    start = datetime(2023, 1, 1)
+    files = []
+    for index in range(collections):
+        collection_time = start + timedelta(hours=index)
+        out_path = os.path.join(mock_dir, collection_time.strftime("%Y%m%d%H%M%S"))
+        os.makedirs(out_path, exist_ok=True)
+        for device_type, file_name in (
+            ("deviceType1", "dt1_collection-1.json"),
+            ("deviceType2", "dt2_collection-1.json"),
+        ):
+            collection = generate_collection(device_type, collection_time, arrays, volumes, seed=index)
+            file_path = os.path.join(out_path, file_name)
+            with open(file_path, "w") as f:
+                json.dump(collection, f)
+            files.append(file_path)
+    return files
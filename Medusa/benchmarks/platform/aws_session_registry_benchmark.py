@@ -0,0 +1,152 @@
+"""
+Client constructions and STS AssumeRole calls per test, for the AWS factory without a session cache (one assumed role
+session per AWS object, a new boto3 client / resource on every manager property access) against the session registry.
+
+Each simulated test creates an AWS object with a role ARN, like the test context does, and runs steps calling
+aws.ec2 / aws.s3 / aws.ssm / aws.rds in a loop on a few threads. The HTTP layer is replaced by a stand-in answering
+every AWS API call locally, so the numbers are the client side costs only: on AWS each STS call adds a round-trip.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.aws_session_registry_benchmark --tests 20 --steps 25 --threads 4
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import boto3
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+from lib.platform.aws_boto3 import aws_session_manager
+from lib.platform.aws_boto3.aws_factory import AWS
+
+ROLE_ARN = "arn:aws:iam::123456789012:role/benchmark"
+REGION = "us-west-2"
+
+_ASSUME_ROLE_RESPONSE = """<AssumeRoleResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+<AssumeRoleResult><Credentials><AccessKeyId>ASIABENCHMARK</AccessKeyId><SecretAccessKey>secret</SecretAccessKey>
+<SessionToken>token</SessionToken><Expiration>{expiration}</Expiration></Credentials>
+<AssumedRoleUser><Arn>{role_arn}/benchmark</Arn><AssumedRoleId>AROA:benchmark</AssumedRoleId></AssumedRoleUser>
+</AssumeRoleResult><ResponseMetadata><RequestId>1</RequestId></ResponseMetadata></AssumeRoleResponse>"""
+_GET_USER_RESPONSE = """<GetUserResponse xmlns="https://iam.amazonaws.com/doc/2010-05-08/"><GetUserResult><User>
+<UserName>benchmark</UserName><UserId>AIDABENCHMARK</UserId><Arn>arn:aws:iam::123456789012:user/benchmark</Arn>
+<Path>/</Path><CreateDate>2024-01-01T00:00:00Z</CreateDate></User></GetUserResult></GetUserResponse>"""
+
+
+class _Raw:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+class StandInTransport:
+    """Answers AssumeRole (credentials valid credentials_minutes), GetUser and any other call with an empty result"""
+
+    def __init__(self, credentials_minutes):
+        self.credentials_minutes = credentials_minutes
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def send(self, request):
+        body = request.body.decode() if isinstance(request.body, bytes) else request.body or ""
+        params = dict(item.split("=", 1) for item in body.split("&") if "=" in item)
+        action = params.get("Action", request.method)
+        with self._lock:
+            self.calls[action] += 1
+        if action == "AssumeRole":
+            expiration = datetime.now(timezone.utc) + timedelta(minutes=self.credentials_minutes)
+            xml = _ASSUME_ROLE_RESPONSE.format(expiration=expiration.strftime("%Y-%m-%dT%H:%M:%SZ"), role_arn=ROLE_ARN)
+        elif action == "GetUser":
+            xml = _GET_USER_RESPONSE
+        else:
+            xml = f"<{action}Response><requestId>1</requestId></{action}Response>"
+        return AWSResponse(request.url, 200, {"Content-Type": "text/xml"}, _Raw(xml.encode()))
+
+
+class UncachedAWS(AWS):
+    """AWS without the session registry: one assumed role session per AWS object, plain boto3 sessions"""
+
+    def _aws_session(self):
+        if not hasattr(self, "_uncached_session"):
+            credentials = boto3.client("sts").assume_role(RoleArn=ROLE_ARN, RoleSessionName="role_session")
+            credentials = credentials["Credentials"]
+            self._uncached_session = boto3.Session(
+                region_name=self.region_name,
+                aws_access_key_id=credentials["AccessKeyId"],
+                aws_secret_access_key=credentials["SecretAccessKey"],
+                aws_session_token=credentials["SessionToken"],
+            )
+        return self._uncached_session
+
+
+def _step(aws):
+    aws.ec2.ec2_client.describe_instances()
+    aws.ec2.ec2_resource
+    aws.s3.s3_client
+    aws.ssm.ssm_client
+    aws.rds.rds_client
+
+
+def _run_tests(aws_class, tests, steps, threads):
+    for _ in range(tests):
+        aws = aws_class(region_name=REGION, role_arn=ROLE_ARN)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: _step(aws), range(steps)))
+
+
+def _measure(aws_class, args):
+    aws_session_manager.session_registry.clear()
+    transport = StandInTransport(args.credentials_minutes)
+    clients = Counter()
+    create_client = botocore.session.Session.create_client
+
+    def counting_create_client(self, service_name, *client_args, **client_kwargs):
+        clients[service_name] += 1
+        return create_client(self, service_name, *client_args, **client_kwargs)
+
+    with mock.patch("botocore.httpsession.URLLib3Session.send", lambda _, request: transport.send(request)), mock.patch(
+        "botocore.session.Session.create_client", counting_create_client
+    ):
+        start = time.perf_counter()
+        _run_tests(aws_class, args.tests, args.steps, args.threads)
+        elapsed = time.perf_counter() - start
+    return {
+        "clients per test": sum(clients.values()) / args.tests,
+        "STS calls per test": transport.calls["AssumeRole"] / args.tests,
+        "ms per test": elapsed / args.tests * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AWS factory without and with the session registry")
+    parser.add_argument("--tests", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=25, help="steps per test, each uses 4 clients and 1 resource")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--credentials-minutes",
+        type=int,
+        default=60,
+        help="lifetime of the assumed role credentials, below 15 botocore refreshes them on use",
+    )
+    args = parser.parse_args()
+
+    os.environ.pop("LOCALSTACK_URL", None)
+    os.environ.update(AWS_ACCESS_KEY_ID="benchmark", AWS_SECRET_ACCESS_KEY="benchmark", AWS_DEFAULT_REGION=REGION)
+    results = {"uncached": _measure(UncachedAWS, args), "session registry": _measure(AWS, args)}
+
+    print(f"{args.tests} tests x {args.steps} steps on {args.threads} threads")
+    print(f"{'':<18}" + "".join(f"{name:>20}" for name in results))
+    for metric in results["uncached"]:
+        print(f"{metric:<18}" + "".join(f"{result[metric]:>20.1f}" for result in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Checksums of a device: one cksum over the whole of it, as IOManager.generate_checksum runs it, against the checksum
+manifest of manifest_command(), --workers dd | cksum readers of --extent-mb extents, and against the update of the
+manifest after the writes of _run_dd_for_synthetic_backup, only the extents written hashed again.
+
+The device is a local file of --size-mb of random bytes, the commands run locally through the shell as they run on
+the remote host. The file is read from the page cache after the first run, drop the caches (or use a file larger
+than the memory) to time the reads of a restored volume.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.extent_manifest_benchmark --size-mb 8192 --workers 8
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from lib.platform.host.extent_manifest import ExtentManifest, dd_size_in_bytes, manifest_command, written_extents
+
+# (fill, block size, count, seek) of _run_dd_for_synthetic_backup
+SYNTHETIC_WRITES = [("zero", "512", 1024, 0), ("urandom", "512", 1024, 2100), ("zero", "1M", 500, 4500)]
+
+
+def _shell(command) -> list[str]:
+    return subprocess.run(command, shell=True, check=True, capture_output=True, text=True).stdout.splitlines()
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _manifest(path, extent_size, workers, extents=None):
+    return ExtentManifest.from_output(path, extent_size, _shell(manifest_command(path, extent_size, workers, extents)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole device cksum against extent checksum manifests")
+    parser.add_argument("--size-mb", type=int, default=4096)
+    parser.add_argument("--extent-mb", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    extent_size = args.extent_mb * 2**20
+    fd, path = tempfile.mkstemp(prefix="extent_manifest_bench_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(2**20))
+        whole, whole_seconds = _timed(_shell, f"cksum {path}")
+        manifest, manifest_seconds = _timed(_manifest, path, extent_size, args.workers)
+
+        writes = []
+        for fill, block_size, count, seek in SYNTHETIC_WRITES:
+            bs = dd_size_in_bytes(block_size)
+            if (seek + count) * bs <= os.path.getsize(path):
+                _shell(f"dd if=/dev/{fill} of={path} bs={bs} count={count} seek={seek} conv=notrunc 2>/dev/null")
+                writes.append((seek * bs, count * bs))
+        _, rewhole_seconds = _timed(_shell, f"cksum {path}")
+        extents = written_extents(extent_size, writes)
+        rehashed, update_seconds = _timed(_manifest, path, extent_size, args.workers, extents)
+        updated = manifest.updated(rehashed)
+        full = _manifest(path, extent_size, args.workers)
+        assert updated == full, "updated manifest differs from a full one"
+        mismatches = manifest.diff(updated)
+    finally:
+        os.remove(path)
+
+    print(f"{args.size_mb} MB, extents of {args.extent_mb} MB, {args.workers} workers")
+    print(f"{'whole cksum':<32}{whole_seconds:>8.2f} s  {whole[0].split()[0]}")
+    print(f"{'manifest':<32}{manifest_seconds:>8.2f} s  {manifest.extent_count} extents")
+    print(f"{'whole cksum after writes':<32}{rewhole_seconds:>8.2f} s")
+    print(f"{'manifest update after writes':<32}{update_seconds:>8.2f} s  {len(extents)} extents rehashed")
+    for block_range in mismatches:
+        print(f"    written {block_range}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Comparison of source and restored Get-FileHash outputs: the nested scan compare_checksums did (the restored list
+scanned for each source file) against FileHashList.diff(), indexed by path, and the parsing of the ConvertTo-Json
+output with json.loads against iter_sha256_windows() streaming it line by line.
+
+The nested scan is timed on --scan-files files only, it is quadratic.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.file_hash_diff_benchmark --files 100000 1000000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from lib.platform.host.models.file_hash import FileHash, FileHashList, iter_sha256_windows
+
+
+def _output(files) -> str:
+    entries = [
+        {"Algorithm": "SHA256", "Hash": f"{i:064X}", "Path": f"D:\\vdbench\\dir{i % 100}\\file{i}.bin"}
+        for i in range(files)
+    ]
+    return json.dumps(entries, indent=4)
+
+
+def _nested_scan(source, restored):
+    for source_vm in source.file_hashes:
+        restored_vm = [res_vm for res_vm in restored.file_hashes if res_vm.path == source_vm.path][0]
+        assert source_vm.hash == restored_vm.hash
+
+
+def _timed(function, *args):
+    """Result, seconds and peak MB of allocations, traced in a second run as tracing slows it down"""
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _parse_json_loads(output):
+    return [
+        FileHash(algorithm="SHA256", hash=entry["Hash"], path=entry["Path"])
+        for entry in json.loads(output.replace("\n", ""))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nested scan against indexed FileHashList diff")
+    parser.add_argument("--files", type=int, nargs="+", default=[100000])
+    parser.add_argument("--scan-files", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'files':>10}{'step':>28}{'seconds':>10}{'peak MB':>10}")
+    for files in args.files:
+        output = _output(files)
+        lines = output.splitlines(True)
+        source, parse_seconds, parse_peak = _timed(_parse_json_loads, output)
+        streamed, stream_seconds, stream_peak = _timed(lambda: list(iter_sha256_windows(lines)))
+        assert streamed == source, "streamed entries differ"
+        print(f"{files:>10}{'json.loads parse':>28}{parse_seconds:>10.2f}{parse_peak:>10.0f}")
+        print(f"{files:>10}{'streaming parse':>28}{stream_seconds:>10.2f}{stream_peak:>10.0f}")
+
+        restored = list(reversed(source))
+        restored[len(restored) // 2] = FileHash("SHA256", "0" * 64, restored[len(restored) // 2].path)
+        diff, diff_seconds, diff_peak = _timed(FileHashList(source).diff, FileHashList(restored))
+        assert (diff.matched, len(diff.mismatched)) == (files - 1, 1), diff.summary()
+        print(f"{files:>10}{'indexed diff':>28}{diff_seconds:>10.2f}{diff_peak:>10.0f}")
+
+        scan_files = min(files, args.scan_files)
+        scan_source = FileHashList(source[:scan_files])
+        scan_restored = FileHashList(list(reversed(source[:scan_files])))
+        start = time.perf_counter()
+        _nested_scan(scan_source, scan_restored)
+        scan_seconds = time.perf_counter() - start
+        estimate = scan_seconds * (files / scan_files) ** 2
+        print(f"{files:>10}{f'nested scan ({scan_files} files)':>28}{scan_seconds:>10.2f}")
+        print(f"{files:>10}{'nested scan (extrapolated)':>28}{estimate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Preparing a fleet of instances with data: the hosts one after the other and their devices one after the other, as
+io_steps.run_dd_command is called for each instance, against IOOrchestrator, --max-connections hosts at a time and
+--jobs-per-host devices of a host at a time.
+
+The hosts are simulated: connecting takes --connect-s, and a dd write takes --latency-s plus its bytes at --mbps, the
+EBS throughput of one volume. The writes are the ones of io_steps.FULL_BACKUP_WRITES. The times are divided by
+--time-scale, the results report them scaled back. --failing-hosts hosts fail their second device, the other hosts
+must not be affected.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.io_orchestrator_benchmark --hosts 50 --devices 2
+"""
+
+import argparse
+import time
+
+from lib.platform.host.extent_manifest import dd_size_in_bytes
+from lib.platform.host.io_orchestrator import IOJob, IOOrchestrator, JobStatus
+
+# (block size, count) of io_steps.FULL_BACKUP_WRITES, io_steps imports the e2e context
+WRITES = [("1M", 2048), ("1M", 2048), ("512", 1000), ("512", 1000)]
+
+
+class SimulatedHost:
+    def __init__(self, args, host: str):
+        self.args = args
+        self.host = host
+        time.sleep(args.connect_s / args.time_scale)
+
+    def get_devices(self) -> list[str]:
+        return [f"xvd{chr(ord('b') + index)}" for index in range(self.args.devices)]
+
+    def execute_dd_command(self, block_size, count, device):
+        if self.host in self.args.failing and device == "xvdc":
+            raise Exception(f"dd: error writing '/dev/{device}': Input/output error")
+        seconds = self.args.latency_s + dd_size_in_bytes(block_size) * count / 2**20 / self.args.mbps
+        time.sleep(seconds / self.args.time_scale)
+
+
+def _write(manager: SimulatedHost, device: str) -> int:
+    for block_size, count in WRITES:
+        manager.execute_dd_command(block_size, count, device)
+    return sum(dd_size_in_bytes(block_size) * count for block_size, count in WRITES)
+
+
+def _sequential(args, hosts):
+    failed = set()
+    for host in hosts:
+        try:
+            manager = SimulatedHost(args, host)
+            for device in manager.get_devices():
+                _write(manager, device)
+        except Exception:
+            failed.add(host)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential dd writes against IOOrchestrator")
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--devices", type=int, default=2)
+    parser.add_argument("--max-connections", type=int, default=16)
+    parser.add_argument("--jobs-per-host", type=int, default=4)
+    parser.add_argument("--connect-s", type=float, default=5.0)
+    parser.add_argument("--latency-s", type=float, default=0.5)
+    parser.add_argument("--mbps", type=float, default=125.0)
+    parser.add_argument("--time-scale", type=float, default=200.0)
+    parser.add_argument("--failing-hosts", type=int, default=2)
+    args = parser.parse_args()
+
+    hosts = [f"i-{index:017x}" for index in range(args.hosts)]
+    args.failing = set(hosts[1 :: max(args.hosts // max(args.failing_hosts, 1), 1)][: args.failing_hosts])
+
+    start = time.perf_counter()
+    sequential_failed = _sequential(args, hosts)
+    sequential_seconds = (time.perf_counter() - start) * args.time_scale
+
+    orchestrator = IOOrchestrator(
+        lambda host: SimulatedHost(args, host), max_connections=args.max_connections, jobs_per_host=args.jobs_per_host
+    )
+    jobs = [IOJob(host, "dd full", _write, per_device=True) for host in hosts]
+    start = time.perf_counter()
+    results = list(orchestrator.run(jobs))
+    orchestrated_seconds = (time.perf_counter() - start) * args.time_scale
+
+    failed = {result.host for result in results if result.status == JobStatus.FAILED}
+    passed = {result.host for result in results} - failed
+    assert failed == sequential_failed == args.failing, f"failed hosts {failed}, expected {args.failing}"
+    written = sum(result.bytes or 0 for result in results) / 2**30
+
+    print(f"{args.hosts} hosts of {args.devices} devices, {len(args.failing)} failing, {written:.0f} GiB written")
+    print(f"{'sequential':<14}{sequential_seconds:>10.0f} s  {len(sequential_failed)} hosts failed")
+    print(
+        f"{'orchestrated':<14}{orchestrated_seconds:>10.0f} s  {len(passed)} hosts passed, "
+        f"{len(failed)} failed, {args.max_connections} connections, {args.jobs_per_host} devices per host"
+    )
+
+
+if __name__ == "__main__":
+    main()
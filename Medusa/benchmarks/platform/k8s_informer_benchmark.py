@@ -0,0 +1,214 @@
+"""
+Waiting for the pods of --waiters namespaces to be Running on a large cluster, each namespace waited on by its own
+thread: polling, a LIST of the namespace pods every --poll-s as the EKS steps do with get_k8s_list_pods_namespace,
+against the informer cache, one LIST of all the pods then a watch, and wait_until() woken by the watch events.
+
+The API server is simulated in memory, kubernetes.watch.Watch reads its watch stream as it reads a real one. A LIST
+takes --list-ms plus --item-us per pod listed. --pods pods are spread over --namespaces namespaces, the pods of the
+namespaces waited on turn Running one after the other, every --step-s; the server keeps --history events, a watch
+resumed from an older resourceVersion gets 410 Gone and the informer lists again.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.k8s_informer_benchmark --pods 20000 --namespaces 200
+"""
+
+import argparse
+import json
+import threading
+import time
+
+from kubernetes import client
+
+from lib.platform.kubernetes.informer_cache import InformerCache
+
+
+class FakeWatchResponse:
+    def __init__(self, server, resource_version, timeout_seconds):
+        self.server = server
+        self.resource_version = int(resource_version)
+        self.deadline = time.monotonic() + (timeout_seconds or 5)
+
+    def stream(self, amt=None, decode_content=False):
+        while time.monotonic() < self.deadline and not self.server.stopped:
+            lines = self.server.events_after(self.resource_version, self.deadline)
+            for resource_version, line in lines:
+                self.resource_version = resource_version
+                yield (line + "\n").encode()
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeApiServer:
+    def __init__(self, args):
+        self.args = args
+        self.resource_version = 0
+        self.pods = {}
+        self.events = []
+        self.list_count = 0
+        self.listed_items = 0
+        self.stopped = False
+        self.condition = threading.Condition()
+        for index in range(args.pods):
+            namespace = f"ns-{index % args.namespaces}"
+            self._write("ADDED", namespace, f"pod-{index}", "Pending")
+
+    def _write(self, event_type, namespace, name, phase):
+        self.resource_version += 1
+        pod = {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {
+                "name": name,
+                "namespace": namespace,
+                "labels": {"app": namespace},
+                "resourceVersion": str(self.resource_version),
+            },
+            "status": {"phase": phase},
+        }
+        self.pods[(namespace, name)] = pod
+        self.events.append((self.resource_version, json.dumps({"type": event_type, "object": pod})))
+        del self.events[: -self.args.history]
+
+    def set_phase(self, namespace, name, phase):
+        with self.condition:
+            self._write("MODIFIED", namespace, name, phase)
+            self.condition.notify_all()
+
+    def events_after(self, resource_version, deadline):
+        with self.condition:
+            while not self.events or self.events[-1][0] <= resource_version:
+                if not self.condition.wait(max(deadline - time.monotonic(), 0)) or self.stopped:
+                    return []
+            if self.events[0][0] > resource_version + 1:
+                gone = {"type": "ERROR", "object": {"code": 410, "reason": "Expired", "message": "too old"}}
+                return [(resource_version, json.dumps(gone))]
+            return [event for event in self.events if event[0] > resource_version]
+
+    def _list(self, namespace=None):
+        with self.condition:
+            pods = [pod for (ns, _), pod in self.pods.items() if namespace is None or ns == namespace]
+            resource_version = self.resource_version
+        self.list_count += 1
+        self.listed_items += len(pods)
+        time.sleep((self.args.list_ms * 1000 + self.args.item_us * len(pods)) / 1e6)
+        return client.ApiClient()._ApiClient__deserialize(
+            {"items": pods, "metadata": {"resourceVersion": str(resource_version)}}, "V1PodList"
+        )
+
+    def list_namespaced_pod(self, namespace, **kwargs):
+        """:return: V1PodList"""
+        return self._list(namespace)
+
+    def list_pod_for_all_namespaces(self, watch=False, resource_version=None, timeout_seconds=None, **kwargs):
+        """:return: V1PodList"""
+        if watch:
+            return FakeWatchResponse(self, resource_version, timeout_seconds)
+        return self._list()
+
+    def stop(self):
+        self.stopped = True
+        with self.condition:
+            self.condition.notify_all()
+
+
+class FakeKubernetesClient:
+    def __init__(self, server):
+        self.api_instance = server
+
+
+def _start_pods(server, namespaces):
+    names = sorted((name, namespace) for namespace, name in server.pods if namespace in namespaces)
+
+    def run():
+        for name, namespace in names:
+            time.sleep(server.args.step_s)
+            server.set_phase(namespace, name, "Running")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, len(names)
+
+
+def _all_running(pods):
+    return pods if pods and all(pod.status.phase == "Running" for pod in pods) else None
+
+
+def _wait_all(namespaces, wait) -> float:
+    """Seconds until wait(namespace) returned for all the namespaces, each waited on by a thread"""
+    start = time.perf_counter()
+    threads = [threading.Thread(target=wait, args=(namespace,)) for namespace in namespaces]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def _polling(args, namespaces):
+    server = FakeApiServer(args)
+    thread, count = _start_pods(server, namespaces)
+
+    def wait(namespace):
+        while not _all_running(server.list_namespaced_pod(namespace).items):
+            time.sleep(args.poll_s)
+
+    elapsed = _wait_all(namespaces, wait)
+    thread.join()
+    server.stop()
+    return elapsed, server, count
+
+
+def _informer(args, namespaces):
+    server = FakeApiServer(args)
+    cache = InformerCache(FakeKubernetesClient(server), watch_timeout_seconds=2)
+    cache.informer("pods")
+    thread, count = _start_pods(server, namespaces)
+
+    def wait(namespace):
+        cache.wait_until("pods", _all_running, namespace=namespace, timeout=600)
+
+    elapsed = _wait_all(namespaces, wait)
+    assert all(_all_running(cache.list("pods", namespace=namespace).items) for namespace in namespaces)
+    reads = time.perf_counter()
+    for _ in range(args.reads):
+        cache.list("pods", namespace=namespaces[0], label_selector={"app": namespaces[0]})
+    reads = (time.perf_counter() - reads) / args.reads
+    thread.join()
+    cache.stop()
+    server.stop()
+    return elapsed, server, reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polling LIST requests against the informer cache")
+    parser.add_argument("--pods", type=int, default=20000)
+    parser.add_argument("--namespaces", type=int, default=200)
+    parser.add_argument("--waiters", type=int, default=10)
+    parser.add_argument("--poll-s", type=float, default=0.5)
+    parser.add_argument("--step-s", type=float, default=0.01)
+    parser.add_argument("--list-ms", type=float, default=50)
+    parser.add_argument("--item-us", type=float, default=20)
+    parser.add_argument("--history", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=100)
+    args = parser.parse_args()
+
+    namespaces = [f"ns-{index}" for index in range(args.waiters)]
+    polling_seconds, polling_server, count = _polling(args, namespaces)
+    informer_seconds, informer_server, read_seconds = _informer(args, namespaces)
+
+    print(f"{args.pods} pods in {args.namespaces} namespaces, waiting for the {count} pods of {len(namespaces)}")
+    print(f"{'':<10}{'seconds':>10}{'LISTs':>8}{'items listed':>14}")
+    for name, seconds, server in (
+        ("polling", polling_seconds, polling_server),
+        ("informer", informer_seconds, informer_server),
+    ):
+        print(f"{name:<10}{seconds:>10.2f}{server.list_count:>8}{server.listed_items:>14}")
+    print(f"cached namespace and label read: {read_seconds * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Throughput of KafkaManager.send_message (one flush per event) against KafkaManager.send_messages (one flush per
+batch), with a local broker stand-in in place of the kafka-python clients.
+
+The stand-in producer charges one simulated round-trip per produce request: a flush sends the accumulated records
+in batches of producer_batch_size bytes. Draining the consumer (set_offset_last_send_to_latest) also costs one
+round-trip; a real consumer additionally waits consumer_timeout_ms for new messages, so the gap is wider on a broker.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.kafka_batch_send_benchmark --events 2000 --rtt-ms 2
+"""
+
+import argparse
+import json
+import time
+import uuid
+from collections import defaultdict
+from unittest import mock
+
+from google.protobuf.json_format import MessageToJson
+from kafka import TopicPartition
+from kafka.producer.future import FutureProduceResult, FutureRecordMetadata
+
+from lib.platform.kafka import kafka_manager
+from lib.platform.kafka.protobuf.cvsa_manager import cvsa_manager_pb2
+
+UINT64_FIELDS = [
+    "data_protected_previous_bytes",
+    "data_protected_previous_changed_bytes",
+    "data_protected_new_bytes",
+    "target_duration_seconds",
+]
+
+
+class StandInProducer:
+    def __init__(self, rtt_seconds, value_serializer=None, batch_size=16384, **configs):
+        self.rtt_seconds = rtt_seconds
+        self.value_serializer = value_serializer
+        self.batch_size = batch_size
+        self.requests = 0
+        self._next_offset = defaultdict(int)
+        # partition -> [(produce future, bytes, records)]
+        self._batches = defaultdict(list)
+
+    def send(self, topic, value=None, key=None, headers=None, partition=None):
+        partition = partition or 0
+        value = self.value_serializer(value) if self.value_serializer else value
+        batches = self._batches[partition]
+        if not batches or batches[-1][1] + len(value) > self.batch_size:
+            batches.append([FutureProduceResult(TopicPartition(topic, partition)), 0, 0])
+        batch = batches[-1]
+        future = FutureRecordMetadata(batch[0], batch[2], int(time.time() * 1000), None, len(key), len(value), -1)
+        batch[1] += len(value)
+        batch[2] += 1
+        return future
+
+    def flush(self, timeout=None):
+        for partition, batches in self._batches.items():
+            for produce_future, _, records in batches:
+                time.sleep(self.rtt_seconds)
+                self.requests += 1
+                produce_future.success((self._next_offset[partition], -1, 0))
+                self._next_offset[partition] += records
+        self._batches.clear()
+
+
+class StandInConsumer:
+    def __init__(self, rtt_seconds, *topics, **configs):
+        self.rtt_seconds = rtt_seconds
+
+    def __iter__(self):
+        time.sleep(self.rtt_seconds)
+        return iter(())
+
+
+def _create_manager(rtt_seconds):
+    with mock.patch.object(kafka_manager, "KafkaAdminClient"), mock.patch.object(
+        kafka_manager, "KafkaProducer", lambda **configs: StandInProducer(rtt_seconds, **configs)
+    ), mock.patch.object(
+        kafka_manager, "KafkaConsumer", lambda *topics, **configs: StandInConsumer(rtt_seconds, *topics, **configs)
+    ):
+        return kafka_manager.KafkaManager("cvsa.benchmark", account_id=b"benchmark")
+
+
+def _events(count):
+    events = []
+    for index in range(count):
+        event = cvsa_manager_pb2.CVSABackupBatchRequestedEvent()
+        event.base.correlation_id = uuid.uuid4().hex
+        event.base.cam_account_id = uuid.uuid4().hex
+        event.base.csp_account_id = uuid.uuid4().hex
+        event.data_protected_previous_bytes = 2**40 + index
+        event.data_protected_previous_changed_bytes = 2**30 + index
+        event.data_protected_new_bytes = 2**35 + index
+        event.target_duration_seconds = 3600
+        events.append(event)
+    return events
+
+
+def _bench_serialization(manager, events):
+    def legacy(event):
+        event_data = json.loads(
+            MessageToJson(
+                event,
+                preserving_proto_field_name=manager._event_json_preserving_proto_field_name,
+                use_integers_for_enums=manager._event_json_use_integers_for_enums,
+            )
+        )
+        for field in UINT64_FIELDS:
+            if field in event_data:
+                event_data[field] = int(event_data[field])
+        return event_data
+
+    serialize = manager._KafkaManager__serialize_message
+    start = time.perf_counter()
+    expected = [legacy(event) for event in events]
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = [serialize(event, UINT64_FIELDS) for event in events]
+    new_time = time.perf_counter() - start
+    assert expected == actual, "serialized events differ from the MessageToJson round-trip"
+    print(f"Serialization: MessageToJson + json.loads {legacy_time:.3f} s, MessageToDict {new_time:.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KafkaManager send_message vs send_messages")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="simulated broker round-trip")
+    args = parser.parse_args()
+    rtt_seconds = args.rtt_ms / 1000
+    events = _events(args.events)
+
+    manager = _create_manager(rtt_seconds)
+    _bench_serialization(manager, events)
+
+    start = time.perf_counter()
+    for event in events:
+        manager.send_message(event, uint64_fields=UINT64_FIELDS)
+    single_time = time.perf_counter() - start
+    single_requests = manager.producer.requests
+
+    manager = _create_manager(rtt_seconds)
+    start = time.perf_counter()
+    futures = manager.send_messages(events, uint64_fields=UINT64_FIELDS)
+    batch_time = time.perf_counter() - start
+    offsets = [future.get().offset for future in futures]
+    assert offsets == list(range(len(events))), "delivery offsets are not in send order"
+
+    print(f"{args.events} events, {args.rtt_ms} ms round-trip")
+    print(f"send_message:  {single_time:.2f} s, {args.events / single_time:,.0f} events/s, {single_requests} requests")
+    print(
+        f"send_messages: {batch_time:.2f} s, {args.events / batch_time:,.0f} events/s, "
+        f"{manager.producer.requests} requests"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Seeding a mailbox with contacts through a local Microsoft Graph stand-in: one create_contact call (a new connection
+and one POST) per contact, as the steps did, against create_contacts sending Graph $batch envelopes of 20 over a
+pooled session.
+
+The stand-in answers each request after --latency-ms, plus --item-ms per request of an envelope, and throttles like
+Graph: more than 4 concurrent requests per mailbox, or more than --limit requests per second, are answered with a 429
+and a Retry-After of 1 second (per request inside an envelope). It checks that each contact is created once.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.ms365_graph_batch_benchmark --contacts 500 --latency-ms 100 --limit 200
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lib.platform.ms365.graph_batch import new_session
+from lib.platform.ms365.ms_outlook_manager import MSOutlookManager
+
+USER = "seed@contoso.onmicrosoft.com"
+CONCURRENT_REQUESTS_PER_MAILBOX = 4
+
+
+class GraphStandIn:
+    def __init__(self, latency_ms, item_ms, limit):
+        self.latency = latency_ms / 1000
+        self.item = item_ms / 1000
+        self.limit = limit
+        self.created = {}
+        self.stats = {"http_requests": 0, "throttled": 0}
+        self._in_flight = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def _admit(self, requests_count) -> bool:
+        """Counts the requests against the per second limit, False when throttled"""
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] < now - 1:
+                self._recent.popleft()
+            if len(self._recent) + requests_count > self.limit:
+                self.stats["throttled"] += requests_count
+                return False
+            self._recent.extend([now] * requests_count)
+            return True
+
+    def create(self, url, body):
+        with self._lock:
+            contact_id = f"contact-{len(self.created) + 1}"
+            key = body["givenName"]
+            if key in self.created:
+                raise AssertionError(f"{key} created twice")
+            self.created[key] = contact_id
+        return 201, {**body, "id": contact_id}
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stand_in._lock:
+                    stand_in.stats["http_requests"] += 1
+                    stand_in._in_flight += 1
+                    concurrent = stand_in._in_flight
+                try:
+                    if concurrent > CONCURRENT_REQUESTS_PER_MAILBOX:
+                        stand_in.stats["throttled"] += 1
+                        time.sleep(stand_in.latency)
+                        return self._reply(429, {"error": {"code": "ApplicationThrottled"}}, {"Retry-After": "1"})
+                    if self.path.endswith("/$batch"):
+                        return self._batch(body)
+                    time.sleep(stand_in.latency)
+                    if not stand_in._admit(1):
+                        return self._reply(429, {"error": {"code": "ApplicationThrottled"}}, {"Retry-After": "1"})
+                    status, created = stand_in.create(self.path, body)
+                    return self._reply(status, created)
+                finally:
+                    with stand_in._lock:
+                        stand_in._in_flight -= 1
+
+            def _batch(self, envelope):
+                time.sleep(stand_in.latency + stand_in.item * len(envelope["requests"]))
+                responses = []
+                for request in envelope["requests"]:
+                    if stand_in._admit(1):
+                        status, created = stand_in.create(request["url"], request["body"])
+                        responses.append({"id": request["id"], "status": status, "body": created})
+                    else:
+                        responses.append(
+                            {
+                                "id": request["id"],
+                                "status": 429,
+                                "headers": {"Retry-After": "1"},
+                                "body": {"error": {"code": "ApplicationThrottled"}},
+                            }
+                        )
+                self._reply(200, {"responses": responses})
+
+        return Handler
+
+
+def _manager(base_url) -> MSOutlookManager:
+    # Without __init__: no config, token or checksum tool needed against the stand-in
+    manager = MSOutlookManager.__new__(MSOutlookManager)
+    manager.graph_api_endpoint = f"{base_url}/v1.0/users"
+    manager.graph_api_root = f"{base_url}/v1.0"
+    manager.http_session = new_session()
+    manager.access_token = "stand-in"
+    manager.token_expiry_time = datetime.max
+    return manager
+
+
+def _contacts(manager, mode, count):
+    return [
+        manager.construct_contact_details(given_name=f"{mode}{i}", surname="Seed", email_addresses=[])
+        for i in range(count)
+    ]
+
+
+def _run(mode, args):
+    stand_in = GraphStandIn(args.latency_ms, args.item_ms, args.limit)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    manager = _manager(f"http://127.0.0.1:{server.server_port}")
+    contacts = _contacts(manager, mode, args.contacts)
+    start = time.perf_counter()
+    if mode == "per item":
+        statuses = [manager.create_contact(USER, contact_details=contact).status_code for contact in contacts]
+    else:
+        responses = manager.create_contacts(USER, contacts)
+        statuses = [response.status_code for response in responses]
+        for contact, response in zip(contacts, responses):
+            if response.ok:
+                assert response.json()["givenName"] == contact["givenName"], "response of another contact"
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return {
+        "seconds": elapsed,
+        "created": sum(1 for status in statuses if status == 201),
+        "failed": sum(1 for status in statuses if status != 201),
+        "http requests": stand_in.stats["http_requests"],
+        "throttled": stand_in.stats["throttled"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per item Graph requests against $batch envelopes")
+    parser.add_argument("--contacts", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100, help="round-trip of a Graph request")
+    parser.add_argument("--item-ms", type=float, default=5, help="added per request of a $batch envelope")
+    parser.add_argument("--limit", type=int, default=200, help="requests per second before 429s")
+    args = parser.parse_args()
+
+    results = {mode: _run(mode, args) for mode in ("per item", "$batch")}
+    print(f"{args.contacts} contacts, {args.latency_ms} ms round-trip, {args.limit} requests/s limit")
+    print(f"{'':<16}" + "".join(f"{mode:>12}" for mode in results))
+    for metric in results["per item"]:
+        print(f"{metric:<16}" + "".join(f"{result[metric]:>12.1f}" for result in results.values()))
+
+
+if __name__ == "__main__":
+    main()
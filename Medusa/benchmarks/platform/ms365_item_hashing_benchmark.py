@@ -0,0 +1,101 @@
+"""
+Checksum verification of restored contacts: get_hash_of_contacts of the source and of the restored items one item at
+a time, as the steps did, against compare_item_hashes hashing --workers items at a time and streaming the mismatches.
+A second verification of the same source items, with their change keys, reuses the cached source digests.
+
+The checksum tool is a stand-in taking --latency-ms per item (the Graph requests fetching the item), --mismatches
+restored items hash differently.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.ms365_item_hashing_benchmark --items 200 --latency-ms 150 --workers 8
+"""
+
+import argparse
+import hashlib
+import time
+
+from lib.platform.ms365.item_hashing import item_digest_cache
+from lib.platform.ms365.ms_outlook_manager import MSOutlookManager
+
+USER = "verify@contoso.onmicrosoft.com"
+
+
+class ChecksumToolStandIn:
+    def __init__(self, latency_ms, corrupted):
+        self.latency = latency_ms / 1000
+        self.corrupted = corrupted
+        self.hashed = 0
+
+    def HashContactFolder(self, user_id, folder_id):
+        return self
+
+    def Item(self, attachment_filter, item_filter, item_id, useGraphFilter=False):
+        time.sleep(self.latency)
+        self.hashed += 1
+        content = item_id.split("-", 1)[1]
+        if item_id in self.corrupted:
+            content += "-corrupted"
+        return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _manager(chksum_tool) -> MSOutlookManager:
+    # Without __init__: no config, token or checksum tool needed
+    manager = MSOutlookManager.__new__(MSOutlookManager)
+    manager.chksum_tool = chksum_tool
+    manager.tenant_id = "stand-in"
+    manager.attachment_filter = ["name", "contentType", "contentBytes"]
+    manager.item_filter = ["displayName"]
+    return manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per item checksum verification against concurrent hashing")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=150, help="hashing time of an item")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--mismatches", type=int, default=3)
+    args = parser.parse_args()
+
+    source_ids = [f"source-{i}" for i in range(args.items)]
+    restored_ids = [f"restored-{i}" for i in range(args.items)]
+    corrupted = set(restored_ids[:: max(args.items // max(args.mismatches, 1), 1)][: args.mismatches])
+    chksum_tool = ChecksumToolStandIn(args.latency_ms, corrupted)
+    manager = _manager(chksum_tool)
+
+    start = time.perf_counter()
+    source = manager.get_hash_of_contacts(USER, source_ids, "source-folder")
+    restored = manager.get_hash_of_contacts(USER, restored_ids, "restored-folder")
+    sequential_mismatches = sum(1 for pair in zip(source, restored) if pair[0] != pair[1])
+    sequential = time.perf_counter() - start
+
+    change_keys = {item_id: "v1" for item_id in source_ids}
+    runs = []
+    for run in ("concurrent", "concurrent, cached source"):
+        chksum_tool.hashed = 0
+        start = time.perf_counter()
+        first_mismatch = None
+        mismatches = 0
+        for mismatch in manager.compare_item_hashes(
+            USER,
+            "contacts",
+            source_ids,
+            "source-folder",
+            restored_ids,
+            "restored-folder",
+            max_workers=args.workers,
+            source_change_keys=change_keys,
+        ):
+            mismatches += 1
+            first_mismatch = first_mismatch or time.perf_counter() - start
+        runs.append((run, time.perf_counter() - start, first_mismatch, mismatches, chksum_tool.hashed))
+
+    print(f"{args.items} item pairs, {args.latency_ms} ms per item, {args.workers} workers")
+    print(f"{'':<28}{'seconds':>10}{'first mismatch s':>18}{'mismatches':>12}{'hashed':>8}")
+    print(f"{'per item':<28}{sequential:>10.2f}{sequential:>18.2f}{sequential_mismatches:>12}{2 * args.items:>8}")
+    for run, seconds, first_mismatch, mismatches, hashed in runs:
+        print(f"{run:<28}{seconds:>10.2f}{first_mismatch or 0:>18.2f}{mismatches:>12}{hashed:>8}")
+    print(f"cache {dict(item_digest_cache.stats)}")
+
+
+if __name__ == "__main__":
+    main()
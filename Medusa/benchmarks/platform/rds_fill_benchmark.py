@@ -0,0 +1,166 @@
+"""
+Growing a database by --grow-gb: the fill loop as it was (insert_blob of 20 rows into a new table through pandas
+to_sql, the size queried after every batch) against fill_database_to_size and its bulk fast path, --workers
+connections loading batches of --batch-mb.
+
+The blob file is --file-mb of random bytes. The tables created are dropped after each run.
+
+--verify first loads rows holding the bytes the bulk encodings escape (tab, newline, backslash, NUL, "\\N") through
+bulk_insert, for MySQL and MariaDB through LOAD DATA LOCAL INFILE and through its INSERT fallback, and checks the rows
+read back are byte identical.
+
+Run from the Medusa folder, against a database of the engine (e.g. a local postgres or mysql container):
+    python -m benchmarks.platform.rds_fill_benchmark --engine postgres --host 127.0.0.1 --port 5432 \\
+        --user postgres --password postgres --database testing --grow-gb 2
+    python -m benchmarks.platform.rds_fill_benchmark --engine mysql --host 127.0.0.1 --port 3306 \\
+        --user root --password mysql --database testing --verify
+"""
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+import uuid
+
+from lib.platform.rds.bulk_fill import BLOB_COLUMNS, BlobPayload
+
+# Bytes escaped by the LOAD DATA file and the COPY / INSERT encodings, "\\N" is NULL in a LOAD DATA file
+ESCAPED_BYTES = b"\t\n\\\x00\r\x1a\\N\\\\t\\"
+
+# Imported on use, not through DBFactory: oracle_db needs the Oracle instant client when imported
+ENGINES = {
+    "postgres": ("lib.platform.rds.postgres_sql", "PostgresSQLDB"),
+    "mysql": ("lib.platform.rds.mysql_db", "MySQLDB"),
+    "mariadb": ("lib.platform.rds.maria_db", "MariaDB"),
+    "sqlserver": ("lib.platform.rds.mssql_db", "MSSQLDB"),
+    "oracle": ("lib.platform.rds.oracle_db", "OracleDB"),
+}
+
+
+def _per_batch_fill(db, db_name, table_name_prefix, file_path, target_size_in_MB):
+    """The loop fill_database_to_size ran before the bulk path"""
+    myuuidstr = str(uuid.uuid4()).split("-")[0]
+    current_size = db.get_size_of_db_in_MB(db_name)
+    counter = 1
+    while current_size < target_size_in_MB:
+        table_name = table_name_prefix + "_" + myuuidstr + "_" + str(counter)
+        db.insert_blob(db_name, file_path, table_names=[table_name], num_of_records=20)
+        current_size = db.get_size_of_db_in_MB(db_name)
+        counter += 1
+
+
+def _connect(args):
+    module_name, class_name = ENGINES[args.engine]
+    db = getattr(importlib.import_module(module_name), class_name)()
+    db.initialize_db_properties(args.database, args.user, args.password, args.host, args.port)
+    return db
+
+
+def _verify_rows(file_path) -> list[dict]:
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return [
+        {"id": "row-0", "misc": ESCAPED_BYTES, "large_data": b"\\N", "address": "a\tb\nc\\d"},
+        {"id": "row-1", "misc": ESCAPED_BYTES + data + ESCAPED_BYTES, "large_data": data, "address": "\\N"},
+        {"id": "row-2", "misc": b"\x00", "large_data": bytes(range(256)) * 16, "address": "-"},
+    ]
+
+
+def _value(value):
+    # Oracle returns LOB objects, PostgreSQL memoryviews
+    if hasattr(value, "read"):
+        return value.read()
+    return bytes(value) if isinstance(value, (bytearray, memoryview)) else value
+
+
+def _read_back(connection, table_name) -> list[dict]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(BLOB_COLUMNS)} FROM {table_name} ORDER BY id")
+        return [{column: _value(value) for column, value in zip(BLOB_COLUMNS, row)} for row in cursor.fetchall()]
+
+
+def _verify(args, file_path) -> list[str]:
+    """Loads the verify rows through each bulk_insert path of the engine, returns the paths the rows read back from"""
+    db = _connect(args)
+    # MySQL and MariaDB fall back from LOAD DATA LOCAL INFILE to INSERTs, both are checked
+    paths = ["load data", "insert"] if hasattr(db, "load_data_local") else ["bulk"]
+    rows = _verify_rows(file_path)
+    verified = []
+    connection = db.connect_bulk(args.database)
+    try:
+        for path in paths:
+            if path != "bulk":
+                db.load_data_local = path == "load data"
+            table_name = f"fill_bench_verify_{path.replace(' ', '_')}"
+            db.create_bulk_table(connection, table_name)
+            with BlobPayload(rows) as payload:
+                db.bulk_insert(connection, table_name, payload)
+            if path == "load data" and not db.load_data_local:
+                raise AssertionError("LOAD DATA LOCAL INFILE was refused by the server, enable local_infile")
+            read_back = _read_back(connection, table_name)
+            assert len(read_back) == len(rows), f"{path}: {len(read_back)} rows read back, {len(rows)} loaded"
+            for expected, actual in zip(rows, read_back):
+                for column in BLOB_COLUMNS:
+                    assert actual[column] == expected[column], f"{path}: {expected['id']}.{column} differs"
+            verified.append(path)
+    finally:
+        connection.close()
+        db.cleanup_database(db_name=args.database, table_name_prefix="fill_bench_verify")
+        db.close_db_connection()
+    return verified
+
+
+def _run(args, mode, file_path):
+    db = _connect(args)
+    prefix = f"fill_bench_{mode.replace(' ', '_')}"
+    initial = db.get_size_of_db_in_MB(args.database)
+    target_gb = (initial + 1023) // 1024 + args.grow_gb
+    start = time.perf_counter()
+    if mode == "per batch":
+        _per_batch_fill(db, args.database, prefix, file_path, target_gb * 1024)
+    else:
+        db.fill_database_to_size(
+            args.database, prefix, file_path, target_gb, workers=args.workers, batch_size_in_MB=args.batch_mb
+        )
+    elapsed = time.perf_counter() - start
+    final = db.get_size_of_db_in_MB(args.database)
+    db.cleanup_database(db_name=args.database, table_name_prefix=prefix)
+    db.close_db_connection()
+    return {"seconds": elapsed, "grown MB": final - initial, "MB/s": (final - initial) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per batch fill against the bulk fill of fill_database_to_size")
+    parser.add_argument("--engine", choices=ENGINES, default="postgres")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="testing")
+    parser.add_argument("--grow-gb", type=int, default=1)
+    parser.add_argument("--file-mb", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-mb", type=int, default=64)
+    parser.add_argument("--modes", nargs="+", default=["per batch", "bulk"], choices=["per batch", "bulk"])
+    parser.add_argument("--verify", action="store_true", help="check the bulk loaded rows read back byte identical")
+    args = parser.parse_args()
+
+    fd, file_path = tempfile.mkstemp(prefix="fill_bench_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(os.urandom(args.file_mb * 2**20))
+    try:
+        if args.verify:
+            print(f"{args.engine} rows read back byte identical through: {', '.join(_verify(args, file_path))}")
+        results = {mode: _run(args, mode, file_path) for mode in args.modes}
+    finally:
+        os.remove(file_path)
+
+    print(f"{args.engine}, grow {args.grow_gb} GB, {args.file_mb} MB file, {args.workers} workers")
+    print(f"{'':<12}" + "".join(f"{mode:>12}" for mode in results))
+    for metric in next(iter(results.values())):
+        print(f"{metric:<12}" + "".join(f"{result[metric]:>12.1f}" for result in results.values()))
+
+
+if __name__ == "__main__":
+    main()
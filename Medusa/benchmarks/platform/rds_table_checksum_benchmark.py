@@ -0,0 +1,118 @@
+"""
+Table checksums on PostgreSQL: generate_checksum, md5 of the whole table aggregated in one value, against
+generate_range_checksum, --ranges key ranges checksummed over --workers connections, and compare_table_checksums
+of the table against a copy of the database with --changes rows updated, which reports the differing ranges.
+
+The table has --rows rows of an integer key and --row-bytes of text. It is created in --database, the copy is
+created from it as a template, both are dropped at the end.
+
+Run from the Medusa folder, against a local postgres:
+    python -m benchmarks.platform.rds_table_checksum_benchmark --port 5432 --user postgres --rows 2000000
+"""
+
+import argparse
+import time
+
+import psycopg2
+
+from lib.platform.rds.postgres_sql import PostgresSQLDB
+
+TABLE = "checksum_bench"
+
+
+def _admin(args):
+    connection = psycopg2.connect(host=args.host, port=args.port, user=args.user, password=args.password)
+    connection.autocommit = True
+    return connection
+
+
+def _db(args, database):
+    db = PostgresSQLDB()
+    db.initialize_db_properties(database, args.user, args.password, args.host, args.port)
+    db.set_db_connection(database)
+    return db
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    except Exception as e:
+        result = f"failed: {str(e).splitlines()[0]}"
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole table checksum against range checksums")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="checksum_bench")
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--row-bytes", type=int, default=256)
+    parser.add_argument("--ranges", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--changes", type=int, default=3)
+    parser.add_argument("--skip-whole", action="store_true", help="no whole table checksum, it can exhaust memory")
+    args = parser.parse_args()
+
+    restored_database = f"{args.database}_restored"
+    admin = _admin(args)
+    cursor = admin.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS {args.database}")
+    cursor.execute(f"CREATE DATABASE {args.database}")
+    with psycopg2.connect(
+        host=args.host, port=args.port, user=args.user, password=args.password, database=args.database
+    ) as connection, connection.cursor() as table_cursor:
+        table_cursor.execute(
+            f"CREATE TABLE {TABLE} (id bigint PRIMARY KEY, payload text); "
+            f"INSERT INTO {TABLE} SELECT g, repeat(md5(g::text), {max(args.row_bytes // 32, 1)}) "
+            f"FROM generate_series(1, {args.rows}) g;"
+        )
+    connection.close()
+    cursor.execute(f"DROP DATABASE IF EXISTS {restored_database}")
+    cursor.execute(f"CREATE DATABASE {restored_database} TEMPLATE {args.database}")
+    source = _db(args, args.database)
+    restored = _db(args, restored_database)
+    step = max(args.rows // max(args.changes, 1), 1)
+    changed = list(range(step // 2, args.rows + 1, step))[: args.changes]
+    restored.execute_sql_query_no_return(
+        f"UPDATE {TABLE} SET payload = 'changed' WHERE id IN ({', '.join(map(str, changed)) or 'NULL'})"
+    )
+
+    try:
+        whole, whole_seconds = (
+            ("skipped", 0) if args.skip_whole else _timed(source.generate_checksum, TABLE, args.database)
+        )
+        ranged, ranged_seconds = _timed(
+            source.generate_range_checksum, TABLE, args.database, ranges=args.ranges, workers=args.workers
+        )
+        differences, compare_seconds = _timed(
+            source.compare_table_checksums,
+            restored,
+            [TABLE],
+            args.database,
+            restored_database,
+            ranges=args.ranges,
+            workers=args.workers,
+        )
+    finally:
+        source.dbConnection.dispose()
+        restored.dbConnection.dispose()
+        source.close_db_connection()
+        restored.close_db_connection()
+        cursor.execute(f"DROP DATABASE IF EXISTS {restored_database}")
+        cursor.execute(f"DROP DATABASE IF EXISTS {args.database}")
+        admin.close()
+
+    print(f"{args.rows} rows of {args.row_bytes} bytes, {args.ranges} ranges, {args.workers} workers")
+    print(f"{'whole table checksum':<28}{whole_seconds:>8.2f} s  {whole}")
+    print(f"{'range checksum':<28}{ranged_seconds:>8.2f} s  {ranged}")
+    print(f"{'compare with restored copy':<28}{compare_seconds:>8.2f} s  rows changed {changed}")
+    for source_range, restored_range in differences[TABLE] if isinstance(differences, dict) else []:
+        print(f"    differing keys [{source_range.lo}, {source_range.hi})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Sizing, listing and emptying a bucket of --objects objects spread over --prefixes prefixes: the resource API loops
+S3Manager used (objects.all() for the size and the keys, one DeleteObject per key) against s3_bulk_operations, the
+prefixes listed on --workers threads and the keys deleted 1000 per DeleteObjects request.
+
+S3 is moto's in memory stand-in, every request made through the session waits --latency-ms first, the round-trip to
+S3. The bulk results are checked against the objects written: object count, total size and keys. Closing the key
+generator after a few keys must stop the listing threads, and the bucket must be empty after empty_or_delete_s3_bucket.
+
+Run from the Medusa folder:
+    python -m benchmarks.platform.s3_bulk_operations_benchmark --objects 3500 --prefixes 7 --latency-ms 5
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+import boto3
+from moto import mock_s3
+
+from lib.platform.aws_boto3 import s3_bulk_operations
+from lib.platform.aws_boto3.s3_manager import S3Manager
+
+BUCKET = "s3-bulk-benchmark"
+REGION = "us-west-2"
+
+
+class RequestCounter:
+    """Counts the S3 requests by operation, each one delayed by the latency"""
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, model, **kwargs):
+        with self._lock:
+            self.calls[model.name] += 1
+        time.sleep(self.latency_ms / 1000)
+
+    def reset(self) -> Counter:
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+
+def _populate(client, args) -> dict[str, int]:
+    """Writes the objects, --root-objects of them directly in the bucket, returns their sizes by key"""
+    rng = random.Random(args.seed)
+    sizes = {}
+    for index in range(args.objects):
+        prefix = "" if index < args.root_objects else f"prefix-{index % args.prefixes:02d}/"
+        key = f"{prefix}object-{index:06d}"
+        sizes[key] = rng.randint(0, args.max_kb * 1024)
+        client.put_object(Bucket=BUCKET, Key=key, Body=b"x" * sizes[key])
+    return sizes
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _sequential_size_and_keys(manager: S3Manager):
+    # One listing each, as get_s3_bucket_size and get_s3_object_keys did
+    size = sum(o.size for o in manager.s3_resource.Bucket(BUCKET).objects.all())
+    return size, sorted(o.key for o in manager.s3_resource.Bucket(BUCKET).objects.all())
+
+
+def _sequential_empty(manager: S3Manager):
+    for o in list(manager.s3_resource.Bucket(BUCKET).objects.all()):
+        response = o.delete()
+        assert response["ResponseMetadata"]["HTTPStatusCode"] == 204
+
+
+def _bulk_size_and_keys(manager: S3Manager, workers: int):
+    size = s3_bulk_operations.get_bucket_size(manager.s3_client, BUCKET, max_workers=workers)
+    keys = sorted(s3_bulk_operations.iter_object_keys(manager.s3_client, BUCKET, max_workers=workers))
+    return size, keys
+
+
+def _listing_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("s3-list")]
+
+
+def _check_early_close(manager: S3Manager) -> int:
+    """Takes a few keys then closes the generator, returns the listing threads still alive after a second"""
+    keys = manager.iter_s3_object_keys(BUCKET)
+    taken = list(itertools.islice(keys, 10))
+    assert len(taken) == 10, f"{len(taken)} keys taken"
+    keys.close()
+    deadline = time.monotonic() + 1
+    while _listing_threads() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return len(_listing_threads())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resource API loops against s3_bulk_operations, on moto")
+    parser.add_argument("--objects", type=int, default=3500)
+    parser.add_argument("--prefixes", type=int, default=7)
+    parser.add_argument("--root-objects", type=int, default=50)
+    parser.add_argument("--max-kb", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=s3_bulk_operations.MAX_WORKERS)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_s3():
+        session = boto3.Session(region_name=REGION)
+        counter = RequestCounter(args.latency_ms)
+        session.events.register("before-call.s3", counter)
+        manager = S3Manager(lambda: session)
+        client = manager.s3_client
+        client.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": REGION})
+        sizes = _populate(client, args)
+        expected_keys = sorted(sizes)
+        expected_bytes = sum(sizes.values())
+
+        rows = []
+        counter.reset()
+        (total_bytes, keys), seconds = _timed(_sequential_size_and_keys, manager)
+        assert total_bytes == expected_bytes and keys == expected_keys, "resource API listing differs"
+        rows.append(("size + keys, resource API", seconds, counter.reset()))
+
+        (size, keys), seconds = _timed(_bulk_size_and_keys, manager, args.workers)
+        assert size.objects == len(sizes), f"{size.objects} objects counted, {len(sizes)} written"
+        assert size.bytes == expected_bytes, f"{size.bytes} bytes counted, {expected_bytes} written"
+        assert keys == expected_keys, "bulk listing keys differ from the keys written"
+        rows.append(("size + keys, bulk", seconds, counter.reset()))
+
+        alive = _check_early_close(manager)
+        assert not alive, f"{alive} listing threads still running after the key generator was closed"
+        counter.reset()
+
+        _, seconds = _timed(_sequential_empty, manager)
+        rows.append(("empty, DeleteObject per key", seconds, counter.reset()))
+        _populate(client, args)
+        counter.reset()
+
+        _, seconds = _timed(manager.empty_or_delete_s3_bucket, BUCKET)
+        calls = counter.reset()
+        rows.append(("empty, empty_bucket", seconds, calls))
+        batches = math.ceil(len(sizes) / s3_bulk_operations.DELETE_BATCH_SIZE)
+        assert calls["DeleteObjects"] == batches, f"{calls['DeleteObjects']} DeleteObjects requests, {batches} expected"
+        remaining = client.list_objects_v2(Bucket=BUCKET)["KeyCount"]
+        assert remaining == 0, f"{remaining} objects left after empty_or_delete_s3_bucket"
+
+    print(
+        f"{len(sizes)} objects, {expected_bytes / 2**20:.1f} MiB, {args.prefixes} prefixes, "
+        f"{args.workers} workers, {args.latency_ms} ms per request"
+    )
+    print("counts, sizes and keys match; early close stops the listing threads; bucket empty after empty_bucket")
+    for name, seconds, calls in rows:
+        requests = ", ".join(f"{count} {operation}" for operation, count in sorted(calls.items()))
+        print(f"{name:<30}{seconds:>8.2f} s  {requests}")
+
+
+if __name__ == "__main__":
+    main()
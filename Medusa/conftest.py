@@ -12,6 +12,11 @@ for root, dirs, files in os.walk(".", topdown=True):
 
 
 def pytest_configure():
+    from lib.common import dataclass_json_decoder
+
+    # Compiled decoders for the dataclass_json models, the stock decoder is kept on other dataclasses-json versions
+    dataclass_json_decoder.install()
+
     var_file = os.getenv("CONFIG_FILE")
     print(f"{var_file=}")
     if var_file:
@@ -18,3 +18,12 @@ class WrongServiceSpecifiedError(Exception):
             f"Wrong service specified, we got: {service}! Service Version available: {ServiceType._member_names_}"
         )
         super().__init__(self.message)
+
+
+class FrozenConfigError(TypeError):
+    def __init__(self):
+        self.message = (
+            "ConfigManager.get_config() returns a shared read-only config, "
+            "use ConfigManager.get_config().mutable_copy() to get a config you can modify"
+        )
+        super().__init__(self.message)
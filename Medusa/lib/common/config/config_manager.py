@@ -1,12 +1,12 @@
 import logging
 import os
-import pickle
 
 from configparser import ConfigParser, ExtendedInterpolation
 from threading import Lock
+from lib.common.config.config_errors import FrozenConfigError
 from lib.common.enums.provided_users import ProvidedUser
 from utils.common_helpers import get_project_root
-from utils.ip_utils import find_unused_ip_from_range
+from utils.ip_utils import DEFAULT_LEASE_SECONDS, find_unused_ip_from_range
 
 SERVICE_1_VERSION = "service1"
 SERVICE_2_VERSION = "service2"
@@ -30,6 +30,64 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class FrozenConfigParser(ConfigParser):
+    """Read-only ConfigParser: every get_config() caller gets the same object instead of a copy.
+
+    Reads (config["SECTION"]["key"], get(), getint(), sections(), ...) work as on a ConfigParser, writes raise
+    FrozenConfigError. mutable_copy() returns a ConfigParser owned by the caller.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._frozen = False
+        super().__init__(*args, **kwargs)
+
+    def freeze(self) -> "FrozenConfigParser":
+        self._frozen = True
+        return self
+
+    def _check_writable(self):
+        if self._frozen:
+            raise FrozenConfigError()
+
+    def mutable_copy(self) -> ConfigParser:
+        config = ConfigParser(allow_no_value=self._allow_no_value, interpolation=self._interpolation)
+        config.read_dict({self.default_section: self._defaults, **self._sections})
+        return config
+
+    def set(self, section, option, value=None):
+        self._check_writable()
+        super().set(section, option, value)
+
+    def add_section(self, section):
+        self._check_writable()
+        super().add_section(section)
+
+    def remove_section(self, section):
+        self._check_writable()
+        return super().remove_section(section)
+
+    def remove_option(self, section, option):
+        self._check_writable()
+        return super().remove_option(section, option)
+
+    def read_dict(self, dictionary, source="<dict>"):
+        self._check_writable()
+        super().read_dict(dictionary, source)
+
+    def _read(self, fp, fpname):
+        # read(), read_file() and read_string() all parse through _read
+        self._check_writable()
+        super()._read(fp, fpname)
+
+    def __setitem__(self, key, value):
+        self._check_writable()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._check_writable()
+        super().__delitem__(key)
+
+
 class ConfigManager(metaclass=Singleton):
     _path_configs_service1 = get_project_root() / "configs/service1"
     _path_configs_service2 = get_project_root() / "configs/atlantia"
@@ -76,25 +134,37 @@ class ConfigManager(metaclass=Singleton):
         if not os.path.exists(path=self.config_path):
             raise FileNotFoundError(f"File {config}.ini is not found!")
 
-        self.config = ConfigParser(allow_no_value=True, interpolation=ExtendedInterpolation())
+        # Read BASE 1st, Override INI 2nd
+        self._config_files = [f"{path}/{BASE_VARIABLES}", self.config_path]
+        self._lock = Lock()
+        self._parse_config()
+        logger.debug(f"Loaded config {path}/{config}")
+
+    def _config_mtimes(self) -> tuple:
+        return tuple(os.stat(config_file).st_mtime_ns for config_file in self._config_files)
+
+    def _parse_config(self) -> None:
+        self._mtimes = self._config_mtimes()
+        config = FrozenConfigParser(allow_no_value=True, interpolation=ExtendedInterpolation())
 
         # this line reads in the configuration from the INI files, returns a list of successfully parsed files.
-        # Read BASE 1st, Override INI 2nd
-        parsed_files = self.config.read([f"{path}/{BASE_VARIABLES}", self.config_path])
+        parsed_files = config.read(self._config_files)
         logger.info(f"Parsed {len(parsed_files)} files: {parsed_files}")
-        logger.debug(f"Loaded config {path}/{config}")
+        self.config = config.freeze()
 
-    def _deep_copy(self) -> ConfigParser:
-        """deep copy config"""
-        temp = pickle.dumps(self.config)
-        new_config = pickle.loads(temp)
-        return new_config
+    def _current_config(self) -> FrozenConfigParser:
+        # The INI files are parsed again only when one of them changed (write_and_save_config, update scripts).
+        # Snapshots handed out before keep their values.
+        if self._config_mtimes() != self._mtimes:
+            with self._lock:
+                if self._config_mtimes() != self._mtimes:
+                    self._parse_config()
+        return self.config
 
     @classmethod
-    def get_config(cls) -> ConfigParser:
-        instance = cls()
-        config = instance._deep_copy()
-        return config
+    def get_config(cls) -> FrozenConfigParser:
+        """Shared read-only config, use get_config().mutable_copy() to modify it"""
+        return cls()._current_config()
 
     @classmethod
     def write_and_save_config(cls) -> None:
@@ -149,13 +219,15 @@ class ConfigManager(metaclass=Singleton):
             key = f"TEST-DATA-FOR-{user.value}"
             instance = cls()
             user_data = instance.config[key]
-            unused_ip = find_unused_ip_from_range(user_data["network"])
+            unused_ip = find_unused_ip_from_range(user_data["network"], lease_seconds=DEFAULT_LEASE_SECONDS)
             if not unused_ip:
                 raise Exception(f"Failed to find unused IP from '{user_data['network']}'")
             config.set(key, "network", unused_ip)
             config.set(key, "network_ip_range", user_data["network"])
             logger.info(f"Updated {key}.network = {unused_ip}")
-            unused_ip = find_unused_ip_from_range(user_data["secondary_psgw_ip"], exclude_ip_list=[unused_ip])
+            unused_ip = find_unused_ip_from_range(
+                user_data["secondary_psgw_ip"], exclude_ip_list=[unused_ip], lease_seconds=DEFAULT_LEASE_SECONDS
+            )
             if not unused_ip:
                 raise Exception(f"Failed to find unused IP from '{user_data['secondary_psgw_ip']}'")
             config.set(key, "secondary_psgw_ip", unused_ip)
@@ -0,0 +1,264 @@
+"""Precompiled decoders for the @dataclass_json models.
+
+dataclasses_json decodes a dict into a model by introspecting the model on every call: dataclass fields, letter case
+overrides, type hints and the type of every field, for every entry of every nested list. For list responses of
+thousands of entries most of the time goes there.
+
+This module builds, once per model class, a decode function with all of that resolved: the camelCase to field name
+mapping, the defaults, and one value decoder per field (nested models, lists, dicts, Optional, Enum, datetime). The
+cases handled here are the common ones, any other type is decoded by the dataclasses_json functions, so the results
+are the same as with dataclasses_json.
+
+install() makes from_json / from_dict of every @dataclass_json model and DataClassJsonMixin subclass use the compiled
+decoders. It is called by the pytest bootstrap (conftest.py), and only patches the dataclasses_json version the
+decoders are written against: with any other version the stock decoder is kept.
+"""
+
+import logging
+import threading
+import warnings
+from importlib.metadata import PackageNotFoundError, version
+from dataclasses import MISSING, fields, is_dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Union, get_type_hints
+from uuid import UUID
+
+from dataclasses_json import api, core
+from dataclasses_json.utils import _is_new_type, _is_optional, _issubclass_safe, _undefined_parameter_action_safe
+
+logger = logging.getLogger()
+
+_decoders = {}
+_lock = threading.Lock()
+_library_decode_dataclass = core._decode_dataclass
+# The compiled decoders mirror core._decode_dataclass and use private helpers of this dataclasses_json release
+SUPPORTED_DATACLASSES_JSON_VERSION = "0.5.6"
+
+
+def _identity(value):
+    return value
+
+
+def _strip_new_type(type_):
+    while _is_new_type(type_):
+        type_ = type_.__supertype__
+    return type_
+
+
+def _optional_arg(type_):
+    """X of Optional[X], None for any other type"""
+    args = getattr(type_, "__args__", None)
+    if getattr(type_, "__origin__", None) is Union and args and len(args) == 2 and args[1] is type(None):
+        return args[0]
+    return None
+
+
+def _dataclass_decoder(type_, infer_missing) -> Callable:
+    # Looked up on the first call, so models referring to themselves or to each other compile
+    decoder = None
+
+    def decode(value):
+        nonlocal decoder
+        if decoder is None:
+            decoder = get_decoder(type_, infer_missing)
+        return decoder(value)
+
+    return decode
+
+
+def _extended_decoder(type_) -> Callable:
+    """Decoder of a value which is not a model nor a generic, core._support_extended_types"""
+    if _issubclass_safe(type_, datetime):
+
+        def decode_datetime(value):
+            if isinstance(value, datetime):
+                return value
+            return datetime.fromtimestamp(value, tz=datetime.now(timezone.utc).astimezone().tzinfo)
+
+        return decode_datetime
+    if _issubclass_safe(type_, (Decimal, UUID)):
+        return lambda value: core._support_extended_types(type_, value)
+    return _identity
+
+
+def _generic_decoder(type_, infer_missing) -> Callable:
+    """Decoder of a value of a supported generic type, core._decode_generic"""
+    if _issubclass_safe(type_, Enum):
+        return lambda value: None if value is None else type_(value)
+
+    origin = getattr(type_, "__origin__", None)
+    args = getattr(type_, "__args__", None)
+    if origin is list and args and len(args) == 1:
+        decode_item = _items_decoder(args[0], infer_missing)
+        return _collection_decoder(type_, lambda value: [decode_item(item) for item in value], infer_missing)
+    if origin is dict and args and args[0] is str:
+        decode_item = _items_decoder(args[1], infer_missing)
+        return _collection_decoder(
+            type_, lambda value: {str(key): decode_item(item) for key, item in value.items()}, infer_missing
+        )
+
+    optional_arg = _optional_arg(type_)
+    if optional_arg is not None:
+        if is_dataclass(optional_arg):
+            decode_arg = _dataclass_decoder(optional_arg, infer_missing)
+        elif core._is_supported_generic(optional_arg):
+            decode_arg = _generic_decoder(optional_arg, infer_missing)
+        else:
+            decode_arg = _extended_decoder(optional_arg)
+        return lambda value: None if value is None else decode_arg(value)
+
+    return lambda value: core._decode_generic(type_, value, infer_missing)
+
+
+def _collection_decoder(type_, decode_entries, infer_missing) -> Callable:
+    def decode(value):
+        if value is None:
+            return None
+        try:
+            return decode_entries(value)
+        except (TypeError, AttributeError):
+            # dataclasses_json catches these when building the collection, and builds it again from the entries
+            # left, decoding the value with it gives the same result
+            return core._decode_generic(type_, value, infer_missing)
+
+    return decode
+
+
+def _items_decoder(type_, infer_missing) -> Callable:
+    """Decoder of an entry of a list or a dict value, core._decode_items"""
+    if is_dataclass(type_):
+        return _dataclass_decoder(type_, infer_missing)
+    if core._is_supported_generic(type_):
+        return _generic_decoder(type_, infer_missing)
+    return _identity
+
+
+def _field_decoder(type_, override, infer_missing) -> Callable:
+    """Decoder of a field value which is not None, like core._decode_dataclass"""
+    type_ = _strip_new_type(type_)
+    if override is not None and override.decoder is not None:
+        decoder = override.decoder
+        return lambda value: value if type_ is type(value) else decoder(value)
+    if is_dataclass(type_):
+        decode = _dataclass_decoder(type_, infer_missing)
+        return lambda value: value if is_dataclass(value) else decode(value)
+    if core._is_supported_generic(type_) and type_ != str:
+        return _generic_decoder(type_, infer_missing)
+    return _extended_decoder(type_)
+
+
+def _compile(cls, infer_missing) -> Callable:
+    overrides = core._user_overrides_or_exts(cls)
+    cls_fields = fields(cls)
+    decode_names = core._decode_letter_case_overrides([field.name for field in cls_fields], overrides)
+    types = get_type_hints(cls)
+    undefined_action = _undefined_parameter_action_safe(cls)
+
+    defaults = []
+    for field in cls_fields:
+        if field.default is not MISSING:
+            defaults.append((field.name, field.default, None))
+        elif field.default_factory is not MISSING:
+            defaults.append((field.name, None, field.default_factory))
+        elif infer_missing:
+            defaults.append((field.name, None, None))
+
+    init_fields = []
+    for field in cls_fields:
+        if not field.init:
+            continue
+        override = overrides.get(field.name)
+        optional = _is_optional(types[field.name])
+        # A user decoder of an Optional field is given None values too
+        decodes_none = optional and override is not None and override.decoder is not None
+        init_fields.append(
+            (field.name, _field_decoder(types[field.name], override, infer_missing), optional, decodes_none)
+        )
+
+    def decode(kvs):
+        if isinstance(kvs, cls):
+            return kvs
+        if kvs is None and infer_missing:
+            kvs = {}
+        kvs = {decode_names.get(key, key): value for key, value in kvs.items()}
+        for name, default, default_factory in defaults:
+            if name not in kvs:
+                kvs[name] = default_factory() if default_factory is not None else default
+        if undefined_action is not None:
+            kvs = undefined_action.value.handle_from_dict(cls=cls, kvs=kvs)
+
+        init_kwargs = {}
+        for name, decode_value, optional, decodes_none in init_fields:
+            value = kvs[name]
+            if value is not None or decodes_none:
+                init_kwargs[name] = decode_value(value)
+            else:
+                if not optional:
+                    _warn_none(cls, name, infer_missing)
+                init_kwargs[name] = None
+        return cls(**init_kwargs)
+
+    return decode
+
+
+def _warn_none(cls, name, infer_missing):
+    # Same warnings as core._decode_dataclass
+    warning = f"value of non-optional type {name} detected when decoding {cls.__name__}"
+    if infer_missing:
+        warnings.warn(
+            f"Missing {warning} and was defaulted to None by infer_missing=True. "
+            f"Set infer_missing=False (the default) to prevent this behavior.",
+            RuntimeWarning,
+        )
+    else:
+        warnings.warn(f"`NoneType` object {warning}.", RuntimeWarning)
+
+
+def get_decoder(cls, infer_missing: bool = False) -> Callable[[Any], Any]:
+    """Compiled decode function of the model class, from a dict (or the model) to the model"""
+    key = (cls, bool(infer_missing))
+    decoder = _decoders.get(key)
+    if decoder is None:
+        with _lock:
+            decoder = _decoders.get(key)
+            if decoder is None:
+                try:
+                    decoder = _compile(cls, infer_missing)
+                except Exception as e:
+                    # e.g. a type hint which does not resolve: dataclasses_json raises the error on decode
+                    logger.debug(f"No compiled decoder for {cls.__name__}, dataclasses_json decodes it: {e}")
+                    decoder = lambda kvs: _library_decode_dataclass(cls, kvs, infer_missing)  # noqa: E731
+                _decoders[key] = decoder
+    return decoder
+
+
+def decode_dataclass(cls, kvs, infer_missing=False):
+    """Drop in replacement of dataclasses_json.core._decode_dataclass"""
+    return get_decoder(cls, infer_missing)(kvs)
+
+
+def install() -> bool:
+    """Route DataClassJsonMixin.from_dict (and so from_json) of every model through the compiled decoders
+
+    Returns:
+        bool: False when the installed dataclasses_json is not the supported version, the stock decoder is kept
+    """
+    try:
+        installed_version = version("dataclasses-json")
+    except PackageNotFoundError:
+        installed_version = None
+    if installed_version != SUPPORTED_DATACLASSES_JSON_VERSION:
+        logger.warning(
+            f"dataclasses-json {installed_version} is not {SUPPORTED_DATACLASSES_JSON_VERSION}, "
+            "the compiled decoders are not installed"
+        )
+        uninstall()
+        return False
+    api._decode_dataclass = decode_dataclass
+    return True
+
+
+def uninstall():
+    api._decode_dataclass = _library_decode_dataclass
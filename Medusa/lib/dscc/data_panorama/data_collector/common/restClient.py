@@ -1,6 +1,11 @@
-from math import ceil
+import itertools
 import requests
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
 
 # import logging
 
@@ -9,96 +14,181 @@ import time
 
 # logger = logging.getLogger()
 
+# Connections kept per host by the shared session, should be >= the number of hauler worker threads
+DEFAULT_POOL_SIZE = 32
+# Page size of get_all_response and the page requests a paginator keeps in flight
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_MAX_IN_FLIGHT = 8
 
-def get(url, headers, body=None):
-    retry_count = 5
-    while retry_count > 0:
+_session = None
+_session_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+_rate_limiter = None
+
+
+def configure(pool_size=None, rate_limiter=None):
+    """Set the connection pool size of the shared session and the rate limiter (TokenBucket) used for every request"""
+    global _session, _pool_size, _rate_limiter
+    with _session_lock:
+        if pool_size and pool_size != _pool_size:
+            _pool_size = pool_size
+            if _session is not None:
+                _session.close()
+                _session = None
+        _rate_limiter = rate_limiter
+
+
+def get_session():
+    """Pooled session shared by all the threads, so connections are reused across requests"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _retry_delay(error, default=5):
+    # Honour Retry-After of a throttled (429 / 503) response
+    response = getattr(error, "response", None)
+    if response is not None and response.headers.get("Retry-After", "").isdigit():
+        return int(response.headers["Retry-After"])
+    return default
+
+
+def _request(method, url, headers, data, retry_count):
+    attempts = retry_count
+    while True:
+        if _rate_limiter is not None:
+            _rate_limiter.acquire()
         try:
             # timeout(<connectionTimeout> ,  <ResponseTimeout>) in seconds
-            response = requests.get(url=url, data=body, headers=headers, timeout=(15, 60))
+            response = get_session().request(method, url=url, data=data, headers=headers, timeout=(15, 60))
             response.raise_for_status()  # Raise an exception if the status is not 200
-            # Do something with the response
             return response
-            # break  # Exit the loop if successful
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             retry_count -= 1
             if retry_count == 0:
-                # logger.error(f"Failed to get API response after 3 retries. url - {url}")
-                print(f"Failed to get API response after 3 retries. url - {url}")
-                # break
-                exit()
-            else:
-                print(f"Retrying {retry_count} more time(s) in 5 seconds. url - {url}")
-                time.sleep(5)
+                print(f"Failed to {method} API response after {attempts} retries. url - {url}")
+                raise
+            delay = _retry_delay(e)
+            print(f"Retrying {retry_count} more time(s) in {delay} seconds. url - {url}")
+            time.sleep(delay)
+
+
+def get(url, headers, body=None):
+    """GET with retries.
+
+    Raises:
+        requests.exceptions.RequestException: the last error once the retries are exhausted
+    """
+    return _request("GET", url, headers, body, retry_count=5)
 
 
 def post(url, headers, payload):
-    retry_count = 3
-    while retry_count > 0:
-        try:
-            # timeout(<connectionTimeout> ,  <ResponseTimeout>) in seconds
-            response = requests.post(url=url, data=payload, headers=headers, timeout=(15, 60))
-            response.raise_for_status()  # Raise an exception if the status is not 200
-            # Do something with the response
-            return response
-            # break  # Exit the loop if successful
-        except requests.exceptions.RequestException as e:
-            print(f"Error: {e}")
-            retry_count -= 1
-            if retry_count == 0:
-                print("Failed to post API data after 3 retries.")
-                exit()
-            else:
-                print(f"Retrying {retry_count} more time(s) in 5 seconds.")
-                time.sleep(5)
+    """POST with retries.
+
+    Raises:
+        requests.exceptions.RequestException: the last error once the retries are exhausted
+    """
+    return _request("POST", url, headers, payload, retry_count=3)
+
+
+def _page_url(resource_url, limit, offset, sort_by=None):
+    if sort_by:
+        return f"{resource_url}?sort={sort_by}+desc&limit={limit}&offset={offset}"
+    return f"{resource_url}?limit={limit}&offset={offset}"
+
+
+def _get_page(page_url, headers):
+    return get(url=page_url, headers=headers).json()
+
+
+def iter_pages(resource_url, headers, limit=DEFAULT_PAGE_SIZE, sort_by=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Yield the pages (response json) of a resource in offset order.
+    The first page gives the total, the other pages are requested concurrently with at most max_in_flight requests
+    in flight. When the response has no total, pages are requested until an empty page is returned.
+    Callers already running on a BoundedExecutor worker pass max_in_flight=1: the pages are then requested one after
+    the other on the worker thread, under the endpoint limit of its task, instead of from a nested thread pool.
+    """
+    first_page = _get_page(_page_url(resource_url, limit, 0, sort_by), headers)
+    yield first_page
+    if not first_page["items"]:
+        return
+    total = first_page.get("total")
+    offsets = iter(range(limit, total, limit)) if total is not None else itertools.count(limit, limit)
+
+    if max_in_flight <= 1:
+        for offset in offsets:
+            page = _get_page(_page_url(resource_url, limit, offset, sort_by), headers)
+            if not page["items"]:
+                break
+            yield page
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="paginator")
+    pending = deque()
+    try:
+        for offset in itertools.islice(offsets, max_in_flight):
+            pending.append(executor.submit(_get_page, _page_url(resource_url, limit, offset, sort_by), headers))
+        while pending:
+            page = pending.popleft().result()
+            if not page["items"]:
+                # End of the resource (or it shrank while paging)
+                break
+            yield page
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(executor.submit(_get_page, _page_url(resource_url, limit, offset, sort_by), headers))
+    finally:
+        # Pages requested past the end, or not consumed by the caller, are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_paginated_items(
+    resource_url, headers, limit=DEFAULT_PAGE_SIZE, sort_by=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, dedupe_key="id"
+):
+    """
+    Yield the items of all the pages in order, without holding the full list.
+    Note: Fleet API has issue with paging response thus duplicates are occuring, items with an already seen
+    dedupe_key are skipped. Items without the key are always returned.
+    """
+    seen = set()
+    for page in iter_pages(resource_url, headers, limit=limit, sort_by=sort_by, max_in_flight=max_in_flight):
+        for item in page["items"]:
+            key = item.get(dedupe_key) if dedupe_key and isinstance(item, dict) else None
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield item
 
 
 def get_paginated_response(resource_url, headers, limit=50):
     """
     Get page by page response.
-    Note: Fleet API has issue with paging response thus duplicates are occuring. So use get_all_response
+    Note: Fleet API has issue with paging response thus duplicates are occuring, they are removed by id.
     """
-    all_data = []
-    # total_limit = 0
-    num_resources = 0
-    offset = 0
-    while True:
-        limits_url = f"{resource_url}?limit={limit}&offset={offset}"
-        # params = {"limit": limit, "offset": offset}
-        response = get(url=limits_url, headers=headers)
-        resource = response.json()
-        if not resource["items"]:
-            break
-        num_resources += len(resource["items"])
-        all_data.extend(resource["items"])
-        # total_limit = total_limit + limit
-        # if total_limit < resource['total']:
-        offset += limit
-    return all_data
-
-
-def get_all_response(resource_url, headers, sort_by="id", get_list=True):
+    return list(iter_paginated_items(resource_url, headers, limit=limit))
+
+
+def get_all_response(resource_url, headers, sort_by="id", get_list=True, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
     """
     Get all response irrespective of page limit
+    max_in_flight: page requests in flight, 1 when called from a collector task already running on a BoundedExecutor
     """
-    all_data = []
-    response = get(url=resource_url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-
-    limit = data["total"]
-    # limit = 500
-    for i in range(ceil(limit / 500)):
-        offset = 500 * i
-        # url_limit_1000 = f'https://scdev01-app.qa.cds.hpe.com/api/v1/storage-systems/device-type2/0074a8774a94dbbe7c000000000000000000000001/volumes/0674a8774a94dbbe7c000000000000000000000012/snapshots?sort=id+desc&limit=500&offset={offset}'
-        # limits_url = url_limit_1000
-        # limits_url = f"{resource_url}?limit={limit}&offset=0"
-        limits_url = f"{resource_url}?sort={sort_by}+desc&limit=500&offset={offset}"
-        response = get(url=limits_url, headers=headers)
-        if get_list == False:
-            return response
-        resource = response.json()
-        all_data.extend(resource["items"])
+    if not get_list:
+        # First page only
+        response = get(url=_page_url(resource_url, DEFAULT_PAGE_SIZE, 0, sort_by), headers=headers)
+        return response if response.json()["total"] else []
 
-    return all_data
+    return list(
+        iter_paginated_items(
+            resource_url, headers, limit=DEFAULT_PAGE_SIZE, sort_by=sort_by, max_in_flight=max_in_flight
+        )
+    )
@@ -0,0 +1,98 @@
+"""Concurrency and rate limits for the hauler.
+
+The collectors fan out one request per volume and endpoint. BoundedExecutor runs those requests on a fixed number of
+threads with a concurrency limit per endpoint, and TokenBucket (used by restClient for every request) keeps the
+overall request rate under the API throttling limit.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger()
+
+
+class TokenBucket:
+    """Thread safe token bucket: allows `rate` requests per second on average and bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` tokens are available and take them"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class BoundedExecutor:
+    """Thread pool with a concurrency limit per endpoint.
+
+    Errors raised by the submitted tasks are not swallowed: wait_all() re-raises the first one once every task is done.
+
+    Usage:
+        with BoundedExecutor(max_workers=32, endpoint_limits={"snapshots": 8}) as executor:
+            for volume_id in volume_ids:
+                executor.submit("snapshots", get_snapshots, volume_id)
+            executor.wait_all()
+    """
+
+    def __init__(self, max_workers, endpoint_limits=None, default_limit=None):
+        self.max_workers = max_workers
+        endpoint_limits = endpoint_limits or {}
+        default_limit = default_limit or max_workers
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(default_limit))
+        for endpoint, limit in endpoint_limits.items():
+            self._semaphores[endpoint] = threading.BoundedSemaphore(limit)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hauler")
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Tasks which have not started yet are dropped when the caller already failed
+        self._executor.shutdown(wait=True, cancel_futures=exc_type is not None)
+        return False
+
+    def _run(self, endpoint, function, args, kwargs):
+        with self._semaphores[endpoint]:
+            return function(*args, **kwargs)
+
+    def submit(self, endpoint, function, *args, **kwargs):
+        """Schedule function(*args, **kwargs) under the concurrency limit of the endpoint"""
+        future = self._executor.submit(self._run, endpoint, function, args, kwargs)
+        self._futures.append(future)
+        return future
+
+    def wait_all(self):
+        """Wait for every submitted task and return their results in submission order.
+
+        Raises:
+            Exception: the first error raised by a task, after logging how many tasks failed
+        """
+        futures, self._futures = self._futures, []
+        wait(futures)
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            logger.error(f"{len(errors)} of {len(futures)} hauler requests failed, first error: {errors[0]}")
+            raise errors[0]
+        return [future.result() for future in futures]
@@ -1,7 +1,18 @@
 import yaml
 import lib.dscc.data_panorama.data_collector.common.restClient as restClinet
+from lib.dscc.data_panorama.data_collector.common.throttle import TokenBucket
 import datetime
 import os
+import threading
+
+DEFAULT_HAULER_CONFIG = {
+    "max_workers": 32,
+    "requests_per_second": 50,
+    "burst": 50,
+    "endpoint_limits": {},
+}
+_hauler_config = None
+_hauler_config_lock = threading.Lock()
 
 
 def read_yaml():
@@ -10,6 +21,25 @@ def read_yaml():
     return acc_config
 
 
+def configure_hauler():
+    """HAULER settings of the config file (defaults for the missing ones).
+
+    The first call also sets up the shared rest client session and rate limiter, so the dt1 and dt2 collectors
+    share one request budget.
+    """
+    global _hauler_config
+    with _hauler_config_lock:
+        if _hauler_config is None:
+            hauler_config = {**DEFAULT_HAULER_CONFIG, **(read_yaml().get("HAULER") or {})}
+            # dt1 and dt2 collectors run at the same time, each with max_workers threads
+            restClinet.configure(
+                pool_size=2 * hauler_config["max_workers"],
+                rate_limiter=TokenBucket(hauler_config["requests_per_second"], hauler_config["burst"]),
+            )
+            _hauler_config = hauler_config
+    return _hauler_config
+
+
 def getAccessToken():
     url = f"https://sso.common.cloud.hpe.com/as/token.oauth2"
     yaml_config = read_yaml()
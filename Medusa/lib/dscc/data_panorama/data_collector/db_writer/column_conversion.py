@@ -0,0 +1,95 @@
+"""Vectorized column conversions used while building the storage tables.
+
+Conversions keep the columns numeric so the tables can be built and concatenated cheaply.
+Size columns which are stored as text in the aggregated DB are formatted once, at export, with format_size_columns().
+"""
+
+import numpy as np
+import pandas as pd
+
+BYTES_IN_MIB = 1024**2
+
+# Above this value float64 can not represent every integer, so fall back to numpy's positional formatting
+_MAX_EXACT_INT = 2**53
+
+
+def _as_whole_numbers(sizes: pd.Series) -> pd.Series:
+    """Use a nullable integer dtype when every size is a whole number.
+
+    A float column (or an int column which gets NaN from a left merge) would turn the raw integer sizes of the other
+    device type into floats when the tables are concatenated, which changes how they are written to the aggregated DB.
+    """
+    if sizes.dtype.kind in "iu":
+        return sizes.astype("Int64")
+    if sizes.dtype.kind != "f":
+        return sizes
+    values = sizes.to_numpy()
+    present = ~np.isnan(values)
+    if (np.abs(values[present]) < _MAX_EXACT_INT).all() and (np.trunc(values[present]) == values[present]).all():
+        return sizes.astype("Int64")
+    return sizes
+
+
+def mib_to_bytes(size_mib: pd.Series) -> pd.Series:
+    """Convert a MiB column to bytes, keeping it numeric"""
+    return _as_whole_numbers(pd.to_numeric(size_mib) * BYTES_IN_MIB)
+
+
+def bytes_to_mib(size_bytes: pd.Series) -> pd.Series:
+    """Convert a bytes column to whole MiB (same rounding as round(int(bytes) / 1024**2)), keeping it numeric"""
+    return _as_whole_numbers(np.round(np.trunc(pd.to_numeric(size_bytes)) / BYTES_IN_MIB))
+
+
+def provision_type(thin_provisioned: pd.Series) -> pd.Series:
+    """thin / thick provision type from a thin provisioned flag column"""
+    return pd.Series(np.where(thin_provisioned == True, "thin", "thick"), index=thin_provisioned.index)  # noqa: E712
+
+
+def snap_type(is_unmanaged: pd.Series) -> pd.Series:
+    """periodic / adhoc snapshot type from an unmanaged flag column"""
+    return pd.Series(np.where(is_unmanaged.astype(bool), "periodic", "adhoc"), index=is_unmanaged.index)
+
+
+def format_size_column(sizes: pd.Series) -> pd.Series:
+    """Format a numeric size column as np.format_float_positional(value, trim="-") strings.
+
+    Whole numbers (the common case) are formatted in bulk through int64, anything else goes through numpy.
+    Missing values are kept as missing.
+    """
+    if sizes.dtype == object:
+        sizes = pd.to_numeric(sizes, errors="coerce").where(sizes.notna())
+    values = sizes.to_numpy(dtype="float64", na_value=np.nan)
+    formatted = pd.Series(None, index=sizes.index, dtype=object)
+
+    missing = np.isnan(values)
+    whole = ~missing & (np.abs(values) < _MAX_EXACT_INT) & (np.trunc(values) == values)
+    formatted[whole] = values[whole].astype("int64").astype(str)
+
+    other = ~missing & ~whole
+    if other.any():
+        formatted[other] = [np.format_float_positional(value, trim="-") for value in values[other]]
+    return formatted
+
+
+def format_size_columns(dataframe: pd.DataFrame, row_masks: dict) -> pd.DataFrame:
+    """Returns a copy of the dataframe with the size columns formatted for export.
+
+    Args:
+        dataframe (DataFrame): table with numeric size columns
+        row_masks (dict): column name -> boolean array of the rows to format. Other rows keep their raw value.
+
+    Returns:
+        DataFrame: formatted copy, or the dataframe itself when there is nothing to format
+    """
+    row_masks = {column: mask for column, mask in row_masks.items() if column in dataframe and np.any(mask)}
+    if not row_masks:
+        return dataframe
+    formatted_df = dataframe.copy()
+    for column, mask in row_masks.items():
+        if np.all(mask):
+            formatted_df[column] = format_size_column(formatted_df[column])
+        else:
+            values = formatted_df[column].astype(object)
+            values[mask] = format_size_column(formatted_df.loc[mask, column])
+            formatted_df[column] = values
+    return formatted_df
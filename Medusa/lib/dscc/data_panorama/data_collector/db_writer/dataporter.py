@@ -2,15 +2,49 @@ import json
 import logging
 import os
 import pathlib
-import pandas as pd
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+import pandas as pd
 
-import sqlalchemy
+from lib.dscc.data_panorama.data_collector.db_writer.column_conversion import (
+    bytes_to_mib,
+    format_size_columns,
+    mib_to_bytes,
+    provision_type,
+    snap_type,
+)
+from lib.dscc.data_panorama.data_collector.db_writer.sqlite_writer import DEFAULT_CHUNK_SIZE, AggregatedDBWriter
 
 # from lib.platform.storage_array.ssh_connection import SshConnection
 
 logger = logging.getLogger()
 
+# Size columns are kept numeric while the tables are built. For each table, the columns below are written as text
+# for the rows of the given device type, the same way np.format_float_positional() formatted them.
+EXPORT_SIZE_COLUMNS = {
+    "volume_table": {
+        "deviceType1": ["volsize", "usedsizeBytes"],
+        "deviceType2": ["volsizeMiB", "usedsize"],
+    },
+    "application_table": {
+        "deviceType1": ["volumeTotalSizeBytes", "volumeUsageBytes"],
+        "deviceType2": ["volumeTotalSizeMiB", "volumeUsedSizeMiB"],
+    },
+    "volusage_table": {
+        "deviceType1": ["volumesize", "usedsizeBytes", "arrtotalsizeBytes", "arrtotalusedBytes"],
+        "deviceType2": ["volumesizeMiB", "usedsize", "arrtotalsize", "arrtotalused"],
+    },
+    "snapshot_table": {
+        "deviceType1": ["snapsizeBytes"],
+        "deviceType2": ["snapMiB"],
+    },
+    "sys_inventory_table": {
+        "deviceType1": ["arrtotalused", "arrusablecapacity", "storagesystotalused", "storagesysusablecapacity"],
+    },
+}
+
 
 class StorageTables:
     """Tables required to create mock API response will be generated.
@@ -28,6 +62,61 @@ class StorageTables:
         self.volume_performance_table = pd.DataFrame()
         self.snapshot_table = pd.DataFrame()
         self.cost_table = pd.DataFrame()
+        # Device type of the rows appended to each table, as (row count, device type) in append order
+        self._table_segments = defaultdict(list)
+        self.failed_collections = []
+        self.ingested_collections = []
+
+    def _append_rows(self, table_name, rows):
+        """Concatenate the rows generated from the current collection to the table"""
+        if rows is None:
+            return
+        setattr(self, table_name, pd.concat([getattr(self, table_name), rows], ignore_index=True))
+        self._table_segments[table_name].append((len(rows), getattr(self, "_device_type", None)))
+
+    def _append_batches(self, table_name, batches):
+        """Concatenate the rows generated from several collections to the table at once
+
+        Args:
+            table_name (str): StorageTables attribute name
+            batches (list): (device type, rows) of each collection, in collection order
+        """
+        batches = [(device_type, rows) for device_type, rows in batches if rows is not None]
+        if not batches:
+            return
+        setattr(
+            self,
+            table_name,
+            pd.concat([getattr(self, table_name)] + [rows for _, rows in batches], ignore_index=True),
+        )
+        self._table_segments[table_name].extend((len(rows), device_type) for device_type, rows in batches)
+
+    def _get_export_size_masks(self, table_name):
+        """Rows of each size column which are exported as text, based on the device type of the rows"""
+        size_columns = EXPORT_SIZE_COLUMNS.get(table_name, {})
+        segments = self._table_segments[table_name]
+        row_device_types = np.repeat([device_type for _, device_type in segments], [rows for rows, _ in segments])
+        if len(row_device_types) != len(getattr(self, table_name)):
+            raise Exception(f"Rows of {table_name} were not added through _append_rows")
+        masks = {}
+        for device_type, columns in size_columns.items():
+            for column in columns:
+                masks[column] = masks.get(column, False) | (row_device_types == device_type)
+        return masks
+
+    def export_table(self, table_name):
+        """Returns the table with its size columns formatted the way they are stored in the aggregated DB
+
+        Args:
+            table_name (str): StorageTables attribute name, e.g. volume_table
+
+        Returns:
+            DataFrame: table ready to be written
+        """
+        table = getattr(self, table_name)
+        if table_name not in EXPORT_SIZE_COLUMNS or table.empty:
+            return table
+        return format_size_columns(table, self._get_export_size_masks(table_name))
 
     def _get_collection_json_files(self, mock_dir):
         """From mock directory get all the mock collection json files
@@ -63,10 +152,16 @@ class StorageTables:
 
         return latest_collection_mock_files
 
-    def create_table_from_multiple_collection(self, mock_dir):
+    def create_table_from_multiple_collection(self, mock_dir, workers=1, skip_files=None):
         """Tables from raw data (json) will be created.
         Selected fields required for REST API response will be created as tables.
 
+        Args:
+            mock_dir (str): mock data directory with all the collections
+            workers (int, optional): processes used to parse the collections for the volume usage and performance
+                tables. Defaults to 1, which parses them in this process.
+            skip_files (set, optional): collection files (absolute paths) already loaded in the volume usage and
+                performance tables
         """
         # Tables like Volume,Snapshot,Clone and etc will be created from latest collection.
         latest_collection = self._get_latest_collection_files(mock_dir)
@@ -74,25 +169,22 @@ class StorageTables:
             try:
                 self.create_tables_from_latest_collection(mock_file)
             except Exception as e:
-                print(e)
+                logger.error(f"Latest collection {mock_file} could not be processed: {e!r}")
+                self.failed_collections.append(str(mock_file))
 
         # Volume usage and performance tables will be created from all collection as Trend graphs required to precess
         # all collection details
-        mock_file_list = self._get_collection_json_files(mock_dir)
-        for mock_file in mock_file_list:
-            try:
-                print(f" ================== Processing collection {mock_file} ===============================")
-                self.create_volusage_perf_tables(mock_file)
-                print(f" ================== Collection {mock_file} is completed ===============================")
-            except Exception as e:
-                print(e)
+        mock_file_list = [str(mock_file.resolve()) for mock_file in self._get_collection_json_files(mock_dir)]
+        if skip_files:
+            mock_file_list = [mock_file for mock_file in mock_file_list if mock_file not in skip_files]
+        self.ingest_volusage_perf_tables(mock_file_list, workers=workers)
 
         # Cost info table will be created at last
         cost_info_file_list = self._get_cost_info_files(mock_dir)
         for cost_file in cost_info_file_list:
             print(f" ================== Processing cost info {cost_file} ===============================")
             cost_rows = self.generate_cost_table(cost_file)
-            self.cost_table = pd.concat([self.cost_table, cost_rows], ignore_index=True)
+            self._append_rows("cost_table", cost_rows)
             print(f" ================== cost info {cost_file} processing completed ===============================")
 
     def create_tables_from_latest_collection(self, mock_file):
@@ -109,17 +201,17 @@ class StorageTables:
             return None
         # get rows from each collection and append to appropriate tables
         sys_inventory_rows = self.generate_inventory_table()
-        self.sys_inventory_table = pd.concat([self.sys_inventory_table, sys_inventory_rows], ignore_index=True)
+        self._append_rows("sys_inventory_table", sys_inventory_rows)
 
         vol_rows = self.generate_volume_table()
-        self.volume_table = pd.concat([self.volume_table, vol_rows], ignore_index=True)
+        self._append_rows("volume_table", vol_rows)
 
         clone_rows = self.generate_clone_table()
-        self.clone_table = pd.concat([self.clone_table, clone_rows], ignore_index=True)
+        self._append_rows("clone_table", clone_rows)
 
         # spark app data using spark clone data ,so calling after spark_clone_data
         app_rows = self.generate_app_table(clone_rows)
-        self.application_table = pd.concat([self.application_table, app_rows], ignore_index=True)
+        self._append_rows("application_table", app_rows)
 
         vol_df = vol_rows[["id", "arrid"]]
         if type(clone_rows):
@@ -130,7 +222,7 @@ class StorageTables:
         vol_clone_df = pd.concat([vol_df, clone_df], ignore_index=True)
 
         snap_rows = self.generate_snap_table(vol_clone_df)
-        self.snapshot_table = pd.concat([self.snapshot_table, snap_rows], ignore_index=True)
+        self._append_rows("snapshot_table", snap_rows)
 
     def _get_common_fields(self, mock_file):
         with open(mock_file) as f:
@@ -160,10 +252,51 @@ class StorageTables:
         if len(self._mock_json_dict["Systems"]) == 0:
             return None
         vol_usage_rows = self.generate_volume_usage_table()
-        self.volusage_table = pd.concat([self.volusage_table, vol_usage_rows], ignore_index=True)
+        self._append_rows("volusage_table", vol_usage_rows)
 
         vol_perf_rows = self.generate_vol_performance_table()
-        self.volume_performance_table = pd.concat([self.volume_performance_table, vol_perf_rows], ignore_index=True)
+        self._append_rows("volume_performance_table", vol_perf_rows)
+
+    def ingest_volusage_perf_tables(self, mock_file_list, workers=1):
+        """Volume usage and performance tables will be created from all the given collections.
+
+        Collections are parsed in a process pool when workers > 1. Each worker holds only the collection it is
+        parsing and sends back its volume usage / performance rows, which are collected in collection order and
+        concatenated to the tables once at the end.
+        Collections which fail are logged and listed in failed_collections.
+
+        Args:
+            mock_file_list (list): collection json files
+            workers (int, optional): number of processes. Defaults to 1.
+        """
+        volusage_batches = []
+        volperf_batches = []
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                self._collect_volusage_perf_rows(
+                    executor.map(_read_volusage_perf_rows, mock_file_list), volusage_batches, volperf_batches
+                )
+        else:
+            self._collect_volusage_perf_rows(
+                map(_read_volusage_perf_rows, mock_file_list), volusage_batches, volperf_batches
+            )
+
+        self._append_batches("volusage_table", volusage_batches)
+        self._append_batches("volume_performance_table", volperf_batches)
+
+    def _collect_volusage_perf_rows(self, results, volusage_batches, volperf_batches):
+        for mock_file, device_type, vol_usage_rows, vol_perf_rows, error in results:
+            if error:
+                logger.error(f"Collection {mock_file} could not be processed: {error}")
+                self.failed_collections.append(mock_file)
+                continue
+            self.ingested_collections.append(mock_file)
+            if device_type is None:
+                # EOC collection or a collection without systems
+                continue
+            volusage_batches.append((device_type, vol_usage_rows))
+            volperf_batches.append((device_type, vol_perf_rows))
+            logger.info(f"Collection {mock_file} is completed")
 
     def create_all_tables_from_mock_file(self, mock_file):
         """From single raw data json file ,it will create table of records.
@@ -178,17 +311,17 @@ class StorageTables:
             return None
         # get rows from each collection and append to appropriate tables
         sys_inventory_rows = self.generate_inventory_table()
-        self.sys_inventory_table = pd.concat([self.sys_inventory_table, sys_inventory_rows], ignore_index=True)
+        self._append_rows("sys_inventory_table", sys_inventory_rows)
 
         vol_rows = self.generate_volume_table()
-        self.volume_table = pd.concat([self.volume_table, vol_rows], ignore_index=True)
+        self._append_rows("volume_table", vol_rows)
 
         clone_rows = self.generate_clone_table()
-        self.clone_table = pd.concat([self.clone_table, clone_rows], ignore_index=True)
+        self._append_rows("clone_table", clone_rows)
 
         # spark app data using spark clone data ,so calling after spark_clone_data
         app_rows = self.generate_app_table(clone_rows)
-        self.application_table = pd.concat([self.application_table, app_rows], ignore_index=True)
+        self._append_rows("application_table", app_rows)
 
         vol_df = vol_rows[["id", "arrid"]]
         clone_df = clone_rows[["cloneid", "arrid"]]
@@ -196,33 +329,13 @@ class StorageTables:
         vol_clone_df = pd.concat([vol_df, clone_df], ignore_index=True)
 
         snap_rows = self.generate_snap_table(vol_clone_df)
-        self.snapshot_table = pd.concat([self.snapshot_table, snap_rows], ignore_index=True)
+        self._append_rows("snapshot_table", snap_rows)
 
         vol_usage_rows = self.generate_volume_usage_table()
-        self.volusage_table = pd.concat([self.volusage_table, vol_usage_rows], ignore_index=True)
+        self._append_rows("volusage_table", vol_usage_rows)
 
         vol_perf_rows = self.generate_vol_performance_table()
-        self.volume_performance_table = pd.concat([self.volume_performance_table, vol_perf_rows], ignore_index=True)
-
-    def _convert_to_bytes(self, size_mb):
-        size_bytes = size_mb * 1024**2
-        return np.format_float_positional(size_bytes, trim="-")
-
-    def _convert_to_mb(self, size_bytes):
-        """Convert from bytes to Megabytes
-
-        Returns:
-            _type_: _description_
-        """
-        size_mb = round(int(size_bytes) / 1024**2)
-        return np.format_float_positional(size_mb, trim="-")
-
-    def _get_provision_type(self, thin_provision):
-        """Get thin or thick provision value"""
-        return "thin" if thin_provision == True else "thick"
-
-    def _get_snap_type(self, is_unmanaged):
-        return "periodic" if is_unmanaged else "adhoc"
+        self._append_rows("volume_performance_table", vol_perf_rows)
 
     def _generate_volume_columns(self):
         """Columns fetched for Volume table from both the device types
@@ -243,8 +356,8 @@ class StorageTables:
             vol_data_df["volumename"] = raw_df["name"]
 
             if self._device_type == "deviceType1":
-                vol_data_df["volumeTotalSizeBytes"] = raw_df["sizeMiB"].apply(self._convert_to_bytes)
-                vol_data_df["volumeUsageBytes"] = raw_df["usedSizeMiB"].apply(self._convert_to_bytes)
+                vol_data_df["volumeTotalSizeBytes"] = mib_to_bytes(raw_df["sizeMiB"])
+                vol_data_df["volumeUsageBytes"] = mib_to_bytes(raw_df["usedSizeMiB"])
                 vol_data_df["volumeTotalSizeMiB"] = raw_df["sizeMiB"]
                 vol_data_df["volumeUsedSizeMiB"] = raw_df["usedSizeMiB"]
                 vol_data_df["volumecreationtime"] = raw_df["creationTime.ms"]
@@ -252,8 +365,8 @@ class StorageTables:
             else:
                 vol_data_df["volumeTotalSizeBytes"] = raw_df["size"]
                 vol_data_df["volumeUsageBytes"] = raw_df["total_usage_bytes"]
-                vol_data_df["volumeTotalSizeMiB"] = raw_df["size"].apply(self._convert_to_mb)
-                vol_data_df["volumeUsedSizeMiB"] = raw_df["total_usage_bytes"].apply(self._convert_to_mb)
+                vol_data_df["volumeTotalSizeMiB"] = bytes_to_mib(raw_df["size"])
+                vol_data_df["volumeUsedSizeMiB"] = bytes_to_mib(raw_df["total_usage_bytes"])
                 vol_data_df["volumecreationtime"] = raw_df["creation_time"]
                 vol_data_df["volumeexpiresat"] = 0  # No expiration value is there for volume at dev type2(nimble)
 
@@ -284,11 +397,11 @@ class StorageTables:
                 raw_df = raw_df[raw_df["policy.system"] == False]
                 vol_data_df = raw_df[["id", "name"]]
                 vol_data_df["volumeId"] = raw_df["volumeId"]
-                vol_data_df["volsize"] = raw_df["sizeMiB"].apply(self._convert_to_bytes)
-                vol_data_df["usedsizeBytes"] = raw_df["usedSizeMiB"].apply(self._convert_to_bytes)
+                vol_data_df["volsize"] = mib_to_bytes(raw_df["sizeMiB"])
+                vol_data_df["usedsizeBytes"] = mib_to_bytes(raw_df["usedSizeMiB"])
                 vol_data_df["volsizeMiB"] = raw_df["sizeMiB"]
                 vol_data_df["usedsize"] = raw_df["usedSizeMiB"]
-                vol_data_df["provisionType"] = raw_df["thinProvisioned"].apply(self._get_provision_type)
+                vol_data_df["provisionType"] = provision_type(raw_df["thinProvisioned"])
                 vol_data_df["creationTime"] = pd.to_datetime(raw_df["creationTime.ms"], unit="ms")
             else:
                 vol_only = raw_df[(raw_df["clone"] == False)]  # Do not clone .
@@ -296,9 +409,9 @@ class StorageTables:
                 vol_data_df["volumeId"] = vol_only["id"]
                 vol_data_df["volsize"] = vol_only["size"]
                 vol_data_df["usedsizeBytes"] = vol_only["vol_usage_compressed_bytes"]
-                vol_data_df["volsizeMiB"] = vol_only["size"].apply(self._convert_to_mb)
-                vol_data_df["usedsize"] = vol_only["vol_usage_compressed_bytes"].apply(self._convert_to_mb)
-                vol_data_df["provisionType"] = vol_only["thinly_provisioned"].apply(self._get_provision_type)
+                vol_data_df["volsizeMiB"] = bytes_to_mib(vol_only["size"])
+                vol_data_df["usedsize"] = bytes_to_mib(vol_only["vol_usage_compressed_bytes"])
+                vol_data_df["provisionType"] = provision_type(vol_only["thinly_provisioned"])
                 vol_data_df["creationTime"] = pd.to_datetime(vol_only["creation_time"], unit="ms")
                 vol_data_df["num_snaps"] = vol_only["num_snaps"]
                 vol_data_df["parent_vol_name"] = vol_only["parent_vol_name"]
@@ -340,21 +453,19 @@ class StorageTables:
                 continue
             vol_usage_data_df = raw_volumes_df[["id", "name"]]
             if self._device_type == "deviceType1":
-                vol_usage_data_df["volumesize"] = raw_volumes_df["sizeMiB"].apply(self._convert_to_bytes)
-                vol_usage_data_df["usedsizeBytes"] = raw_volumes_df["usedSizeMiB"].apply(self._convert_to_bytes)
+                vol_usage_data_df["volumesize"] = mib_to_bytes(raw_volumes_df["sizeMiB"])
+                vol_usage_data_df["usedsizeBytes"] = mib_to_bytes(raw_volumes_df["usedSizeMiB"])
                 vol_usage_data_df["volumeId"] = raw_volumes_df["volumeId"]
                 vol_usage_data_df["volumesizeMiB"] = raw_volumes_df["sizeMiB"]
                 vol_usage_data_df["usedsize"] = raw_volumes_df["usedSizeMiB"]
-                vol_usage_data_df["provisiontype"] = raw_volumes_df["thinProvisioned"].apply(self._get_provision_type)
+                vol_usage_data_df["provisiontype"] = provision_type(raw_volumes_df["thinProvisioned"])
             else:
                 vol_usage_data_df["volumesize"] = raw_volumes_df["size"]
                 vol_usage_data_df["usedsizeBytes"] = raw_volumes_df["total_usage_bytes"]
                 vol_usage_data_df["volumeId"] = raw_volumes_df["id"]
-                vol_usage_data_df["volumesizeMiB"] = raw_volumes_df["size"].apply(self._convert_to_mb)
-                vol_usage_data_df["usedsize"] = raw_volumes_df["total_usage_bytes"].apply(self._convert_to_mb)
-                vol_usage_data_df["provisiontype"] = raw_volumes_df["thinly_provisioned"].apply(
-                    self._get_provision_type
-                )
+                vol_usage_data_df["volumesizeMiB"] = bytes_to_mib(raw_volumes_df["size"])
+                vol_usage_data_df["usedsize"] = bytes_to_mib(raw_volumes_df["total_usage_bytes"])
+                vol_usage_data_df["provisiontype"] = provision_type(raw_volumes_df["thinly_provisioned"])
                 # vol_data_df['avgiops'] =
 
             # Add below fields for all volume usage elements
@@ -393,7 +504,7 @@ class StorageTables:
             # print(cloned_volumes_df)
 
             clone_data_df["cloneparentid"] = cloned_volumes_df["parent_vol_id"]
-            clone_data_df["provisiontype"] = cloned_volumes_df["thinly_provisioned"].apply(self._get_provision_type)
+            clone_data_df["provisiontype"] = provision_type(cloned_volumes_df["thinly_provisioned"])
             clone_data_df["cloneid"] = cloned_volumes_df["id"]
             clone_data_df["clonevolumeid"] = cloned_volumes_df[
                 "id"
@@ -442,8 +553,8 @@ class StorageTables:
             arr_capacity_df["arrid"] = arrays_df["id"]
             arr_capacity_df["arrtotalsizeBytes"] = arrays_df["usable_capacity_bytes"]
             arr_capacity_df["arrtotalusedBytes"] = arrays_df["usage"]
-            arr_capacity_df["arrtotalsize"] = arrays_df["usable_capacity_bytes"].apply(self._convert_to_mb)
-            arr_capacity_df["arrtotalused"] = arrays_df["usage"].apply(self._convert_to_mb)
+            arr_capacity_df["arrtotalsize"] = bytes_to_mib(arrays_df["usable_capacity_bytes"])
+            arr_capacity_df["arrtotalused"] = bytes_to_mib(arrays_df["usage"])
         else:
             systems_capacity_list_dict = mock_data["SystemCapacity"]
             sys_capacity_df = pd.json_normalize(systems_capacity_list_dict, max_level=2)
@@ -452,12 +563,8 @@ class StorageTables:
             arr_capacity_df["arrid"] = sys_capacity_df.id
             arr_capacity_df["arrtotalsize"] = sys_capacity_df["capacityByTier.usableCapacity"]
             arr_capacity_df["arrtotalused"] = sys_capacity_df["capacityByTier.totalUsed"]
-            arr_capacity_df["arrtotalsizeBytes"] = sys_capacity_df["capacityByTier.usableCapacity"].apply(
-                self._convert_to_bytes
-            )
-            arr_capacity_df["arrtotalusedBytes"] = sys_capacity_df["capacityByTier.totalUsed"].apply(
-                self._convert_to_bytes
-            )
+            arr_capacity_df["arrtotalsizeBytes"] = mib_to_bytes(sys_capacity_df["capacityByTier.usableCapacity"])
+            arr_capacity_df["arrtotalusedBytes"] = mib_to_bytes(sys_capacity_df["capacityByTier.totalUsed"])
         return arr_capacity_df
 
     def generate_vol_performance_table(self):
@@ -565,6 +672,21 @@ class StorageTables:
 
         return spark_app_data
 
+    def _get_dt1_snap_time(self, snap_raw_df, time_field, volume_ids, first_snap_of_volume):
+        """Expiration/retention time of dt1 snapshots.
+
+        The time is taken for all the snapshots of a volume only when the first snapshot of that volume has it set,
+        otherwise it is None.
+        """
+        snap_time = pd.Series(None, index=snap_raw_df.index, dtype=object)
+        if time_field not in snap_raw_df:
+            return snap_time
+        volumes_with_time = volume_ids[first_snap_of_volume & snap_raw_df[time_field].notnull().to_numpy()]
+        rows_with_time = np.isin(volume_ids, volumes_with_time)
+        if rows_with_time.any():
+            snap_time[rows_with_time] = pd.to_datetime(snap_raw_df.loc[rows_with_time, f"{time_field}.Ms"], unit="ms")
+        return snap_time
+
     def _add_common_fields(self, appset_df):
         appset_df["collectionstarttime"] = self._common_fields["collection_start_time"]
         appset_df["collectionendtime"] = self._common_fields["collection_end_time"]
@@ -596,60 +718,57 @@ class StorageTables:
             "creationtime": "2021-07-30 06:12:02",
             "custid": "03bf4f5020022edecad3a7642bfb5391"
         """
-        snap_data_list = []
         snapshots = self._mock_json_dict["Snapshots"]
-        # For device 1
-        for vol_id, snap_list in snapshots.items():
-            snap_raw_df = pd.json_normalize(snap_list, max_level=2)
-            snap_data_df = pd.DataFrame()
-            if self._device_type == "deviceType1":
-                no_snapshots = snap_raw_df.empty
-                if no_snapshots:
-                    # In case of device type 1 there is no snapshot so return it immediately with empty dataframe
-                    # empty dataframe is return as expected output is dataframe or list of dataframe
-                    return snap_data_df
-                # snap_data_df['arrid'] = snap_raw_df['systemId']
-                snap_data_df["snapMiB"] = snap_raw_df["sizeMiB"]
-                snap_data_df["snapsizeBytes"] = snap_raw_df["sizeMiB"].apply(self._convert_to_bytes)
-                snap_data_df["snaptype"] = "adhoc"
-                snap_data_df["expirationtime"] = None
-                if "expirationTime" in snap_raw_df:
-                    if not snap_raw_df["expirationTime"].isnull().values[0]:
-                        snap_data_df["expirationtime"] = pd.to_datetime(snap_raw_df["expirationTime.Ms"], unit="ms")
-
-                snap_data_df["creationtime"] = pd.to_datetime(snap_raw_df["creationTime.Ms"], unit="ms")
-
-                snap_data_df["retentiontime"] = None
-                if "retentionTime" in snap_raw_df:
-                    if not snap_raw_df["retentionTime"].isnull().values[0]:
-                        snap_data_df["retentiontime"] = pd.to_datetime(snap_raw_df["retentionTime.Ms"], unit="ms")
-            else:  # dt2
-                snap_data_df["snapsizeBytes"] = snap_raw_df["size"]
-                snap_data_df["snapMiB"] = snap_raw_df["size"].apply(self._convert_to_mb)
-                snap_data_df["snaptype"] = snap_raw_df["is_unmanaged"].apply(self._get_snap_type)
-                # tmp_df = pd.DataFrame()
-                snap_data_df["creationtime"] = pd.to_datetime(snap_raw_df["creation_time"], unit="s")
-                snap_data_df["expirationtime"] = pd.to_datetime(snap_raw_df["expiry_time"], unit="s")
-                snap_data_df["retentiontime"] = snap_data_df["expirationtime"]
-
-            snap_data_df["snapname"] = snap_raw_df["name"]
-            snap_data_df["snapid"] = snap_raw_df["id"]
-            # snap_data_df["vol_name"] = snap_raw_df["vol_name"]
-            snap_data_df["volumeId"] = vol_id
-            snap_data_df["devicetype"] = self._device_type
-
-            self._add_common_fields(snap_data_df)
-
-            snap_data_list.append(snap_data_df)
-
-        snap_data_list = pd.concat(snap_data_list, ignore_index=True)
+        snap_counts = [len(snap_list) for snap_list in snapshots.values()]
+        if self._device_type == "deviceType1" and 0 in snap_counts:
+            # In case of device type 1 there is no snapshot so return it immediately with empty dataframe
+            # empty dataframe is return as expected output is dataframe or list of dataframe
+            return pd.DataFrame()
+        if sum(snap_counts) == 0:
+            return pd.DataFrame()
+        # Normalize the snapshots of all the volumes at once, volume id of each row is repeated from the dict keys
+        snap_raw_df = pd.json_normalize(
+            [snap for snap_list in snapshots.values() for snap in snap_list],
+            max_level=2,
+        )
+        volume_ids = np.repeat(list(snapshots.keys()), snap_counts)
+        snap_data_df = pd.DataFrame(index=snap_raw_df.index)
+        if self._device_type == "deviceType1":
+            # snap_data_df['arrid'] = snap_raw_df['systemId']
+            snap_data_df["snapMiB"] = snap_raw_df["sizeMiB"]
+            snap_data_df["snapsizeBytes"] = mib_to_bytes(snap_raw_df["sizeMiB"])
+            snap_data_df["snaptype"] = "adhoc"
+            first_snap_of_volume = ~pd.Series(volume_ids).duplicated().to_numpy()
+            snap_data_df["expirationtime"] = self._get_dt1_snap_time(
+                snap_raw_df, "expirationTime", volume_ids, first_snap_of_volume
+            )
+            snap_data_df["creationtime"] = pd.to_datetime(snap_raw_df["creationTime.Ms"], unit="ms")
+            snap_data_df["retentiontime"] = self._get_dt1_snap_time(
+                snap_raw_df, "retentionTime", volume_ids, first_snap_of_volume
+            )
+        else:  # dt2
+            snap_data_df["snapsizeBytes"] = snap_raw_df["size"]
+            snap_data_df["snapMiB"] = bytes_to_mib(snap_raw_df["size"])
+            snap_data_df["snaptype"] = snap_type(snap_raw_df["is_unmanaged"])
+            snap_data_df["creationtime"] = pd.to_datetime(snap_raw_df["creation_time"], unit="s")
+            snap_data_df["expirationtime"] = pd.to_datetime(snap_raw_df["expiry_time"], unit="s")
+            snap_data_df["retentiontime"] = snap_data_df["expirationtime"]
+
+        snap_data_df["snapname"] = snap_raw_df["name"]
+        snap_data_df["snapid"] = snap_raw_df["id"]
+        # snap_data_df["vol_name"] = snap_raw_df["vol_name"]
+        snap_data_df["volumeId"] = volume_ids
+        snap_data_df["devicetype"] = self._device_type
+
+        self._add_common_fields(snap_data_df)
+
         # To fetch array Id
         volume_subset = volume_dataframe[["id", "arrid"]]
         # volume_subset.rename(columns = {'arrayId':'arrid'}, inplace = True)
         volume_subset.rename(columns={"id": "volumeId"}, inplace=True)
         # With the snapshot data append array id. Inner is used because only when volume id is there ,we need to get
         # array id
-        snapdata_final = snap_data_list.merge(volume_subset, on="volumeId", how="left")
+        snapdata_final = snap_data_df.merge(volume_subset, on="volumeId", how="left")
 
         return snapdata_final
 
@@ -733,7 +852,7 @@ class StorageTables:
                 ]
             )
             .astype(int)
-            .apply(self._convert_to_bytes)
+            .pipe(mib_to_bytes)
         )
         system_df["arrusablecapacity"] = (
             (
@@ -743,7 +862,7 @@ class StorageTables:
                 ]
             )
             .astype(int)
-            .apply(self._convert_to_bytes)
+            .pipe(mib_to_bytes)
         )
         system_df["storagesystotalused"] = system_df["arrtotalused"]
         system_df["storagesysusablecapacity"] = system_df["arrusablecapacity"]
@@ -792,20 +911,39 @@ class StorageTables:
         Returns:
             Pandas.dataframe: Snap count dataframe
         """
-        snap_df_list = []
-        for vol_id, snap_list in snap_dict.items():
-            snap_raw_df = pd.json_normalize(snap_list)
-            data = {
-                "volid": [vol_id],
-                "volumesnapcount": [snap_raw_df.shape[0]],
-            }  # Each row under a snapshots.
-            snap_df = pd.DataFrame(data)
-            snap_df_list.append(snap_df)
-            # print(snap_df)
-        snap_count_df = pd.concat(snap_df_list, ignore_index=True)
+        # Each row under a snapshots.
+        snap_count_df = pd.DataFrame(
+            {
+                "volid": list(snap_dict.keys()),
+                "volumesnapcount": [len(snap_list) for snap_list in snap_dict.values()],
+            }
+        )
         return snap_count_df
 
 
+def _read_volusage_perf_rows(mock_file):
+    """Volume usage and performance rows of one collection. Runs in the ingest worker processes.
+
+    Returns:
+        tuple: (mock_file, device_type, volume usage rows, volume performance rows, error)
+    """
+    mock_file = str(mock_file)
+    table = StorageTables()
+    try:
+        table._get_common_fields(mock_file)
+        if table._collection_type == "EOC" or len(table._mock_json_dict["Systems"]) == 0:
+            return mock_file, None, None, None, None
+        return (
+            mock_file,
+            table._device_type,
+            table.generate_volume_usage_table(),
+            table.generate_vol_performance_table(),
+            None,
+        )
+    except Exception as e:
+        return mock_file, None, None, None, repr(e)
+
+
 def _convert_to_dict(dataframes):
     converted_dict = dataframes.to_json(orient="table", index=False)
     json_dict = json.loads(converted_dict)
@@ -813,7 +951,9 @@ def _convert_to_dict(dataframes):
     return json_dict["data"]
 
 
-def create_tables_from_collection(mock_dir, db_file="aggregated_db.sqlite"):
+def create_tables_from_collection(
+    mock_dir, db_file="aggregated_db.sqlite", workers=1, append=False, chunk_size=DEFAULT_CHUNK_SIZE
+):
     """Storage tables will be created from given mock data directory.
     Mock data dir contains multiple collection json and a single cost info data file.
     From this data all the tables will be created
@@ -821,15 +961,26 @@ def create_tables_from_collection(mock_dir, db_file="aggregated_db.sqlite"):
     Args:
         mock_dir (_type_): _description_
         outfile (str, optional): _description_. Defaults to "sparkdata.json".
+        workers (int, optional): processes used to parse the collections. Defaults to 1.
+        append (bool, optional): only the collections which are not in db_file yet are added to the volume usage and
+            performance tables. Defaults to False, which rebuilds the whole DB.
+        chunk_size (int, optional): rows per insert batch while writing the DB
     """
 
+    skip_files = set()
+    if append and os.path.exists(db_file):
+        with AggregatedDBWriter(db_file) as writer:
+            skip_files = writer.get_ingested_files()
+
     # For each collection file , get spark tables such as spark_volume_data, spark_vol_usage and etc.
     table = StorageTables()
-    table.create_table_from_multiple_collection(mock_dir)
+    table.create_table_from_multiple_collection(mock_dir, workers=workers, skip_files=skip_files)
+    if table.failed_collections:
+        logger.warning(f"{len(table.failed_collections)} collections were skipped: {table.failed_collections}")
 
     # upload_folder_name = os.path.basename(mock_dir)
     # _write_storage_table_json(outfile, table, upload_folder_name)
-    _create_aggregated_db(table, db_file)
+    _create_aggregated_db(table, db_file, append=append, chunk_size=chunk_size)
 
 
 def generate_spark_table_from_single_file(mock_file, outfile="sparksingledata.json"):
@@ -850,14 +1001,14 @@ def generate_spark_table_from_single_file(mock_file, outfile="sparksingledata.js
 
 
 def _write_storage_table_json(outfile, table, upload_folder_name):
-    spark_vol_data_dict = _convert_to_dict(table.volume_table)
-    spark_clone_data_dict = _convert_to_dict(table.clone_table)
-    spark_perf_data_dict = _convert_to_dict(table.volume_performance_table)
-    spark_volusage_dict = _convert_to_dict(table.volusage_table)
-    spark_appdata_dict = _convert_to_dict(table.application_table)
-    spark_snapdata_dict = _convert_to_dict(table.snapshot_table)
-    spark_inventory_dict = _convert_to_dict(table.sys_inventory_table)
-    spark_cost_dict = _convert_to_dict(table.cost_table)
+    spark_vol_data_dict = _convert_to_dict(table.export_table("volume_table"))
+    spark_clone_data_dict = _convert_to_dict(table.export_table("clone_table"))
+    spark_perf_data_dict = _convert_to_dict(table.export_table("volume_performance_table"))
+    spark_volusage_dict = _convert_to_dict(table.export_table("volusage_table"))
+    spark_appdata_dict = _convert_to_dict(table.export_table("application_table"))
+    spark_snapdata_dict = _convert_to_dict(table.export_table("snapshot_table"))
+    spark_inventory_dict = _convert_to_dict(table.export_table("sys_inventory_table"))
+    spark_cost_dict = _convert_to_dict(table.export_table("cost_table"))
 
     spark_json_table_dict = {}
     spark_json_table_dict["spark_voldata"] = spark_vol_data_dict
@@ -874,31 +1025,43 @@ def _write_storage_table_json(outfile, table, upload_folder_name):
         json.dump(spark_json_table_dict, json_file)
 
 
-def _create_aggregated_db(table: StorageTables, db_file):
-    # out_db_name = f"/mock_aggregated_db.sqlite"
-    engine = sqlalchemy.create_engine("sqlite:///%s" % db_file, execution_options={"sqlite_raw_colnames": True})
-    # conn = engine.connect()
-
-    table.volume_table.to_sql("volume_last_collection", engine, if_exists="replace", index=False)
-    # Create a dictionary mapping storagesysid to dedupe_ratio
-    dedupe_dict = table.sys_inventory_table.set_index("storagesysid")["dedupe_ratio"].to_dict()
-
-    # Add a new column 'dedupe_ratio' to clone_table conditionally
-    table.clone_table["dedupe_ratio"] = table.clone_table["storagesysid"].map(dedupe_dict)
-    table.clone_table["compressedusedbytes_deduped"] = (
-        table.clone_table["compressedusedbytes"] / table.clone_table["dedupe_ratio"]
-    )
-    table.clone_table.to_sql("clone_last_collection", engine, if_exists="replace", index=False)
-
-    sysname_dict = table.sys_inventory_table.set_index("storagesysid")["storagesysname"].to_dict()
-    table.application_table["sysname"] = table.application_table["arrayid"].map(sysname_dict)
-    table.application_table.to_sql("app_last_collection", engine, if_exists="replace", index=False)
-    table.snapshot_table.to_sql("snapshot_last_collection", engine, if_exists="replace", index=False)
-    table.sys_inventory_table.to_sql("system_last_collection", engine, if_exists="replace", index=False)
-    table.volume_performance_table.to_sql("volperf_all_collection", engine, if_exists="replace", index=False)
-    table.volusage_table.to_sql("volusage_all_collection", engine, if_exists="replace", index=False)
-    if not table.cost_table.empty:
-        table.cost_table.to_sql("system_cis", engine, if_exists="replace", index=False)
+def _create_aggregated_db(table: StorageTables, db_file, append=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the storage tables to the aggregated DB.
+
+    Args:
+        table (StorageTables): storage tables
+        db_file (str): sqlite db file
+        append (bool, optional): append the volume usage/performance rows of the new collections to the existing
+            *_all_collection tables instead of replacing them. Last collection tables are always replaced.
+        chunk_size (int, optional): rows per executemany() batch
+    """
+    all_collection_mode = "append" if append else "replace"
+    with AggregatedDBWriter(db_file, chunk_size=chunk_size) as writer:
+        writer.write_table(table.export_table("volume_table"), "volume_last_collection")
+        # Create a dictionary mapping storagesysid to dedupe_ratio
+        dedupe_dict = table.sys_inventory_table.set_index("storagesysid")["dedupe_ratio"].to_dict()
+
+        # Add a new column 'dedupe_ratio' to clone_table conditionally
+        table.clone_table["dedupe_ratio"] = table.clone_table["storagesysid"].map(dedupe_dict)
+        table.clone_table["compressedusedbytes_deduped"] = (
+            table.clone_table["compressedusedbytes"] / table.clone_table["dedupe_ratio"]
+        )
+        writer.write_table(table.export_table("clone_table"), "clone_last_collection")
+
+        sysname_dict = table.sys_inventory_table.set_index("storagesysid")["storagesysname"].to_dict()
+        table.application_table["sysname"] = table.application_table["arrayid"].map(sysname_dict)
+        writer.write_table(table.export_table("application_table"), "app_last_collection")
+        writer.write_table(table.export_table("snapshot_table"), "snapshot_last_collection")
+        writer.write_table(table.export_table("sys_inventory_table"), "system_last_collection")
+        writer.write_table(
+            table.export_table("volume_performance_table"), "volperf_all_collection", if_exists=all_collection_mode
+        )
+        writer.write_table(
+            table.export_table("volusage_table"), "volusage_all_collection", if_exists=all_collection_mode
+        )
+        if not table.cost_table.empty:
+            writer.write_table(table.export_table("cost_table"), "system_cis")
+        writer.add_ingested_files(table.ingested_collections, replace=not append)
 
 
 # def copy_to_remote(
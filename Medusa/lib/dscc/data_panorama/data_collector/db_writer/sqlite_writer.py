@@ -0,0 +1,155 @@
+"""Bulk writer for the aggregated SQLite DB.
+
+Tables are created with the same column types DataFrame.to_sql() would use, then loaded with executemany() in chunks
+inside a single transaction. Indexes on the keys the mock consumption APIs filter on are created after the load.
+"""
+
+import itertools
+import logging
+import sqlite3
+
+import pandas as pd
+import sqlalchemy
+
+logger = logging.getLogger()
+
+DEFAULT_CHUNK_SIZE = 50000
+# Join / filter keys of the aggregated tables
+INDEX_COLUMNS = ["arrid", "id", "collectionId", "custid"]
+# Collection files already loaded into the DB, used by the incremental append mode
+INGESTED_FILES_TABLE = "ingested_collection_files"
+
+# The DB is rebuilt from the collections if a load fails, so durability is traded for load speed
+_PRAGMAS = [
+    "PRAGMA journal_mode=MEMORY",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+]
+# Same text format SQLAlchemy uses for DATETIME columns in SQLite
+_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _quote(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _to_rows(dataframe: pd.DataFrame):
+    """Rows of the dataframe as tuples of sqlite3 compatible values, missing values as None"""
+    columns = []
+    for _, column in dataframe.items():
+        # to_sql() writes datetime columns, and object columns holding only datetimes, as DATETIME text
+        if pd.api.types.is_datetime64_any_dtype(column) or pd.api.types.infer_dtype(column) == "datetime":
+            column = pd.to_datetime(column).dt.strftime(_DATETIME_FORMAT)
+        columns.append(column.astype(object).where(column.notna(), None))
+    return zip(*columns)
+
+
+class AggregatedDBWriter:
+    """Writes DataFrames to the aggregated SQLite DB in a single transaction.
+
+    Usage:
+        with AggregatedDBWriter(db_file) as writer:
+            writer.write_table(volume_df, "volume_last_collection")
+            writer.write_table(volusage_df, "volusage_all_collection", if_exists="append")
+    """
+
+    def __init__(self, db_file, chunk_size=DEFAULT_CHUNK_SIZE, index_columns=INDEX_COLUMNS):
+        self.db_file = db_file
+        self.chunk_size = chunk_size
+        self.index_columns = index_columns
+        self._written_tables = {}
+        self._conn = None
+        # Only used to render CREATE TABLE statements with the to_sql() column types
+        self._engine = sqlalchemy.create_engine("sqlite://")
+
+    def __enter__(self):
+        self._conn = sqlite3.connect(self.db_file, isolation_level=None)
+        for pragma in _PRAGMAS:
+            self._conn.execute(pragma)
+        self._conn.execute("BEGIN")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._create_indexes()
+                self._conn.execute("COMMIT")
+            else:
+                self._conn.execute("ROLLBACK")
+        finally:
+            self._conn.close()
+            self._conn = None
+            self._engine.dispose()
+        return False
+
+    def table_exists(self, table_name):
+        query = "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?"
+        return self._conn.execute(query, (table_name,)).fetchone() is not None
+
+    def _get_table_columns(self, table_name):
+        return [row[1] for row in self._conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
+
+    def _create_table(self, dataframe, table_name):
+        self._conn.execute(pd.io.sql.get_schema(dataframe, table_name, con=self._engine))
+
+    def write_table(self, dataframe: pd.DataFrame, table_name, if_exists="replace"):
+        """Write the dataframe to the table.
+
+        Args:
+            dataframe (DataFrame): rows to be written
+            table_name (str): table name
+            if_exists (str, optional): "replace" drops and re-creates the table, "append" adds the rows to the
+                existing table (created if missing). Defaults to "replace".
+        """
+        if if_exists not in ("replace", "append"):
+            raise ValueError(f"Unsupported if_exists value: {if_exists}")
+        if dataframe.columns.empty:
+            logger.warning(f"No columns to write for {table_name}, skipping it")
+            return
+
+        if if_exists == "replace":
+            self._conn.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+        if not self.table_exists(table_name):
+            self._create_table(dataframe, table_name)
+        else:
+            missing_columns = set(dataframe.columns) - set(self._get_table_columns(table_name))
+            if missing_columns:
+                raise Exception(f"Columns {sorted(missing_columns)} are not present in the table {table_name}")
+
+        columns = ", ".join(_quote(column) for column in dataframe.columns)
+        placeholders = ", ".join("?" * len(dataframe.columns))
+        insert_query = f"INSERT INTO {_quote(table_name)} ({columns}) VALUES ({placeholders})"
+        rows = _to_rows(dataframe)
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._conn.executemany(insert_query, chunk)
+
+        self._written_tables[table_name] = list(dataframe.columns)
+        logger.info(f"{len(dataframe)} rows written to {table_name} ({if_exists})")
+
+    def _create_indexes(self):
+        for table_name, columns in self._written_tables.items():
+            for column in self.index_columns:
+                if column in columns:
+                    index_name = _quote(f"ix_{table_name}_{column}")
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(table_name)} ({_quote(column)})"
+                    )
+
+    def get_ingested_files(self):
+        """Collection files already loaded into the DB"""
+        if not self.table_exists(INGESTED_FILES_TABLE):
+            return set()
+        return {row[0] for row in self._conn.execute(f"SELECT file FROM {INGESTED_FILES_TABLE}")}
+
+    def add_ingested_files(self, files, replace=False):
+        """Record the collection files loaded into the DB. replace=True forgets the files recorded before."""
+        if replace:
+            self._conn.execute(f"DROP TABLE IF EXISTS {INGESTED_FILES_TABLE}")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {INGESTED_FILES_TABLE} (file TEXT PRIMARY KEY)")
+        self._conn.executemany(
+            f"INSERT OR IGNORE INTO {INGESTED_FILES_TABLE} (file) VALUES (?)", [(str(file),) for file in files]
+        )
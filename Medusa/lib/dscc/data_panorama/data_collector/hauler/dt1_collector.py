@@ -3,16 +3,17 @@ import uuid
 import pandas as pd
 
 # import dt1_collection_tables as dt1coll
-import common.restClient as restClient
-import common.utils as utils
+import lib.dscc.data_panorama.data_collector.common.restClient as restClient
+import lib.dscc.data_panorama.data_collector.common.utils as utils
+from lib.dscc.data_panorama.data_collector.common.throttle import BoundedExecutor
 import multiprocessing as mp
 import logging
-from threading import Thread
 
 # from tests.data_collector.common.restClient import get_paginated_response
 
 yaml_config = utils.read_yaml()
 cluster = yaml_config["ACCOUNT"]["Cluster"]
+hauler_config = utils.configure_hauler()
 logger = logging.getLogger()
 
 # Initialize empty lists/arrays for storing data
@@ -54,53 +55,15 @@ def dt1_collect_array_data(mock_dir):
         # Retrieve Application-sets for current array
         get_dt1_application_sets(dt1_sys_urls, array_id)
 
-        threads = []
-        for volume in volumes:
-            volume_id = volume["id"]
-
-            # Create a new thread to perform GET operations on different endpoints for the volume in parallel
-            t1 = Thread(
-                target=get_dt1_snapshots,
-                args=(
-                    dt1_vol_url,
-                    volume_id,
-                ),
-            )
-            t2 = Thread(
-                target=get_dt1_volume_performance_stats,
-                args=(
-                    dt1_vol_url,
-                    volume_id,
-                ),
-            )
-            t3 = Thread(
-                target=get_dt1_vluns,
-                args=(
-                    dt1_vol_url,
-                    volume_id,
-                ),
-            )
-
-            # Add the threads to the list of threads
-            threads.append(t1)
-            threads.append(t2)
-            threads.append(t3)
-        # Start the threads to perform GET operations on different endpoints for each volume in parallel
-        for t in threads:
-            t.start()
-
-        # Wait for all threads to finish
-        for t in threads:
-            t.join()
-
-            # # Retrieve snapshots for each volume
-            # get_dt1_snapshots(dt1_vol_url, volume_id)
-
-            # # # Retrieve volume-performance for current volume
-            # get_dt1_volume_performance_stats(dt1_vol_url, volume_id)
-
-            # # # Retrieve vlun information for current volume
-            # get_dt1_vluns(dt1_vol_url, volume_id)
+        # GET operations on different endpoints for each volume run in parallel, bounded per endpoint.
+        # A failed request fails the collection instead of writing a partial one
+        with BoundedExecutor(hauler_config["max_workers"], hauler_config["endpoint_limits"]) as executor:
+            for volume in volumes:
+                volume_id = volume["id"]
+                executor.submit("snapshots", get_dt1_snapshots, dt1_vol_url, volume_id)
+                executor.submit("performance-statistics", get_dt1_volume_performance_stats, dt1_vol_url, volume_id)
+                executor.submit("vluns", get_dt1_vluns, dt1_vol_url, volume_id)
+            executor.wait_all()
     dt1_consolidate_response_json(mock_dir)
 
 
@@ -129,7 +92,8 @@ def get_dt1_volume_performance_stats(dt1_vol_url, volume_id):
 def get_dt1_snapshots(dt1_vol_url, volume_id):
     logger.info(f"get volumeSnapshots for the volume - {volume_id}")
     dt1_snap_url = f"{dt1_vol_url}/{volume_id}/snapshots"
-    snapshots = restClient.get_all_response(dt1_snap_url, headers, sort_by="creationTime")
+    # Runs on a BoundedExecutor worker: its pages are fetched on this thread, under the "snapshots" limit
+    snapshots = restClient.get_all_response(dt1_snap_url, headers, sort_by="creationTime", max_in_flight=1)
     # snapshots_response = restClient.get(url=dt1_snap_url, headers=headers)
     # snapshots = snapshots_response.json()
     global all_snapshots
@@ -4,12 +4,13 @@ import uuid
 import pandas as pd
 
 # import dt2_collection_tables as dt2coll
-import common.restClient as restClinet
-import common.utils as utils
-from threading import Thread
+import lib.dscc.data_panorama.data_collector.common.restClient as restClinet
+import lib.dscc.data_panorama.data_collector.common.utils as utils
+from lib.dscc.data_panorama.data_collector.common.throttle import BoundedExecutor
 
 yaml_config = utils.read_yaml()
 cluster = yaml_config["ACCOUNT"]["Cluster"]
+hauler_config = utils.configure_hauler()
 
 logger = logging.getLogger()
 
@@ -49,42 +50,15 @@ def dt2_collect_array_data(mock_dir):
         # Retrieve volume-collections for current array
         get_dt2_volumeCollections(dt2_sys_urls, array_id)
 
-        # Retrieve snapshots for each volume
-        threads = []
-        for volume in volumes["items"]:
-            volume_id = volume["id"]
-            logger.info(f"getting volume snapshot details for volume ID - {volume_id}")
-            t1 = Thread(
-                target=get_dt2_snapshots,
-                args=(
-                    dt2_vol_url,
-                    volume_id,
-                ),
-            )
-            t2 = Thread(
-                target=get_dt2_volume_performance_stats,
-                args=(
-                    dt2_vol_url,
-                    volume_id,
-                ),
-            )
-
-            # Add the threads to the list of threads
-            threads.append(t1)
-            threads.append(t2)
-
-        # Start the threads to perform GET operations on different endpoints for each volume in parallel
-        for t in threads:
-            t.start()
-
-        # Wait for all threads to finish
-        for t in threads:
-            t.join()
-
-            # get_dt2_snapshots(dt2_vol_url, volume_id)
-
-            # # Retrieve volume-performance for current volume
-            # get_dt2_volume_performance_stats(dt2_vol_url, volume_id)
+        # Retrieve snapshots and performance stats for each volume in parallel, bounded per endpoint.
+        # A failed request fails the collection instead of writing a partial one
+        with BoundedExecutor(hauler_config["max_workers"], hauler_config["endpoint_limits"]) as executor:
+            for volume in volumes["items"]:
+                volume_id = volume["id"]
+                logger.info(f"getting volume snapshot details for volume ID - {volume_id}")
+                executor.submit("snapshots", get_dt2_snapshots, dt2_vol_url, volume_id)
+                executor.submit("performance-statistics", get_dt2_volume_performance_stats, dt2_vol_url, volume_id)
+            executor.wait_all()
     dt2_consolidate_response_json(mock_dir)
 
 
@@ -102,7 +76,8 @@ def get_dt2_volume_performance_stats(dt2_vol_url, volume_id):
 def get_dt2_snapshots(dt2_vol_url, volume_id):
     logger.info(f"get volumeSnapshots for the volume - {volume_id}")
     dt2_snap_url = f"{dt2_vol_url}/{volume_id}/snapshots"
-    all_data = restClinet.get_all_response(dt2_snap_url, headers, sort_by="id")
+    # Runs on a BoundedExecutor worker: its pages are fetched on this thread, under the "snapshots" limit
+    all_data = restClinet.get_all_response(dt2_snap_url, headers, sort_by="id", max_in_flight=1)
     logger.info(f"got the volumeSnapshots for the volume - {volume_id}")
     global all_snapshots
     if all_data:
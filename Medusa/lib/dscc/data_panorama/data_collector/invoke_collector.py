@@ -43,5 +43,5 @@ if __name__ == "__main__":
     dt2_getArrayData(mock_dir=mock_dir)
 
     db_path = f"{mock_dir}/aggregateddb.sqlite"
-    db_writer.create_tables_from_collection(mock_dir=mock_dir, db_file=db_path)
+    db_writer.create_tables_from_collection(mock_dir=mock_dir, db_file=db_path, workers=os.cpu_count())
     costdata.getCISCostCalculationdata()
@@ -1,4 +1,3 @@
-import datetime
 import logging
 import os
 
@@ -50,8 +49,6 @@ class AWS:
         self.account_name = account_name
         self.endpoint_url = os.getenv("LOCALSTACK_URL", None)
         self.region_name = region_name
-        self._time_created = datetime.datetime.now()
-        self.__aws_session = self.__set_session()
 
         self.client_config = None if not set_client_config else ClientConfig(region_name=self.region_name).client_config
 
@@ -178,14 +175,7 @@ class AWS:
         )
 
     def _aws_session(self):
-        token_lifetime = datetime.timedelta(minutes=50)
-        if datetime.datetime.now() > self._time_created + token_lifetime:
-            logger.info(f"Refresh AWS session, {token_lifetime.seconds}s has passed since {self._time_created}")
-            self._time_created = datetime.datetime.now()
-            self.__aws_session = self.__set_session()
-        return self.__aws_session
-
-    def __set_session(self):
+        # Sessions are cached by the session registry, assumed role credentials refresh themselves before expiry
         return (
             self._aws_session_manager.aws_session
             if not self._localstack
@@ -1,4 +1,129 @@
+import logging
+import threading
+from collections import Counter
+
 import boto3
+import botocore.session
+from botocore.config import Config
+from botocore.credentials import RefreshableCredentials
+
+logger = logging.getLogger()
+
+
+def _cache_key(value):
+    # botocore Config objects compare by identity, the options they were built from identify them
+    if isinstance(value, Config):
+        return ("Config", repr(sorted(value._user_provided_options.items())))
+    return value
+
+
+class CachingSession(boto3.Session):
+    """
+    boto3 Session which hands out the same client for the same arguments.
+
+    boto3 clients are thread safe once created, so they are shared by all the threads of the process. Creating them
+    from one Session is not, so creation is done under a lock. Resources are not thread safe and are cached per thread.
+    """
+
+    def __init__(self, *args, stats: Counter = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats = stats if stats is not None else Counter()
+        self._clients = {}
+        # Reentrant: boto3 creates the client of a resource with self.client()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    @staticmethod
+    def _key(service_name, args, kwargs):
+        key = (
+            service_name,
+            tuple(_cache_key(arg) for arg in args),
+            tuple(sorted((name, _cache_key(value)) for name, value in kwargs.items() if value is not None)),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def client(self, service_name, *args, **kwargs):
+        key = self._key(service_name, args, kwargs)
+        client = self._clients.get(key) if key is not None else None
+        if client is not None:
+            return client
+        with self._lock:
+            if key is None or key not in self._clients:
+                self._stats["clients_created"] += 1
+                client = super().client(service_name, *args, **kwargs)
+                if key is None:
+                    return client
+                self._clients[key] = client
+            return self._clients[key]
+
+    def resource(self, service_name, *args, **kwargs):
+        key = self._key(service_name, args, kwargs)
+        if not hasattr(self._local, "resources"):
+            self._local.resources = {}
+        resources = self._local.resources
+        if key is None or key not in resources:
+            with self._lock:
+                self._stats["resources_created"] += 1
+                resource = super().resource(service_name, *args, **kwargs)
+            if key is None:
+                return resource
+            resources[key] = resource
+        return resources[key]
+
+
+class AWSSessionRegistry:
+    """
+    Sessions shared by every AWS / AWSSessionManager of the process, one per region and credentials
+    (profile, access key or role ARN), so clients and assumed role credentials are not recreated on each access.
+
+    Assumed role credentials are botocore RefreshableCredentials: STS AssumeRole is called again only when the
+    credentials are about to expire, and the clients of the session pick up the new credentials.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._credentials = {}
+        # Reentrant: creating a role session gets the default session used to assume the role
+        self._lock = threading.RLock()
+        self.stats = Counter()
+
+    def _get(self, cache, key, create):
+        value = cache.get(key)
+        if value is None:
+            with self._lock:
+                value = cache.get(key)
+                if value is None:
+                    value = cache[key] = create()
+        return value
+
+    def get_session(self, key, create_session) -> CachingSession:
+        def create():
+            self.stats["sessions_created"] += 1
+            return create_session()
+
+        return self._get(self._sessions, key, create)
+
+    def get_role_credentials(self, role_arn, load_credentials) -> RefreshableCredentials:
+        """Credentials of the role, shared by the sessions of every region"""
+        return self._get(
+            self._credentials,
+            role_arn,
+            lambda: RefreshableCredentials.create_from_metadata(
+                metadata=load_credentials(), refresh_using=load_credentials, method="sts-assume-role"
+            ),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._credentials.clear()
+
+
+session_registry = AWSSessionRegistry()
 
 
 class AWSSessionManager:
@@ -15,7 +140,6 @@ class AWSSessionManager:
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.role_arn = role_arn
-        self.aws_session_token = None
 
     def __repr__(self):
         return f"{vars(self)}"
@@ -23,34 +147,58 @@ class AWSSessionManager:
     @property
     def aws_session(self) -> boto3.Session:
         if self.role_arn:
-            self._load_credentials_from_role()
-            return boto3.Session(
-                region_name=self.region_name,
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
-                aws_session_token=self.aws_session_token,
-            )
+            return session_registry.get_session(("role", self.region_name, self.role_arn), self._create_role_session)
         elif self.aws_access_key_id and self.aws_secret_access_key:
-            return boto3.Session(
-                region_name=self.region_name,
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
+            return session_registry.get_session(
+                ("keys", self.region_name, self.aws_access_key_id),
+                lambda: CachingSession(
+                    region_name=self.region_name,
+                    aws_access_key_id=self.aws_access_key_id,
+                    aws_secret_access_key=self.aws_secret_access_key,
+                    stats=session_registry.stats,
+                ),
             )
         else:
-            return boto3.Session(region_name=self.region_name, profile_name=self.profile_name)
+            return session_registry.get_session(
+                ("profile", self.region_name, self.profile_name),
+                lambda: CachingSession(
+                    region_name=self.region_name, profile_name=self.profile_name, stats=session_registry.stats
+                ),
+            )
 
     @property
     def localstack_session(self) -> boto3.Session:
-        return boto3.Session(
-            region_name=self.region_name,
-            aws_access_key_id="test",
-            aws_secret_access_key="test",
+        return session_registry.get_session(
+            ("localstack", self.region_name),
+            lambda: CachingSession(
+                region_name=self.region_name,
+                aws_access_key_id="test",
+                aws_secret_access_key="test",
+                stats=session_registry.stats,
+            ),
+        )
+
+    def _create_role_session(self) -> CachingSession:
+        botocore_session = botocore.session.get_session()
+        botocore_session._credentials = session_registry.get_role_credentials(
+            self.role_arn, self._load_credentials_from_role
+        )
+        return CachingSession(
+            botocore_session=botocore_session, region_name=self.region_name, stats=session_registry.stats
         )
 
-    def _load_credentials_from_role(self):
-        sts_client = boto3.client("sts")
+    def _load_credentials_from_role(self) -> dict:
+        # The role is assumed with the default credentials, as the environment / instance profile provides them
+        sts_client = session_registry.get_session(
+            ("default", None), lambda: CachingSession(stats=session_registry.stats)
+        ).client("sts")
+        session_registry.stats["sts_assume_role_calls"] += 1
         assumed_role_object = sts_client.assume_role(RoleArn=self.role_arn, RoleSessionName="role_session")
         credentials = assumed_role_object["Credentials"]
-        self.aws_access_key_id = credentials["AccessKeyId"]
-        self.aws_secret_access_key = credentials["SecretAccessKey"]
-        self.aws_session_token = credentials["SessionToken"]
+        logger.info(f"Assumed role {self.role_arn}, credentials expire at {credentials['Expiration']}")
+        return {
+            "access_key": credentials["AccessKeyId"],
+            "secret_key": credentials["SecretAccessKey"],
+            "token": credentials["SessionToken"],
+            "expiry_time": credentials["Expiration"].isoformat(),
+        }
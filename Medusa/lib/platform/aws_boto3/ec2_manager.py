@@ -1,6 +1,9 @@
 import logging
 import os
-from typing import Any, List, Callable
+import threading
+import time
+import weakref
+from typing import Any, List, Callable, Iterator
 
 import boto3
 import botocore.exceptions as BotoException
@@ -12,7 +15,7 @@ from lib.common.enums.cvsa import CloudProvider, CloudRegions
 from lib.common.enums.ec2_type import Ec2Type
 from lib.platform.aws_boto3.client_config import ClientConfig
 from lib.platform.aws_boto3.models.address import Address
-from lib.platform.aws_boto3.models.instance import Tag, Instance
+from lib.platform.aws_boto3.models.instance import Tag, Instance, InstanceSummary
 from lib.platform.aws_boto3.models.security_group import SecurityGroup
 from lib.platform.cloud.cloud_dataclasses import CloudInstance, CloudDisk, CloudImage, CloudInstanceState, CloudSubnet
 from lib.platform.cloud.cloud_vm_manager import CloudVmManager
@@ -21,6 +24,40 @@ from utils.timeout_manager import TimeoutManager
 
 logger = logging.getLogger()
 
+# Instances per describe_instances page, the API maximum
+INSTANCE_PAGE_SIZE = 1000
+# describe_instances does not take MaxResults with InstanceIds, ids are sent in chunks
+INSTANCE_IDS_PER_REQUEST = 200
+TAG_INDEX_TTL_SECONDS = 60
+
+# Tag key -> instance ids, per session: EC2Manager objects are created on every AWS.ec2 access, sessions are shared
+_tag_indexes: "weakref.WeakKeyDictionary[boto3.Session, dict]" = weakref.WeakKeyDictionary()
+_tag_indexes_lock = threading.Lock()
+
+
+def filter_value(value: str) -> str:
+    """EC2 filter value matching the value exactly: * and ? are wildcards in filter values, escaped with a backslash"""
+    return value.replace("\\", "\\\\").replace("*", "\\*").replace("?", "\\?")
+
+
+def tag_filter(tag: Tag) -> dict:
+    """describe_* filter on the exact value of the tag"""
+    return {"Name": f"tag:{tag.Key}", "Values": [filter_value(tag.Value)]}
+
+
+def instance_filters(
+    tags: list[Tag] = None, states: list[str] = None, availability_zones: list[str] = None, tag_keys: list[str] = None
+) -> list[dict]:
+    """describe_instances filters: an instance matches all the tags and one of the states / availability zones"""
+    filters = [tag_filter(tag) for tag in tags or []]
+    if states:
+        filters.append({"Name": "instance-state-name", "Values": list(states)})
+    if availability_zones:
+        filters.append({"Name": "availability-zone", "Values": list(availability_zones)})
+    if tag_keys:
+        filters.append({"Name": "tag-key", "Values": [filter_value(tag_key) for tag_key in tag_keys]})
+    return filters
+
 
 class EC2Manager(CloudVmManager):
     def __init__(
@@ -81,7 +118,7 @@ class EC2Manager(CloudVmManager):
             instance_type=ec2_instance.instance_type,
             location=ec2_instance.placement["AvailabilityZone"][:-1],
             state=CloudInstanceState(ec2_instance.state["Name"]),
-            tags=self.get_instance_tags(ec2_instance.id),
+            tags=[Tag(**tag) for tag in ec2_instance.tags or []],
             launch_time=ec2_instance.launch_time,
             image=self._get_image_dataclass(instance_image=ec2_instance.image),
             public_ip=ec2_instance.public_ip_address,
@@ -101,15 +138,11 @@ class EC2Manager(CloudVmManager):
         self, states: List[CloudInstanceState] = None, tags: List[Tag] = None, location: str = None
     ) -> List[CloudInstance]:
         """list instances by tags or state"""
-        if tags:
-            instances = self.list_instances_by_tags(tags)
-        else:
-            instances = self.ec2_resource.instances.all()
-        instances = [self._get_instance_dataclass(instance) for instance in instances]
-        if states:
-            instances = [instance for instance in instances if instance.state in states]
+        filters = instance_filters(tags=tags, states=[state.value for state in states] if states else None)
+        instances = self.ec2_resource.instances.filter(Filters=filters).page_size(INSTANCE_PAGE_SIZE)
         if location:
-            instances = [instance for instance in instances if instance.location == location]
+            instances = [instance for instance in instances if instance.placement["AvailabilityZone"][:-1] == location]
+        instances = [self._get_instance_dataclass(instance) for instance in instances]
         if not instances:
             logging.info("No instances found with given parameters")
             instances = []
@@ -188,6 +221,7 @@ class EC2Manager(CloudVmManager):
     def terminate_ec2_instance(self, ec2_instance_id: str, wait: bool = True) -> None:
         ec2_instance = self.get_ec2_instance_by_id(ec2_instance_id)
         ec2_instance.terminate()
+        self.invalidate_tag_index()
         logger.info(f"----- Terminating EC2 Instance {ec2_instance.instance_id} ------ ")
         if wait:
             ec2_instance.wait_until_terminated()
@@ -201,12 +235,12 @@ class EC2Manager(CloudVmManager):
         logger.info(f'EC2 instance "{instance.id}" has been started.')
 
     def get_subnets_ids_by_tag(self, tag: Tag) -> list[str]:
-        filters = [{"Name": f"tag:{tag.Key}", "Values": [tag.Value]}]
+        filters = [tag_filter(tag)]
         subnets = self.ec2_client.describe_subnets(Filters=filters).get("Subnets", [])
         return [subnet["SubnetId"] for subnet in subnets]
 
     def get_all_instances(self) -> list[Instance]:
-        instances = self.ec2_resource.instances.all()
+        instances = self.ec2_resource.instances.page_size(INSTANCE_PAGE_SIZE)
         return [instance for instance in instances]
 
     def get_availability_zone(self):
@@ -214,8 +248,80 @@ class EC2Manager(CloudVmManager):
         return list([az for az in responses["AvailabilityZones"] if az["State"] == "available"])[0]["ZoneName"]
 
     def get_instances_by_tag(self, tag: Tag) -> list[Instance]:
-        instances = self.ec2_resource.instances.all()
-        return [instance for instance in instances if instance.tags and dict(tag) in instance.tags]
+        instances = self.ec2_resource.instances.filter(Filters=instance_filters(tags=[tag]))
+        return [instance for instance in instances.page_size(INSTANCE_PAGE_SIZE)]
+
+    def _describe_instances(self, filters: list[dict], instance_ids: list[str] = None) -> Iterator[dict]:
+        paginator = self.ec2_client.get_paginator("describe_instances")
+        if instance_ids:
+            pages = (
+                page
+                for index in range(0, len(instance_ids), INSTANCE_IDS_PER_REQUEST)
+                for page in paginator.paginate(
+                    InstanceIds=instance_ids[index : index + INSTANCE_IDS_PER_REQUEST], Filters=filters
+                )
+            )
+        else:
+            pages = paginator.paginate(Filters=filters, PaginationConfig={"PageSize": INSTANCE_PAGE_SIZE})
+        for page in pages:
+            for reservation in page["Reservations"]:
+                yield from reservation["Instances"]
+
+    def query_instances(
+        self,
+        tags: list[Tag] = None,
+        states: list[str] = None,
+        availability_zones: list[str] = None,
+        tag_keys: list[str] = None,
+        instance_ids: list[str] = None,
+    ) -> list[InstanceSummary]:
+        """Instances matching all the given conditions, filtered by the EC2 API
+
+        Args:
+            tags (list[Tag], optional): tags the instances have, all of them
+            states (list[str], optional): instance state names, ex: ["running", "stopped"]
+            availability_zones (list[str], optional): availability zone names
+            tag_keys (list[str], optional): tag keys the instances have, one of them. Accepts * and ? wildcards
+            instance_ids (list[str], optional): restrict the query to these instances
+
+        Returns:
+            list[InstanceSummary]: id, state, type, placement, addresses and tags of each instance
+        """
+        filters = instance_filters(tags=tags, states=states, availability_zones=availability_zones, tag_keys=tag_keys)
+        return [
+            InstanceSummary.from_description(instance) for instance in self._describe_instances(filters, instance_ids)
+        ]
+
+    def _get_tag_index(self, states: tuple[str], refresh: bool = False) -> dict[str, set[str]]:
+        session = self.get_session()
+        with _tag_indexes_lock:
+            indexes = _tag_indexes.setdefault(session, {})
+            built_at, index = indexes.get((self.endpoint_url, states), (0, None))
+        if index is not None and not refresh and time.monotonic() - built_at < TAG_INDEX_TTL_SECONDS:
+            return index
+        index = {}
+        for instance in self._describe_instances(instance_filters(states=list(states))):
+            for tag in instance.get("Tags", []):
+                index.setdefault(tag["Key"], set()).add(instance["InstanceId"])
+        with _tag_indexes_lock:
+            indexes[(self.endpoint_url, states)] = (time.monotonic(), index)
+        return index
+
+    def invalidate_tag_index(self):
+        """Drop the cached tag indexes, the next substring lookup describes the instances again"""
+        with _tag_indexes_lock:
+            _tag_indexes.pop(self.get_session(), None)
+
+    def get_instance_ids_with_tag_key_containing(
+        self, tag_substring: str, states: list[str] = ("running",), refresh: bool = False
+    ) -> list[str]:
+        """Ids of the instances with a tag key containing tag_substring.
+
+        Looked up in a tag key index of the instances in the given states, built with one describe_instances and
+        reused for TAG_INDEX_TTL_SECONDS. Tag and terminate calls made through EC2Manager invalidate it.
+        """
+        index = self._get_tag_index(tuple(sorted(states)), refresh=refresh)
+        return sorted({instance_id for key, ids in index.items() if tag_substring in key for instance_id in ids})
 
     def get_all_network_interfaces_from_vpc(self, vpc_id):
         logger.info(f"Getting all network interfaces from VPC {vpc_id}")
@@ -230,12 +336,9 @@ class EC2Manager(CloudVmManager):
         ), f"Failed to delete network interface {network_interface_id}."
 
     def list_instances_by_tags(self, tags: list[Tag]) -> list["ec2.Instance"]:
-        filters = [dict(tag) for tag in tags]
-        matching_instances = []
-        for instance in self.ec2_resource.instances.all():
-            if all(tag in instance.tags for tag in filters):
-                matching_instances.append(instance)
-        logging.info(f"Instances with tags {filters} are: {matching_instances}")
+        instances = self.ec2_resource.instances.filter(Filters=instance_filters(tags=tags))
+        matching_instances = [instance for instance in instances.page_size(INSTANCE_PAGE_SIZE)]
+        logging.info(f"Instances with tags {[dict(tag) for tag in tags]} are: {matching_instances}")
         return matching_instances
 
     def get_running_ec2_instances_by_tag(self, tag: Tag) -> list:
@@ -246,31 +349,39 @@ class EC2Manager(CloudVmManager):
         """
         instances = self.ec2_resource.instances.filter(
             Filters=[
-                {"Name": f"tag:{tag.Key}", "Values": [tag.Value]},
+                tag_filter(tag),
                 {"Name": "instance-state-name", "Values": ["running"]},
             ]
         )
         return instances
 
-    def get_running_ec2_instances_contains_tag(self, tag_substring: str) -> list:
+    def get_running_ec2_instances_contains_tag(self, tag_substring: str, refresh: bool = False) -> list:
         """This function will filter the ec2 instances by searching input tag_substring using 'contains' on 'Key'
             of tagged running ec2 instances
 
         Args:
             tag_substring (str): substring which has to used in contains filter
+            refresh (bool, optional): rebuild the tag index instead of using the cached one, which can miss the
+                instances tagged since it was built. Defaults to False, for read-only polling.
 
         Returns:
             list: list of instance objects satisfying the 'contains' filter criteria
         """
-        running_instances = self.ec2_resource.instances.filter(
-            Filters=[{"Name": "instance-state-name", "Values": ["running"]}]
-        )
-        tagged_instances = [instance for instance in running_instances if instance.tags]
+        instance_ids = self.get_instance_ids_with_tag_key_containing(tag_substring, refresh=refresh)
+        if not instance_ids:
+            return []
+        # The index may be up to TAG_INDEX_TTL_SECONDS old, the state and tags are checked again on the current data
         instances = []
-        for instance in tagged_instances:
-            for tag in instance.tags:
-                if tag_substring in tag["Key"]:
-                    instances.append(instance)
+        for index in range(0, len(instance_ids), INSTANCE_IDS_PER_REQUEST):
+            running_instances = self.ec2_resource.instances.filter(
+                InstanceIds=instance_ids[index : index + INSTANCE_IDS_PER_REQUEST],
+                Filters=instance_filters(states=["running"]),
+            )
+            instances.extend(
+                instance
+                for instance in running_instances
+                if instance.tags and any(tag_substring in tag["Key"] for tag in instance.tags)
+            )
         return instances
 
     def delete_running_ec2_instances_by_tag(self, tag):
@@ -279,6 +390,7 @@ class EC2Manager(CloudVmManager):
         if instance_id_list:
             logger.info(f"Instances to be deleted are {instance_id_list}")
             self.ec2_client.terminate_instances(InstanceIds=instance_id_list)
+            self.invalidate_tag_index()
         else:
             logger.warning(f"Instance id list is empty {instance_id_list}. May be already they are deleted.")
 
@@ -290,11 +402,13 @@ class EC2Manager(CloudVmManager):
         Args:
             tag_substring (str): substring which has to used in contains filter
         """
-        instances = self.get_running_ec2_instances_contains_tag(tag_substring=tag_substring)
+        # A cached index misses the instances tagged since it was built, they would be left running
+        instances = self.get_running_ec2_instances_contains_tag(tag_substring=tag_substring, refresh=True)
         instance_id_list = [instance.id for instance in instances]
         if instance_id_list:
             logger.debug(f"Instances to be deleted are {instance_id_list}")
             self.ec2_client.terminate_instances(InstanceIds=instance_id_list)
+            self.invalidate_tag_index()
         else:
             logger.warning(f"Instance id list is empty {instance_id_list}. May be instances are already deleted.")
 
@@ -328,6 +442,7 @@ class EC2Manager(CloudVmManager):
         """
         tags_dict = [dict(tag) for tag in tags_list]
         tags = ec2_instance.create_tags(Tags=tags_dict)
+        self.invalidate_tag_index()
         logger.info(f" ------ {tags} ----- ")
 
     def create_tags_to_different_aws_resource_types_by_id(
@@ -344,6 +459,7 @@ class EC2Manager(CloudVmManager):
         """
         tags_dict = [dict(tag) for tag in tags_list]
         tags = self.ec2_resource.create_tags(Resources=resource_ids_list, Tags=tags_dict)
+        self.invalidate_tag_index()
         logger.info(f" ------ {tags} ----- ")
         return tags
 
@@ -359,6 +475,7 @@ class EC2Manager(CloudVmManager):
         """
         tags_dict = [dict(tag) for tag in tags_list]
         response = self.ec2_client.delete_tags(Resources=aws_resource_id_list, Tags=tags_dict)
+        self.invalidate_tag_index()
         logger.info(f" ------ {response} ----- ")
 
     def get_instance_state(self, instance_id) -> str:
@@ -594,6 +711,7 @@ class EC2Manager(CloudVmManager):
         )
 
         logger.info(instances)
+        self.invalidate_tag_index()
 
         for instance in instances:
             # waiting for instance to start running and pass status checks.
@@ -659,6 +777,7 @@ class EC2Manager(CloudVmManager):
             )
 
         logger.info(instances)
+        self.invalidate_tag_index()
 
         for instance in instances:
             # waiting for instance to start running and pass status checks.
@@ -702,9 +821,7 @@ class EC2Manager(CloudVmManager):
         logger.info(f"----- Started EC2 Instance {ec2_instance.instance_id} ------ ")
 
     def get_instances_by_availability_zones(self, availability_zones: list[str]):
-        instances = self.ec2_resource.instances.filter(
-            Filters=[{"Name": "availability-zone", "Values": availability_zones}]
-        )
+        instances = self.ec2_resource.instances.filter(Filters=instance_filters(availability_zones=availability_zones))
         return instances
 
     def get_instance_vpc_id(self, instance_id: str) -> str:
@@ -147,3 +147,38 @@ class Instance(Base):
     UsageOperation: Optional[str]
     UsageOperationUpdateTime: Optional[datetime]
     PrivateDnsNameOptions: Optional[PrivateDnsNameOptions]
+
+
+class InstanceSummary(Base):
+    """Fields of an instance projected from describe_instances, returned by EC2Manager.query_instances"""
+
+    InstanceId: str
+    State: str
+    InstanceType: Optional[str]
+    AvailabilityZone: Optional[str]
+    ImageId: Optional[str]
+    KeyName: Optional[str]
+    LaunchTime: Optional[datetime]
+    PrivateIpAddress: Optional[str]
+    PublicIpAddress: Optional[str]
+    SubnetId: Optional[str]
+    VpcId: Optional[str]
+    Tags: list[Tag] = []
+
+    @classmethod
+    def from_description(cls, description: dict) -> "InstanceSummary":
+        # construct() skips validation, the fields come straight from the EC2 API
+        return cls.construct(
+            InstanceId=description["InstanceId"],
+            State=description["State"]["Name"],
+            InstanceType=description.get("InstanceType"),
+            AvailabilityZone=description.get("Placement", {}).get("AvailabilityZone"),
+            ImageId=description.get("ImageId"),
+            KeyName=description.get("KeyName"),
+            LaunchTime=description.get("LaunchTime"),
+            PrivateIpAddress=description.get("PrivateIpAddress"),
+            PublicIpAddress=description.get("PublicIpAddress"),
+            SubnetId=description.get("SubnetId"),
+            VpcId=description.get("VpcId"),
+            Tags=[Tag.construct(Key=tag["Key"], Value=tag["Value"]) for tag in description.get("Tags", [])],
+        )
@@ -1,5 +1,6 @@
 import boto3
 from lib.common.config.config_manager import ConfigManager
+from lib.platform.aws_boto3 import s3_bulk_operations
 import logging
 
 config = ConfigManager.get_config()
@@ -16,18 +17,11 @@ def connect_to_s3(access_key, secret_key):
 
 def get_bucket_size(bucket_name=bucket):
     try:
-        s3 = connect_to_s3(access_key=aws_access_key, secret_key=aws_secret_key)
-        bucket = s3.Bucket(bucket_name)
-        total_size = 0
-
-        for obj in bucket.objects.all():
-            total_size += obj.size
-            print("\n")
-            print(f"Object Name             : {obj.key}")
-            print(f"Object Size in Bytes    : {obj.size} Bytes")
+        session = boto3.Session(aws_access_key_id=aws_access_key, aws_secret_access_key=aws_secret_key)
+        size = s3_bulk_operations.get_bucket_size(session.client("s3"), bucket_name)
 
-        total_size_gb = total_size / 1024 / 1024 / 1024
-        print(f'\nTotal size of Bucket "{bucket_name}" in GB : {total_size_gb}')
+        total_size_gb = size.bytes / 1024 / 1024 / 1024
+        print(f'\nTotal size of Bucket "{bucket_name}" in GB : {total_size_gb} ({size.objects} objects)')
 
         return total_size_gb
     except Exception as e:
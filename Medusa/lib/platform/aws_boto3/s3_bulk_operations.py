@@ -0,0 +1,165 @@
+"""Bulk S3 operations for buckets with millions of objects.
+
+Listing is partitioned by the prefixes under the given prefix (the first "/" level) and the partitions are listed in
+parallel, each with its own list_objects_v2 paginator. Pages are streamed through a bounded queue as they arrive, so
+sizing or emptying a bucket never holds the whole listing in memory. Deletes go through delete_objects, 1000 keys
+per request, on a thread pool.
+
+boto3 clients are thread safe, the functions take one client and share it between the threads.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+logger = logging.getLogger()
+
+# delete_objects takes at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+LIST_PAGE_SIZE = 1000
+MAX_WORKERS = 8
+DELIMITER = "/"
+
+
+@dataclass
+class BucketSize:
+    objects: int = 0
+    bytes: int = 0
+
+
+def _list_prefix(client, bucket_name: str, prefix: str, delimiter: str = None) -> Iterator[dict]:
+    paginator = client.get_paginator("list_objects_v2")
+    kwargs = {"Bucket": bucket_name, "Prefix": prefix, "PaginationConfig": {"PageSize": LIST_PAGE_SIZE}}
+    if delimiter:
+        kwargs["Delimiter"] = delimiter
+    yield from paginator.paginate(**kwargs)
+
+
+def iter_object_pages(client, bucket_name: str, prefix: str = "", max_workers: int = MAX_WORKERS) -> Iterator[list]:
+    """Pages of objects (list_objects_v2 "Contents" entries) under prefix, in no particular order
+
+    The objects directly under prefix are listed first, with the sub-prefixes. The sub-prefixes are then listed on
+    max_workers threads.
+    """
+    sub_prefixes = []
+    for page in _list_prefix(client, bucket_name, prefix, DELIMITER):
+        sub_prefixes.extend(common_prefix["Prefix"] for common_prefix in page.get("CommonPrefixes", []))
+        if page.get("Contents"):
+            yield page["Contents"]
+    if not sub_prefixes:
+        return
+
+    # Bounded, so the listing threads wait for the consumer instead of buffering the whole bucket
+    pages = queue.Queue(maxsize=max_workers * 4)
+    done = object()
+    stop = threading.Event()
+
+    def list_sub_prefix(sub_prefix):
+        try:
+            for page in _list_prefix(client, bucket_name, sub_prefix):
+                if stop.is_set():
+                    return
+                if page.get("Contents"):
+                    pages.put(page["Contents"])
+        finally:
+            pages.put(done)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-list") as executor:
+        futures = [executor.submit(list_sub_prefix, sub_prefix) for sub_prefix in sub_prefixes]
+        remaining = len(futures)
+        try:
+            while remaining:
+                page = pages.get()
+                if page is done:
+                    remaining -= 1
+                else:
+                    yield page
+        finally:
+            # The consumer stopped early or a listing failed: unblock and stop the listing threads
+            stop.set()
+            while any(not future.done() for future in futures):
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        for future in futures:
+            future.result()
+
+
+def iter_object_keys(client, bucket_name: str, prefix: str = "", max_workers: int = MAX_WORKERS) -> Iterator[str]:
+    for page in iter_object_pages(client, bucket_name, prefix, max_workers):
+        for s3_object in page:
+            yield s3_object["Key"]
+
+
+def get_bucket_size(client, bucket_name: str, prefix: str = "", max_workers: int = MAX_WORKERS) -> BucketSize:
+    """Number of objects and total size in bytes under prefix, summed page by page"""
+    size = BucketSize()
+    for page in iter_object_pages(client, bucket_name, prefix, max_workers):
+        size.objects += len(page)
+        size.bytes += sum(s3_object["Size"] for s3_object in page)
+    return size
+
+
+def _batches(keys: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _delete_batch(client, bucket_name: str, keys: list[str]) -> int:
+    response = client.delete_objects(
+        Bucket=bucket_name, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+    )
+    errors = response.get("Errors", [])
+    if errors:
+        raise Exception(
+            f"Failed to delete {len(errors)} of {len(keys)} objects from {bucket_name}, first error: {errors[0]}"
+        )
+    return len(keys)
+
+
+def delete_objects(
+    client,
+    bucket_name: str,
+    keys: Iterable[str],
+    batch_size: int = DELETE_BATCH_SIZE,
+    max_workers: int = MAX_WORKERS,
+) -> int:
+    """Delete the keys with delete_objects requests of batch_size keys, max_workers requests at a time
+
+    keys may be a generator (iter_object_keys), at most 2 * max_workers batches are held at once.
+
+    Returns:
+        int: number of objects deleted
+
+    Raises:
+        Exception: when S3 reports keys it could not delete, after the batches in flight are done
+    """
+    deleted = 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-delete") as executor:
+        in_flight = set()
+        for batch in _batches(keys, batch_size):
+            if len(in_flight) >= max_workers * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                deleted += sum(future.result() for future in finished)
+            in_flight.add(executor.submit(_delete_batch, client, bucket_name, batch))
+        deleted += sum(future.result() for future in wait(in_flight).done)
+    return deleted
+
+
+def empty_bucket(client, bucket_name: str, prefix: str = "", max_workers: int = MAX_WORKERS) -> int:
+    """Delete every object under prefix. Returns the number of objects deleted."""
+    deleted = delete_objects(
+        client, bucket_name, iter_object_keys(client, bucket_name, prefix, max_workers), max_workers=max_workers
+    )
+    logger.info(f"Deleted {deleted} objects from S3 bucket {bucket_name}")
+    return deleted
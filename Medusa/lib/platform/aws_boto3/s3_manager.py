@@ -1,16 +1,20 @@
 import logging
 import os
 from io import BytesIO
-from typing import Callable
+from typing import Callable, Iterator
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 
+from lib.platform.aws_boto3 import s3_bulk_operations
 from lib.platform.aws_boto3.models.instance import Tag
 from lib.platform.aws_boto3.client_config import ClientConfig
 
 logger = logging.getLogger()
 
+MiB = 1024 * 1024
+
 
 class S3Manager:
     def __init__(
@@ -51,10 +55,14 @@ class S3Manager:
         :param bucket_name: name of the bucket that we want to check its size
         :return: sum value of all objects size inside bucket in bytes
         """
-        return sum([o.size for o in self.s3_resource.Bucket(bucket_name).objects.all()])
+        return s3_bulk_operations.get_bucket_size(self.s3_client, bucket_name).bytes
 
     def get_s3_object_keys(self, bucket_name: str) -> list[str]:
-        return [o.key for o in self.s3_resource.Bucket(bucket_name).objects.all()]
+        return list(self.iter_s3_object_keys(bucket_name))
+
+    def iter_s3_object_keys(self, bucket_name: str, prefix: str = "") -> Iterator[str]:
+        """Object keys under prefix, listed in parallel per sub-prefix, in no particular order"""
+        return s3_bulk_operations.iter_object_keys(self.s3_client, bucket_name, prefix)
 
     def create_s3_presigned_url(
         self,
@@ -73,10 +81,7 @@ class S3Manager:
     def empty_or_delete_s3_bucket(self, bucket_name, delete_bucket: bool = False):
         bucket = self.get_s3_bucket(bucket_name)
         if not os.getenv("LOCALSTACK_URL"):
-            objects_in_bucket = [o for o in bucket.objects.all()]
-            for o in objects_in_bucket:
-                response = o.delete()
-                assert response["ResponseMetadata"]["HTTPStatusCode"] == 204
+            s3_bulk_operations.empty_bucket(self.s3_client, bucket_name)
         if delete_bucket:
             bucket.delete()
 
@@ -94,7 +99,18 @@ class S3Manager:
         logger.info(buffered_data)
         return buffered_data
 
-    def download_object(self, bucket_name: str, s3_filename: str, target_filename: str):
-        bucket = self.get_s3_bucket(bucket_name)
-        bucket.download_file(s3_filename, target_filename)
+    def download_object(
+        self,
+        bucket_name: str,
+        s3_filename: str,
+        target_filename: str,
+        part_size: int = 16 * MiB,
+        max_concurrency: int = 10,
+    ):
+        """Download the object, with ranged GETs of part_size bytes on max_concurrency threads when it is larger
+        than part_size"""
+        transfer_config = TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size, max_concurrency=max_concurrency
+        )
+        self.s3_client.download_file(bucket_name, s3_filename, target_filename, Config=transfer_config)
         logger.info(f"S3 {bucket_name} file {s3_filename} downloaded.")
@@ -0,0 +1,144 @@
+"""Extent checksum manifests of remote devices and files, for IOManager restore validation.
+
+IOManager.generate_checksum runs cksum over a whole device: one serial read of the volume, and one CRC which does not
+tell where a restored volume differs. A manifest holds the CRC of each extent (extent_size bytes) of the device. The
+extents are hashed on the remote host by parallel dd | cksum readers, and the output streamed back is one
+"index crc" line per extent.
+
+Manifests are compared locally, the differing extents reported as block ranges. After writes to a device (e.g.
+execute_dd_command), only the extents written are hashed again and merged into the previous manifest.
+"""
+
+import logging
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+logger = logging.getLogger()
+
+EXTENT_SIZE = 64 * 2**20
+BLOCK_SIZE = 512
+
+# dd size suffixes: K, M, G... (and KiB, MiB...) are powers of 1024, kB, MB, GB... powers of 1000
+_DD_SIZE = re.compile(r"^(\d+)(c|w|b|k|kB|[KMGTP]|[KMGTP]B|[KMGTP]iB)?$")
+_DD_MULTIPLIERS = {None: 1, "c": 1, "w": 2, "b": 512, "k": 1024, "kB": 1000}
+for power, unit in enumerate("KMGTP", start=1):
+    _DD_MULTIPLIERS.update({unit: 1024**power, f"{unit}iB": 1024**power, f"{unit}B": 1000**power})
+
+
+def dd_size_in_bytes(size) -> int:
+    """Bytes of a dd size, e.g. 512, "4k" or "1M" """
+    match = _DD_SIZE.match(str(size).strip())
+    if not match:
+        raise ValueError(f"Not a dd size: {size}")
+    return int(match.group(1)) * _DD_MULTIPLIERS[match.group(2)]
+
+
+def written_extents(extent_size: int, writes: Iterable[tuple[int, int]]) -> set[int]:
+    """Indexes of the extents overlapped by the (offset, length) byte ranges written"""
+    extents = set()
+    for offset, length in writes:
+        if length > 0:
+            extents.update(range(offset // extent_size, (offset + length - 1) // extent_size + 1))
+    return extents
+
+
+@dataclass(frozen=True)
+class BlockRange:
+    """Blocks first to last, inclusive, of block_size bytes"""
+
+    first: int
+    last: int
+    block_size: int = BLOCK_SIZE
+
+    def __str__(self):
+        return f"blocks {self.first}-{self.last} (bs={self.block_size})"
+
+
+@dataclass
+class ExtentManifest:
+    path: str
+    size: int
+    extent_size: int
+    # CRC by extent index
+    digests: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def extent_count(self) -> int:
+        return -(-self.size // self.extent_size)
+
+    @classmethod
+    def from_output(cls, path: str, extent_size: int, stdout: Iterable[str]) -> "ExtentManifest":
+        """Manifest of manifest_command() output: a "size <bytes>" line then "<index> <crc>" lines in any order"""
+        size = None
+        digests = {}
+        for line in stdout:
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+            if parts[0] == "size":
+                size = int(parts[1])
+            elif parts[0].isdigit() and parts[1].isdigit():
+                digests[int(parts[0])] = parts[1]
+        if size is None:
+            raise ValueError(f"No size in the checksum manifest output of {path}")
+        return cls(path, size, extent_size, digests)
+
+    def updated(self, rehashed: "ExtentManifest") -> "ExtentManifest":
+        """Manifest with the extents of rehashed replacing these ones"""
+        if rehashed.extent_size != self.extent_size:
+            raise ValueError(f"Extent size {rehashed.extent_size} against {self.extent_size}")
+        digests = {index: digest for index, digest in self.digests.items() if index < rehashed.extent_count}
+        digests.update(rehashed.digests)
+        return ExtentManifest(self.path, rehashed.size, self.extent_size, digests)
+
+    def differing_extents(self, other: "ExtentManifest") -> list[int]:
+        """Indexes of the extents whose CRC differs, or which are missing from either manifest"""
+        if other.extent_size != self.extent_size:
+            raise ValueError(f"Extent size {other.extent_size} against {self.extent_size}")
+        extents = range(max(self.extent_count, other.extent_count))
+        differing = [index for index in extents if self.digests.get(index) != other.digests.get(index)]
+        if self.size != other.size and self.extent_count == other.extent_count and self.extent_count:
+            # Same extent count, the last extent ends at a different offset
+            differing = sorted(set(differing) | {self.extent_count - 1})
+        return differing
+
+    def diff(self, other: "ExtentManifest", block_size: int = BLOCK_SIZE) -> list[BlockRange]:
+        """Differing extents, contiguous ones merged, as ranges of blocks of block_size"""
+        ranges = []
+        size = max(self.size, other.size)
+        for index in self.differing_extents(other):
+            first = index * self.extent_size // block_size
+            last = (min((index + 1) * self.extent_size, size) - 1) // block_size
+            if ranges and ranges[-1].last + 1 >= first:
+                ranges[-1] = BlockRange(ranges[-1].first, last, block_size)
+            else:
+                ranges.append(BlockRange(first, last, block_size))
+        return ranges
+
+
+def manifest_command(
+    path: str, extent_size: int = EXTENT_SIZE, workers: Optional[int] = None, extents: Iterable[int] = None
+) -> str:
+    """Shell command printing the size of the device or file, then the CRC of each extent, or of the given extents.
+
+    workers dd | cksum readers run in parallel, as many as the processors of the host by default.
+    """
+    # Arguments of the reader: $1 path, $2 extent size, $3 extent index (appended by xargs)
+    reader = (
+        'printf "%s %s\\n" "$3" "$(dd if="$1" bs=1M iflag=skip_bytes,count_bytes skip=$(($3 * $2)) count="$2" '
+        '2>/dev/null | cksum | cut -d " " -f 1)"'
+    )
+    if extents is None:
+        indexes = f"seq 0 $(( (size + {extent_size} - 1) / {extent_size} - 1 ))"
+    else:
+        indexes = f"printf '%s\\n' {' '.join(str(index) for index in sorted(set(extents))) or ''}"
+        indexes = f"{indexes} | awk -v n=$(( (size + {extent_size} - 1) / {extent_size} )) 'NF && $1 < n'"
+    quoted = shlex.quote(path)
+    script = (
+        f"size=$(if [ -b {quoted} ]; then blockdev --getsize64 {quoted}; else stat -L -c %s {quoted}; fi) || exit 1; "
+        'echo "size $size"; '
+        f"{indexes} | xargs -r -n 1 -P {workers or '$(nproc)'} sh -c {shlex.quote(reader)} _ {quoted} {extent_size}"
+    )
+    return f"sh -c {shlex.quote(script)}"
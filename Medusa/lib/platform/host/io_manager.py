@@ -1,5 +1,14 @@
 import time
 from lib.platform.aws_boto3.remote_ssh_manager import RemoteConnect
+from lib.platform.host.extent_manifest import (
+    BLOCK_SIZE,
+    EXTENT_SIZE,
+    BlockRange,
+    ExtentManifest,
+    dd_size_in_bytes,
+    manifest_command,
+    written_extents,
+)
 from tests.e2e.aws_protection.context import Context
 from utils.size_conversion import str_gb_to_mb
 import logging
@@ -14,7 +23,8 @@ class IOManager:
     def __init__(self, context: Context, client: RemoteConnect):
         """
         Class contains methods to run dd and vdbench workload on a EC2 instance (Linux)
-        Provides support for generating checksum using cksum module and cksum validation.
+        Provides support for generating checksum using cksum module and cksum validation, of whole devices or of
+        their extents (checksum manifests).
 
         Args:
             client (RemoteConnect): Paramiko client object of the EC2 instance.
@@ -30,6 +40,8 @@ class IOManager:
         self.home_directory = f"/home/{client.username}"
         self.archive = os.path.join(self.home_directory, self.vdbench_archive)
         self.dmcore_directory, self.dmcore_filename = os.path.split(self.dmcore)
+        # (offset, length) byte ranges written by execute_dd_command, by device path, since the last manifest update
+        self.written: dict[str, list[tuple[int, int]]] = {}
 
     def get_devices(self) -> list[str]:
         # Information on EC2 block devices:
@@ -68,7 +80,14 @@ class IOManager:
         # Limitation: Successful dd command execution will not return any stdout.
         # Exception will be thrown if the command did not executed successfully.
         # TODO Add a retry mechanism.
-        self.client.execute_command(f"dd if=/dev/{fill} of=/dev/{device} bs={block_size} count={count} oflag=direct")
+        seek_option = f" seek={seek}" if seek else ""
+        self.client.execute_command(
+            f"dd if=/dev/{fill} of=/dev/{device} bs={block_size} count={count}{seek_option} oflag=direct"
+        )
+        block_size_in_bytes = dd_size_in_bytes(block_size)
+        self.written.setdefault(f"/dev/{device}", []).append(
+            ((seek or 0) * block_size_in_bytes, count * block_size_in_bytes)
+        )
 
     def clean_disks(self, devices: list[str]) -> None:
         for device in devices:
@@ -112,6 +131,76 @@ class IOManager:
         else:
             raise FileNotFoundError("Remote file does not exists, Checksum generation failed.")
 
+    def generate_checksum_manifest(
+        self, file_path: str, extent_size: int = EXTENT_SIZE, workers: int = None, extents: list[int] = None
+    ) -> ExtentManifest:
+        """Generates the 'cksum' checksum of each extent of extent_size bytes of a given remote device or file,
+        workers extents hashed in parallel on the remote host.
+
+        eg: generate_checksum_manifest("/dev/xvdb").digests returns {0: "3633963874", 1: "4294967295", ...}
+
+        Args:
+            file_path (str): Absolute remote file path (linux only)
+            extent_size (int): Bytes of an extent. Defaults to 64 MiB.
+            workers (int): Extents hashed in parallel. Defaults to the processor count of the remote host.
+            extents (list[int]): Indexes of the extents to hash. Defaults to all of them.
+
+        Returns:
+            ExtentManifest: checksums by extent index
+        """
+        if not self.client.sftp_exists(file_path):
+            raise FileNotFoundError("Remote file does not exists, Checksum manifest generation failed.")
+        stdout = self.client.execute_command(manifest_command(file_path, extent_size, workers, extents))
+        manifest = ExtentManifest.from_output(file_path, extent_size, stdout)
+        expected = range(manifest.extent_count) if extents is None else set(extents) & set(range(manifest.extent_count))
+        assert len(manifest.digests) == len(expected), f"Checksum manifest of {file_path} is missing extents"
+        logger.info(
+            f"Checksum manifest generated successfully for the file {file_path} - size {manifest.size} in bytes, "
+            f"{len(manifest.digests)} extents of {extent_size} bytes"
+        )
+        return manifest
+
+    def update_checksum_manifest(
+        self, manifest: ExtentManifest, extents: list[int] = None, workers: int = None
+    ) -> ExtentManifest:
+        """Hashes again the extents written since the manifest was generated, and merges them into it.
+
+        Args:
+            manifest (ExtentManifest): Manifest of the remote device or file
+            extents (list[int]): Indexes of the extents written. Defaults to the extents of the execute_dd_command
+                writes to the device since its last manifest update.
+            workers (int): Extents hashed in parallel. Defaults to the processor count of the remote host.
+
+        Returns:
+            ExtentManifest: the updated manifest
+        """
+        if extents is None:
+            extents = written_extents(manifest.extent_size, self.written.get(manifest.path, []))
+        rehashed = self.generate_checksum_manifest(manifest.path, manifest.extent_size, workers, extents=extents)
+        self.written.pop(manifest.path, None)
+        return manifest.updated(rehashed)
+
+    def compare_checksum_manifests(
+        self, source: ExtentManifest, restored: ExtentManifest, block_size: int = BLOCK_SIZE
+    ) -> list[BlockRange]:
+        """Compares the checksum manifests of a source and of a restored device or file.
+
+        Args:
+            source (ExtentManifest): Manifest of the source
+            restored (ExtentManifest): Manifest of the restored copy, of the same extent size
+            block_size (int): Bytes of the blocks of the ranges reported. Defaults to 512.
+
+        Returns:
+            list[BlockRange]: ranges of the blocks of the extents which differ, empty if the manifests match
+        """
+        mismatches = source.diff(restored, block_size)
+        for block_range in mismatches:
+            logger.error(f"Checksum mismatch between {source.path} and {restored.path}: {block_range}")
+        logger.info(
+            f"Checksum manifests of {source.path} and {restored.path}: {len(mismatches)} mismatching block ranges"
+        )
+        return mismatches
+
     def copy_vdbench_executable_to_remote_host(self):
         if not self.client.sftp_exists(self.home_directory):
             self.client.execute_command(f"mkdir -p {self.home_directory}")
@@ -0,0 +1,216 @@
+"""Parallel IO workloads (dd, vdbench, dmcore) over a fleet of instances.
+
+The io_steps functions drive one instance at a time, one device after the other. IOOrchestrator runs the jobs of
+max_connections hosts at a time, each host over one connection (an IOManager, or any IO manager connect() returns)
+shared by its jobs. The jobs of a host run in the order given; a per device job runs on all the devices of the host
+at once, jobs_per_host devices at a time.
+
+A failed job fails its host only: the remaining jobs of the host are skipped, the other hosts go on. Results are
+streamed as the jobs finish, with their duration and throughput.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger()
+
+MAX_CONNECTIONS = 16
+JOBS_PER_HOST = 4
+
+
+class JobStatus(Enum):
+    PASSED = "passed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class IOJob:
+    host: str
+    name: str
+    # run(manager, device) returns the bytes written or read, or None. device is None unless per_device.
+    run: Callable[[Any, Optional[str]], Optional[int]]
+    per_device: bool = False
+
+
+@dataclass
+class IOJobResult:
+    host: str
+    name: str
+    status: JobStatus
+    device: Optional[str] = None
+    seconds: float = 0.0
+    bytes: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def mb_per_second(self) -> Optional[float]:
+        if self.bytes is None or not self.seconds:
+            return None
+        return self.bytes / 2**20 / self.seconds
+
+    def __str__(self):
+        device = f" {self.device}" if self.device else ""
+        throughput = f", {self.mb_per_second:.1f} MB/s" if self.mb_per_second is not None else ""
+        error = f": {self.error}" if self.error else ""
+        return f"{self.host} {self.name}{device} {self.status.value} in {self.seconds:.1f} s{throughput}{error}"
+
+
+@dataclass
+class FleetReport:
+    results: list[IOJobResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def failed_hosts(self) -> dict[str, str]:
+        """Error of the first failed job, by host"""
+        failed = {}
+        for result in self.results:
+            if result.status == JobStatus.FAILED:
+                failed.setdefault(result.host, f"{result.name}: {result.error}")
+        return failed
+
+    @property
+    def passed(self) -> bool:
+        return all(result.status == JobStatus.PASSED for result in self.results)
+
+    def summary(self) -> str:
+        hosts = {result.host for result in self.results}
+        written = sum(result.bytes or 0 for result in self.results if result.status == JobStatus.PASSED)
+        counts = ", ".join(
+            f"{sum(result.status == status for result in self.results)} {status.value}" for status in JobStatus
+        )
+        return (
+            f"{len(self.results)} jobs on {len(hosts)} hosts in {self.seconds:.1f} s: {counts}; "
+            f"{written / 2**30:.1f} GiB, {written / 2**20 / self.seconds if self.seconds else 0:.1f} MB/s overall; "
+            f"failed hosts {sorted(self.failed_hosts)}"
+        )
+
+
+def close_io_manager(manager):
+    """Closes the ssh connection of an IOManager, other managers (e.g. winrm sessions) are left as they are"""
+    client = getattr(manager, "client", None)
+    if client is not None and hasattr(client, "close_connection"):
+        client.close_connection()
+
+
+class IOOrchestrator:
+    def __init__(
+        self,
+        connect: Callable[[str], Any],
+        max_connections: int = MAX_CONNECTIONS,
+        jobs_per_host: int = JOBS_PER_HOST,
+        close: Callable[[Any], None] = close_io_manager,
+    ):
+        """
+        Args:
+            connect: connect(host) returns the IO manager of the host, e.g. an IOManager of connect_to_ec2_instance()
+            max_connections: Hosts connected, and running jobs, at the same time
+            jobs_per_host: Devices of a host running a per device job at the same time
+            close: close(manager) called when the jobs of the host are done
+        """
+        self.connect = connect
+        self.max_connections = max_connections
+        self.jobs_per_host = jobs_per_host
+        self.close = close
+
+    def run(self, jobs: Iterable[IOJob]) -> Iterator[IOJobResult]:
+        """Runs the jobs, results yielded as the jobs finish"""
+        hosts: dict[str, list[IOJob]] = {}
+        for job in jobs:
+            hosts.setdefault(job.host, []).append(job)
+        if not hosts:
+            return
+        results = queue.Queue()
+        done = object()
+
+        def run_host(host, host_jobs):
+            try:
+                self._run_host(host, host_jobs, results.put)
+            finally:
+                results.put(done)
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_connections, len(hosts)), thread_name_prefix="io-host")
+        with executor:
+            for host, host_jobs in hosts.items():
+                executor.submit(run_host, host, host_jobs)
+            remaining = len(hosts)
+            while remaining:
+                result = results.get()
+                if result is done:
+                    remaining -= 1
+                else:
+                    yield result
+
+    def run_all(self, jobs: Iterable[IOJob]) -> FleetReport:
+        """Runs the jobs, logging the progress, and reports all their results"""
+        jobs = list(jobs)
+        report = FleetReport()
+        start = time.perf_counter()
+        for result in self.run(jobs):
+            report.results.append(result)
+            log = logger.info if result.status == JobStatus.PASSED else logger.error
+            log(f"[{len(report.results)}] {result}")
+        report.seconds = time.perf_counter() - start
+        logger.info(report.summary())
+        return report
+
+    def _run_host(self, host: str, jobs: list[IOJob], report: Callable[[IOJobResult], None]):
+        start = time.perf_counter()
+        try:
+            manager = self.connect(host)
+        except Exception as e:
+            error = f"connection failed: {e}"
+            report(IOJobResult(host, "connect", JobStatus.FAILED, seconds=time.perf_counter() - start, error=error))
+            for job in jobs:
+                report(IOJobResult(host, job.name, JobStatus.SKIPPED))
+            return
+
+        failed = threading.Event()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs_per_host, thread_name_prefix=f"io-{host}") as executor:
+                for job in jobs:
+                    if failed.is_set():
+                        report(IOJobResult(host, job.name, JobStatus.SKIPPED))
+                        continue
+                    devices = self._devices(manager, host, job, report, failed)
+                    futures = [executor.submit(self._run_job, manager, job, device, failed) for device in devices]
+                    for future in as_completed(futures):
+                        report(future.result())
+        finally:
+            try:
+                self.close(manager)
+            except Exception as e:
+                logger.warning(f"Closing the connection to {host} failed: {e}")
+
+    @staticmethod
+    def _devices(manager, host, job, report, failed) -> list[Optional[str]]:
+        if not job.per_device:
+            return [None]
+        try:
+            return manager.get_devices()
+        except Exception as e:
+            failed.set()
+            report(IOJobResult(host, job.name, JobStatus.FAILED, error=f"device listing failed: {e}"))
+            return []
+
+    @staticmethod
+    def _run_job(manager, job: IOJob, device: Optional[str], failed: threading.Event) -> IOJobResult:
+        # Devices of a per device job still queued when another device failed are skipped
+        if failed.is_set():
+            return IOJobResult(job.host, job.name, JobStatus.SKIPPED, device=device)
+        start = time.perf_counter()
+        try:
+            transferred = job.run(manager, device)
+        except Exception as e:
+            failed.set()
+            return IOJobResult(
+                job.host, job.name, JobStatus.FAILED, device, time.perf_counter() - start, error=str(e) or repr(e)
+            )
+        return IOJobResult(job.host, job.name, JobStatus.PASSED, device, time.perf_counter() - start, transferred)
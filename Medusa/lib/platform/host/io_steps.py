@@ -4,7 +4,15 @@ from lib.common.enums.ec2_username import EC2Username
 from tests.e2e.aws_protection.context import Context
 from lib.common.enums.io_types import IOType
 from lib.platform.aws_boto3.remote_ssh_manager import RemoteConnect
+from lib.platform.host.extent_manifest import dd_size_in_bytes
 from lib.platform.host.io_manager import IOManager
+from lib.platform.host.io_orchestrator import (
+    JOBS_PER_HOST,
+    MAX_CONNECTIONS,
+    FleetReport,
+    IOJob,
+    IOOrchestrator,
+)
 from lib.platform.host.vdbench_config_models import (
     BasicParameters,
     StorageDefinitions,
@@ -12,11 +20,32 @@ from lib.platform.host.vdbench_config_models import (
     RunDefinitions,
 )
 from json import loads
+from typing import Callable
 
 logger = logging.getLogger()
 
+# (fill, block size, count, seek) of the dd writes on each device
+FULL_BACKUP_WRITES = [
+    (IOType.RANDOM.value, "1M", 2048, None),
+    (IOType.ZERO.value, "1M", 2048, 2100),
+    (IOType.RANDOM.value, "512", 1000, 4500),
+    (IOType.ZERO.value, "512", 1000, 5600),
+]
+# Overwrite the existing data in the data block with alternative.
+SYNTHETIC_BACKUP_WRITES = [
+    (IOType.ZERO.value, "512", 1024, None),
+    (IOType.RANDOM.value, "512", 1024, 2100),
+    (IOType.ZERO.value, "1M", 500, 4500),
+    (IOType.RANDOM.value, "1M", 500, 5600),
+]
+
+
+def run_dd_command(context: Context, instance, run_type="full") -> dict[str, list[tuple[int, int]]]:
+    """Runs the dd writes of a full or synthetic backup on the devices of the instance.
 
-def run_dd_command(context: Context, instance, run_type="full"):
+    Returns:
+        dict: (offset, length) byte ranges written by device path, the extents to update in checksum manifests
+    """
     io_manager = _create_remote_connect(context=context, instance=instance)
     devices = io_manager.get_devices()
     # Fill disk with zeros and random data sequentially.
@@ -27,52 +56,24 @@ def run_dd_command(context: Context, instance, run_type="full"):
     elif run_type.lower() == "incremental":
         _run_dd_for_synthetic_backup(devices=devices, io_manager=io_manager)
     io_manager.client.close_connection()
+    return io_manager.written
 
 
 def _run_dd_for_full_backup(devices: list[str], io_manager: IOManager):
     for device in devices:
-        io_manager.execute_dd_command(fill=IOType.RANDOM.value, device=device, block_size="1M", count=2048)
-        io_manager.execute_dd_command(
-            fill=IOType.ZERO.value,
-            device=device,
-            block_size="1M",
-            count=2048,
-            seek=2100,
-        )
-        io_manager.execute_dd_command(
-            fill=IOType.RANDOM.value,
-            device=device,
-            block_size="512",
-            count=1000,
-            seek=4500,
-        )
-        io_manager.execute_dd_command(
-            fill=IOType.ZERO.value,
-            device=device,
-            block_size="512",
-            count=1000,
-            seek=5600,
-        )
+        _run_dd_writes(io_manager=io_manager, device=device, writes=FULL_BACKUP_WRITES)
 
 
 def _run_dd_for_synthetic_backup(devices: list[str], io_manager: IOManager):
     for device in devices:
-        io_manager.execute_dd_command(fill=IOType.ZERO.value, device=device, block_size="512", count=1024)
-        io_manager.execute_dd_command(
-            fill=IOType.RANDOM.value,
-            device=device,
-            block_size="512",
-            count=1024,
-            seek=2100,
-        )
-        io_manager.execute_dd_command(fill=IOType.ZERO.value, device=device, block_size="1M", count=500, seek=4500)
-        io_manager.execute_dd_command(
-            fill=IOType.RANDOM.value,
-            device=device,
-            block_size="1M",
-            count=500,
-            seek=5600,
-        )
+        _run_dd_writes(io_manager=io_manager, device=device, writes=SYNTHETIC_BACKUP_WRITES)
+
+
+def _run_dd_writes(io_manager: IOManager, device: str, writes: list[tuple]) -> int:
+    """Runs the (fill, block size, count, seek) dd writes on the device, returns the bytes written"""
+    for fill, block_size, count, seek in writes:
+        io_manager.execute_dd_command(fill=fill, device=device, block_size=block_size, count=count, seek=seek)
+    return sum(dd_size_in_bytes(block_size) * count for _, block_size, count, _ in writes)
 
 
 # TODO: DEPRECATED , same function exists in common_steps.py
@@ -215,6 +216,12 @@ def create_vdbench_config_file_for_generating_files_and_dirs(
 
 
 def run_vdbench(io_manager: IOManager, validate=False, custom_config_file_name="config"):
+    result = _run_vdbench_session(io_manager, validate, custom_config_file_name)
+    io_manager.client.close_connection()
+    return result
+
+
+def _run_vdbench_session(io_manager: IOManager, validate=False, custom_config_file_name="config") -> bool:
     success_message = "Vdbench execution completed successfully"
     channel = io_manager.client.client.get_transport().open_session()
     if validate:
@@ -233,5 +240,128 @@ def run_vdbench(io_manager: IOManager, validate=False, custom_config_file_name="
         if success_message in str(buffer):
             result = True
             break
-    io_manager.client.close_connection()
     return result
+
+
+def run_dd_command_on_fleet(
+    connect: Callable[[str], IOManager],
+    hosts: list[str],
+    run_type: str = "full",
+    max_connections: int = MAX_CONNECTIONS,
+    jobs_per_host: int = JOBS_PER_HOST,
+) -> FleetReport:
+    """Runs the dd writes of a full or synthetic backup on all the devices of the hosts, in parallel
+
+    Args:
+        connect (Callable[[str], IOManager]): connect(host) returns the IOManager of the host, eg:
+            lambda instance_id: IOManager(context, connect_to_ec2_instance(context, aws, account_id, instance_id))
+        hosts (list[str]): Hosts passed to connect(), eg: EC2 instance IDs
+        run_type (str, optional): "full" or "incremental". Defaults to "full".
+        max_connections (int, optional): Hosts written at the same time. Defaults to MAX_CONNECTIONS.
+        jobs_per_host (int, optional): Devices of a host written at the same time. Defaults to JOBS_PER_HOST.
+
+    Returns:
+        FleetReport: results, duration and throughput of the writes of each device
+    """
+    writes = FULL_BACKUP_WRITES if run_type.lower() == "full" else SYNTHETIC_BACKUP_WRITES
+
+    def write(io_manager: IOManager, device: str) -> int:
+        return _run_dd_writes(io_manager=io_manager, device=device, writes=writes)
+
+    jobs = [IOJob(host, f"dd {run_type.lower()}", write, per_device=True) for host in hosts]
+    return IOOrchestrator(connect, max_connections, jobs_per_host).run_all(jobs)
+
+
+def write_and_validate_data_vdbench_on_fleet(
+    context: Context,
+    connect: Callable[[str], IOManager],
+    hosts: list[str],
+    file_count: int = 2,
+    file_size: str = "1g",
+    dir_name: str = "/dir1",
+    depth: int = 1,
+    width: int = 2,
+    validate: bool = False,
+    max_connections: int = MAX_CONNECTIONS,
+) -> FleetReport:
+    """Generates, or validates, files and directories with vdbench on the hosts, in parallel.
+    See write_and_validate_data_vdbench() in common_steps for the arguments of vdbench.
+
+    Args:
+        context (Context): context object
+        connect (Callable[[str], IOManager]): connect(host) returns the IOManager of the host
+        hosts (list[str]): Hosts passed to connect(), eg: EC2 instance IDs
+        max_connections (int, optional): Hosts running vdbench at the same time. Defaults to MAX_CONNECTIONS.
+
+    Returns:
+        FleetReport: results and duration of the vdbench runs
+    """
+
+    def setup(io_manager: IOManager, device: str = None) -> None:
+        copy_vdbench_executable_to_ec2_instance(io_manager=io_manager)
+        install_java_in_remote_host(io_manager=io_manager)
+
+    def configure(io_manager: IOManager, device: str = None) -> None:
+        create_vdbench_config_file_for_generating_files_and_dirs(
+            context=context,
+            file_size=file_size,
+            file_count=file_count,
+            dir_name=dir_name,
+            depth=depth,
+            width=width,
+            io_manager=io_manager,
+        )
+
+    def run(io_manager: IOManager, device: str = None) -> None:
+        assert _run_vdbench_session(io_manager=io_manager, validate=validate), "vdbench run failed"
+
+    jobs = []
+    for host in hosts:
+        if not validate:
+            jobs.append(IOJob(host, "vdbench setup", setup))
+        jobs.append(IOJob(host, "vdbench config", configure))
+        jobs.append(IOJob(host, "vdbench validate" if validate else "vdbench write", run))
+    return IOOrchestrator(connect, max_connections).run_all(jobs)
+
+
+def write_and_validate_data_dm_core_on_fleet(
+    connect: Callable[[str], IOManager],
+    hosts: list[str],
+    validation: bool = False,
+    percentage_to_fill: int = 5,
+    copy_dm_core: bool = False,
+    max_connections: int = MAX_CONNECTIONS,
+    jobs_per_host: int = JOBS_PER_HOST,
+) -> FleetReport:
+    """Writes, or validates, data with dmcore on all the devices of the hosts, in parallel
+
+    Args:
+        connect (Callable[[str], IOManager]): connect(host) returns the IOManager of the host
+        hosts (list[str]): Hosts passed to connect(), eg: EC2 instance IDs
+        validation (bool, optional): Validates the data when True, writes it when False. Defaults to False.
+        percentage_to_fill (int, optional): Percentage of each device to write or validate. Defaults to 5.
+        copy_dm_core (bool, optional): Copy the dmcore binary before a validation. Defaults to False.
+        max_connections (int, optional): Hosts running dmcore at the same time. Defaults to MAX_CONNECTIONS.
+        jobs_per_host (int, optional): Devices of a host running dmcore at the same time. Defaults to JOBS_PER_HOST.
+
+    Returns:
+        FleetReport: results, duration and throughput of dmcore on each device
+    """
+
+    def setup(io_manager: IOManager, device: str = None) -> None:
+        io_manager.copy_dmcore_binary_to_remote_host()
+
+    def run(io_manager: IOManager, device: str) -> int:
+        # Size in MB dmcore writes or reads, as run_dm_core_on_custom_drive computes it
+        size = int((io_manager.get_volume_size(device) / 100) * percentage_to_fill)
+        assert io_manager.run_dm_core_on_custom_drive(
+            device=device, percentage_to_fill=percentage_to_fill, validation=validation
+        ), "dmcore run failed"
+        return size * 2**20
+
+    jobs = []
+    for host in hosts:
+        if not validation or copy_dm_core:
+            jobs.append(IOJob(host, "dmcore setup", setup))
+        jobs.append(IOJob(host, "dmcore validate" if validation else "dmcore write", run, per_device=True))
+    return IOOrchestrator(connect, max_connections, jobs_per_host).run_all(jobs)
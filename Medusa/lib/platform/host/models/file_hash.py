@@ -1,10 +1,15 @@
 from dataclasses import dataclass, field
 from dataclasses_json import dataclass_json, LetterCase, config
+from typing import Iterable, Iterator, Union
 import json
 import logging
+import re
 
 logger = logging.getLogger()
 
+# Between the objects of the ConvertTo-Json output of a list
+_SEPARATORS = re.compile(r"[\s,\[\]]*")
+
 
 # NOTE: This class is added to convert the response from 'Get-FileHash' Powershell command to read checksum
 @dataclass_json(letter_case=LetterCase.CAMEL)
@@ -15,6 +20,87 @@ class FileHash:
     path: str = field(metadata=config(field_name="Path"))
 
 
+@dataclass
+class FileHashDiff:
+    """Result of FileHashList.diff(): paths missing from the restored list, extra paths in it, and mismatched hashes
+    as (source, restored) pairs"""
+
+    matched: int = 0
+    missing: list[FileHash] = field(default_factory=list)
+    extra: list[FileHash] = field(default_factory=list)
+    mismatched: list[tuple[FileHash, FileHash]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """True when every source file is restored with the same hash. Extra restored files are not counted"""
+        return not self.missing and not self.mismatched
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [
+            f"{self.matched} matched, {len(self.missing)} missing, {len(self.extra)} extra, "
+            f"{len(self.mismatched)} mismatched"
+        ]
+        lines += [f"missing: {file_hash.path}" for file_hash in self.missing[:limit]]
+        lines += [
+            f"mismatched: {source.path} source {source.hash} restored {restored.hash}"
+            for source, restored in self.mismatched[:limit]
+        ]
+        lines += [f"extra: {file_hash.path}" for file_hash in self.extra[:limit]]
+        return "\n".join(lines)
+
+
+def diff_file_hashes(source: Iterable[FileHash], restored: Iterable[FileHash]) -> FileHashDiff:
+    """Compares the file hashes by path in one pass over each side: the restored entries are indexed by path, the
+    source entries can be streamed (e.g. from iter_sha256_windows()). Hashes are compared case insensitive, Windows
+    returns them uppercase and Linux lowercase."""
+    restored_by_path = {file_hash.path: file_hash for file_hash in restored}
+    diff = FileHashDiff()
+    for source_hash in source:
+        restored_hash = restored_by_path.pop(source_hash.path, None)
+        if restored_hash is None:
+            diff.missing.append(source_hash)
+        elif source_hash.hash.upper() != restored_hash.hash.upper():
+            diff.mismatched.append((source_hash, restored_hash))
+        else:
+            diff.matched += 1
+    diff.extra = list(restored_by_path.values())
+    return diff
+
+
+def iter_sha256_windows(output: Union[str, Iterable[str]], algorithm: str = "SHA256") -> Iterator[FileHash]:
+    """FileHash entries of 'Get-FileHash | ConvertTo-Json' output, parsed one JSON object at a time
+
+    Args:
+        output (Union[str, Iterable[str]]): the whole output, or chunks of it (e.g. the lines of a file)
+        algorithm (str, optional): algorithm of the hashes. Defaults to "SHA256".
+    """
+    # Line breaks are dropped like parse_sha256_windows() always did: they are either JSON whitespace or breaks
+    # inserted in long values by the console output
+    chunks = [output] if isinstance(output, str) else output
+    decoder = json.JSONDecoder()
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.replace("\r", "").replace("\n", "")
+        if "}" not in chunk:
+            # the object being read ends in a later chunk
+            continue
+        position = 0
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+            if buffer.find("}", position) == -1:
+                break
+            try:
+                entry, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield FileHash(algorithm=algorithm, hash=entry["Hash"], path=entry["Path"])
+        buffer = buffer[position:]
+    position = _SEPARATORS.match(buffer).end()
+    if position < len(buffer):
+        # an object which never completed: raise its decoding error
+        decoder.raw_decode(buffer, position)
+
+
 @dataclass
 class FileHashList:
     file_hashes: list[FileHash]
@@ -44,13 +130,12 @@ class FileHashList:
         # this function is currently is use, called from "ssm_manager":
         # "response = self.ssm_client.send_command()"
         # The "response["StandardOutputContent"]" is provided to this function
-        result = response.replace("\n", "")
-        parsed_list = json.loads(result)
-        # if there is only 1 entry, then the 'parsed_list' will not be a 'list'
-        if not isinstance(parsed_list, list):
-            parsed_list = [parsed_list]
+        # if there is only 1 entry, then the output is an object, not a list
+        self.file_hashes = list(iter_sha256_windows(response))
+        if not self.file_hashes:
+            # json.loads() used to fail on it: an empty list would make diff() pass with every restored file extra
+            raise ValueError(f"No file hash in the Get-FileHash output: {response!r}")
 
-        # now build an actual list[FileHash] from the 'json_loads' data
-        self.file_hashes = [
-            FileHash(algorithm="SHA256", hash=filehash["Hash"], path=filehash["Path"]) for filehash in parsed_list
-        ]
+    def diff(self, restored: "FileHashList") -> FileHashDiff:
+        """Missing, extra and mismatched files of the restored list against this one, indexed by path"""
+        return diff_file_hashes(self.file_hashes, restored.file_hashes)
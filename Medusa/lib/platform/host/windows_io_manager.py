@@ -503,15 +503,10 @@ class WindowsIOManager:
                 source_vm_checksum.hash == restored_vm_checksum.hash
             ), f"Source VM Checksum = {source_vm_checksum.hash} and Restored VM Checksum = {restored_vm_checksum.hash}"
         else:  # The object will be an instance of FileHashList
-            for source_vm in source_vm_checksum.file_hashes:
-                source_vm_file_path = source_vm.path
-                restored_vm = [
-                    res_vm for res_vm in restored_vm_checksum.file_hashes if res_vm.path == source_vm_file_path
-                ][0]
-                if restored_vm:
-                    assert (
-                        source_vm.hash == restored_vm.hash
-                    ), f"Source VM Checksum = {source_vm.hash} and Restored VM Checksum = {restored_vm.hash}"
+            assert source_vm_checksum.file_hashes, "Source VM Checksum list is empty, nothing to compare"
+            diff = source_vm_checksum.diff(restored_vm_checksum)
+            logger.info(f"Source and Restored VM Checksums: {diff.summary()}")
+            assert diff.ok, f"Source and Restored VM Checksums do not match: {diff.summary()}"
 
     def bring_disks_online(self):
         """Brings all the disks online which are in offline state."""
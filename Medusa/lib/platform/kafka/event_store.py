@@ -0,0 +1,229 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from kafka.protocol.message import Message as KafkaMessage
+
+from lib.platform.kafka.eventfilters import EventFilter
+
+
+class _OffsetIndex:
+    """Offsets of one partition in ascending order, with the sequence number of each event"""
+
+    def __init__(self):
+        self.offsets: List[int] = []
+        self.seqs: List[int] = []
+        self.start = 0
+
+    def add(self, offset: int, seq: int):
+        if not self.offsets or offset > self.offsets[-1]:
+            self.offsets.append(offset)
+            self.seqs.append(seq)
+        else:
+            position = bisect.bisect_left(self.offsets, offset, self.start)
+            self.offsets.insert(position, offset)
+            self.seqs.insert(position, seq)
+
+    def seqs_from(self, offset: int) -> List[int]:
+        return self.seqs[bisect.bisect_left(self.offsets, offset, self.start) :]
+
+    def drop_before(self, offset: int) -> List[int]:
+        end = bisect.bisect_left(self.offsets, offset, self.start)
+        dropped = self.seqs[self.start : end]
+        self.start = end
+        self.compact()
+        return dropped
+
+    def compact(self):
+        if self.start and self.start * 2 >= len(self.offsets):
+            del self.offsets[: self.start]
+            del self.seqs[: self.start]
+            self.start = 0
+
+
+class EventStore:
+    """
+    Kafka messages consumed by KafkaManager, kept in arrival order.
+
+    Events are indexed by partition and offset, by key and by the values of the indexed headers (ce_type by
+    default), so reading the events after an offset or of one type does not scan everything consumed so far.
+    Retention keeps the store bounded on long runs: at most max_events events, none older than max_age_seconds
+    (arrival time) and evict_before() drops the events before given offsets.
+
+    ARGUMENTS
+    indexed_headers - optional - header names with a value index, default: ("ce_type",)
+    max_events - optional - number of events kept, default: unbounded
+    max_age_seconds - optional - seconds an event is kept after it arrived, default: unbounded
+    """
+
+    def __init__(self, indexed_headers=("ce_type",), max_events: int = None, max_age_seconds: float = None):
+        self.indexed_headers = tuple(indexed_headers)
+        self.max_events = max_events
+        self.max_age_seconds = max_age_seconds
+        self._events: "OrderedDict[int, KafkaMessage]" = OrderedDict()
+        self._arrival: "OrderedDict[int, float]" = OrderedDict()
+        self._partitions: Dict[int, _OffsetIndex] = defaultdict(_OffsetIndex)
+        self._latest_offsets: Dict[int, int] = {}
+        # key -> seqs, (header name, header value) -> seqs. Evicted seqs are skipped on read and removed by _compact
+        self._by_key: Dict[bytes, List[int]] = defaultdict(list)
+        self._by_header: Dict[tuple, List[int]] = defaultdict(list)
+        self._next_seq = 0
+        self._evicted_since_compact = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._events.values()))
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the next event, events added later have a sequence number >= last_seq"""
+        return self._next_seq
+
+    def add(self, events: Iterable[KafkaMessage]) -> int:
+        """Add consumed events. Returns the number of events added."""
+        added = 0
+        with self._lock:
+            now = time.monotonic()
+            for event in events:
+                seq = self._next_seq
+                self._next_seq += 1
+                self._events[seq] = event
+                self._arrival[seq] = now
+                self._partitions[event.partition].add(event.offset, seq)
+                if event.offset > self._latest_offsets.get(event.partition, -1):
+                    self._latest_offsets[event.partition] = event.offset
+                if event.key is not None:
+                    self._by_key[event.key].append(seq)
+                for name, value in event.headers or ():
+                    if name in self.indexed_headers:
+                        self._by_header[(name, value)].append(seq)
+                added += 1
+            self._apply_retention()
+        return added
+
+    def latest_offsets(self) -> Dict[int, int]:
+        """partition -> highest offset consumed"""
+        with self._lock:
+            return self._latest_offsets.copy()
+
+    def evict_before(self, offsets: Dict[int, int]):
+        """Drop the events before the given offset of each partition"""
+        with self._lock:
+            for partition, offset in offsets.items():
+                if partition in self._partitions:
+                    for seq in self._partitions[partition].drop_before(offset):
+                        self._drop(seq)
+            self._compact()
+
+    def _apply_retention(self):
+        if self.max_events is not None:
+            while len(self._events) > self.max_events:
+                self._drop(next(iter(self._events)), from_partition=True)
+        if self.max_age_seconds is not None:
+            expired = time.monotonic() - self.max_age_seconds
+            while self._arrival and next(iter(self._arrival.values())) < expired:
+                self._drop(next(iter(self._arrival)), from_partition=True)
+        self._compact()
+
+    def _drop(self, seq: int, from_partition=False):
+        event = self._events.pop(seq, None)
+        self._arrival.pop(seq, None)
+        if event is None:
+            return
+        self._evicted_since_compact += 1
+        if from_partition:
+            # Oldest event first, so it is at the head of its partition unless offsets arrived out of order
+            index = self._partitions[event.partition]
+            if index.start < len(index.seqs) and index.seqs[index.start] == seq:
+                index.start += 1
+                index.compact()
+            else:
+                position = index.seqs.index(seq, index.start)
+                del index.offsets[position]
+                del index.seqs[position]
+
+    def _compact(self):
+        # Rebuild the postings once evicted entries outnumber the live ones
+        if self._evicted_since_compact <= max(len(self._events), 1024):
+            return
+        for postings in (self._by_key, self._by_header):
+            for index_key in list(postings):
+                live = [seq for seq in postings[index_key] if seq in self._events]
+                if live:
+                    postings[index_key] = live
+                else:
+                    del postings[index_key]
+        self._evicted_since_compact = 0
+
+    def _candidate_seqs(self, from_offset, key, headers, from_seq) -> Optional[List[int]]:
+        """Sequence numbers from the most selective index, None when no index applies"""
+        candidates = []
+        if key is not None:
+            candidates.append(self._by_key.get(key, []))
+        for name, value in (headers or {}).items():
+            if name not in self.indexed_headers:
+                continue
+            # Header filters match a value containing the given bytes, as event_filter_type does
+            matching = [
+                seqs
+                for (header, indexed_value), seqs in self._by_header.items()
+                if header == name and indexed_value is not None and value in indexed_value
+            ]
+            candidates.append(sorted(seq for seqs in matching for seq in seqs))
+        if from_offset:
+            candidates.append(
+                sorted(
+                    seq
+                    for partition, index in self._partitions.items()
+                    for seq in index.seqs_from(from_offset.get(partition, 0))
+                )
+            )
+        if from_seq:
+            candidates = [seqs[bisect.bisect_left(seqs, from_seq) :] for seqs in candidates]
+        if not candidates:
+            return None
+        return min(candidates, key=len)
+
+    def query(
+        self,
+        from_offset: Dict[int, int] = None,
+        key: bytes = None,
+        headers: Dict[str, bytes] = None,
+        event_filters: List[EventFilter] = None,
+        from_seq: int = 0,
+    ) -> List[KafkaMessage]:
+        """
+        Events in arrival order matching all the given conditions.
+
+        args:
+        from_offset - partition -> first offset returned, partitions not listed are returned from the start
+        key - exact message key
+        headers - header name -> bytes the header value contains
+        event_filters - EventFilter functions applied to the remaining events
+        from_seq - only events added after last_seq had this value
+        """
+        with self._lock:
+            seqs = self._candidate_seqs(from_offset, key, headers, from_seq)
+            if seqs is None:
+                seqs = [seq for seq in self._events if seq >= from_seq] if from_seq else list(self._events)
+            events = [self._events[seq] for seq in seqs if seq in self._events]
+
+        def match(event) -> bool:
+            if from_offset and event.partition in from_offset and from_offset[event.partition] > event.offset:
+                return False
+            if key is not None and event.key != key:
+                return False
+            if headers:
+                event_headers = dict(event.headers or ())
+                for name, value in headers.items():
+                    if name not in event_headers or value not in event_headers[name]:
+                        return False
+            return all(event_filter(event) for event_filter in event_filters or ())
+
+        return [event for event in events if match(event)]
@@ -17,6 +17,7 @@ def event_filter_type(event_type: str) -> EventFilter:
         headers = dict(map(lambda x: (x[0], x[1]), event.headers))
         return bytes(event_type, "utf-8") in headers["ce_type"]
 
+    f.index_headers = {"ce_type": bytes(event_type, "utf-8")}
     return f
 
 
@@ -34,6 +35,7 @@ def event_filter_customer_id(customer_id: bytes) -> EventFilter:
     def f(event):
         return True if event.key.decode("utf-8") == customer_id.decode("utf-8") else False
 
+    f.index_key = customer_id
     return f
 
 
@@ -2,6 +2,8 @@ from typing import Callable
 
 from kafka.protocol.message import Message
 
+# A filter can expose what it matches for the KafkaManager event store indexes:
+# index_key (exact message key) and index_headers (header name -> bytes the value contains)
 EventFilter = Callable[[Message], bool]
 
 
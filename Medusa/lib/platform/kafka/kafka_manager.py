@@ -2,17 +2,21 @@ import json
 import logging
 import os
 import secrets
+import time
 import uuid
 from enum import Enum
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-from google.protobuf.json_format import MessageToJson, MessageToDict
+from google.protobuf.json_format import MessageToDict
 from kafka import KafkaAdminClient
 from kafka import KafkaConsumer
 from kafka import KafkaProducer
 from kafka import TopicPartition
+from kafka.producer.future import FutureRecordMetadata
 from kafka.protocol.message import Message as KafkaMessage
 
+from lib.platform.kafka.event_store import EventStore
+from lib.platform.kafka.eventfilters import EventFilter
 from utils.dates import get_iso8601
 
 logger = logging.getLogger()
@@ -35,7 +39,7 @@ class TopicEncoding(Enum):
 
 
 class KafkaManager:
-    events: List[KafkaMessage]
+    event_store: EventStore
     _offset_last_send: Dict[int, int]  # partition -> offset
 
     _event_json_preserving_proto_field_name: bool
@@ -50,6 +54,10 @@ class KafkaManager:
         account_id=None,
         event_json_preserving_proto_field_name: bool = True,
         event_json_use_integers_for_enums: bool = True,
+        producer_linger_ms: int = 5,
+        producer_batch_size: int = 256 * 1024,
+        event_retention_count: int = None,
+        event_retention_seconds: float = None,
     ):
         """
         KafkaManager class to send and retrieve messages on topic indicated in arguments.
@@ -58,10 +66,16 @@ class KafkaManager:
         topic - topic on which we send / retrieve messages
         host - optional - Kafka host on which we want to send / retrieve messages, default: localhost:9092
         topic_encoding - optional - encoding format for messages, default: JSON
+        producer_linger_ms - optional - time the producer waits to fill a batch, default: 5
+        producer_batch_size - optional - producer batch size in bytes per partition, default: 256 KiB
+        event_retention_count - optional - number of consumed events kept, default: unbounded
+        event_retention_seconds - optional - seconds a consumed event is kept, default: unbounded
 
         FUNCTIONS
         send_message - send message on topic
+        send_messages - send a list of messages on topic with a single flush
         read_message - retrieve message from topic if message key is matching
+        wait_for - wait until a message matching the filters is consumed
 
         ENVIRONMENT VARIABLES
         KAFKA_BOOTSTRAP_SERVERS - optional - list of boostrap servers to which Kafka listen
@@ -73,6 +87,8 @@ class KafkaManager:
         self.kafka_hosts = hosts.split(",") if (hosts := os.getenv("KAFKA_BOOTSTRAP_SERVERS")) else [host]
         self.topic = topic
         self.tp = TopicPartition(topic=self.topic, partition=0)
+        self.producer_linger_ms = producer_linger_ms
+        self.producer_batch_size = producer_batch_size
 
         self.admin_client = self.__create_admin_client()
         self.producer = self.__create_producer()
@@ -90,7 +106,7 @@ class KafkaManager:
         self._event_json_preserving_proto_field_name = event_json_preserving_proto_field_name
         self._event_json_use_integers_for_enums = event_json_use_integers_for_enums
 
-        self.events = []
+        self.event_store = EventStore(max_events=event_retention_count, max_age_seconds=event_retention_seconds)
         self.set_offset_last_send_to_latest()
 
     def __repr__(self):
@@ -155,6 +171,8 @@ class KafkaManager:
             bootstrap_servers=self.kafka_hosts,
             value_serializer=self.__serializer,
             acks="all",
+            linger_ms=self.producer_linger_ms,
+            batch_size=self.producer_batch_size,
             **self.__generate_settings_for_ssl(),
         )
         logger.info("Kafka producer created")
@@ -162,12 +180,12 @@ class KafkaManager:
 
     def __serialize_message(self, event, uint64_fields: list = None):
         if self.__topic_encoding == TopicEncoding.JSON:
-            json_msg = MessageToJson(
+            # Same object json.loads(MessageToJson(event)) gives, without the JSON round-trip
+            event_data = MessageToDict(
                 event,
                 preserving_proto_field_name=self._event_json_preserving_proto_field_name,
                 use_integers_for_enums=self._event_json_use_integers_for_enums,
             )
-            event_data = json.loads(json_msg)
             if uint64_fields:
                 for field in uint64_fields:
                     try:
@@ -204,16 +222,71 @@ class KafkaManager:
         self.producer.flush()
         logger.info(f"Event sent: {event_raw}, headers:{headers}")
 
+    def send_messages(
+        self, events: list, user_headers: dict = None, uint64_fields: list = None, partition=None, update_offsets=True
+    ) -> List[FutureRecordMetadata]:
+        """
+        This function is used to send a batch of messages, e.g. thousands of events for scale tests.
+        Messages are handed to the producer without waiting for each other, batched according to
+        producer_linger_ms / producer_batch_size and flushed once.
+
+        args:
+        events - list of events constructed from protobuf file
+        user_headers - optional. Possibility to add aditional headers to basic generated headers, same for all events
+        uint64_fileds - optional. Explicity field list will be converted to python long.
+        partition - optional. Partition on which messages will be sent.
+        update_offsets - optional. Consume the pending messages once before sending, as send_message does.
+
+        returns:
+        Delivery future per event, in the order of events. future.get() returns the RecordMetadata
+        (partition, offset) or raises the delivery error.
+        """
+        if update_offsets:
+            self.set_offset_last_send_to_latest()
+        if user_headers is None:
+            user_headers = {}
+        headers = self.__generate_headers(user_headers)
+        logger.info(f"Send {len(events)} events, headers:{user_headers}")
+        futures = [
+            self.producer.send(
+                self.topic,
+                value=self.__serialize_message(event, uint64_fields),
+                key=self.account_id,
+                headers=headers,
+                partition=partition,
+            )
+            for event in events
+        ]
+        self.producer.flush()
+        failed = sum(1 for future in futures if future.failed())
+        if failed:
+            logger.error(f"{failed} of {len(events)} events were not delivered")
+        logger.info(f"{len(events) - failed} events sent")
+        return futures
+
+    @property
+    def events(self) -> List[KafkaMessage]:
+        """Consumed messages of the account, in arrival order"""
+        return list(self.event_store)
+
+    def __is_account_message(self, msg) -> bool:
+        return bool(msg.key) and self.account_id in msg.key
+
     def __consume_new_messages_and_update_events(self):
         try:
-            for msg in self.consumer:
-                if not msg.key or self.account_id not in msg.key:
-                    continue
-                self.events.append(msg)
+            self.event_store.add(msg for msg in self.consumer if self.__is_account_message(msg))
         except StopIteration:
             # read all messages up until latest offset on all partitions
             pass
 
+    def __consume_until(self, deadline: float) -> int:
+        """Long poll the consumer, it returns as soon as new messages arrive or at the deadline"""
+        timeout_ms = max(int((deadline - time.monotonic()) * 1000), 0)
+        records = self.consumer.poll(timeout_ms=timeout_ms)
+        return self.event_store.add(
+            msg for partition_records in records.values() for msg in partition_records if self.__is_account_message(msg)
+        )
+
     def get_offsets(self) -> Dict[int, int]:
         return self._offset_last_send.copy()
 
@@ -230,27 +303,76 @@ class KafkaManager:
         if not self._offset_last_send:
             self._offset_last_send = {}
         self.__consume_new_messages_and_update_events()
-        for event in self.events:
-            t = self._offset_last_send[event.partition] if event.partition in self._offset_last_send else 0
-            self._offset_last_send[event.partition] = event.offset if event.offset > t else t
+        for partition, offset in self.event_store.latest_offsets().items():
+            t = self._offset_last_send[partition] if partition in self._offset_last_send else 0
+            self._offset_last_send[partition] = offset if offset > t else t
 
-    def read_messages(self, from_offset: Dict[int, int] = None) -> List[KafkaMessage]:
+    def evict_events_before(self, offsets: Dict[int, int] = None) -> None:
+        """
+        This function is used to drop consumed messages which are not needed anymore, e.g. on long runs
+
+        args:
+        offsets - optional. Messages before these offsets are dropped, default: offsets of the last send
+        """
+        self.event_store.evict_before(self._offset_last_send if offsets is None else offsets)
+
+    @staticmethod
+    def __index_hints(event_filters: List[EventFilter]) -> dict:
+        # Filters built by eventfilters expose the key / header they match, which the event store has indexes for
+        hints = {}
+        for event_filter in event_filters or ():
+            if getattr(event_filter, "index_key", None) is not None:
+                hints["key"] = event_filter.index_key
+            if getattr(event_filter, "index_headers", None):
+                hints.setdefault("headers", {}).update(event_filter.index_headers)
+        return hints
+
+    def read_messages(
+        self, from_offset: Dict[int, int] = None, event_filters: List[EventFilter] = None
+    ) -> List[KafkaMessage]:
         """
         This function is used to read messages on kafka and looking for matching key (account id)
 
         args:
         from_offset - adds filter for the returned events, based on the offset
+        event_filters - optional. Only events matching all the filters are returned
         """
         self.__consume_new_messages_and_update_events()
+        return self.event_store.query(
+            from_offset=from_offset, event_filters=event_filters, **self.__index_hints(event_filters)
+        )
+
+    def wait_for(
+        self, event_filters: List[EventFilter], timeout: float = 60, from_offset: Dict[int, int] = None
+    ) -> Optional[KafkaMessage]:
+        """
+        This function is used to wait for a message matching all the filters.
+        The consumer long polls the broker, so the wait ends as soon as the message arrives.
+        Only the newly consumed messages are checked again after each poll.
 
-        def reduce(msg) -> bool:
-            if from_offset:
-                if msg.partition in from_offset and from_offset[msg.partition] > msg.offset:
-                    return False
-            return True
+        args:
+        event_filters - filters the message has to match
+        timeout - optional. Seconds to wait, default: 60
+        from_offset - optional. Only messages from these offsets are considered
 
-        account_events = filter(lambda msg: reduce(msg), self.events)
-        return list(account_events)
+        returns:
+        The first matching message, None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        hints = self.__index_hints(event_filters)
+        self.__consume_new_messages_and_update_events()
+        from_seq = 0
+        while True:
+            found = self.event_store.query(
+                from_offset=from_offset, event_filters=event_filters, from_seq=from_seq, **hints
+            )
+            if found:
+                return found[0]
+            if time.monotonic() >= deadline:
+                logger.info(f"No event matching the filters within {timeout} seconds, from offset: {from_offset}")
+                return None
+            from_seq = self.event_store.last_seq
+            self.__consume_until(deadline)
 
     def consumer_group_offset(self, group_id, partition):
         """
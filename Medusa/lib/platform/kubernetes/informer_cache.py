@@ -0,0 +1,298 @@
+"""Watch based informer cache of Kubernetes resources, for KubernetesClient.
+
+The KubernetesClient list methods send a full LIST to the API server on every call, and the EKS steps call them in
+polling loops. An informer lists a resource kind once, over all namespaces, then keeps its objects current from a
+watch started at the resourceVersion of the list. When the watch times out it is resumed from the last
+resourceVersion seen (bookmarks included), when that version is too old (410 Gone) the kind is listed again.
+
+Reads are served from memory, indexed by namespace, label and name. wait_until() waits on the watch events instead
+of polling.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Union
+
+from kubernetes import watch
+from kubernetes.client import V1ListMeta
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger()
+
+WATCH_TIMEOUT_SECONDS = 300
+SYNC_TIMEOUT_SECONDS = 120
+RETRY_SECONDS = 5
+WAIT_TIMEOUT_SECONDS = 600
+HTTP_STATUS_GONE = 410
+
+# Resource kind: (KubernetesClient API attribute, method listing the kind over all namespaces)
+RESOURCE_KINDS = {
+    "configmaps": ("api_instance", "list_config_map_for_all_namespaces"),
+    "deployments": ("apps_v1_api", "list_deployment_for_all_namespaces"),
+    "ingresses": ("network_api_instance", "list_ingress_for_all_namespaces"),
+    "namespaces": ("api_instance", "list_namespace"),
+    "persistentvolumeclaims": ("api_instance", "list_persistent_volume_claim_for_all_namespaces"),
+    "persistentvolumes": ("api_instance", "list_persistent_volume"),
+    "pods": ("api_instance", "list_pod_for_all_namespaces"),
+    "replicasets": ("apps_v1_api", "list_replica_set_for_all_namespaces"),
+    "secrets": ("api_instance", "list_secret_for_all_namespaces"),
+    "services": ("api_instance", "list_service_for_all_namespaces"),
+}
+
+
+@dataclass
+class CachedList:
+    """Cached objects, shaped as the V1*List the list methods return"""
+
+    items: list
+    metadata: V1ListMeta
+
+
+def parse_label_selector(label_selector: Union[str, dict, None]) -> list[tuple[str, str, Optional[str]]]:
+    """(key, operator, value) of the equality based requirements of a label selector, eg: "app=nginx,tier!=db,env"
+
+    Operators are "=", "!=", "exists" and "!exists" (value None).
+    """
+    if not label_selector:
+        return []
+    if isinstance(label_selector, dict):
+        return [(key, "=", str(value)) for key, value in label_selector.items()]
+    requirements = []
+    for term in label_selector.split(","):
+        term = term.strip()
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            requirements.append((key.strip(), "!=", value.strip()))
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            requirements.append((key.strip(), "=", value.strip()))
+        elif term.startswith("!"):
+            requirements.append((term[1:].strip(), "!exists", None))
+        elif term:
+            requirements.append((term, "exists", None))
+    return requirements
+
+
+def _labels(obj) -> dict:
+    return (obj.metadata.labels if obj.metadata else None) or {}
+
+
+def _matches(obj, requirement) -> bool:
+    key, operator, value = requirement
+    labels = _labels(obj)
+    if operator == "=":
+        return labels.get(key) == value
+    if operator == "!=":
+        return labels.get(key) != value
+    if operator == "exists":
+        return key in labels
+    return key not in labels
+
+
+class Informer:
+    """Objects of one resource kind, kept current by a watch"""
+
+    def __init__(self, kind: str, list_function: Callable, watch_timeout_seconds: int = WATCH_TIMEOUT_SECONDS):
+        """
+        Args:
+            kind (str): Resource kind, eg: "pods"
+            list_function (Callable): API method listing the kind over all namespaces, eg:
+                CoreV1Api().list_pod_for_all_namespaces
+            watch_timeout_seconds (int): Duration of a watch request, resumed at its end
+        """
+        self.kind = kind
+        self.list_function = list_function
+        self.watch_timeout_seconds = watch_timeout_seconds
+        self.resource_version: Optional[str] = None
+        # LIST requests and watch events, eg: to compare with the LIST requests of polling
+        self.list_count = 0
+        self.event_count = 0
+        self._objects: dict[tuple[str, str], Any] = {}
+        self._by_namespace: dict[str, set] = {}
+        self._by_label: dict[tuple[str, str], set] = {}
+        self._condition = threading.Condition()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, timeout: int = SYNC_TIMEOUT_SECONDS):
+        """Lists the kind and starts watching it, returns once the objects are listed"""
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"informer-{self.kind}", daemon=True)
+                self._thread.start()
+        if not self._synced.wait(timeout):
+            raise TimeoutError(f"Informer of {self.kind} not synced after {timeout} seconds")
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch_from_resource_version()
+            except ApiException as e:
+                if e.status == HTTP_STATUS_GONE:
+                    logger.info(f"Informer of {self.kind}: resourceVersion {self.resource_version} expired, relisting")
+                    self.resource_version = None
+                else:
+                    logger.warning(f"Informer of {self.kind}: watch failed, retrying: {e}")
+                    self._stopped.wait(RETRY_SECONDS)
+            except Exception as e:
+                logger.warning(f"Informer of {self.kind}: watch failed, retrying: {e}")
+                self._stopped.wait(RETRY_SECONDS)
+
+    def _relist(self):
+        response = self.list_function()
+        self.list_count += 1
+        with self._condition:
+            self._objects.clear()
+            self._by_namespace.clear()
+            self._by_label.clear()
+            for obj in response.items:
+                self._add(obj)
+            self.resource_version = response.metadata.resource_version
+            self._condition.notify_all()
+        self._synced.set()
+        logger.debug(f"Informer of {self.kind}: {len(self._objects)} objects at {self.resource_version}")
+
+    def _watch_from_resource_version(self):
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+            self.list_function,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout_seconds,
+            allow_watch_bookmarks=True,
+        ):
+            if self._stopped.is_set():
+                self._watch.stop()
+                break
+            self._apply(event)
+
+    def _apply(self, event: dict):
+        self.event_count += 1
+        if event["type"] == "BOOKMARK":
+            self.resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+            return
+        obj = event["object"]
+        with self._condition:
+            self._remove(self._key(obj))
+            if event["type"] != "DELETED":
+                self._add(obj)
+            self.resource_version = obj.metadata.resource_version
+            self._condition.notify_all()
+
+    @staticmethod
+    def _key(obj) -> tuple[str, str]:
+        return obj.metadata.namespace or "", obj.metadata.name
+
+    def _add(self, obj):
+        key = self._key(obj)
+        self._objects[key] = obj
+        self._by_namespace.setdefault(key[0], set()).add(key)
+        for label in _labels(obj).items():
+            self._by_label.setdefault(label, set()).add(key)
+
+    def _remove(self, key):
+        obj = self._objects.pop(key, None)
+        if obj is None:
+            return
+        self._by_namespace[key[0]].discard(key)
+        for label in _labels(obj).items():
+            self._by_label[label].discard(key)
+
+    def _select(self, namespace: Optional[str], label_selector) -> list:
+        requirements = parse_label_selector(label_selector)
+        keys = None
+        if namespace is not None:
+            keys = self._by_namespace.get(namespace, set())
+        for key, operator, value in requirements:
+            if operator == "=":
+                labelled = self._by_label.get((key, value), set())
+                keys = labelled if keys is None else keys & labelled
+        objects = [self._objects[key] for key in sorted(keys if keys is not None else self._objects)]
+        return [obj for obj in objects if all(_matches(obj, requirement) for requirement in requirements)]
+
+    def list(self, namespace: str = None, label_selector: Union[str, dict] = None) -> list:
+        """Objects of the namespace (all namespaces by default) matching the label selector"""
+        with self._condition:
+            return self._select(namespace, label_selector)
+
+    def get(self, name: str, namespace: str = None):
+        """Object of the name, None if there is none"""
+        with self._condition:
+            return self._objects.get((namespace or "", name))
+
+    def wait_until(
+        self,
+        predicate: Callable[[list], Any],
+        namespace: str = None,
+        label_selector: Union[str, dict] = None,
+        timeout: int = WAIT_TIMEOUT_SECONDS,
+    ):
+        """Waits until predicate(objects of the namespace matching the label selector) is true, checked on every
+        change of the objects of the kind.
+
+        Returns:
+            the predicate result
+
+        Raises:
+            TimeoutError: the predicate is still false after timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                result = predicate(self._select(namespace, label_selector))
+                if result:
+                    return result
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopped.is_set():
+                    raise TimeoutError(f"{self.kind} condition not met after {timeout} seconds")
+                self._condition.wait(remaining)
+
+
+class InformerCache:
+    """Informers of the resource kinds read through a KubernetesClient, each started on its first read"""
+
+    def __init__(self, kubernetes_client, watch_timeout_seconds: int = WATCH_TIMEOUT_SECONDS):
+        self.kubernetes_client = kubernetes_client
+        self.watch_timeout_seconds = watch_timeout_seconds
+        self._informers: dict[str, Informer] = {}
+        self._lock = threading.Lock()
+
+    def informer(self, kind: str) -> Informer:
+        with self._lock:
+            if kind not in self._informers:
+                api, method = RESOURCE_KINDS[kind]
+                list_function = getattr(getattr(self.kubernetes_client, api), method)
+                self._informers[kind] = Informer(kind, list_function, self.watch_timeout_seconds)
+            informer = self._informers[kind]
+        informer.start()
+        return informer
+
+    def list(self, kind: str, namespace: str = None, label_selector: Union[str, dict] = None) -> CachedList:
+        informer = self.informer(kind)
+        return CachedList(
+            informer.list(namespace, label_selector), V1ListMeta(resource_version=informer.resource_version)
+        )
+
+    def get(self, kind: str, name: str, namespace: str = None):
+        return self.informer(kind).get(name, namespace)
+
+    def wait_until(self, kind: str, predicate: Callable[[list], Any], **kwargs):
+        return self.informer(kind).wait_until(predicate, **kwargs)
+
+    def stop(self):
+        with self._lock:
+            for informer in self._informers.values():
+                informer.stop()
+            self._informers.clear()
@@ -3,6 +3,9 @@ from kubernetes import client, config
 from kubernetes.stream import stream
 import os
 import requests
+from typing import Any, Callable, Optional, Union
+
+from lib.platform.kubernetes.informer_cache import InformerCache
 
 from tests.steps.aws_protection.eks.eks_common_steps import run_ctl_command
 
@@ -10,7 +13,12 @@ logger = logging.getLogger()
 
 
 class KubernetesClient:
-    def __init__(self):
+    def __init__(self, use_informers: bool = False):
+        """
+        Args:
+            use_informers (bool, optional): Serve the list methods from an informer cache kept current by watches,
+                instead of a LIST request on every call. Defaults to False.
+        """
         kube_config = os.environ.get("KUBECONFIG", "~/.kube/config")
         proxy_url = os.environ.get("http_proxy")
         self.config = config.load_kube_config(config_file=kube_config)
@@ -22,6 +30,70 @@ class KubernetesClient:
         self.apps_v1_api = client.AppsV1Api()
         self.storage_v1_api = client.StorageV1Api()
         self.rbac_authorization_v1_api = client.RbacAuthorizationV1Api()
+        self.informers: Optional[InformerCache] = InformerCache(self) if use_informers else None
+
+    def _list(self, kind: str, list_function: Callable, namespace: str = None):
+        """Objects of the kind from the informer cache, or from list_function (a LIST request) without informers"""
+        if self.informers:
+            return self.informers.list(kind, namespace=namespace)
+        return list_function(namespace=namespace) if namespace else list_function()
+
+    def get_cached_object(self, kind: str, name: str, namespace: str = None):
+        """Object of the kind and name (eg: "pods", "nginx-7c5ddbdf54-x2x8p") from the informer cache
+
+        Returns:
+            The object, None if there is none
+        """
+        assert self.informers, "KubernetesClient created without informers, use KubernetesClient(use_informers=True)"
+        return self.informers.get(kind, name, namespace)
+
+    def list_cached_objects(self, kind: str, namespace: str = None, label_selector: Union[str, dict] = None) -> list:
+        """Objects of the kind from the informer cache, of the namespace and label selector (eg: "app=nginx")"""
+        assert self.informers, "KubernetesClient created without informers, use KubernetesClient(use_informers=True)"
+        return self.informers.list(kind, namespace=namespace, label_selector=label_selector).items
+
+    def wait_until(
+        self,
+        kind: str,
+        predicate: Callable[[list], Any],
+        namespace: str = None,
+        label_selector: Union[str, dict] = None,
+        timeout: int = 600,
+    ):
+        """Waits until predicate(objects of the kind, namespace and label selector) is true, checked on each watch
+        event instead of polling the list methods.
+
+        eg: wait_until("pods", lambda pods: pods and all(pod.status.phase == "Running" for pod in pods), "nginx-ns")
+
+        Returns:
+            the predicate result
+
+        Raises:
+            TimeoutError: the predicate is still false after timeout seconds
+        """
+        assert self.informers, "KubernetesClient created without informers, use KubernetesClient(use_informers=True)"
+        return self.informers.wait_until(
+            kind, predicate, namespace=namespace, label_selector=label_selector, timeout=timeout
+        )
+
+    def wait_for_pods_running(self, namespace: str, label_selector: Union[str, dict] = None, timeout: int = 600):
+        """Waits until the namespace has pods, of the label selector, and all of them are Running
+
+        Returns:
+            list: the running pods
+        """
+        return self.wait_until(
+            "pods",
+            lambda pods: pods if pods and all(pod.status.phase == "Running" for pod in pods) else None,
+            namespace=namespace,
+            label_selector=label_selector,
+            timeout=timeout,
+        )
+
+    def stop_informers(self):
+        """Stops the watches of the informer cache"""
+        if self.informers:
+            self.informers.stop()
 
     def pod_command_exec(self, pod_name: str, namespace: str, command: str) -> str:
         """Execute bash command on provided kubernetes pod.
@@ -75,7 +147,7 @@ class KubernetesClient:
 
         """
         try:
-            config_map_list = self.api_instance.list_config_map_for_all_namespaces()
+            config_map_list = self._list("configmaps", self.api_instance.list_config_map_for_all_namespaces)
             logger.info(f"Config Map List being returned here -> {config_map_list}")
             return config_map_list
 
@@ -96,7 +168,9 @@ class KubernetesClient:
                     metadata - some metadata associated with the response. It is optional.
         """
         try:
-            namespaced_config_map = self.api_instance.list_namespaced_config_map(namespace=namespace)
+            namespaced_config_map = self._list(
+                "configmaps", self.api_instance.list_namespaced_config_map, namespace=namespace
+            )
             logger.info(f"Config Map for the namespace '{namespace}' is -> {namespaced_config_map}")
             return namespaced_config_map
         except Exception as e:
@@ -113,7 +187,7 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            namespace_list = self.api_instance.list_namespace()
+            namespace_list = self._list("namespaces", self.api_instance.list_namespace)
             logger.debug(f"Namespace being returned here -> {namespace_list}")
             return namespace_list
         except Exception as e:
@@ -129,7 +203,9 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            deployments_list = self.apps_v1_api.list_namespaced_deployment(namespace=namespace)
+            deployments_list = self._list(
+                "deployments", self.apps_v1_api.list_namespaced_deployment, namespace=namespace
+            )
             logger.debug(f"Deployments {deployments_list} are in the Namespac {namespace}")
             return deployments_list
         except Exception as e:
@@ -145,7 +221,7 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            services_list = self.api_instance.list_namespaced_service(namespace=namespace)
+            services_list = self._list("services", self.api_instance.list_namespaced_service, namespace=namespace)
             logger.debug(f"Deployments {services_list} are in the Namespace {namespace}")
             return services_list
         except Exception as e:
@@ -178,7 +254,7 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            all_ns_deployments_list = self.apps_v1_api.list_deployment_for_all_namespaces()
+            all_ns_deployments_list = self._list("deployments", self.apps_v1_api.list_deployment_for_all_namespaces)
             logger.debug(f"Deployments {all_ns_deployments_list} are all the Namespaces")
             return all_ns_deployments_list
         except Exception as e:
@@ -195,7 +271,7 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            pods_list = self.api_instance.list_namespaced_pod(namespace)
+            pods_list = self._list("pods", self.api_instance.list_namespaced_pod, namespace=namespace)
             logger.debug(f"List of pods {pods_list} for the name space -> {namespace}")
             return pods_list
         except Exception as e:
@@ -212,7 +288,9 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            replica_set_list = self.apps_v1_api.list_namespaced_replica_set(namespace)
+            replica_set_list = self._list(
+                "replicasets", self.apps_v1_api.list_namespaced_replica_set, namespace=namespace
+            )
             logger.debug(f"List of replicaset {replica_set_list} for the name space -> {namespace}")
             return replica_set_list
         except Exception as e:
@@ -229,7 +307,9 @@ class KubernetesClient:
                     metadata - Set of optional data associated with the response.
         """
         try:
-            persistent_volume_claim = self.api_instance.list_persistent_volume_claim_for_all_namespaces()
+            persistent_volume_claim = self._list(
+                "persistentvolumeclaims", self.api_instance.list_persistent_volume_claim_for_all_namespaces
+            )
             logger.debug(f"Persistent Volume Claim Data returned here is -> {persistent_volume_claim}")
             return persistent_volume_claim
         except Exception as e:
@@ -242,7 +322,7 @@ class KubernetesClient:
             list: list of persistent volumes objects
         """
         try:
-            persistent_volumes = self.api_instance.list_persistent_volume()
+            persistent_volumes = self._list("persistentvolumes", self.api_instance.list_persistent_volume)
             logger.debug(f"Persistent Volume Claim Data returned here is -> {persistent_volumes}")
             return persistent_volumes
         except Exception as e:
@@ -272,8 +352,9 @@ class KubernetesClient:
                     metadata - set of optional data associated with the response data.
         """
         try:
-            secret_for_all_namespace = self.api_instance.list_secret_for_all_namespaces()
+            secret_for_all_namespace = self._list("secrets", self.api_instance.list_secret_for_all_namespaces)
             logger.debug(f"List of secret for all namespaces being returned is -> {secret_for_all_namespace}")
+            return secret_for_all_namespace
         except Exception as e:
             logger.error("Exception occurred while executing list_secret_for_all_namespaces: %s\n" % e)
 
@@ -305,7 +386,9 @@ class KubernetesClient:
                     metadata - set of optional data associated with the response data.
         """
         try:
-            ingress_class_for_all_namespaces = self.network_api_instance.list_ingress_for_all_namespaces()
+            ingress_class_for_all_namespaces = self._list(
+                "ingresses", self.network_api_instance.list_ingress_for_all_namespaces
+            )
             logger.debug(
                 f"Ingress Class List for all namespaces being returned is -> {ingress_class_for_all_namespaces}"
             )
@@ -327,7 +410,9 @@ class KubernetesClient:
                     metadata - set of optional data associated with the response data.
         """
         try:
-            namespaced_ingress = self.network_api_instance.list_namespaced_ingress(namespace=namespace)
+            namespaced_ingress = self._list(
+                "ingresses", self.network_api_instance.list_namespaced_ingress, namespace=namespace
+            )
             logger.debug(f"Ingress for namespace '{namespace}' is -> {namespaced_ingress}")
             return namespaced_ingress
         except Exception as e:
@@ -389,7 +474,7 @@ class KubernetesClient:
                     metadata - optional set of data associated with the response.
         """
         try:
-            configMap_obj = self.api_instance.list_namespaced_config_map(namespace=namespace)
+            configMap_obj = self._list("configmaps", self.api_instance.list_namespaced_config_map, namespace=namespace)
             logger.debug(f"{configMap_obj} are in the Namespace {namespace}")
             return configMap_obj
         except Exception as e:
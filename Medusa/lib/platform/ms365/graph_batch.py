@@ -0,0 +1,198 @@
+"""Microsoft Graph JSON batching.
+
+Requests are packed in $batch envelopes of GRAPH_BATCH_SIZE (the Graph limit, 20) and the envelopes are posted
+max_workers at a time over one pooled requests Session. Graph throttles per mailbox (at most 4 concurrent requests
+per app and mailbox for Outlook), the default of max_workers stays within that.
+
+Throttled requests, the whole envelope or single requests in it (429, 503 and 504 responses), are sent again after
+the Retry-After seconds of the response. While a Retry-After is pending no envelope is posted, by any worker. Results
+are returned per request, in the order of the requests.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import requests
+from requests import adapters
+
+logger = logging.getLogger()
+
+GRAPH_BATCH_SIZE = 20
+MAX_CONCURRENT_BATCHES = 4
+MAX_ATTEMPTS = 5
+DEFAULT_RETRY_AFTER_SECONDS = 5
+RETRY_STATUS_CODES = (429, 503, 504)
+
+
+@dataclass
+class GraphBatchRequest:
+    """One request of a batch, url relative to the Graph version root (e.g. "/users/<id>/events") or absolute"""
+
+    method: str
+    url: str
+    body: Optional[dict] = None
+    headers: dict = field(default_factory=dict)
+
+
+@dataclass
+class GraphBatchResponse:
+    """Response of one request of a batch, status_code and json() like a requests Response"""
+
+    status_code: int
+    body: Optional[dict] = None
+    headers: dict = field(default_factory=dict)
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    def json(self) -> dict:
+        return self.body if self.body is not None else {}
+
+
+def new_session(max_workers: int = MAX_CONCURRENT_BATCHES) -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+    session.mount("http://", adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+    return session
+
+
+def _retry_after(headers: dict) -> float:
+    for name, value in (headers or {}).items():
+        if name.lower() == "retry-after":
+            try:
+                return float(value)
+            except ValueError:
+                break
+    return DEFAULT_RETRY_AFTER_SECONDS
+
+
+class GraphBatchClient:
+    def __init__(
+        self,
+        graph_root: str,
+        get_headers: Callable[[], dict],
+        session: requests.Session = None,
+        batch_size: int = GRAPH_BATCH_SIZE,
+        max_workers: int = MAX_CONCURRENT_BATCHES,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        """
+        Args:
+            graph_root (str): Graph version root, e.g. https://graph.microsoft.com/v1.0
+            get_headers (Callable): returns the Authorization headers, called for each envelope
+            session (requests.Session, optional): shared session. Defaults to a new pooled session.
+            batch_size (int, optional): requests per envelope, at most 20. Defaults to 20.
+            max_workers (int, optional): envelopes posted at a time. Defaults to 4.
+            max_attempts (int, optional): attempts of a throttled request. Defaults to 5.
+        """
+        self.graph_root = graph_root.rstrip("/")
+        self.get_headers = get_headers
+        self.session = session or new_session(max_workers)
+        self.batch_size = min(batch_size, GRAPH_BATCH_SIZE)
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def _relative_url(self, url: str) -> str:
+        if url.startswith(self.graph_root):
+            url = url[len(self.graph_root) :]
+        return url if url.startswith("/") else f"/{url}"
+
+    def _throttle(self, seconds: float):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_throttling(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _envelope(self, batch: list[tuple[int, GraphBatchRequest]]) -> dict:
+        envelope = []
+        for index, request in batch:
+            item = {"id": str(index), "method": request.method.upper(), "url": self._relative_url(request.url)}
+            if request.body is not None:
+                item["body"] = request.body
+                item["headers"] = {"Content-Type": "application/json", **request.headers}
+            elif request.headers:
+                item["headers"] = request.headers
+            envelope.append(item)
+        return {"requests": envelope}
+
+    def _post_batch(self, batch: list[tuple[int, GraphBatchRequest]], attempts: dict) -> dict:
+        """Responses of the requests of the batch, by index"""
+        envelope = self._envelope(batch)
+        for attempt in range(1, self.max_attempts + 1):
+            self._wait_for_throttling()
+            headers = {**self.get_headers(), "Content-Type": "application/json"}
+            response = self.session.post(f"{self.graph_root}/$batch", headers=headers, json=envelope)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_attempts:
+                break
+            retry_after = _retry_after(response.headers)
+            logger.info(f"Graph $batch throttled ({response.status_code}), retrying after {retry_after}s")
+            self._throttle(retry_after)
+
+        if response.status_code != requests.codes.ok:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"error": response.text}
+            return {
+                index: GraphBatchResponse(response.status_code, body, dict(response.headers), attempts[index])
+                for index, _ in batch
+            }
+        results = {
+            int(item["id"]): GraphBatchResponse(
+                item["status"], item.get("body"), item.get("headers", {}), attempts[int(item["id"])]
+            )
+            for item in response.json()["responses"]
+        }
+        for index, _ in batch:
+            if index not in results:
+                results[index] = GraphBatchResponse(
+                    requests.codes.server_error, {"error": "No response in the $batch response"}, {}, attempts[index]
+                )
+        return results
+
+    def run(self, batch_requests: list[GraphBatchRequest]) -> list[GraphBatchResponse]:
+        """Send the requests in $batch envelopes
+
+        Returns:
+            list[GraphBatchResponse]: response of each request, in the order of batch_requests. Requests still
+                throttled after max_attempts have the throttling response.
+        """
+        results: list[Optional[GraphBatchResponse]] = [None] * len(batch_requests)
+        attempts = {index: 0 for index in range(len(batch_requests))}
+        pending = list(range(len(batch_requests)))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="graph-batch") as executor:
+            while pending:
+                for index in pending:
+                    attempts[index] += 1
+                batches = [
+                    [(index, batch_requests[index]) for index in pending[start : start + self.batch_size]]
+                    for start in range(0, len(pending), self.batch_size)
+                ]
+                pending = []
+                for responses in executor.map(lambda batch: self._post_batch(batch, attempts), batches):
+                    for index, response in responses.items():
+                        results[index] = response
+                        if response.status_code in RETRY_STATUS_CODES and attempts[index] < self.max_attempts:
+                            self._throttle(_retry_after(response.headers))
+                            pending.append(index)
+                if pending:
+                    logger.info(f"{len(pending)} Graph requests throttled, sending them again")
+                    pending.sort()
+
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(f"Sent {len(batch_requests)} Graph requests in $batch envelopes, {failed} failed")
+        return results
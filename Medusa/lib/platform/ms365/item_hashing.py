@@ -0,0 +1,142 @@
+"""Concurrent hashing of MS365 items, with a cache of the item digests.
+
+The checksum tool hashes one item per call, most of the time going to the Graph requests fetching the item, so the
+items are hashed on a thread pool, max_workers calls at a time.
+
+Digests are cached by item ID and change key (Graph changes the change key of an item on every update), so an item
+hashed before a backup is not fetched and hashed again after the restore when it did not change. Without a change key
+nothing is cached: an item could have changed in between.
+"""
+
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger()
+
+HASH_WORKERS = 8
+
+
+class ItemDigestCache:
+    """Digests by (item kind, user, item ID, change key, hash filters), shared by the MSOutlookManager objects"""
+
+    def __init__(self):
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            digest = self._digests.get(key)
+            self.stats["hits" if digest is not None else "misses"] += 1
+            return digest
+
+    def put(self, key, digest: str):
+        with self._lock:
+            self._digests[key] = digest
+
+    def clear(self):
+        with self._lock:
+            self._digests.clear()
+            self.stats.clear()
+
+
+item_digest_cache = ItemDigestCache()
+
+
+@dataclass
+class ItemMismatch:
+    index: int
+    source_id: str
+    restored_id: str
+    source_digest: Optional[str]
+    restored_digest: Optional[str]
+
+
+def _map_bounded(function: Callable, arguments: Iterable, max_workers: int) -> Iterator[tuple]:
+    """(index, result) of function(argument), in completion order, at most 2 * max_workers calls submitted at once"""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ms365-hash") as executor:
+        in_flight = {}
+        for index, argument in enumerate(arguments):
+            if len(in_flight) >= max_workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+            in_flight[executor.submit(function, argument)] = index
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+
+
+def cached_hash(hash_item: Callable[[str], str], cache_key: Callable[[str], Optional[tuple]]) -> Callable[[str], str]:
+    """hash_item with the digests of the items with a cache key (a change key) kept in item_digest_cache"""
+
+    def hash_with_cache(item_id):
+        key = cache_key(item_id)
+        if key is None:
+            return hash_item(item_id)
+        digest = item_digest_cache.get(key)
+        if digest is None:
+            digest = hash_item(item_id)
+            item_digest_cache.put(key, digest)
+        return digest
+
+    return hash_with_cache
+
+
+def hash_items(hash_item: Callable[[str], str], item_ids: list, max_workers: int = 1) -> list:
+    """Digest of each item, in the order of item_ids, max_workers items hashed at a time"""
+    if max_workers <= 1:
+        return [hash_item(item_id) for item_id in item_ids]
+    digests = [None] * len(item_ids)
+    for index, digest in _map_bounded(hash_item, item_ids, max_workers):
+        digests[index] = digest
+    return digests
+
+
+def compare_items(
+    hash_source: Callable[[str], str],
+    hash_restored: Callable[[str], str],
+    source_ids: list,
+    restored_ids: list,
+    max_workers: int = HASH_WORKERS,
+) -> Iterator[ItemMismatch]:
+    """Hashes the source and restored items pairwise and yields each mismatch as soon as both digests are known
+
+    An item which fails to hash is a mismatch with a None digest, and the comparison goes on.
+    """
+
+    def hash_pair_item(argument):
+        hash_item, item_id = argument
+        try:
+            return hash_item(item_id)
+        except Exception as e:
+            logger.error(f"Failed to hash item {item_id}: {e}")
+            return None
+
+    pairs = max(len(source_ids), len(restored_ids))
+    arguments = []
+    for index in range(pairs):
+        arguments.append((hash_source, source_ids[index]) if index < len(source_ids) else (lambda _: None, None))
+        arguments.append((hash_restored, restored_ids[index]) if index < len(restored_ids) else (lambda _: None, None))
+
+    pending = {}
+    for argument_index, digest in _map_bounded(hash_pair_item, arguments, max(max_workers, 1)):
+        index, side = divmod(argument_index, 2)
+        if index not in pending:
+            pending[index] = {side: digest}
+            continue
+        digests = pending.pop(index)
+        digests[side] = digest
+        if digests[0] is None or digests[0] != digests[1]:
+            yield ItemMismatch(
+                index,
+                source_ids[index] if index < len(source_ids) else None,
+                restored_ids[index] if index < len(restored_ids) else None,
+                digests[0],
+                digests[1],
+            )
@@ -1,8 +1,9 @@
 import asyncio
+import threading
 import requests
 import msal
 import logging
-from typing import List, Union
+from typing import Iterator, List, Union
 from azure.identity.aio import ClientSecretCredential
 from msgraph import GraphServiceClient
 from msgraph.generated.models.user import User
@@ -17,6 +18,14 @@ from datetime import datetime, timedelta
 from lib.common.config.config_manager import ConfigManager
 from lib.dscc.backup_recovery.ms365_protection.common.enums.importance import MS365Importance
 from lib.dscc.backup_recovery.ms365_protection.common.enums.categories import TaskCategories
+from lib.platform.ms365.graph_batch import (
+    MAX_CONCURRENT_BATCHES,
+    GraphBatchClient,
+    GraphBatchRequest,
+    GraphBatchResponse,
+    new_session,
+)
+from lib.platform.ms365.item_hashing import ItemMismatch, cached_hash, compare_items, hash_items
 
 from requests import Response
 import os
@@ -42,7 +51,12 @@ class MSOutlookManager:
 
         self.access_token = None
         self.token_expiry_time = 0
+        # The items are hashed on worker threads, which share the token
+        self._token_lock = threading.Lock()
         self.ms_graph_client = None
+        # Graph version root (graph_api_endpoint is <root>/users), for the $batch requests of the bulk methods
+        self.graph_api_root = self.graph_api_endpoint.rsplit("/users", 1)[0]
+        self.http_session = new_session()
         from MS365_Asset_Checksum_Tool import api as checksumTool
 
         # hashing algorithm can also be checksumTool.sha256(), but mmh3 is faster/preferred
@@ -61,24 +75,21 @@ class MSOutlookManager:
         Returns:
             string: access token of an application
         """
-        if not self.access_token:
-            app = msal.ConfidentialClientApplication(
-                client_id=self.client_id,
-                authority=self.authority,
-                client_credential=self.client_secret,
-            )
-            response = app.acquire_token_for_client(scopes=[self.default_scope])
-
-            # Set the expiry time
-            current_time = datetime.now()
-            self.token_expiry_time = current_time + timedelta(minutes=55)
-            self.access_token = response["access_token"]
-        else:
-            # Check token expiry time
-            if datetime.now() >= self.token_expiry_time:
-                self.access_token = None
-                self.get_access_token()
-        return self.access_token
+        with self._token_lock:
+            # Check token expiry time, a single thread acquires a new token
+            if not self.access_token or datetime.now() >= self.token_expiry_time:
+                app = msal.ConfidentialClientApplication(
+                    client_id=self.client_id,
+                    authority=self.authority,
+                    client_credential=self.client_secret,
+                )
+                response = app.acquire_token_for_client(scopes=[self.default_scope])
+
+                # Set the expiry time
+                current_time = datetime.now()
+                self.token_expiry_time = current_time + timedelta(minutes=55)
+                self.access_token = response["access_token"]
+            return self.access_token
 
     def create_ms_graph_client(self):
         """Create MS graph client, which will be created based on the provided credentials"""
@@ -642,6 +653,108 @@ class MSOutlookManager:
         logger.debug(f"Response: {response.json()}")
         return response
 
+    def batch_requests(
+        self, graph_requests: list[GraphBatchRequest], max_workers: int = MAX_CONCURRENT_BATCHES
+    ) -> list[GraphBatchResponse]:
+        """Sends the requests in Graph $batch envelopes of 20, max_workers envelopes at a time.
+        Throttled requests are sent again after the Retry-After of their response.
+
+        Args:
+            graph_requests (list[GraphBatchRequest]): requests, with urls built from graph_api_endpoint or relative
+                to the Graph version root
+            max_workers (int, optional): envelopes sent at a time. Defaults to 4, the Graph limit per mailbox.
+
+        Returns:
+            list[GraphBatchResponse]: response of each request (status_code, json()), in the order of the requests
+        """
+        client = GraphBatchClient(self.graph_api_root, self.get_headers, self.http_session, max_workers=max_workers)
+        return client.run(graph_requests)
+
+    def send_emails(
+        self, sender_address: str, email_messages: list[dict], max_workers: int = MAX_CONCURRENT_BATCHES
+    ) -> list[GraphBatchResponse]:
+        """Sends emails in Graph $batch envelopes
+
+        Args:
+            sender_address (str): email address of the sender
+            email_messages (list[dict]): email message objects returned by construct_email()
+            max_workers (int, optional): envelopes sent at a time. Defaults to 4.
+
+        Returns:
+            list[GraphBatchResponse]: response of each email, status_code 202 when sent
+        """
+        url = f"{self.graph_api_endpoint}/{sender_address}/sendMail"
+        return self.batch_requests([GraphBatchRequest("POST", url, message) for message in email_messages], max_workers)
+
+    def create_events(
+        self,
+        user_id: str,
+        events_details: list[dict],
+        calendar_folder_id: str = "",
+        max_workers: int = MAX_CONCURRENT_BATCHES,
+    ) -> list[GraphBatchResponse]:
+        """Creates outlook events in Graph $batch envelopes
+
+        Args:
+            user_id (str): Outlook email id for which events have to be created
+            events_details (list[dict]): event objects returned by construct_event_details()
+            calendar_folder_id (str, optional): MS365 outlook calendar folder. Defaults to the default calendar.
+            max_workers (int, optional): envelopes sent at a time. Defaults to 4.
+
+        Returns:
+            list[GraphBatchResponse]: response of each event, status_code 201 and the event in json() when created
+        """
+        url = f"{self.graph_api_endpoint}/{user_id}/events"
+        if calendar_folder_id:
+            url = f"{self.graph_api_endpoint}/{user_id}/calendars/{calendar_folder_id}/events"
+        return self.batch_requests([GraphBatchRequest("POST", url, event) for event in events_details], max_workers)
+
+    def create_contacts(
+        self,
+        user_id: str,
+        contacts_details: list[dict],
+        contacts_folder_id: str = "",
+        max_workers: int = MAX_CONCURRENT_BATCHES,
+    ) -> list[GraphBatchResponse]:
+        """Creates outlook contacts in Graph $batch envelopes
+
+        Args:
+            user_id (str): outlook user id
+            contacts_details (list[dict]): contact objects returned by construct_contact_details()
+            contacts_folder_id (str, optional): contacts folder id. Defaults to the default contacts folder.
+            max_workers (int, optional): envelopes sent at a time. Defaults to 4.
+
+        Returns:
+            list[GraphBatchResponse]: response of each contact, status_code 201 and the contact in json() when created
+        """
+        url = f"{self.graph_api_endpoint}/{user_id}/contacts"
+        if contacts_folder_id:
+            url = f"{self.graph_api_endpoint}/{user_id}/contactFolders/{contacts_folder_id}/contacts"
+        return self.batch_requests(
+            [GraphBatchRequest("POST", url, contact) for contact in contacts_details], max_workers
+        )
+
+    def create_to_do_tasks(
+        self,
+        user_id: str,
+        task_list_id: str,
+        tasks_details: list[dict],
+        max_workers: int = MAX_CONCURRENT_BATCHES,
+    ) -> list[GraphBatchResponse]:
+        """Creates outlook to do tasks in Graph $batch envelopes
+
+        Args:
+            user_id (str): outlook user id
+            task_list_id (str): task list id to create the tasks
+            tasks_details (list[dict]): task objects returned by construct_task_details()
+            max_workers (int, optional): envelopes sent at a time. Defaults to 4.
+
+        Returns:
+            list[GraphBatchResponse]: response of each task, status_code 201 and the task in json() when created
+        """
+        url = f"{self.graph_api_endpoint}/{user_id}/todo/lists/{task_list_id}/tasks"
+        return self.batch_requests([GraphBatchRequest("POST", url, task) for task in tasks_details], max_workers)
+
     def list_contacts(self, user_id: str):
         """lists outlook contacts
 
@@ -1018,6 +1131,8 @@ class MSOutlookManager:
         use_graph_filter=False,
         attachment_filter=["name", "contentType", "contentBytes"],
         item_filter=["subject", "receivedDateTime", "body"],
+        change_keys: dict = None,
+        max_workers: int = 1,
     ) -> list:
         """
         This function returns list of hashes of emails pointed by email_ids.
@@ -1029,6 +1144,9 @@ class MSOutlookManager:
             use_graph_filter (bool, optional): Flag if filter has to be used to get email. Defaults to False.
             attachment_filter (list, optional): Attachment specific filter. Defaults to ["name", "contentType", "contentBytes"].
             item_filter (list, optional): Filter to be used for getting email message. Defaults to ["subject", "receivedDateTime", "body"]
+            change_keys (dict, optional): change key by item id, from get_item_change_keys(). The hashes of the items
+                with a change key are cached, and reused while the change key is the same. Defaults to None.
+            max_workers (int, optional): messages hashed at a time. Defaults to 1.
 
         Raises:
             Exception: Exception will be raised if email message not found or checksum returned is empty string.
@@ -1036,14 +1154,14 @@ class MSOutlookManager:
         Returns:
             List of checksum of email message pointed by user_id and item_ids.
         """
-        ck_sum_list = []
         if not attachment_filter:
             attachment_filter = self.attachment_filter
         if not item_filter:
             item_filter = self.item_filter
-        for item_id in item_ids:
-            ck_sum = self.get_hash_of_message(user_id, item_id, use_graph_filter, attachment_filter, item_filter)
-            ck_sum_list.append(ck_sum)
+        hash_item = self._item_hasher(
+            "messages", user_id, "", use_graph_filter, attachment_filter, item_filter, change_keys
+        )
+        ck_sum_list = hash_items(hash_item, item_ids, max_workers)
         return ck_sum_list
 
     def get_hash_of_messages_folder(
@@ -1141,6 +1259,8 @@ class MSOutlookManager:
         use_graph_filter=False,
         attachment_filter=[],
         item_filter=[],
+        change_keys: dict = None,
+        max_workers: int = 1,
     ) -> list:
         """
         Returns list of hashes of contacts passed as input via items_ids
@@ -1152,20 +1272,21 @@ class MSOutlookManager:
             use_graph_filter (bool, optional): Flag if filter has to be used to get contact. Defaults to False.
             attachment_filter (list, optional): Defaults to [].
             item_filter (list, optional): Defaults to [].
+            change_keys (dict, optional): change key by item id, from get_item_change_keys(). The hashes of the items
+                with a change key are cached, and reused while the change key is the same. Defaults to None.
+            max_workers (int, optional): items hashed at a time. Defaults to 1.
 
         Returns:
             List of checksum of contacts pointed by user_id and item_ids.
         """
-        ck_sum_list = []
         if not attachment_filter:
             attachment_filter = self.attachment_filter
         if not item_filter:
             item_filter = self.item_filter
-        for item_id in item_ids:
-            ck_sum = self.get_hash_of_contact(
-                user_id, item_id, folder_id, use_graph_filter, attachment_filter, item_filter
-            )
-            ck_sum_list.append(ck_sum)
+        hash_item = self._item_hasher(
+            "contacts", user_id, folder_id, use_graph_filter, attachment_filter, item_filter, change_keys
+        )
+        ck_sum_list = hash_items(hash_item, item_ids, max_workers)
         return ck_sum_list
 
     def get_hash_of_contacts_folder(
@@ -1269,6 +1390,8 @@ class MSOutlookManager:
         use_graph_filter=False,
         attachment_filter=[],
         item_filter=[],
+        change_keys: dict = None,
+        max_workers: int = 1,
     ) -> list:
         """
         Returns list of hashes of tasks which were passed as input via items_ids
@@ -1279,20 +1402,21 @@ class MSOutlookManager:
             use_graph_filter (bool, optional): Flag if filter has to be used to get task. Defaults to False.
             attachment_filter (list, optional): Defaults to [].
             item_filter (list, optional): Defaults to [].
+            change_keys (dict, optional): change key by item id, from get_item_change_keys(). The hashes of the items
+                with a change key are cached, and reused while the change key is the same. Defaults to None.
+            max_workers (int, optional): items hashed at a time. Defaults to 1.
 
         Returns:
             List of checksum of tasks pointed by user_id and item_ids.
         """
-        ck_sum_list = []
         if not attachment_filter:
             attachment_filter = self.attachment_filter
         if not item_filter:
             item_filter = self.item_filter
-        for item_id in item_ids:
-            ck_sum = self.get_hash_of_task(
-                user_id, item_id, folder_id, use_graph_filter, attachment_filter, item_filter
-            )
-            ck_sum_list.append(ck_sum)
+        hash_item = self._item_hasher(
+            "tasks", user_id, folder_id, use_graph_filter, attachment_filter, item_filter, change_keys
+        )
+        ck_sum_list = hash_items(hash_item, item_ids, max_workers)
         return ck_sum_list
 
     def get_hash_of_tasks_folder(
@@ -1396,6 +1520,8 @@ class MSOutlookManager:
         use_graph_filter=False,
         attachment_filter=[],
         item_filter=[],
+        change_keys: dict = None,
+        max_workers: int = 1,
     ) -> list:
         """
         Returns hash of events list which is passed as input.
@@ -1407,20 +1533,21 @@ class MSOutlookManager:
             use_graph_filter (bool, optional): Flag if filter has to be used to get event. Defaults to False.
             attachment_filter (list, optional): Defaults to [].
             item_filter (list, optional): Defaults to [].
+            change_keys (dict, optional): change key by item id, from get_item_change_keys(). The hashes of the items
+                with a change key are cached, and reused while the change key is the same. Defaults to None.
+            max_workers (int, optional): items hashed at a time. Defaults to 1.
 
         Returns:
             List of checksum of events pointed by user_id and item_ids.
         """
-        ck_sum_list = []
         if not attachment_filter:
             attachment_filter = self.attachment_filter
         if not item_filter:
             item_filter = self.item_filter
-        for item_id in item_ids:
-            ck_sum = self.get_hash_of_event(
-                user_id, item_id, folder_id, use_graph_filter, attachment_filter, item_filter
-            )
-            ck_sum_list.append(ck_sum)
+        hash_item = self._item_hasher(
+            "events", user_id, folder_id, use_graph_filter, attachment_filter, item_filter, change_keys
+        )
+        ck_sum_list = hash_items(hash_item, item_ids, max_workers)
         return ck_sum_list
 
     def get_hash_of_events_folder(
@@ -1470,6 +1597,108 @@ class MSOutlookManager:
         logger.info(f"ck_sum of folder is: {ck_sum}")
         return ck_sum
 
+    def _item_hasher(
+        self,
+        item_type: str,
+        user_id: str,
+        folder_id: str,
+        use_graph_filter: bool,
+        attachment_filter: list,
+        item_filter: list,
+        change_keys: dict = None,
+    ):
+        """Function hashing one item of the item type (messages, contacts, tasks or events) by its id, with the
+        digests of the items in change_keys cached"""
+        if item_type == "messages":
+
+            def hash_item(item_id):
+                return self.get_hash_of_message(user_id, item_id, use_graph_filter, attachment_filter, item_filter)
+
+        else:
+            get_hash_of_item = {
+                "contacts": self.get_hash_of_contact,
+                "tasks": self.get_hash_of_task,
+                "events": self.get_hash_of_event,
+            }[item_type]
+
+            def hash_item(item_id):
+                return get_hash_of_item(user_id, item_id, folder_id, use_graph_filter, attachment_filter, item_filter)
+
+        if not change_keys:
+            return hash_item
+        filters = (use_graph_filter, tuple(attachment_filter), tuple(item_filter))
+
+        def cache_key(item_id):
+            change_key = change_keys.get(item_id)
+            return (item_type, self.tenant_id, user_id, item_id, change_key, filters) if change_key else None
+
+        return cached_hash(hash_item, cache_key)
+
+    def get_item_change_keys(self, user_id: str, item_type: str, folder_id: str) -> dict:
+        """Change key of each item of the folder, by item id. Graph changes it on every update of the item.
+
+        Args:
+            user_id (str): UserID of concerned user
+            item_type (str): messages, contacts, tasks or events
+            folder_id (str): mail folder, contact folder, to do list or calendar id
+
+        Returns:
+            dict: change key by item id (lastModifiedDateTime for tasks, which have no change key)
+        """
+        paths = {
+            "messages": (f"mailFolders/{folder_id}/messages", "changeKey"),
+            "contacts": (f"contactFolders/{folder_id}/contacts", "changeKey"),
+            "events": (f"calendars/{folder_id}/events", "changeKey"),
+            "tasks": (f"todo/lists/{folder_id}/tasks", "lastModifiedDateTime"),
+        }
+        path, version_field = paths[item_type]
+        url = f"{self.graph_api_endpoint}/{user_id}/{path}?$select=id,{version_field}&$top=100"
+        change_keys = {}
+        while url:
+            response = self.http_session.get(url, headers=self.get_headers())
+            assert response.status_code == requests.codes.ok, f"Failed to list {item_type}: {response.text}"
+            page = response.json()
+            change_keys.update({item["id"]: item.get(version_field) for item in page.get("value", [])})
+            url = page.get("@odata.nextLink")
+        logger.info(f"Got change keys of {len(change_keys)} {item_type} of folder {folder_id}")
+        return change_keys
+
+    def compare_item_hashes(
+        self,
+        user_id: str,
+        item_type: str,
+        source_item_ids: list,
+        source_folder_id: str,
+        restored_item_ids: list,
+        restored_folder_id: str,
+        max_workers: int = 1,
+        source_change_keys: dict = None,
+        restored_change_keys: dict = None,
+    ) -> Iterator[ItemMismatch]:
+        """Hashes the source and restored items pairwise, max_workers items at a time, and yields the mismatches
+        as they are found
+
+        Args:
+            user_id (str): UserID of concerned user
+            item_type (str): messages, contacts, tasks or events
+            source_item_ids (list): source item ids
+            source_folder_id (str): source folder id, unused for messages
+            restored_item_ids (list): restored item ids, in the order of source_item_ids
+            restored_folder_id (str): restored folder id, unused for messages
+            max_workers (int, optional): items hashed at a time. Defaults to 1, the checksum tool is not known to be
+                thread safe.
+            source_change_keys (dict, optional): change keys of the source items, the digests of the source items
+                hashed before with the same change keys are reused. Defaults to None.
+            restored_change_keys (dict, optional): change keys of the restored items. Defaults to None.
+
+        Yields:
+            ItemMismatch: pair of items with different hashes, or which failed to hash
+        """
+        hash_filters = (False, self.attachment_filter, self.item_filter)
+        hash_source = self._item_hasher(item_type, user_id, source_folder_id, *hash_filters, source_change_keys)
+        hash_restored = self._item_hasher(item_type, user_id, restored_folder_id, *hash_filters, restored_change_keys)
+        yield from compare_items(hash_source, hash_restored, source_item_ids, restored_item_ids, max_workers)
+
     def get_contacts_folders(self, user_email_id: str, filter: str = "") -> Response:
         """Get contacts folders information
 
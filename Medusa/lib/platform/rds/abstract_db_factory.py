@@ -1,10 +1,28 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from faker import Faker
 import pandas as pd
 import logging
+import threading
 import uuid
 from sqlalchemy import create_engine
 
+from lib.platform.rds.bulk_fill import (
+    BATCH_MB,
+    CONFIRM_EVERY_FRACTION,
+    FILL_WORKERS,
+    MIN_CONFIRM_EVERY_MB,
+    BlobPayload,
+    SizeEstimator,
+)
+from lib.platform.rds.table_checksum import (
+    CHECKSUM_WORKERS,
+    RANGES_PER_TABLE,
+    RangeChecksum,
+    TableChecksummer,
+    compare_tables,
+)
+
 fake = Faker()
 
 logger = logging.getLogger()
@@ -170,28 +188,177 @@ class AbstractDatabase(ABC):
         """This function will close db connection"""
         self.connection.close()
 
-    def fill_database_to_size(self, db_name, table_name_prefix, file_path, target_size_in_GB=1):
+    @abstractmethod
+    def connect_bulk(self, db_name):
+        """Returns a new DBAPI connection to the DB, in autocommit, for one bulk fill or table checksum worker
+        Args:
+        db_name: Name of database
+        """
+        pass
+
+    @abstractmethod
+    def create_bulk_table(self, connection, table_name):
+        """Creates the table of the bulk fill rows (id, misc, large_data, address) if it does not exist
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        pass
+
+    @abstractmethod
+    def bulk_insert(self, connection, table_name, payload: BlobPayload):
+        """Inserts the rows of the payload through the engine fast path
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        payload: BlobPayload of the rows, with the engine encodings of them cached
+        """
+        pass
+
+    @abstractmethod
+    def checksum_key(self, connection, table_name):
+        """Returns the name of the primary key column of the table if it is a single integer column, else None
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        pass
+
+    @abstractmethod
+    def range_checksum(self, connection, table_name, key, lo, hi):
+        """Returns (count, digest) of the rows of the table with lo <= key < hi, None bounds unbounded
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        key: Integer primary key column
+        lo: Lowest key value of the range, or None
+        hi: Key value after the range, or None
+        """
+        pass
+
+    @abstractmethod
+    def bucket_checksums(self, connection, table_name, buckets):
+        """Returns {bucket: (count, digest)} of the rows of the table grouped in buckets by a hash of the row
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        buckets: Count of buckets
+        """
+        pass
+
+    def fill_database_to_size(
+        self,
+        db_name,
+        table_name_prefix,
+        file_path,
+        target_size_in_GB=1,
+        workers=FILL_WORKERS,
+        batch_size_in_MB=BATCH_MB,
+    ):
         """Function to populated DBs with records so that its disk footprint grows to target size
         Args:
         db_name: Name of DB whose disk footprint has to be grown
         table_name_prefix : This prefix will be added to tables being created for growing db size
+        file_path: Binary file path used to created BLOB records to be inserted in DB
         target_size_in_GB: Size upto which DB disk footprint has to be grown
+        workers: Count of connections loading batches in parallel, each into its own table
+        batch_size_in_MB: Size of the batch of BLOB records, generated once and loaded repeatedly
         """
-        num_of_records = 20
         myuuidstr = str(uuid.uuid4()).split("-")[0]
         initial_size = int(self.get_size_of_db_in_MB(db_name))
         target_size_in_MB = int(target_size_in_GB) * 1024
         logger.info(f"Initial size in MB {initial_size} and target size in MB {target_size_in_MB}")
         current_size = initial_size
-        counter = 1
-        while current_size < target_size_in_MB:
-            table_name = table_name_prefix + "_" + myuuidstr + "_" + str(counter)
-            self.insert_blob(db_name, file_path, table_names=[table_name], num_of_records=num_of_records)
-            current_size = self.get_size_of_db_in_MB(db_name)
-            logger.info(f"current_size in MB {current_size}")
-            counter += 1
+        if current_size >= target_size_in_MB:
+            logger.info(f"{db_name} is already of size {current_size}")
+            return
+        estimator = SizeEstimator(
+            initial_size, target_size_in_MB, max(target_size_in_MB * CONFIRM_EVERY_FRACTION, MIN_CONFIRM_EVERY_MB)
+        )
+        worker_state = threading.local()
+        connections = []
+        lock = threading.Lock()
+
+        def load_batch():
+            if not hasattr(worker_state, "connection"):
+                with lock:
+                    worker_state.connection = self.connect_bulk(db_name)
+                    connections.append(worker_state.connection)
+                    worker_state.table_name = table_name_prefix + "_" + myuuidstr + "_" + str(len(connections))
+                self.create_bulk_table(worker_state.connection, worker_state.table_name)
+            self.bulk_insert(worker_state.connection, worker_state.table_name, payload)
+            return payload.size_mb
+
+        rows = BlobPayload.rows_for(file_path, batch_size_in_MB)
+        with BlobPayload(self.create_blob(file_path, num_of_records=rows)) as payload:
+            try:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-fill") as executor:
+                    in_flight = set()
+                    while True:
+                        while len(in_flight) < workers and (
+                            estimator.estimate(len(in_flight) * payload.size_mb) < target_size_in_MB
+                        ):
+                            in_flight.add(executor.submit(load_batch))
+                        if in_flight:
+                            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                estimator.add(future.result())
+                        if not in_flight or estimator.confirm_due():
+                            current_size = self.get_size_of_db_in_MB(db_name)
+                            estimator.confirm(current_size)
+                            logger.info(f"current_size in MB {current_size}, loaded {estimator.loaded_mb:.0f} MB")
+                            if current_size >= target_size_in_MB:
+                                break
+                    for future in in_flight:
+                        future.cancel()
+            finally:
+                for connection in connections:
+                    connection.close()
+        current_size = self.get_size_of_db_in_MB(db_name)
         logger.info(f"Successfully filled {db_name} to size {current_size}")
 
+    def generate_range_checksum(self, table_name, db_name=None, ranges=RANGES_PER_TABLE, workers=CHECKSUM_WORKERS):
+        """Returns the Merkle root of the checksums of ranges of the table, checksummed in parallel
+        Args:
+        table_name: Table name for checksum to be calculated
+        db_name: DB name where table is present (optional else DB name of the DB connection)
+        ranges: Count of key ranges of the table
+        workers: Count of connections checksumming ranges in parallel
+        Returns:
+        checksum as string
+        """
+        with TableChecksummer(self, db_name or self.db_name, workers) as checksummer:
+            return checksummer.checksum(table_name, ranges).root
+
+    def compare_table_checksums(
+        self,
+        restored_db: "AbstractDatabase",
+        table_names: list,
+        db_name,
+        restored_db_name=None,
+        ranges=RANGES_PER_TABLE,
+        workers=CHECKSUM_WORKERS,
+    ) -> dict[str, list[tuple[RangeChecksum, RangeChecksum]]]:
+        """Compares range checksums of tables of this DB with the same tables of the restored DB
+        Args:
+        restored_db: Restored DB object of the same type, with initialize_db_properties() called
+        table_names: list of names of tables to compare
+        db_name: Name of source DB
+        restored_db_name: Name of restored DB (optional else db_name)
+        ranges: Count of key ranges per table
+        workers: Count of connections per DB checksumming ranges in parallel
+        Returns:
+        (source, restored) RangeChecksum of the differing ranges by table name, empty for matching tables
+        """
+        with TableChecksummer(self, db_name, workers) as source, TableChecksummer(
+            restored_db, restored_db_name or db_name, workers
+        ) as restored:
+            differences = compare_tables(source, restored, table_names, ranges)
+        for table_name, differing in differences.items():
+            for source_range, restored_range in differing:
+                logger.info(f"Table {table_name} differs in range {source_range} against {restored_range}")
+        return differences
+
     def make_connection(self, connection_string, db_name):
         """Helper function used across DBs to create connection
         Args:
@@ -0,0 +1,142 @@
+"""Bulk load of blob rows for AbstractDatabase.fill_database_to_size.
+
+The rows are the create_blob() rows, generated once for a batch of about batch_mb and reused for every batch, and
+each engine encodes them once for its fast path: a binary COPY stream for PostgreSQL, a LOAD DATA LOCAL file for
+MySQL and MariaDB, multi-row INSERT statements for MSSQL, array binds for Oracle. Batches are loaded over several
+connections, one table per connection.
+
+The size of the database is not queried after every batch: it is estimated from the bytes loaded, scaled by the
+growth seen at the last size check, and only confirmed every confirm_every_mb and when the estimate reaches the
+target.
+"""
+
+import logging
+import os
+import struct
+import tempfile
+import threading
+
+logger = logging.getLogger()
+
+BATCH_MB = 64
+FILL_WORKERS = 4
+CONFIRM_EVERY_FRACTION = 0.05
+MIN_CONFIRM_EVERY_MB = 512
+BLOB_COLUMNS = ("id", "misc", "large_data", "address")
+# Rows per INSERT ... VALUES statement, the SQL Server limit of a table value constructor
+MAX_VALUES_ROWS = 1000
+
+
+class BlobPayload:
+    """A batch of create_blob() rows, and the engine encodings of it, reused for every batch of a fill"""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.size_mb = sum(len(row["misc"]) + len(row["large_data"]) for row in rows) / 2**20
+        self._encoded = {}
+        self._temp_files = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def rows_for(file_path: str, batch_mb: int = BATCH_MB) -> int:
+        """Rows of a batch of about batch_mb, the file content is twice in each row"""
+        return max(1, batch_mb * 2**20 // max(2 * os.path.getsize(file_path), 1))
+
+    def as_tuples(self) -> list[tuple]:
+        return self.encoded("tuples", lambda rows: [tuple(row[column] for column in BLOB_COLUMNS) for row in rows])
+
+    def encoded(self, name: str, encode):
+        """encode(rows), computed on the first call for the name"""
+        with self._lock:
+            if name not in self._encoded:
+                self._encoded[name] = encode(self.rows)
+            return self._encoded[name]
+
+    def temp_file(self, name: str, encode) -> str:
+        """Path of a file holding encode(rows), written on the first call for the name and removed by close()"""
+
+        def write(rows):
+            fd, path = tempfile.mkstemp(prefix=f"bulk_fill_{name}_")
+            with os.fdopen(fd, "wb") as f:
+                f.write(encode(rows))
+            self._temp_files.append(path)
+            return path
+
+        return self.encoded(f"file:{name}", write)
+
+    def close(self):
+        for path in self._temp_files:
+            if os.path.exists(path):
+                os.remove(path)
+        self._temp_files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SizeEstimator:
+    """Database size in MB estimated from the MB loaded, confirmed by size checks"""
+
+    def __init__(self, initial_mb: float, target_mb: float, confirm_every_mb: float):
+        self.initial_mb = initial_mb
+        self.target_mb = target_mb
+        self.confirm_every_mb = confirm_every_mb
+        self.loaded_mb = 0.0
+        # Growth of the database per MB loaded: below 1 with compression, above with page and index overhead
+        self.growth = 1.0
+        self._confirmed_mb = initial_mb
+        self._loaded_at_confirm = 0.0
+
+    def add(self, loaded_mb: float):
+        self.loaded_mb += loaded_mb
+
+    def estimate(self, pending_mb: float = 0) -> float:
+        return self._confirmed_mb + (self.loaded_mb - self._loaded_at_confirm + pending_mb) * self.growth
+
+    def confirm_due(self) -> bool:
+        return self.loaded_mb - self._loaded_at_confirm >= self.confirm_every_mb or self.estimate() >= self.target_mb
+
+    def confirm(self, size_mb: float):
+        if self.loaded_mb > 0 and size_mb > self.initial_mb:
+            # Bounded, size reports lagging behind the loads (e.g. InnoDB statistics) must not stall the fill
+            self.growth = min(max((size_mb - self.initial_mb) / self.loaded_mb, 0.1), 10.0)
+        self._confirmed_mb = size_mb
+        self._loaded_at_confirm = self.loaded_mb
+
+
+def postgres_copy_binary(rows: list[dict]) -> bytes:
+    """COPY ... FROM STDIN WITH (FORMAT binary) data of the rows, text columns utf-8 encoded"""
+    parts = [b"PGCOPY\n\xff\r\n\x00", struct.pack("!ii", 0, 0)]
+    for row in rows:
+        parts.append(struct.pack("!h", len(BLOB_COLUMNS)))
+        for column in BLOB_COLUMNS:
+            value = row[column] if isinstance(row[column], bytes) else str(row[column]).encode("utf-8")
+            parts.append(struct.pack("!i", len(value)))
+            parts.append(value)
+    parts.append(struct.pack("!h", -1))
+    return b"".join(parts)
+
+
+def _load_data_escape(value) -> bytes:
+    value = value if isinstance(value, bytes) else str(value).encode("utf-8")
+    return value.replace(b"\\", b"\\\\").replace(b"\t", b"\\t").replace(b"\n", b"\\n").replace(b"\x00", b"\\0")
+
+
+def load_data_lines(rows: list[dict]) -> bytes:
+    """LOAD DATA file of the rows, in the default format: tab separated, newline terminated, backslash escaped"""
+    return b"".join(b"\t".join(_load_data_escape(row[column]) for column in BLOB_COLUMNS) + b"\n" for row in rows)
+
+
+def mssql_values(rows: list[dict]) -> list[str]:
+    """VALUES lists of the rows as T-SQL literals, at most MAX_VALUES_ROWS rows each"""
+
+    def literal(value):
+        if isinstance(value, bytes):
+            return f"0x{value.hex()}"
+        return "N'" + str(value).replace("'", "''") + "'"
+
+    values = ["(" + ", ".join(literal(row[column]) for column in BLOB_COLUMNS) + ")" for row in rows]
+    return [", ".join(values[start : start + MAX_VALUES_ROWS]) for start in range(0, len(values), MAX_VALUES_ROWS)]
@@ -1,4 +1,6 @@
 from lib.platform.rds.abstract_db_factory import AbstractDatabase
+from lib.platform.rds.bulk_fill import BLOB_COLUMNS, BlobPayload, load_data_lines
+from lib.platform.rds.table_checksum import mysql_row_md5, range_condition
 import pymysql
 import pandas as pd
 import sqlalchemy as sal
@@ -21,6 +23,8 @@ class MariaDB(AbstractDatabase):
         self.connection = None
         self.dbConnection = None
         self.db_name = None
+        # Cleared when the server refuses LOAD DATA LOCAL INFILE, bulk_insert() then uses INSERTs
+        self.load_data_local = True
 
     def initialize_db_properties(self, database, user, password, host, port):
         """Function to create DB connection and initialize params needed for connection
@@ -137,6 +141,122 @@ class MariaDB(AbstractDatabase):
             df.to_sql(table, con=self.dbConnection, index=False, if_exists="append", dtype=dtype)
             logger.info(f"Inserted {num_of_records} records in table {table}")
 
+    def connect_bulk(self, db_name):
+        """Returns a new connection to the DB for a bulk fill or table checksum worker, with LOAD DATA LOCAL enabled
+        Args:
+        db_name: Name of database
+        """
+        connection = pymysql.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            port=self.port,
+            database=db_name,
+            connect_timeout=300,
+            autocommit=True,
+            local_infile=True,
+            # Blobs of the INSERT fallback are sent as _binary literals, not as utf8mb4 strings
+            binary_prefix=True,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET max_statement_time=0")
+        return connection
+
+    def create_bulk_table(self, connection, table_name):
+        """Creates the table of the bulk fill rows if it does not exist
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} (id TEXT, misc LONGBLOB, large_data LONGBLOB, address TEXT)"
+            )
+
+    def bulk_insert(self, connection, table_name, payload: BlobPayload):
+        """Inserts the rows of the payload with LOAD DATA LOCAL INFILE, or multi-row INSERTs when the server does not
+        allow it (local_infile disabled)
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        payload: BlobPayload of the rows
+        """
+        columns = ", ".join(BLOB_COLUMNS)
+        with connection.cursor() as cursor:
+            if self.load_data_local:
+                path = payload.temp_file("load_data", load_data_lines)
+                try:
+                    cursor.execute(
+                        f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} CHARACTER SET binary ({columns})", (path,)
+                    )
+                    return
+                except (pymysql.err.OperationalError, pymysql.err.InternalError, pymysql.err.ProgrammingError) as e:
+                    logger.warning(f"LOAD DATA LOCAL INFILE failed with error {e}, inserting with multi-row INSERTs")
+                    self.load_data_local = False
+            # pymysql sends executemany() INSERTs as multi-row INSERT statements
+            cursor.executemany(f"INSERT INTO {table_name} ({columns}) VALUES (%s, %s, %s, %s)", payload.as_tuples())
+
+    def checksum_key(self, connection, table_name):
+        """Returns the primary key column of the table if it is a single integer column, else None
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        query = (
+            "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_KEY = 'PRI'"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query, (table_name,))
+            rows = cursor.fetchall()
+        if len(rows) == 1 and rows[0][1] in ("tinyint", "smallint", "mediumint", "int", "bigint"):
+            return rows[0][0]
+        return None
+
+    def _table_columns(self, connection, table_name):
+        query = (
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+            "ORDER BY ORDINAL_POSITION"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query, (table_name,))
+            return [row[0] for row in cursor.fetchall()]
+
+    def range_checksum(self, connection, table_name, key, lo, hi):
+        """Returns (count, sum of the md5 of the rows) of the rows lo <= key < hi
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        key: Integer primary key column
+        lo: Lowest key value of the range, or None
+        hi: Key value after the range, or None
+        """
+        row_md5 = mysql_row_md5(self._table_columns(connection, table_name))
+        query = (
+            f"SELECT COUNT(*), SUM(CAST(CONV(SUBSTRING({row_md5}, 1, 15), 16, 10) AS UNSIGNED)) FROM {table_name} "
+            f"WHERE {range_condition(f'`{key}`', lo, hi)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchone()
+
+    def bucket_checksums(self, connection, table_name, buckets):
+        """Returns {bucket: (count, sum of the md5 of the rows)}, rows grouped in buckets by their md5
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        buckets: Count of buckets
+        """
+        row_md5 = mysql_row_md5(self._table_columns(connection, table_name))
+        query = (
+            f"SELECT CAST(CONV(SUBSTRING(h, 1, 8), 16, 10) AS UNSIGNED) % {int(buckets)} AS bucket, COUNT(*), "
+            f"SUM(CAST(CONV(SUBSTRING(h, 9, 15), 16, 10) AS UNSIGNED)) "
+            f"FROM (SELECT {row_md5} AS h FROM {table_name}) r GROUP BY bucket"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            return {int(bucket): (count, digest) for bucket, count, digest in cursor.fetchall()}
+
     def cleanup_database(self, db_name, table_name_prefix):
         """Function to cleanup the database
         Args:
@@ -1,4 +1,6 @@
 from lib.platform.rds.abstract_db_factory import AbstractDatabase
+from lib.platform.rds.bulk_fill import BLOB_COLUMNS, BlobPayload, mssql_values
+from lib.platform.rds.table_checksum import range_condition
 
 import pymssql
 import pandas as pd
@@ -116,6 +118,92 @@ class MSSQLDB(AbstractDatabase):
                 sub_df.to_sql(table, con=self.dbConnection, index=False, if_exists="append", dtype=dtype)
             logger.info(f"Inserted {num_of_records} records in table {table}")
 
+    def connect_bulk(self, db_name):
+        """Returns a new connection to the DB for a bulk fill or table checksum worker
+        Args:
+        db_name: Name of database
+        """
+        return pymssql.connect(
+            host=self.host, user=self.user, password=self.password, port=self.port, database=db_name, autocommit=True
+        )
+
+    def create_bulk_table(self, connection, table_name):
+        """Creates the table of the bulk fill rows if it does not exist
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"IF OBJECT_ID(N'{table_name}', N'U') IS NULL CREATE TABLE {table_name} "
+                f"(id NVARCHAR(400), misc VARBINARY(MAX), large_data VARBINARY(MAX), address NVARCHAR(MAX))"
+            )
+
+    def bulk_insert(self, connection, table_name, payload: BlobPayload):
+        """Inserts the rows of the payload with multi-row INSERT statements, their VALUES lists built once
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        payload: BlobPayload of the rows
+        """
+        columns = ", ".join(BLOB_COLUMNS)
+        with connection.cursor() as cursor:
+            for values in payload.encoded("mssql_values", mssql_values):
+                cursor.execute(f"INSERT INTO {table_name} ({columns}) VALUES {values}")
+
+    def checksum_key(self, connection, table_name):
+        """Returns the primary key column of the table if it is a single integer column, else None
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        query = (
+            "SELECT k.COLUMN_NAME, c.DATA_TYPE FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS t "
+            "JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k ON k.CONSTRAINT_NAME = t.CONSTRAINT_NAME "
+            "AND k.TABLE_NAME = t.TABLE_NAME "
+            "JOIN INFORMATION_SCHEMA.COLUMNS c ON c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME "
+            "WHERE t.CONSTRAINT_TYPE = 'PRIMARY KEY' AND t.TABLE_NAME = %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query, (table_name,))
+            rows = cursor.fetchall()
+        if len(rows) == 1 and rows[0][1] in ("tinyint", "smallint", "int", "bigint"):
+            return rows[0][0]
+        return None
+
+    def range_checksum(self, connection, table_name, key, lo, hi):
+        """Returns (count, sum of the BINARY_CHECKSUM of the rows) of the rows lo <= key < hi
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        key: Integer primary key column
+        lo: Lowest key value of the range, or None
+        hi: Key value after the range, or None
+        """
+        query = (
+            f"SELECT COUNT_BIG(*), SUM(CAST(BINARY_CHECKSUM(*) AS BIGINT)) FROM {table_name} "
+            f"WHERE {range_condition(key, lo, hi)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchone()
+
+    def bucket_checksums(self, connection, table_name, buckets):
+        """Returns {bucket: (count, sum of the BINARY_CHECKSUM of the rows)}, rows grouped in buckets by it
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        buckets: Count of buckets
+        """
+        query = (
+            f"SELECT ABS(h % {int(buckets)}), COUNT_BIG(*), SUM(h) "
+            f"FROM (SELECT CAST(BINARY_CHECKSUM(*) AS BIGINT) AS h FROM {table_name}) r "
+            f"GROUP BY ABS(h % {int(buckets)})"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            return {int(bucket): (count, digest) for bucket, count, digest in cursor.fetchall()}
+
     def cleanup_database(self, db_name, table_name_prefix):
         """Function to cleanup the database
         Args:
@@ -1,4 +1,6 @@
 from lib.platform.rds.abstract_db_factory import AbstractDatabase
+from lib.platform.rds.bulk_fill import BLOB_COLUMNS, BlobPayload
+from lib.platform.rds.table_checksum import range_condition
 import cx_Oracle
 import pandas as pd
 from sqlalchemy import create_engine
@@ -115,6 +117,96 @@ class OracleDB(AbstractDatabase):
             df.to_sql(table, con=self.dbConnection, index=False, if_exists="append")
             logger.info(f"Inserted {num_of_records} records in table {table}")
 
+    def connect_bulk(self, db_name):
+        """Returns a new connection to the DB for a bulk fill or table checksum worker
+        Args:
+        db_name: Name of database (not used, the connection is to self.sid like set_db_connection())
+        """
+        connection = cx_Oracle.connect(user=self.user, password=self.password, dsn=self.sid)
+        connection.autocommit = True
+        return connection
+
+    def create_bulk_table(self, connection, table_name):
+        """Creates the table of the bulk fill rows if it does not exist
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        columns = "id VARCHAR2(400), misc BLOB, large_data BLOB, address VARCHAR2(4000)"
+        # ORA-00955: name is already used by an existing object
+        query = f"""
+            BEGIN
+                EXECUTE IMMEDIATE 'CREATE TABLE {table_name} ({columns})';
+            EXCEPTION WHEN OTHERS THEN
+                IF SQLCODE != -955 THEN RAISE; END IF;
+            END;
+            """
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+
+    def bulk_insert(self, connection, table_name, payload: BlobPayload):
+        """Inserts the rows of the payload with one array bind of all of them
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        payload: BlobPayload of the rows
+        """
+        columns = ", ".join(BLOB_COLUMNS)
+        with connection.cursor() as cursor:
+            # Blobs above 32 KB are bound as LONG RAW
+            cursor.setinputsizes(None, cx_Oracle.DB_TYPE_LONG_RAW, cx_Oracle.DB_TYPE_LONG_RAW, None)
+            cursor.executemany(f"INSERT INTO {table_name} ({columns}) VALUES (:1, :2, :3, :4)", payload.as_tuples())
+
+    def checksum_key(self, connection, table_name):
+        """Returns the primary key column of the table if it is a single integer column, else None
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        query = (
+            "SELECT cc.column_name, tc.data_type, tc.data_scale FROM user_constraints c "
+            "JOIN user_cons_columns cc ON cc.constraint_name = c.constraint_name "
+            "JOIN user_tab_columns tc ON tc.table_name = cc.table_name AND tc.column_name = cc.column_name "
+            "WHERE c.constraint_type = 'P' AND c.table_name = :1"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query, [str(table_name).upper()])
+            rows = cursor.fetchall()
+        if len(rows) == 1 and rows[0][1] in ("NUMBER", "INTEGER") and not rows[0][2]:
+            return rows[0][0]
+        return None
+
+    def range_checksum(self, connection, table_name, key, lo, hi):
+        """Returns (count, dbms_sqlhash MD5 of the rows in key order) of the rows lo <= key < hi
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        key: Integer primary key column
+        lo: Lowest key value of the range, or None
+        hi: Key value after the range, or None
+        """
+        table_name = str(table_name).upper()
+        condition = range_condition(key, lo, hi)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {condition}")
+            count = cursor.fetchone()[0]
+            cursor.execute(
+                f"select dbms_sqlhash.gethash('select * from {table_name} where {condition} order by {key}', 2) "
+                f"FROM dual"
+            )
+            digest = cursor.fetchone()[0]
+        return count, digest.hex() if count else None
+
+    def bucket_checksums(self, connection, table_name, buckets):
+        """Returns {0: (count, dbms_sqlhash MD5 of the table)}: ORA_HASH does not take BLOB columns, so the rows of
+        a table without integer primary key are hashed as one bucket
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        buckets: Count of buckets (not used)
+        """
+        return {0: self.range_checksum(connection, table_name, "1", None, None)}
+
     def cleanup_database(self, db_name, table_name_prefix):
         """Function to cleanup the database
         Args:
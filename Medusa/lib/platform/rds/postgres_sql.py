@@ -1,4 +1,7 @@
 from lib.platform.rds.abstract_db_factory import AbstractDatabase
+from lib.platform.rds.bulk_fill import BLOB_COLUMNS, BlobPayload, postgres_copy_binary
+from lib.platform.rds.table_checksum import range_condition
+import io
 import psycopg2
 import pandas as pd
 import logging
@@ -107,6 +110,91 @@ class PostgresSQLDB(AbstractDatabase):
             df.to_sql(table, con=self.dbConnection, index=False, if_exists="append")
             logger.info(f"Inserted {num_of_records} records in table {table}")
 
+    def connect_bulk(self, db_name):
+        """Returns a new connection to the DB for a bulk fill or table checksum worker
+        Args:
+        db_name: Name of database
+        """
+        connection = psycopg2.connect(
+            user=self.user, password=self.password, host=self.host, port=self.port, database=db_name
+        )
+        connection.autocommit = True
+        return connection
+
+    def create_bulk_table(self, connection, table_name):
+        """Creates the table of the bulk fill rows if it does not exist
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} (id text, misc bytea, large_data bytea, address text);"
+            )
+
+    def bulk_insert(self, connection, table_name, payload: BlobPayload):
+        """Inserts the rows of the payload with a binary COPY
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        payload: BlobPayload of the rows
+        """
+        data = payload.encoded("postgres_copy_binary", postgres_copy_binary)
+        query = f"COPY {table_name} ({', '.join(BLOB_COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+        with connection.cursor() as cursor:
+            cursor.copy_expert(query, io.BytesIO(data), size=1024 * 1024)
+
+    def checksum_key(self, connection, table_name):
+        """Returns the primary key column of the table if it is a single integer column, else None
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        """
+        query = (
+            "SELECT a.attname, format_type(a.atttypid, NULL) FROM pg_index i "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = %s::regclass AND i.indisprimary;"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query, (table_name,))
+            rows = cursor.fetchall()
+        if len(rows) == 1 and rows[0][1] in ("smallint", "integer", "bigint"):
+            return rows[0][0]
+        return None
+
+    def range_checksum(self, connection, table_name, key, lo, hi):
+        """Returns (count, md5 of the md5 of each row in key order) of the rows lo <= key < hi
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        key: Integer primary key column
+        lo: Lowest key value of the range, or None
+        hi: Key value after the range, or None
+        """
+        query = (
+            f"SELECT count(*), md5(string_agg(md5(f::text), '' ORDER BY f.{key})) FROM {table_name} f "
+            f"WHERE {range_condition(f'f.{key}', lo, hi)};"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchone()
+
+    def bucket_checksums(self, connection, table_name, buckets):
+        """Returns {bucket: (count, sum of the md5 of the rows)}, rows grouped in buckets by their md5
+        Args:
+        connection: connection from connect_bulk()
+        table_name: Name of table
+        buckets: Count of buckets
+        """
+        query = (
+            f"SELECT ('x' || substr(h, 1, 8))::bit(32)::bigint % {int(buckets)}, count(*), "
+            f"sum(('x' || substr(h, 9, 15))::bit(60)::bigint) FROM (SELECT md5(f::text) AS h FROM {table_name} f) r "
+            f"GROUP BY 1;"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            return {int(bucket): (count, digest) for bucket, count, digest in cursor.fetchall()}
+
     def cleanup_database(self, db_name, table_name_prefix):
         """Function to cleanup the database
         Args:
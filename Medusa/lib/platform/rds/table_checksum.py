@@ -0,0 +1,215 @@
+"""Range checksums of database tables, combined into a Merkle-style digest.
+
+generate_checksum hashes a whole table in one query, which builds the table as one value in server memory on some
+engines, and a mismatch does not tell where the tables differ. Here a table is split in ranges of its integer primary
+key, each range is checksummed by its own query (count and digest of the rows) and the ranges are checksummed in
+parallel, over several connections. The range checksums are the leaves of a Merkle tree, the root is the checksum of
+the table, and comparing the trees of a source table and of its restored copy finds the differing ranges.
+
+Tables without an integer primary key are checksummed in one pass, the rows grouped in buckets by a hash of the row.
+A differing bucket then only tells how many rows differ, not where.
+
+The engine specific queries are AbstractDatabase hooks: checksum_key, range_checksum and bucket_checksums.
+"""
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger()
+
+RANGES_PER_TABLE = 64
+CHECKSUM_WORKERS = 4
+
+
+def range_condition(key: str, lo: Optional[int], hi: Optional[int]) -> str:
+    """SQL condition of lo <= key < hi, None bounds unbounded"""
+    conditions = []
+    if lo is not None:
+        conditions.append(f"{key} >= {int(lo)}")
+    if hi is not None:
+        conditions.append(f"{key} < {int(hi)}")
+    return " AND ".join(conditions) or "1 = 1"
+
+
+def mysql_row_md5(columns: list) -> str:
+    """MySQL / MariaDB expression of the md5 of a row, NULLs told apart from empty values"""
+    values = ", ".join(f"`{column}`" for column in columns)
+    nulls = ", ".join(f"ISNULL(`{column}`)" for column in columns)
+    return f"MD5(CONCAT_WS('|', {values}, CONCAT({nulls})))"
+
+
+@dataclass
+class RangeChecksum:
+    """Checksum of the rows lo <= key < hi, or of the bucket lo of a table without key (hi None)"""
+
+    lo: Optional[int]
+    hi: Optional[int]
+    count: int
+    digest: Optional[str]
+
+    def leaf(self) -> bytes:
+        return hashlib.sha256(f"{self.lo}:{self.hi}:{self.count}:{self.digest}".encode()).digest()
+
+
+def merkle_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    """Levels of the Merkle tree of the leaves, from the leaves up to the root"""
+    levels = [leaves or [hashlib.sha256(b"").digest()]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append(
+            [hashlib.sha256(b"".join(level[index : index + 2])).digest() for index in range(0, len(level), 2)]
+        )
+    return levels
+
+
+@dataclass
+class TableChecksum:
+    table_name: str
+    key: Optional[str]
+    ranges: list[RangeChecksum]
+    levels: list[list[bytes]] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.levels = merkle_levels([checksum.leaf() for checksum in self.ranges])
+
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0].hex()
+
+    def differing_ranges(self, other: "TableChecksum") -> list[tuple[RangeChecksum, RangeChecksum]]:
+        """(this, other) range checksums which differ, found down the subtrees whose hashes differ.
+        Both must be checksums of the same ranges."""
+        if len(self.ranges) != len(other.ranges):
+            raise ValueError(f"{self.table_name}: {len(self.ranges)} ranges against {len(other.ranges)}")
+        differing = [0] if self.root != other.root else []
+        for depth in range(len(self.levels) - 2, -1, -1):
+            level, other_level = self.levels[depth], other.levels[depth]
+            differing = [
+                child
+                for index in differing
+                for child in (2 * index, 2 * index + 1)
+                if child < len(level) and level[child] != other_level[child]
+            ]
+        return [(self.ranges[index], other.ranges[index]) for index in differing]
+
+
+@dataclass
+class TablePlan:
+    """Ranges of a table, planned on one database and applied to both sides of a comparison"""
+
+    table_name: str
+    key: Optional[str]
+    # Range bounds (None for the unbounded first and last ranges) of a table with key
+    bounds: list[tuple[Optional[int], Optional[int]]] = field(default_factory=list)
+    # Buckets of a table without key
+    buckets: int = 0
+
+
+class TableChecksummer:
+    """Range checksums of the tables of a database, workers ranges at a time over connections of the database"""
+
+    def __init__(self, db, db_name: str, workers: int = CHECKSUM_WORKERS):
+        """
+        Args:
+            db: AbstractDatabase, with initialize_db_properties() called
+            db_name: Name of database
+            workers: Count of connections checksumming ranges in parallel
+        """
+        self.db = db
+        self.db_name = db_name
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-checksum")
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if not hasattr(self._local, "connection"):
+            self._local.connection = self.db.connect_bulk(self.db_name)
+            with self._lock:
+                self._connections.append(self._local.connection)
+        return self._local.connection
+
+    def plan(self, table_name: str, ranges: int = RANGES_PER_TABLE) -> TablePlan:
+        """Splits the key values of the table, from its lowest to its highest, in ranges of the same width"""
+        return self._executor.submit(self._plan, table_name, ranges).result()
+
+    def _plan(self, table_name, ranges):
+        connection = self._connection()
+        key = self.db.checksum_key(connection, table_name)
+        if key is None:
+            return TablePlan(table_name, None, buckets=ranges)
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT MIN({key}), MAX({key}) FROM {table_name}")
+        lowest, highest = cursor.fetchone()
+        cursor.close()
+        if lowest is None:
+            return TablePlan(table_name, key, bounds=[(None, None)])
+        width = max(-(-(int(highest) - int(lowest) + 1) // ranges), 1)
+        edges = [None] + list(range(int(lowest) + width, int(highest) + 1, width)) + [None]
+        return TablePlan(table_name, key, bounds=list(zip(edges, edges[1:])))
+
+    def submit(self, plan: TablePlan) -> list[Future]:
+        """Futures of the range checksums of the table, each a list of RangeChecksum"""
+        if plan.key is None:
+            return [self._executor.submit(self._buckets, plan)]
+        return [self._executor.submit(self._range, plan, lo, hi) for lo, hi in plan.bounds]
+
+    def _range(self, plan, lo, hi):
+        count, digest = self.db.range_checksum(self._connection(), plan.table_name, plan.key, lo, hi)
+        return [RangeChecksum(lo, hi, int(count), None if digest is None else str(digest))]
+
+    def _buckets(self, plan):
+        checksums = self.db.bucket_checksums(self._connection(), plan.table_name, plan.buckets)
+        ranges = []
+        for bucket in range(plan.buckets):
+            count, digest = checksums.get(bucket, (0, None))
+            ranges.append(RangeChecksum(bucket, None, int(count), None if digest is None else str(digest)))
+        return ranges
+
+    @staticmethod
+    def collect(plan: TablePlan, futures: list[Future]) -> TableChecksum:
+        return TableChecksum(
+            plan.table_name, plan.key, [checksum for future in futures for checksum in future.result()]
+        )
+
+    def checksum(self, table_name: str, ranges: int = RANGES_PER_TABLE) -> TableChecksum:
+        plan = self.plan(table_name, ranges)
+        return self.collect(plan, self.submit(plan))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def compare_tables(
+    source: TableChecksummer, restored: TableChecksummer, table_names: list, ranges: int = RANGES_PER_TABLE
+) -> dict[str, list[tuple[RangeChecksum, RangeChecksum]]]:
+    """Range checksums of the tables on both databases, all ranges submitted at once
+
+    Returns:
+        dict: (source, restored) differing range checksums by table name, empty lists for matching tables
+    """
+    plans = [source.plan(table_name, ranges) for table_name in table_names]
+    submitted = [(plan, source.submit(plan), restored.submit(plan)) for plan in plans]
+    differences = {}
+    for plan, source_futures, restored_futures in submitted:
+        source_checksum = source.collect(plan, source_futures)
+        restored_checksum = restored.collect(plan, restored_futures)
+        differences[plan.table_name] = source_checksum.differing_ranges(restored_checksum)
+        logger.info(
+            f"Table {plan.table_name}: source {source_checksum.root}, restored {restored_checksum.root}, "
+            f"{len(differences[plan.table_name])} of {len(source_checksum.ranges)} ranges differ"
+        )
+    return differences
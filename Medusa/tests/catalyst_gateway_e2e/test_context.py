@@ -37,7 +37,7 @@ class Context:
         skip_inventory_exception=False,
         **overwrite_default,
     ):
-        self.config = ConfigManager.get_config()
+        self.config = ConfigManager.get_config().mutable_copy()
         ConfigManager.check_and_update_unused_ip_for_psg(self.config)
         self.user = User(user_tag=test_provided_user.value, oauth2_server=self.config["CLUSTER"]["oauth2_server"])
 
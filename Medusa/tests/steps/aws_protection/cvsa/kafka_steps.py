@@ -16,7 +16,7 @@ from lib.dscc.backup_recovery.aws_protection.cvsa.cvsa_models import ProtectionS
 from lib.dscc.backup_recovery.aws_protection.cvsa.cvsa_models import ProtectionStoreUtilizationUpdate
 from lib.dscc.backup_recovery.aws_protection.cvsa.cvsa_timeout_manager import Timeout
 from lib.platform.cloud.cloud_vm_manager import CloudVmManager
-from lib.platform.kafka.eventfilters import EventFilter, event_filters_reduce
+from lib.platform.kafka.eventfilters import EventFilter
 from lib.platform.kafka.eventfilters.cvsamanager import (
     event_filter_type,
     event_filter_cloud_region,
@@ -51,8 +51,7 @@ def get_latest_events(
         event_filters.append(event_filter_csp_cam_id(csp_cam_id))
     if cloud_region:
         event_filters.append(event_filter_cloud_region(cloud_region))
-    messages = kafka_manager.read_messages(from_offset=kafka_manager.get_offsets())
-    return event_filters_reduce(event_filters, messages)
+    return kafka_manager.read_messages(from_offset=kafka_manager.get_offsets(), event_filters=event_filters)
 
 
 def get_latest_event(
@@ -320,6 +320,7 @@ def verify_checksum_for_source_and_restored_items(
     user_id: str,
     item_type: str,
     ms_outlook_manager: MSOutlookManager = None,
+    max_workers: int = 1,
 ):
     """This step method will get checksum of the provided items and Verify checksums on both source and restored items.
 
@@ -332,40 +333,33 @@ def verify_checksum_for_source_and_restored_items(
         user_id (str): User identifier of user whose mail box is being used
         item_type (str): item type to get the checksum ex: contacts, events and tasks.
         ms_outlook_managter: MSOutlookManager object for user whose mailbox is to be used, Defaults to None
+        max_workers (int): items hashed at a time, Defaults to 1 until the checksum tool is confirmed thread safe
     """
-    src_chksum = None
-    restored_chksum = None
     if not ms_outlook_manager:
         ms_outlook_manager = context.ms_one_outlook_manager
-    if item_type == "contacts":
-        src_chksum = ms_outlook_manager.get_hash_of_contacts(
-            user_id=user_id, item_ids=source_identifiers, folder_id=source_folder_id
-        )
-        restored_chksum = ms_outlook_manager.get_hash_of_contacts(
-            user_id=user_id, item_ids=restored_identifiers, folder_id=restored_folder_id
-        )
-    elif item_type == "events":
-        src_chksum = ms_outlook_manager.get_hash_of_events(
-            user_id=user_id, item_ids=source_identifiers, folder_id=source_folder_id
-        )
-        restored_chksum = ms_outlook_manager.get_hash_of_events(
-            user_id=user_id, item_ids=restored_identifiers, folder_id=restored_folder_id
-        )
-    elif item_type == "tasks":
-        src_chksum = ms_outlook_manager.get_hash_of_tasks(
-            user_id=user_id, item_ids=source_identifiers, folder_id=source_folder_id
-        )
-        restored_chksum = ms_outlook_manager.get_hash_of_tasks(
-            user_id=user_id, item_ids=restored_identifiers, folder_id=restored_folder_id
-        )
-    else:
+    if item_type not in ("contacts", "events", "tasks"):
         logger.warning("item_type parameter is not provided. please provide one to validate checksum")
-    assert (
-        src_chksum == restored_chksum
-    ), f"Source item chksum is {src_chksum} and restored item chksum is {restored_chksum}, and it does not match"
-    logger.info(
-        f"Source item chksum is {src_chksum} and restored item chksum is {restored_chksum}, it matches as expected"
-    )
+        return
+    # Source digests computed by earlier verifications are reused while the source items are unchanged
+    source_change_keys = ms_outlook_manager.get_item_change_keys(user_id, item_type, source_folder_id)
+    mismatches = []
+    for mismatch in ms_outlook_manager.compare_item_hashes(
+        user_id=user_id,
+        item_type=item_type,
+        source_item_ids=source_identifiers,
+        source_folder_id=source_folder_id,
+        restored_item_ids=restored_identifiers,
+        restored_folder_id=restored_folder_id,
+        max_workers=max_workers,
+        source_change_keys=source_change_keys,
+    ):
+        logger.error(
+            f"Source item {mismatch.source_id} chksum is {mismatch.source_digest} and restored item "
+            f"{mismatch.restored_id} chksum is {mismatch.restored_digest}, and it does not match"
+        )
+        mismatches.append(mismatch)
+    assert not mismatches, f"{len(mismatches)} of {len(source_identifiers)} restored {item_type} chksums do not match"
+    logger.info(f"Source and restored chksums of {len(source_identifiers)} {item_type} match as expected")
 
 
 # TODO
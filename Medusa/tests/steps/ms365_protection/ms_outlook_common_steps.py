@@ -1,3 +1,4 @@
+import copy
 import logging
 import time
 import requests
@@ -408,6 +409,7 @@ def send_multiple_emails_to_specific_folder(
     failed_emails = 0
 
     # Send multiple emails to a specified folder
+    email_messages = []
     for i in range(total_no_of_emails):
         if i % 5 == 0:
             email_message = ms_outlook_manager.construct_email(
@@ -422,14 +424,16 @@ def send_multiple_emails_to_specific_folder(
                 subject=subject,
                 content=content,
             )
-        email_response = ms_outlook_manager.send_email(sender_address=sender_email_id, email_message=email_message)
+        email_messages.append(email_message)
+    # Sent in Graph $batch envelopes, throttled emails are sent again after the Retry-After of their response
+    email_responses = ms_outlook_manager.send_emails(sender_address=sender_email_id, email_messages=email_messages)
+    for email_response in email_responses:
         if email_response.status_code != requests.codes.accepted:
             logger.warn(
                 f"Failed to send an email to the user: {receiver_email_id}, Email response: {email_response.json()}"
             )
             failed_emails += 1
-            time.sleep(5)
-        logger.info(f"Email sent successfully to the recipient: {receiver_email_id}")
+    logger.info(f"Emails sent to the recipient: {receiver_email_id}")
     created_emails = total_no_of_emails - failed_emails
     logger.warn(f"out of '{total_no_of_emails}' emails, {created_emails} emails have been sent successfully")
     logger.info(f"Successfully sent {total_no_of_emails} mails and all of them moved to a folder: {folder_name}")
@@ -737,6 +741,7 @@ def create_multiple_contacts_in_folder(
     )
 
     # Create multiple contacts in a specified folder
+    contacts_details = []
     for i in range(total_no_of_contacts):
         # Construct contact details
         modified_given_name = "{}{}".format(given_name, i + 1)
@@ -749,22 +754,24 @@ def create_multiple_contacts_in_folder(
         contact_details = ms_outlook_manager.construct_contact_details(
             given_name=modified_given_name,
             surname=modified_surname,
-            email_addresses=email_addresses,
+            # Copied, the addresses are updated in place for the next contact
+            email_addresses=copy.deepcopy(email_addresses),
             business_phones=business_phones,
         )
+        contacts_details.append(contact_details)
 
-        # Create contact
-        contact_response = ms_outlook_manager.create_contact(
-            user_email_id,
-            contact_details=contact_details,
-            contacts_folder_id=contacts_folder_id,
-        )
+    # Create contacts in Graph $batch envelopes
+    contact_responses = ms_outlook_manager.create_contacts(
+        user_email_id,
+        contacts_details,
+        contacts_folder_id=contacts_folder_id,
+    )
+    for contact_response in contact_responses:
         if contact_response.status_code != requests.codes.created:
             logger.warn(
                 f"Failed to create an outlook contact for the user: {user_email_id} and task response: {contact_response.json()}"
             )
             failed_contacts += 1
-            time.sleep(5)
         logger.info(
             f"Successfully created an outlook contact for the user: {user_email_id} and task list response: {contact_response.json()}"
         )
@@ -860,6 +867,7 @@ def create_multiple_calendar_events_in_folder(
     )
 
     # Create multiple calendar events in a specified folder
+    events_details = []
     for i in range(total_no_of_events):
         start_time = datetime.utcnow() + timedelta(days=i)
         end_time = start_time + timedelta(hours=2)  # Events last for 2 hours
@@ -869,17 +877,18 @@ def create_multiple_calendar_events_in_folder(
 
         # Construct event details
         event_details = ms_outlook_manager.construct_event_details(event_name=modified_event_name, start=start, end=end)
+        events_details.append(event_details)
 
-        # Create Event
-        event_response = ms_outlook_manager.create_event(
-            user_email_id, event_details, calendar_folder_id=calendar_folder_id
-        )
+    # Create events in Graph $batch envelopes
+    event_responses = ms_outlook_manager.create_events(
+        user_email_id, events_details, calendar_folder_id=calendar_folder_id
+    )
+    for event_response in event_responses:
         if event_response.status_code != requests.codes.created:
             logger.warn(
                 f"Failed to create an outlook event for the user: {user_email_id}, Event response: {event_response.json()}"
             )
             failed_events += 1
-            time.sleep(5)
         logger.info(
             f"Successfully created outlook event for the user: {user_email_id} Event response: {event_response.json()}"
         )
@@ -931,6 +940,7 @@ def create_multiple_tasks_in_to_do_list(
         display_name=display_name,
     )
     # Create multiple tasks in a specified task list
+    tasks_details = []
     for i in range(total_no_of_tasks):
         modified_title = "{}{}".format(title, i + 1)
         # Construct task details
@@ -938,17 +948,18 @@ def create_multiple_tasks_in_to_do_list(
             title=modified_title,
             linked_resources=linked_resources,
         )
+        tasks_details.append(task_details)
 
-        # Create to do task
-        task_response = ms_outlook_manager.create_to_do_task(
-            user_id=user_email_id, task_list_id=task_list_id, task_details=task_details
-        )
+    # Create to do tasks in Graph $batch envelopes
+    task_responses = ms_outlook_manager.create_to_do_tasks(
+        user_id=user_email_id, task_list_id=task_list_id, tasks_details=tasks_details
+    )
+    for task_response in task_responses:
         if task_response.status_code != requests.codes.created:
             logger.warn(
                 f"Failed to create an outlook task for the user: {user_email_id} and task response: {task_response.json()}"
             )
             failed_tasks += 1
-            time.sleep(5)
         logger.info(
             f"Successfully created an outlook to do task for the user: {user_email_id} and task response: {task_response.json()}"
         )
@@ -83,7 +83,7 @@ from tests.steps.vm_protection.vcenter_steps import (
     verify_content_libray_datastore,
     create_tiny_vm_and_get_ip,
 )
-from utils.ip_utils import find_unused_ip_from_range, get_unused_ip_for_network_interface, ping
+from utils.ip_utils import find_unused_ip_from_range, get_unused_ip_for_network_interface, ping, release_ip
 from utils.timeout_manager import TimeoutManager
 from lib.common.enums.aws_regions import AwsStorageLocation
 
@@ -952,6 +952,7 @@ def delete_protection_store_gateway_vm(context: Context, verify=True):
     psgw = atlas.get_catalyst_gateway_by_name(context.psgw_name)
     assert psgw == {}, f"Error: PSGW entity '{context.psgw_name}', still listed"
     logger.info(f"deleted {context.psgw_name} successfully..")
+    release_ip(context.network)
 
 
 def cleanup_all_psgw_vms(context: Context):
@@ -997,6 +998,7 @@ def cleanup_psgw_vm(context: Context):
         )
         if status == "succeeded":
             logger.info(f"successfully deleted psgw vm {context.psgw_name} from vcenter: {context.vcenter_name}")
+            release_ip(context.network)
         else:
             logger.info(f"Delete PSGW VM Task {task_id} : {status}")
     else:
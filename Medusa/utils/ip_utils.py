@@ -1,11 +1,32 @@
+import asyncio
+import atexit
+import json
 import logging
-import subprocess
+import os
 import platform
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from lib.dscc.backup_recovery.vmware_protection.common.custom_error_helper import UnusedIPNotFoundError
 
 logger = logging.getLogger()
 
+# Pings running at the same time when probing a range
+MAX_CONCURRENT_PINGS = 64
+# How long an IP leased by find_unused_ip_from_range stays reserved, when the caller asks for a lease
+DEFAULT_LEASE_SECONDS = 600
+# Shared by the pytest-xdist / locust workers of the host
+IP_LEASE_FILE = os.getenv("IP_LEASE_FILE", os.path.join(tempfile.gettempdir(), "ip_leases.json"))
+
+
+def _ping_command(ip):
+    return f"ping {ip} -n 2 -w 1000".split() if platform.system() == "Windows" else f"ping {ip} -c2 -w2".split()
+
 
 def ping(ip, log_stdout=False):
     """
@@ -14,17 +35,146 @@ def ping(ip, log_stdout=False):
     ip str: IP address
     """
     os = platform.system()
-    ping_command = f"ping {ip} -n 2 -w 1000".split() if platform.system() == "Windows" else f"ping {ip} -c2 -w2".split()
+    ping_command = _ping_command(ip)
     ping_output = subprocess.run(ping_command, stdout=subprocess.PIPE, shell=True if os == "Windows" else False)
     if log_stdout:
         print(f"{ping_output.stdout.decode()}")
     return ping_output.returncode == 0
 
 
-def find_unused_ip_from_range(ip_range, exclude_ip_list=None):
+async def _ping_all(ips, max_concurrency):
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def ping_one(ip):
+        async with semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *_ping_command(ip), stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+            )
+            return await process.wait() == 0
+
+    return await asyncio.gather(*(ping_one(ip) for ip in ips))
+
+
+def probe_ips(ips, max_concurrency=MAX_CONCURRENT_PINGS) -> dict:
+    """
+    Pings all the IPs at once, at most max_concurrency at a time, so a range takes about one ping timeout.
+
+    Returns:
+        dict: ip -> True if it answered
+    """
+    ips = list(ips)
+    if not ips:
+        return {}
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        replies = asyncio.run(_ping_all(ips, max_concurrency))
+    else:
+        # Called from a coroutine: the probe gets its own event loop in a thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            replies = executor.submit(asyncio.run, _ping_all(ips, max_concurrency)).result()
+    return dict(zip(ips, replies))
+
+
+def ips_in_range(ip_range) -> list:
+    """
+    IPs of a range such as 172.21.4.51 - 56, in order. A single IP gives a list of one.
+    """
+    if "-" not in ip_range:
+        return [ip_range.strip()]
+    start_ip, end = ip_range.replace(" ", "").split("-")
+    network, start = (".".join(start_ip.split(".")[0:3]), start_ip.split(".")[-1])
+    return [f"{network}.{host}" for host in range(int(start), int(end) + 1)]
+
+
+def _lease_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{os.getenv('PYTEST_XDIST_WORKER', '')}"
+
+
+class IPLeaseRegistry:
+    """
+    IPs leased by the workers of this host, in a JSON file locked with fcntl while it is read and updated.
+
+    Two workers probing the same range see the same free IPs: the lease makes the second one take the next IP. A worker
+    asking again gets back the IP it already holds. Leases expire after their TTL and the ones of a worker are released
+    when it exits.
+    """
+
+    def __init__(self, path=IP_LEASE_FILE):
+        self.path = path
+        self.owner = _lease_owner()
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock, open(self.path, "a+") as lease_file:
+            try:
+                import fcntl
+            except ImportError:
+                # Windows: leases are only shared by the threads of this process
+                fcntl = None
+            if fcntl:
+                fcntl.lockf(lease_file, fcntl.LOCK_EX)
+            try:
+                lease_file.seek(0)
+                content = lease_file.read()
+                leases = json.loads(content) if content.strip() else {}
+                now = time.time()
+                leases = {ip: lease for ip, lease in leases.items() if lease["expires"] > now}
+                yield leases
+                lease_file.seek(0)
+                lease_file.truncate()
+                json.dump(leases, lease_file)
+                lease_file.flush()
+            finally:
+                if fcntl:
+                    fcntl.lockf(lease_file, fcntl.LOCK_UN)
+
+    def leased(self) -> set:
+        """IPs leased by the other workers"""
+        with self._locked() as leases:
+            return {ip for ip, lease in leases.items() if lease["owner"] != self.owner}
+
+    def reserve(self, candidate_ips, ttl_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Lease a candidate, the first one already leased by this worker if any (its lease is renewed) else the first
+        one nobody holds. Returns None when the others hold them all.
+        """
+        with self._locked() as leases:
+            candidate_ips = [ip for ip in candidate_ips if ip not in leases or leases[ip]["owner"] == self.owner]
+            owned = [ip for ip in candidate_ips if ip in leases]
+            ip = (owned or candidate_ips or [None])[0]
+            if ip:
+                leases[ip] = {"owner": self.owner, "expires": time.time() + ttl_seconds}
+            return ip
+
+    def release(self, ip):
+        """Release the lease of the IP, if this worker holds it"""
+        with self._locked() as leases:
+            if ip in leases and leases[ip]["owner"] == self.owner:
+                del leases[ip]
+
+    def release_all(self):
+        """Release the leases of this worker"""
+        if not os.path.exists(self.path):
+            return
+        with self._locked() as leases:
+            for ip in [ip for ip, lease in leases.items() if lease["owner"] == self.owner]:
+                del leases[ip]
+
+
+ip_lease_registry = IPLeaseRegistry()
+atexit.register(ip_lease_registry.release_all)
+
+
+def find_unused_ip_from_range(ip_range, exclude_ip_list=None, lease_seconds=None):
     """
     Performs ICMP check and returns unused one from the given range otherwise returns None.
 
+    The free IPs of the range are probed concurrently. With lease_seconds the IP returned is leased for that long, so
+    other workers on this host calling find_unused_ip_from_range with a lease get a different one, while this worker
+    gets the same one back as long as it is unused. release_ip() gives it back.
+
     ip_range str: IP range. E.g. 172.21.4.51 - 56
     """
     if "-" not in ip_range:
@@ -33,18 +183,24 @@ def find_unused_ip_from_range(ip_range, exclude_ip_list=None):
     if exclude_ip_list is None:
         exclude_ip_list = []
 
-    start_ip, end = ip_range.replace(" ", "").split("-")
-    network, start = (".".join(start_ip.split(".")[0:3]), start_ip.split(".")[-1])
-    for host in range(int(start), int(end) + 1):
-        ip = f"{network}.{host}"
+    excluded = set(exclude_ip_list) | (ip_lease_registry.leased() if lease_seconds else set())
+    candidates = [ip for ip in ips_in_range(ip_range) if ip not in excluded]
+    replies = probe_ips(candidates)
+    unused_ips = [ip for ip in candidates if not replies[ip]]
+    if not lease_seconds:
+        return unused_ips[0] if unused_ips else None
 
-        if ip in exclude_ip_list:
-            continue
+    # Another worker may have leased one of them while we were probing
+    ip = ip_lease_registry.reserve(unused_ips, ttl_seconds=lease_seconds)
+    if ip:
+        logger.info(f"Leased unused IP {ip} from range {ip_range} for {lease_seconds}s")
+    return ip
 
-        if not ping(ip):
-            return ip
 
-    return None
+def release_ip(ip):
+    """Release the lease find_unused_ip_from_range took on the IP, e.g. once the PSG using it is deleted"""
+    if ip:
+        ip_lease_registry.release(ip)
 
 
 def get_unused_ip_for_network_interface(context, ip_range):
@@ -1,25 +1,224 @@
+"""JSON Schema validation of API responses against the schemas of the schemas/ folder.
+
+The schemas are loaded once, on first use, into a registry keyed by their path under schemas/
+(e.g. "atlantia/inventory_manager/get_backups.json"), and a validator is compiled once per schema. The root "$id" of
+each schema is replaced by its file URI (the generated schemas all use the same placeholder $id), so a "$ref" to
+another file, relative to the referencing file (e.g. "../common/page.json#/definitions/item"), resolves in the registry.
+
+List responses can hold thousands of entries in "items", for those the item schema can be checked on a sample of the
+entries, or on all of them in chunks on a process pool:
+    assert_valid_schema(response, "atlantia/inventory_manager/get_backups.json", items_mode=ItemsMode.SAMPLE)
+"""
+
+import copy
 import json
+import logging
 import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
 from os.path import join
-from jsonschema import validate
+from pathlib import Path
 
+from jsonschema import validators
+from jsonschema.exceptions import best_match
+from referencing import Registry, Resource
+from referencing.jsonschema import DRAFT7
 
-def assert_valid_schema(data, schema_file):
-    """Checks whether the given data matches the schemas"""
+from utils.common_helpers import get_project_root
 
-    schema = _load_json_schema(schema_file)
-    return validate(data, schema)
+logger = logging.getLogger()
 
+SCHEMAS_DIR = get_project_root() / "schemas"
+ITEMS_SAMPLE_SIZE = 100
+ITEMS_CHUNK_SIZE = 500
+MAX_WORKERS = max(1, min(8, os.cpu_count() or 1))
 
-def _load_json_schema(filename: str):
-    """Loads the given schemas file
-    Make sure to run the pytest from ~/k8s-cluster-mgr-tests directory.
-    Example:
-    ➜  k8s-cluster-mgr-tests git:(master) ✗ pytest -svra
-    tests/functional-tests/restapi-tests/test_scripts/test_post_cluster.py
-    """
 
-    schemas = join(os.getcwd() + "/catalyst_gateway_e2e/schemas", filename)
+class ItemsMode(str, Enum):
+    # Every entry of "items" is validated, in this process
+    FULL = "full"
+    # The first, last and ITEMS_SAMPLE_SIZE random entries of "items" are validated
+    SAMPLE = "sample"
+    # Every entry of "items" is validated, ITEMS_CHUNK_SIZE entries per task on a process pool
+    CHUNKS = "chunks"
+
+
+class SchemaRegistry:
+    """Schemas of a folder and their compiled validators, loaded once per process"""
+
+    def __init__(self, schemas_dir: Path = SCHEMAS_DIR):
+        self.schemas_dir = Path(schemas_dir)
+        self._schemas = {}
+        self._registry = None
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def _uri(self, path: Path) -> str:
+        return path.resolve().as_uri()
+
+    def _add(self, name: str, path: Path, registry: Registry) -> Registry:
+        with open(path) as file:
+            schema = json.load(file)
+        schema = {**schema, "$id": self._uri(path)}
+        self._schemas[name] = schema
+        return registry.with_resource(schema["$id"], Resource.from_contents(schema, default_specification=DRAFT7))
+
+    def _load(self):
+        if self._registry is not None:
+            return
+        with self._lock:
+            if self._registry is not None:
+                return
+            registry = Registry()
+            for path in sorted(self.schemas_dir.rglob("*.json")):
+                registry = self._add(path.relative_to(self.schemas_dir).as_posix(), path, registry)
+            self._registry = registry.crawl()
+            logger.debug(f"Loaded {len(self._schemas)} JSON schemas from {self.schemas_dir}")
+
+    def _schema(self, name: str) -> dict:
+        self._load()
+        if name not in self._schemas:
+            # Schema files outside of schemas/, at the location used before the registry
+            path = Path(join(os.getcwd() + "/catalyst_gateway_e2e/schemas", name))
+            with self._lock:
+                if name not in self._schemas:
+                    self._registry = self._add(name, path, self._registry).crawl()
+        return self._schemas[name]
+
+    def _compile(self, key, build_schema):
+        validator = self._validators.get(key)
+        if validator is None:
+            schema = build_schema()
+            validator_class = validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            validator = self._validators[key] = validator_class(schema, registry=self._registry)
+        return validator
+
+    def validator(self, name: str):
+        """Compiled validator of the schema"""
+        return self._compile(name, lambda: self._schema(name))
+
+    def items_schema_path(self, name: str) -> list:
+        """Path of the schema of the "items" entries in the schema, empty if it has none"""
+        items = self._schema(name).get("properties", {}).get("items", {})
+        if isinstance(items, dict) and isinstance(items.get("items"), dict):
+            return ["properties", "items", "items"]
+        return []
+
+    def envelope_validator(self, name: str):
+        """Validator of the schema without the schema of the "items" entries, for the rest of the response"""
+
+        def build_schema():
+            schema = copy.deepcopy(self._schema(name))
+            del schema["properties"]["items"]["items"]
+            return schema
+
+        return self._compile((name, "envelope"), build_schema)
+
+    def items_validator(self, name: str):
+        """Validator of one entry of "items", a reference to it so the "$ref"s in it resolve against the file"""
+
+        def build_schema():
+            schema = self._schema(name)
+            return {"$schema": schema["$schema"], "$ref": f"{schema['$id']}#/{'/'.join(self.items_schema_path(name))}"}
+
+        return self._compile((name, "items"), build_schema)
 
-    with open(schemas) as file:
-        return json.loads(file.read())
+    def validate(self, data, name: str, items_mode: ItemsMode = ItemsMode.FULL):
+        """Raises jsonschema.ValidationError for the most relevant error, like jsonschema.validate"""
+        items_mode = ItemsMode(items_mode)
+        items = data.get("items") if isinstance(data, dict) else None
+        if items_mode == ItemsMode.FULL or not isinstance(items, list) or not self.items_schema_path(name):
+            _raise_best_match(self.validator(name), data)
+            return
+
+        _raise_best_match(self.envelope_validator(name), data)
+        if items_mode == ItemsMode.SAMPLE:
+            _validate_items(self, name, _sample(items))
+        else:
+            _validate_items_in_chunks(self, name, items)
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+            self._validators.clear()
+            self._registry = None
+
+
+def _raise_best_match(validator, data):
+    error = best_match(validator.iter_errors(data))
+    if error is not None:
+        raise error
+
+
+def _sample(items: list) -> list:
+    """(index, entry) of the first, last and ITEMS_SAMPLE_SIZE random entries"""
+    if len(items) <= ITEMS_SAMPLE_SIZE + 2:
+        return list(enumerate(items))
+    indexes = [0, *sorted(random.sample(range(1, len(items) - 1), ITEMS_SAMPLE_SIZE)), len(items) - 1]
+    return [(index, items[index]) for index in indexes]
+
+
+def _validate_items(registry: SchemaRegistry, name: str, indexed_items):
+    validator = registry.items_validator(name)
+    for index, item in indexed_items:
+        error = best_match(validator.iter_errors(item))
+        if error is not None:
+            # Path in the response, as a full validation reports it
+            error.path.extendleft([index, "items"])
+            raise error
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _first_invalid_index(schemas_dir: str, name: str, items: list, offset: int):
+    # Runs in a pool process, which loads its own registry once. ValidationError does not pickle, the index of the
+    # first invalid entry is returned and the error is raised again in the calling process.
+    if schema_registry.schemas_dir != Path(schemas_dir):
+        schema_registry.schemas_dir = Path(schemas_dir)
+        schema_registry.clear()
+    validator = schema_registry.items_validator(name)
+    for index, item in enumerate(items, offset):
+        if not validator.is_valid(item):
+            return index
+    return None
+
+
+def _validate_items_in_chunks(registry: SchemaRegistry, name: str, items: list):
+    global _pool
+    if len(items) <= ITEMS_CHUNK_SIZE:
+        _validate_items(registry, name, enumerate(items))
+        return
+    # Compile in this process first, so schema errors are raised here
+    registry.items_validator(name)
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    futures = [
+        _pool.submit(
+            _first_invalid_index, str(registry.schemas_dir), name, items[offset : offset + ITEMS_CHUNK_SIZE], offset
+        )
+        for offset in range(0, len(items), ITEMS_CHUNK_SIZE)
+    ]
+    for future in futures:
+        index = future.result()
+        if index is not None:
+            _validate_items(registry, name, [(index, items[index])])
+
+
+schema_registry = SchemaRegistry()
+
+
+def assert_valid_schema(data, schema_file, items_mode: ItemsMode = ItemsMode.FULL):
+    """Checks whether the given data matches the schemas
+
+    Args:
+        data: response body
+        schema_file (str): path of the schema under schemas/, e.g. "atlantia/inventory_manager/get_backups.json"
+        items_mode (ItemsMode): how the entries of "items" are validated, all of them by default
+    """
+    return schema_registry.validate(data, schema_file, items_mode)
@@ -0,0 +1,95 @@
+"""
+Compares requests/sec of common.common (shared requests.Session) against common.async_common
+(per-host aiohttp pool) using a local stub server.
+
+Run from the squid_1 folder:
+    python -m benchmarks.async_transport_benchmark --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import async_common, common
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = json.dumps({"items": [], "count": 0, "total": 0}).encode()
+    delay = 0.0
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stub_server(delay: float) -> ThreadingHTTPServer:
+    _StubHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _bench_session(uri: str, total: int, concurrency: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        responses = list(executor.map(lambda _: common.get(uri, "api/v1/stub"), range(total)))
+    elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return total / elapsed
+
+
+def _bench_async(uri: str, total: int, concurrency: int) -> float:
+    async def _worker(count: int):
+        return [await async_common.get(uri, "api/v1/stub") for _ in range(count)]
+
+    async def _run_all():
+        try:
+            share, extra = divmod(total, concurrency)
+            results = await asyncio.gather(*[_worker(share + (i < extra)) for i in range(concurrency)])
+            return [response for result in results for response in result]
+        finally:
+            await async_common.close_sessions()
+
+    start = time.perf_counter()
+    responses = asyncio.run(_run_all())
+    elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session vs asyncio transport throughput")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.01, help="stub server latency in seconds")
+    args = parser.parse_args()
+
+    server = _start_stub_server(args.delay)
+    uri = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        session_rps = _bench_session(uri, args.requests, args.concurrency)
+        async_rps = _bench_async(uri, args.requests, args.concurrency)
+    finally:
+        server.shutdown()
+
+    print(f"requests.Session : {session_rps:10.1f} req/s")
+    print(f"async_common     : {async_rps:10.1f} req/s")
+    print(f"speedup          : {async_rps / session_rps:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
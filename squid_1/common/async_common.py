@@ -0,0 +1,213 @@
+"""
+asyncio counterpart of common.common.
+
+The helpers here keep the signatures of common.get/post/put/patch/delete and return
+requests.Response objects, so is_retry_needed / raise_my_exception and all the existing
+response handling work unchanged. Requests go through a per-host aiohttp connection pool
+with keep-alive, and retries use jittered exponential backoff instead of a fixed sleep.
+
+Typical use from an on_test_start listener to fan out setup calls:
+
+    responses = async_common.run(
+        async_common.get(uri, path_1, headers=headers),
+        async_common.get(uri, path_2, headers=headers),
+    )
+"""
+
+import asyncio
+import logging
+import os
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from tenacity import retry, stop_after_attempt, wait_random_exponential
+
+from common.common import (
+    _log_request,
+    _log_response,
+    delete_payload,
+    is_retry_needed,
+    raise_my_exception,
+    timeout_in_millis,
+)
+
+logger = logging.getLogger()
+
+# Max open connections per host, shared by every coroutine running on the same event loop
+pool_size_per_host = int(os.environ.get("async_pool_size_per_host", 50))
+keepalive_timeout = int(os.environ.get("async_keepalive_timeout", 30))
+backoff_multiplier = 1
+backoff_max = 30
+
+_sessions: dict = {}
+
+
+def _get_session(url: str) -> aiohttp.ClientSession:
+    """Returns the pooled session for the host of the url, creating it on first use.
+
+    aiohttp sessions are bound to the event loop they were created on, so the pool is keyed on both.
+    """
+    loop = asyncio.get_running_loop()
+    parts = urlsplit(url)
+    key = (id(loop), parts.scheme, parts.netloc)
+    session = _sessions.get(key)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=pool_size_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ssl=False,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=timeout_in_millis),
+        )
+        _sessions[key] = session
+    return session
+
+
+async def close_sessions():
+    """Closes the pooled sessions that belong to the running event loop"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [key for key in _sessions if key[0] == loop_id]:
+        await _sessions.pop(key).close()
+
+
+def run(*coroutines):
+    """Runs the given request coroutines concurrently on a new event loop and returns their results in order.
+
+    Exceptions are returned in place of the result so that one failing call does not hide the others.
+    """
+
+    async def _run_all():
+        try:
+            return await asyncio.gather(*coroutines, return_exceptions=True)
+        finally:
+            await close_sessions()
+
+    return asyncio.run(_run_all())
+
+
+def _to_response(method: str, url: str, status: int, headers, body: bytes, final_url: str) -> Response:
+    """Builds a requests.Response so callers and the retry predicates see the same type as common.common"""
+    response = Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.url = final_url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.request = requests.Request(method=method, url=url).prepare()
+    return response
+
+
+async def _send(method: str, url: str, headers: dict, verify: bool = False, **kwargs) -> Response:
+    session = _get_session(url)
+    try:
+        async with session.request(method, url, headers=headers, ssl=verify, **kwargs) as resp:
+            body = await resp.read()
+            return _to_response(method, url, resp.status, resp.headers, body, str(resp.url))
+    except aiohttp.ClientProxyConnectionError as e:
+        raise requests.exceptions.ProxyError(e)
+    except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+        raise requests.exceptions.ReadTimeout(e)
+    except aiohttp.ClientConnectionError as e:
+        raise requests.exceptions.ConnectionError(e)
+
+
+def _body_kwargs(json_data, just_json) -> dict:
+    """Mirrors how requests treats empty data/json arguments"""
+    if json_data:
+        return {"data": json_data}
+    if just_json:
+        return {"json": just_json}
+    return {}
+
+
+def _params(params):
+    return params if params else None
+
+
+@retry(
+    retry=is_retry_needed,
+    stop=stop_after_attempt(10),
+    wait=wait_random_exponential(multiplier=backoff_multiplier, max=backoff_max),
+    retry_error_callback=raise_my_exception,
+)
+async def get(uri, path, params="", headers={}, verify=False):
+    """Send a GET request"""
+    _log_request("GET", uri, path, headers)
+    response = await _send("GET", f"{uri}/{path}", headers, verify, params=_params(params))
+    _log_response(response)
+    return response
+
+
+@retry(
+    retry=is_retry_needed,
+    stop=stop_after_attempt(10),
+    wait=wait_random_exponential(multiplier=backoff_multiplier, max=backoff_max),
+    retry_error_callback=raise_my_exception,
+)
+async def post(uri, path, json_data="", params="", just_json="", headers={}, verify=False, auth=None):
+    """Send a POST request"""
+    _log_request("POST", uri, path, headers, json_data)
+    if auth:
+        auth = aiohttp.BasicAuth(*auth)
+    response = await _send(
+        "POST",
+        f"{uri}/{path}",
+        headers,
+        verify,
+        params=_params(params),
+        auth=auth,
+        **_body_kwargs(json_data, just_json),
+    )
+    _log_response(response)
+    return response
+
+
+@retry(
+    retry=is_retry_needed,
+    stop=stop_after_attempt(10),
+    wait=wait_random_exponential(multiplier=backoff_multiplier, max=backoff_max),
+    retry_error_callback=raise_my_exception,
+)
+async def put(uri, path, json_data="", params="", just_json="", headers={}, verify=False):
+    """Send a PUT request"""
+    _log_request("PUT", uri, path, headers, json_data)
+    response = await _send(
+        "PUT", f"{uri}/{path}", headers, verify, params=_params(params), **_body_kwargs(json_data, just_json)
+    )
+    _log_response(response)
+    return response
+
+
+@retry(
+    retry=is_retry_needed,
+    stop=stop_after_attempt(10),
+    wait=wait_random_exponential(multiplier=backoff_multiplier, max=backoff_max),
+    retry_error_callback=raise_my_exception,
+)
+async def patch(uri, path, json_data="", params="", just_json="", headers={}, verify=False):
+    """Send a PATCH request"""
+    _log_request("PATCH", uri, path, headers, json_data)
+    response = await _send(
+        "PATCH", f"{uri}/{path}", headers, verify, params=_params(params), **_body_kwargs(json_data, just_json)
+    )
+    _log_response(response)
+    return response
+
+
+@retry(
+    retry=is_retry_needed,
+    stop=stop_after_attempt(10),
+    wait=wait_random_exponential(multiplier=backoff_multiplier, max=backoff_max),
+    retry_error_callback=raise_my_exception,
+)
+async def delete(uri, path, headers={}, verify=False):
+    _log_request("DELETE", uri, path, headers)
+    response = await _send("DELETE", f"{uri}/{path}", headers, verify, data=delete_payload or None)
+    _log_response(response)
+    return response
@@ -1,12 +1,10 @@
 import logging
 import os
-import pickle
 
-from configparser import ConfigParser, ExtendedInterpolation
 from threading import Lock
 from common.enums.provided_users import ProvidedUser
 from utils.common_helpers import get_project_root
-from utils.ip_utils import find_unused_ip_from_range
+from utils.ip_utils import DEFAULT_LEASE_SECONDS, find_unused_ip_from_range
 import yaml
 from yaml.loader import SafeLoader
 
@@ -32,25 +30,87 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class FrozenConfigError(TypeError):
+    def __init__(self):
+        self.message = (
+            "ConfigManager.get_config() returns a shared read-only config, "
+            "use ConfigManager.get_config().mutable_copy() to get a config you can modify"
+        )
+        super().__init__(self.message)
+
+
+def _raise_frozen(*args, **kwargs):
+    raise FrozenConfigError()
+
+
+class FrozenDict(dict):
+    """Read-only dict of the YAML config, shared by every get_config() caller instead of a copy.
+
+    It is still a dict (json.dumps, isinstance and .get() work), its nested dicts and lists are frozen too.
+    """
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _raise_frozen
+    __ior__ = _raise_frozen
+
+    def __reduce__(self):
+        # pickle / copy.deepcopy rebuild a dict item by item, which the frozen __setitem__ refuses
+        return self.__class__, (dict(self),)
+
+    def mutable_copy(self) -> dict:
+        return _thaw(self)
+
+
+class FrozenList(list):
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _raise_frozen
+    append = clear = extend = insert = pop = remove = reverse = sort = _raise_frozen
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def mutable_copy(self) -> list:
+        return _thaw(self)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw(item) for item in value]
+    return value
+
+
 class ConfigManager(metaclass=Singleton):
 
     def __init__(self):
-        self.config = ConfigParser(interpolation=ExtendedInterpolation())
         self.config_path = os.environ.get("CONFIG_FILE_PATH")
-        with open(f"{self.config_path}") as f:
-            self.config = yaml.load(f, Loader=SafeLoader)
+        self._lock = Lock()
+        self._load_config()
 
-    def _deep_copy(self) -> ConfigParser:
-        """deep copy config"""
-        temp = pickle.dumps(self.config)
-        new_config = pickle.loads(temp)
-        return new_config
+    def _load_config(self) -> None:
+        self._mtime = os.stat(self.config_path).st_mtime_ns
+        with open(f"{self.config_path}") as f:
+            self.config = _freeze(yaml.load(f, Loader=SafeLoader))
 
     @classmethod
-    def get_config(cls) -> ConfigParser:
+    def get_config(cls) -> FrozenDict:
+        """Shared read-only config, use get_config().mutable_copy() to modify it.
+
+        The YAML file is parsed again only when its mtime changed, configs handed out before keep their values.
+        """
         instance = cls()
-        config = instance._deep_copy()
-        return config
+        if os.stat(instance.config_path).st_mtime_ns != instance._mtime:
+            with instance._lock:
+                if os.stat(instance.config_path).st_mtime_ns != instance._mtime:
+                    instance._load_config()
+        return instance.config
 
     @classmethod
     def write_and_save_config(cls) -> None:
@@ -104,13 +164,15 @@ class ConfigManager(metaclass=Singleton):
             key = f"TEST-DATA-FOR-{user.value}"
             instance = cls()
             user_data = instance.config[key]
-            unused_ip = find_unused_ip_from_range(user_data["network"])
+            unused_ip = find_unused_ip_from_range(user_data["network"], lease_seconds=DEFAULT_LEASE_SECONDS)
             if not unused_ip:
                 raise Exception(f"Failed to find unused IP from '{user_data['network']}'")
             config.set(key, "network", unused_ip)
             config.set(key, "network_ip_range", user_data["network"])
             logger.info(f"Updated {key}.network = {unused_ip}")
-            unused_ip = find_unused_ip_from_range(user_data["secondary_psgw_ip"], exclude_ip_list=[unused_ip])
+            unused_ip = find_unused_ip_from_range(
+                user_data["secondary_psgw_ip"], exclude_ip_list=[unused_ip], lease_seconds=DEFAULT_LEASE_SECONDS
+            )
             if not unused_ip:
                 raise Exception(f"Failed to find unused IP from '{user_data['secondary_psgw_ip']}'")
             config.set(key, "secondary_psgw_ip", unused_ip)
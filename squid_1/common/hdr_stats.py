@@ -0,0 +1,269 @@
+"""Per endpoint HDR latency histograms for locust runs.
+
+Import this module in the locustfile (like locust_plugins) to record every request event, custom_locust_response
+workflow timings included, in an HDR histogram per (request type, name). Workers send the histograms recorded since
+their last report to the master with each stats report, so the master holds the merged histograms of the run.
+
+The master (or the local runner) exports a snapshot of the histograms recorded in each interval:
+    --hdr-export-dir <dir>   appends JSON lines to <dir>/hdr_histograms.jsonl
+    --hdr-timescale          inserts rows in the hdr_histogram table of the locust_plugins timescale DB
+    --hdr-interval <s>       export interval, default 30
+
+Each snapshot holds the compressed, base64 encoded histogram, so exact percentiles of any time range are computed by
+decoding and adding the snapshots (HdrHistogram.decode_and_add) instead of scanning every request row.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import gevent
+from hdrh.histogram import HdrHistogram
+from locust import events
+from locust.runners import WorkerRunner
+
+logger = logging.getLogger(__name__)
+
+# Response times are recorded in microseconds, from 1 us to 1 hour with 3 significant digits
+LOWEST_TRACKABLE_US = 1
+HIGHEST_TRACKABLE_US = 3600 * 1000 * 1000
+SIGNIFICANT_FIGURES = 3
+PERCENTILES = [50, 90, 95, 99, 99.9, 99.99, 100]
+REPORT_KEY = "hdr_histograms"
+EXPORT_FILE_NAME = "hdr_histograms.jsonl"
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS hdr_histogram (
+    time TIMESTAMPTZ NOT NULL,
+    testplan TEXT NOT NULL,
+    request_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    count BIGINT NOT NULL,
+    p50_ms DOUBLE PRECISION,
+    p99_ms DOUBLE PRECISION,
+    p999_ms DOUBLE PRECISION,
+    max_ms DOUBLE PRECISION,
+    histogram TEXT NOT NULL
+)
+"""
+_INSERT_ROW = """
+INSERT INTO hdr_histogram (time, testplan, request_type, name, count, p50_ms, p99_ms, p999_ms, max_ms, histogram)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def new_histogram() -> HdrHistogram:
+    return HdrHistogram(LOWEST_TRACKABLE_US, HIGHEST_TRACKABLE_US, SIGNIFICANT_FIGURES)
+
+
+def _key(request_type, name):
+    return f"{request_type}\t{name}"
+
+
+def _split_key(key):
+    return key.split("\t", 1)
+
+
+class HdrStats:
+    """HDR histograms per (request type, name): the whole run and the part not exported / reported yet"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.interval_histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, request_type, name, response_time_ms):
+        value = min(max(int(round(response_time_ms * 1000)), LOWEST_TRACKABLE_US), HIGHEST_TRACKABLE_US)
+        key = _key(request_type, name)
+        with self._lock:
+            for histograms in (self.histograms, self.interval_histograms):
+                if key not in histograms:
+                    histograms[key] = new_histogram()
+                histograms[key].record_value(value)
+
+    def take_interval(self) -> dict:
+        """Histograms recorded since the previous call"""
+        with self._lock:
+            interval_histograms, self.interval_histograms = self.interval_histograms, {}
+        return interval_histograms
+
+    def encode_interval(self) -> dict:
+        return {key: histogram.encode() for key, histogram in self.take_interval().items()}
+
+    def merge_encoded(self, encoded_histograms: dict):
+        """Add histograms encoded by another process (a worker) to this one"""
+        with self._lock:
+            for key, encoded in encoded_histograms.items():
+                for histograms in (self.histograms, self.interval_histograms):
+                    if key not in histograms:
+                        histograms[key] = new_histogram()
+                    histograms[key].decode_and_add(encoded)
+
+    def percentiles_ms(self, key, percentiles=PERCENTILES) -> dict:
+        histogram = self.histograms[key]
+        return {percentile: histogram.get_value_at_percentile(percentile) / 1000 for percentile in percentiles}
+
+    def get_percentile_summary(self, percentiles=PERCENTILES) -> str:
+        """Text table of the exact percentiles (ms) per endpoint, like locust_stats.get_percentile_stats"""
+        header = f"{'Type':<8} {'Name':<60} {'# reqs':>8} " + " ".join(f"{f'p{p}':>9}" for p in percentiles)
+        lines = ["", "Response time percentiles (HDR histogram)", header, "-" * len(header)]
+        with self._lock:
+            keys = sorted(self.histograms)
+            for key in keys:
+                request_type, name = _split_key(key)
+                values = self.percentiles_ms(key, percentiles)
+                count = self.histograms[key].get_total_count()
+                lines.append(
+                    f"{request_type:<8} {name[:60]:<60} {count:>8} "
+                    + " ".join(f"{values[p]:>9.2f}" for p in percentiles)
+                )
+        return "\n".join(lines)
+
+
+class _Exporter:
+    def __init__(self, environment, stats: HdrStats):
+        options = environment.parsed_options
+        self.stats = stats
+        self.export_dir = getattr(options, "hdr_export_dir", None)
+        self.timescale = getattr(options, "hdr_timescale", False)
+        self.interval = getattr(options, "hdr_interval", 30)
+        self.testplan = getattr(options, "override_plan_name", None) or getattr(options, "locustfile", "")
+        self._connection = None
+        self._greenlet = None
+
+    @property
+    def enabled(self):
+        return bool(self.export_dir or self.timescale)
+
+    def start(self):
+        if self.enabled and self._greenlet is None:
+            self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill()
+            self._greenlet = None
+        if self.enabled:
+            self.export()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _run(self):
+        while True:
+            gevent.sleep(self.interval)
+            try:
+                self.export()
+            except Exception as e:
+                logger.error(f"HDR histogram export failed: {e}")
+
+    def _rows(self):
+        now = datetime.now(timezone.utc)
+        for key, histogram in sorted(self.stats.take_interval().items()):
+            request_type, name = _split_key(key)
+            yield {
+                "time": now,
+                "testplan": self.testplan,
+                "request_type": request_type,
+                "name": name,
+                "count": histogram.get_total_count(),
+                "p50_ms": histogram.get_value_at_percentile(50) / 1000,
+                "p99_ms": histogram.get_value_at_percentile(99) / 1000,
+                "p999_ms": histogram.get_value_at_percentile(99.9) / 1000,
+                "max_ms": histogram.get_max_value() / 1000,
+                "histogram": histogram.encode().decode("ascii"),
+            }
+
+    def export(self):
+        rows = list(self._rows())
+        if not rows:
+            return
+        if self.export_dir:
+            os.makedirs(self.export_dir, exist_ok=True)
+            with open(os.path.join(self.export_dir, EXPORT_FILE_NAME), "a") as f:
+                for row in rows:
+                    f.write(json.dumps({**row, "time": row["time"].isoformat()}) + "\n")
+        if self.timescale:
+            self._write_timescale(rows)
+
+    def _write_timescale(self, rows):
+        # Connection settings come from the PG* environment variables, as for the locust_plugins timescale listener
+        import psycopg2
+
+        if self._connection is None:
+            self._connection = psycopg2.connect(dbname=os.getenv("PGDATABASE", "postgres"))
+            with self._connection, self._connection.cursor() as cursor:
+                cursor.execute(_CREATE_TABLE)
+        with self._connection, self._connection.cursor() as cursor:
+            cursor.executemany(
+                _INSERT_ROW,
+                [
+                    (
+                        row["time"],
+                        row["testplan"],
+                        row["request_type"],
+                        row["name"],
+                        row["count"],
+                        row["p50_ms"],
+                        row["p99_ms"],
+                        row["p999_ms"],
+                        row["max_ms"],
+                        row["histogram"],
+                    )
+                    for row in rows
+                ],
+            )
+
+
+hdr_stats = HdrStats()
+_exporter = None
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser, **kwargs):
+    group = parser.add_argument_group("hdr_stats", "HDR latency histogram export")
+    group.add_argument("--hdr-export-dir", type=str, default=None, help="Directory for the HDR histogram snapshots")
+    group.add_argument("--hdr-timescale", action="store_true", default=False, help="Export HDR snapshots to timescale")
+    group.add_argument("--hdr-interval", type=int, default=30, help="Seconds between two HDR histogram snapshots")
+
+
+@events.request.add_listener
+def _record_request(request_type, name, response_time, **kwargs):
+    if response_time is not None:
+        hdr_stats.record(request_type, name, response_time)
+
+
+@events.report_to_master.add_listener
+def _report_to_master(client_id, data, **kwargs):
+    data[REPORT_KEY] = hdr_stats.encode_interval()
+
+
+@events.worker_report.add_listener
+def _worker_report(client_id, data, **kwargs):
+    hdr_stats.merge_encoded(data.get(REPORT_KEY, {}))
+
+
+@events.test_start.add_listener
+def _start_export(environment, **kwargs):
+    global _exporter
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    if _exporter is None:
+        _exporter = _Exporter(environment, hdr_stats)
+    _exporter.start()
+
+
+@events.test_stop.add_listener
+def _stop_export(environment, **kwargs):
+    if _exporter is not None and not isinstance(environment.runner, WorkerRunner):
+        _exporter.stop()
+
+
+@events.quitting.add_listener
+def _final_export(environment, **kwargs):
+    # Worker reports sent while the master was stopping are merged after test_stop
+    if _exporter is not None and not isinstance(environment.runner, WorkerRunner):
+        _exporter.stop()
+        logger.info(hdr_stats.get_percentile_summary())
@@ -3,7 +3,9 @@ import datetime
 from email.utils import formatdate
 import logging
 import os
+import threading
 import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from urllib.parse import urlparse
 from requests import codes, Response
 import requests
@@ -13,6 +15,7 @@ from enum import Enum
 from tenacity import retry, stop_after_attempt, wait_fixed
 from tests.aws.config import ConfigPaths, Paths
 from common import common
+from common.task_watcher import get_task_watcher
 from lib.dscc.tasks.payload.task import TaskList
 from common.users.user import ApiHeader
 from common.users.user_model import APIClientCredential
@@ -23,6 +26,10 @@ from common.users.user import User
 
 logger = logging.getLogger(__name__)
 
+# Header used by wait_for_task when the caller does not pass one
+_default_api_header = None
+_default_api_header_lock = threading.Lock()
+
 
 class TaskStatus(Enum):
     success = "SUCCEEDED"
@@ -199,6 +206,14 @@ def squid_is_retry_needed(retry_state):
     return needs_retry
 
 
+def _get_default_api_header():
+    global _default_api_header
+    with _default_api_header_lock:
+        if _default_api_header is None:
+            _default_api_header = gen_token()
+        return _default_api_header
+
+
 @retry(
     retry=squid_is_retry_needed,
     stop=stop_after_attempt(10),
@@ -208,9 +223,14 @@ def squid_is_retry_needed(retry_state):
 def wait_for_task(task_uri, timeout_minutes=10, sleep_seconds=10, api_header: ApiHeader = None):
     """Wait for tasks to reach Success state
 
+    The task is watched by the TaskWatcher shared by all the users of the process, which polls the outstanding tasks
+    with one GET /api/v1/tasks per interval instead of one GET per task and user.
+
     Args:
         task_uri (_type_): Task url fetched from post requests
-        max_retry (int, optional): Wait for ten seconds then retry. Max_retry by default is 30 which is 300seconds (5 minutes). Defaults to 30.
+        timeout_minutes (int, optional): Time to wait for the task. Defaults to 10.
+        sleep_seconds (int, optional): Longest interval between two polls of the task. Defaults to 10.
+        api_header (ApiHeader, optional): Header of the user. Defaults to a token generated once per process.
 
     Raises:
         Exception: exception if failed or timeout
@@ -219,50 +239,28 @@ def wait_for_task(task_uri, timeout_minutes=10, sleep_seconds=10, api_header: Ap
         enum: Task status
     """
     if not api_header:
-        api_header = gen_token()
-    timeout = (timeout_minutes * 60) / sleep_seconds
-    url = f"{get_locust_host()}{task_uri}"
-    start_perf_counter = time.perf_counter()
-    while timeout:
-        response = requests.request("GET", url, headers=api_header.authentication_header)
-        if (
-            response.status_code == requests.codes.internal_server_error
-            or response.status_code == requests.codes.service_unavailable
-        ):
-            return response
-
-        if response.status_code == codes.ok:
-            # check whether state is "SUCCEEDED or FAILED"
-
-            task_response = response.json()
-            if task_response["state"] == TaskStatus.success.value:
-                time_taken = (time.perf_counter() - start_perf_counter) * 1000
-                logging.info(f"Wait for task completion time: {time_taken}ms")
-                return TaskStatus.success
-            elif task_response["state"] == TaskStatus.failure.value:
-                logger.info(f"Task Response {task_response}")
-                return TaskStatus.failure
-            else:
-                logging.debug(f"Task status is still in {task_response['state']} state")
-                time.sleep(10)
-                timeout -= 1
-        elif response.status_code == codes.forbidden:
-            logging.info("Task state is forbidden due to proxy server issue.Wait for 10 seconds & retry")
-            time.sleep(10)
-            retry_count += 1
-        else:
-            logging.info(response.text)
-            raise Exception(
-                f"Failed to get task status , StatusCode: {str(response.status_code)} , Response is {response.text}"
-            )
-
-    logging.error(
-        f"Task with id {task_uri}  did not succeeded/failed even after {timeout_minutes} minutes.Task status is{task_response['state']}"
-    )
-    return TaskStatus.timeout
+        api_header = _get_default_api_header()
+    watcher = get_task_watcher(f"{get_locust_host()}/{Paths.TASK_API}")
+    future = watcher.watch(task_uri, api_header, sleep_seconds=sleep_seconds)
+    try:
+        result = future.result(timeout=timeout_minutes * 60)
+    except FutureTimeoutError:
+        last_state = watcher.last_state(task_uri)
+        watcher.unwatch(task_uri, future)
+        logging.error(
+            f"Task with id {task_uri} did not succeed/fail even after {timeout_minutes} minutes. "
+            f"Task status is {last_state}"
+        )
+        return TaskStatus.timeout
+
+    if result.state == TaskStatus.success.value:
+        logging.info(f"Wait for task completion time: {result.completion_seconds * 1000}ms")
+        return TaskStatus.success
+    logger.info(f"Task Response {result.task}")
+    return TaskStatus.failure
 
 
-def get_error_message_from_task_response(task_uri,api_header: ApiHeader = None):
+def get_error_message_from_task_response(task_uri, api_header: ApiHeader = None):
     """Get task response using task uri
 
     Args:
@@ -279,8 +277,8 @@ def get_error_message_from_task_response(task_uri,api_header: ApiHeader = None):
             logger.info(f"Task Response {task_response}")
             err_message = task_response["error"]["error"]
             return err_message
-    
-        
+
+
 def wait_for_task_completion_within_time_interval(task_name, customer_id, time_offset_minutes=5, timeout_minutes=10):
     """This function will wait for tasks filtered by given task name and time_offset_minutes within specified time
     Args:
@@ -0,0 +1,228 @@
+"""Shared watcher for the tasks locust users wait on.
+
+Instead of every user polling GET {task_uri} on its own, wait_for_task() registers the task here. A single background
+thread (a greenlet under locust's monkey patching) queries the outstanding tasks in batches with one filtered
+GET /api/v1/tasks per credential and resolves a Future for each task when it reaches a final state.
+
+The poll interval starts at min_interval and doubles while no task changes state, up to the smallest sleep_seconds
+of the outstanding waiters. A new task or a state change resets it.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote
+
+import requests
+from requests import codes
+
+logger = logging.getLogger(__name__)
+
+# Final task states
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+# Task ids per GET /api/v1/tasks query, keeps the filter within URL length limits
+BATCH_SIZE = 50
+
+
+@dataclass
+class TaskResult:
+    """State of a finished task.
+
+    completion_seconds is the time from the start of the wait to the task's endedAt, so it does not include the
+    delay until the next poll. It falls back to the time the state change was observed when endedAt is missing.
+    """
+
+    state: str
+    task: dict
+    completion_seconds: float
+    observed_seconds: float
+
+
+@dataclass(eq=False)
+class _Waiter:
+    task_id: str
+    api_header: object
+    sleep_seconds: float
+    future: Future = field(default_factory=Future)
+    start_perf_counter: float = field(default_factory=time.perf_counter)
+    start_time: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    last_state: Optional[str] = None
+
+
+def _credential_key(api_header):
+    # Users sharing a credential see the same tasks, so their tasks are queried together
+    if api_header.static_token:
+        return ("static", api_header.static_token)
+    return ("client", api_header.user.api_client_id)
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def task_id_from_uri(task_uri):
+    """Task id from a task uri such as /api/v1/tasks/<id>"""
+    return task_uri.rstrip("/").rsplit("/", 1)[-1]
+
+
+class TaskWatcher:
+    def __init__(self, tasks_url, min_interval=1.0, batch_size=BATCH_SIZE):
+        self.tasks_url = tasks_url
+        self.min_interval = min_interval
+        self.batch_size = batch_size
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.polls = 0
+
+    def watch(self, task_uri, api_header, sleep_seconds=10) -> Future:
+        """Start watching the task.
+
+        Returns:
+            Future: resolves to a TaskResult when the task succeeds or fails, or to an exception for an unexpected
+                status code. 500/503 from the tasks API are retried, with the poll interval backing off.
+        """
+        waiter = _Waiter(task_id=task_id_from_uri(task_uri), api_header=api_header, sleep_seconds=sleep_seconds)
+        with self._lock:
+            self._waiters.setdefault(waiter.task_id, []).append(waiter)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="task-watcher", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return waiter.future
+
+    def unwatch(self, task_uri, future: Future):
+        """Stop watching the task for the waiter owning the future (on timeout)"""
+        task_id = task_id_from_uri(task_uri)
+        with self._lock:
+            waiters = [waiter for waiter in self._waiters.get(task_id, []) if waiter.future is not future]
+            if waiters:
+                self._waiters[task_id] = waiters
+            else:
+                self._waiters.pop(task_id, None)
+
+    def last_state(self, task_uri):
+        with self._lock:
+            waiters = self._waiters.get(task_id_from_uri(task_uri), [])
+            return waiters[0].last_state if waiters else None
+
+    def _run(self):
+        interval = self.min_interval
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._thread = None
+                    return
+                groups = {}
+                for task_id, waiters in self._waiters.items():
+                    groups.setdefault(_credential_key(waiters[0].api_header), []).append(task_id)
+                max_interval = min(waiter.sleep_seconds for waiters in self._waiters.values() for waiter in waiters)
+
+            self._wakeup.clear()
+            changed = False
+            for task_ids in groups.values():
+                for index in range(0, len(task_ids), self.batch_size):
+                    changed |= self._poll(task_ids[index : index + self.batch_size])
+
+            interval = self.min_interval if changed else min(interval * 2, max(max_interval, self.min_interval))
+            # A new waiter cuts the wait short so its first state is fetched right away
+            if self._wakeup.wait(interval):
+                interval = self.min_interval
+
+    def _poll(self, task_ids):
+        """Query the tasks and resolve the waiters of the finished ones. Returns True if any task changed state."""
+        with self._lock:
+            waiters = {task_id: list(self._waiters.get(task_id, [])) for task_id in task_ids}
+        waiters = {task_id: task_waiters for task_id, task_waiters in waiters.items() if task_waiters}
+        if not waiters:
+            return False
+        api_header = next(iter(waiters.values()))[0].api_header
+
+        id_filter = ",".join(f"'{task_id}'" for task_id in waiters)
+        url = f"{self.tasks_url}?offset=0&limit={len(waiters)}&filter={quote(f'id in ({id_filter})')}"
+        try:
+            response = requests.request("GET", url, headers=api_header.authentication_header)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Task watcher query failed, retrying: {e}")
+            return False
+        self.polls += 1
+        observed_at = time.perf_counter()
+
+        if response.status_code in (codes.internal_server_error, codes.service_unavailable):
+            # Transient tasks service error (SC-8356), the waiters stay pending and the poll interval backs off
+            logger.warning(f"Tasks service returned {response.status_code}, retrying")
+            return False
+        if response.status_code == codes.forbidden:
+            logger.info("Task state is forbidden due to proxy server issue. Retrying")
+            return False
+        if response.status_code != codes.ok:
+            error = Exception(
+                f"Failed to get task status , StatusCode: {str(response.status_code)} , Response is {response.text}"
+            )
+            self._resolve(waiters, lambda waiter: waiter.future.set_exception(error))
+            return True
+
+        changed = False
+        for task in response.json().get("items", []):
+            task_waiters = waiters.get(task.get("id"))
+            if not task_waiters:
+                continue
+            state = task.get("state")
+            if state != task_waiters[0].last_state:
+                changed = True
+            for waiter in task_waiters:
+                waiter.last_state = state
+            if state in (SUCCEEDED, FAILED):
+                ended_at = _parse_time(task.get("endedAt") or task.get("updatedAt"))
+                self._resolve(
+                    {task["id"]: task_waiters},
+                    lambda waiter: waiter.future.set_result(self._result(waiter, state, task, ended_at, observed_at)),
+                )
+        return changed
+
+    @staticmethod
+    def _result(waiter: _Waiter, state, task, ended_at, observed_at):
+        observed_seconds = observed_at - waiter.start_perf_counter
+        completion_seconds = observed_seconds
+        if ended_at is not None:
+            # Clamped to the observed time, in case of a clock skew with the server
+            completion_seconds = min(max((ended_at - waiter.start_time).total_seconds(), 0.0), observed_seconds)
+        return TaskResult(
+            state=state, task=task, completion_seconds=completion_seconds, observed_seconds=observed_seconds
+        )
+
+    def _resolve(self, waiters, set_outcome):
+        with self._lock:
+            for task_id, task_waiters in waiters.items():
+                remaining = [waiter for waiter in self._waiters.get(task_id, []) if waiter not in task_waiters]
+                if remaining:
+                    self._waiters[task_id] = remaining
+                else:
+                    self._waiters.pop(task_id, None)
+        for task_waiters in waiters.values():
+            for waiter in task_waiters:
+                if not waiter.future.done():
+                    set_outcome(waiter)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_task_watcher(tasks_url) -> TaskWatcher:
+    """TaskWatcher shared by all the users of this process"""
+    with _watchers_lock:
+        if tasks_url not in _watchers:
+            _watchers[tasks_url] = TaskWatcher(tasks_url)
+        return _watchers[tasks_url]